@@ -0,0 +1,104 @@
+# /backend/app/analyze_tle_accuracy.py
+
+"""
+Measures TLE prediction error over the whole of satellite_tle_history:
+each element set propagated to the next one's epoch, summarized per object
+and per orbit class (see services/tle_accuracy.py). History is streamed
+through a server-side cursor in NORAD-complete chunks, so memory stays
+flat however many rows the table holds.
+"""
+
+import time
+from datetime import datetime, timezone
+from psycopg2.extras import execute_values
+from database import get_db_connection  # ✅ Use get_db_connection()
+from services.tle_accuracy import (
+    ACCURACY_CHUNK_ROWS,
+    ClassAccumulator,
+    iter_norad_chunks,
+    object_stats,
+    pair_errors,
+)
+
+
+def stream_history(conn):
+    """Yields history rows ordered by (norad_number, epoch), ACCURACY_CHUNK_ROWS at a time."""
+    cursor = conn.cursor(name="tle_history_stream")  # server-side: rows arrive in batches
+    cursor.itersize = ACCURACY_CHUNK_ROWS
+    cursor.execute("""
+        SELECT norad_number, tle_line1, tle_line2
+        FROM satellite_tle_history
+        WHERE tle_line1 IS NOT NULL AND tle_line2 IS NOT NULL
+        ORDER BY norad_number, epoch;
+    """)
+    try:
+        yield from cursor
+    finally:
+        cursor.close()
+
+
+def store_accuracy(object_rows, class_rows, computed_at):
+    """Replaces both summary tables with this run's results."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM tle_accuracy_objects;")
+        execute_values(cursor, """
+            INSERT INTO tle_accuracy_objects (
+                norad_number, orbit_class, pairs, median_error_km, p95_error_km, max_error_km,
+                median_span_days, median_error_rate_km_day,
+                median_radial_km, median_in_track_km, median_cross_track_km, computed_at
+            ) VALUES %s;
+        """, [row + (computed_at,) for row in object_rows], page_size=1000)
+        cursor.execute("DELETE FROM tle_accuracy_classes;")
+        execute_values(cursor, """
+            INSERT INTO tle_accuracy_classes (
+                orbit_class, pairs, objects, mean_error_km, rms_error_km,
+                p50_error_km, p90_error_km, p95_error_km, p99_error_km, mean_span_days, computed_at
+            ) VALUES %s;
+        """, [row + (computed_at,) for row in class_rows])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def analyze_tle_accuracy():
+    print("\n🚀 Analyzing TLE prediction error from history...")
+    computed_at = datetime.now(timezone.utc)
+    classes = ClassAccumulator()
+    object_rows = []
+    history_rows = pairs = 0
+
+    t0 = time.perf_counter()
+    conn = get_db_connection()
+    try:
+        for chunk in iter_norad_chunks(stream_history(conn)):
+            errors = pair_errors(
+                [row["norad_number"] for row in chunk],
+                [(row["tle_line1"], row["tle_line2"]) for row in chunk],
+            )
+            stats = object_stats(errors)
+            classes.add(errors, stats)
+            object_rows.extend(s.to_row() for s in stats)
+            history_rows += len(chunk)
+            pairs += len(errors)
+            print(f"   ⏳ {history_rows} history rows, {pairs} pairs, {len(object_rows)} objects", flush=True)
+    finally:
+        conn.close()
+
+    class_stats = classes.stats()
+    print(f"✅ {pairs} TLE pairs analyzed in {time.perf_counter() - t0:.0f}s.")
+    for c in class_stats:
+        print(f"   {c.orbit_class}: median {c.p50_error_km:.2f} km, p95 {c.p95_error_km:.2f} km "
+              f"over {c.pairs} pairs / {c.objects} objects")
+
+    store_accuracy(object_rows, [c.to_row() for c in class_stats], computed_at)
+    print("✅ TLE accuracy statistics stored.\n")
+
+
+if __name__ == "__main__":
+    analyze_tle_accuracy()
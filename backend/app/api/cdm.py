@@ -22,8 +22,10 @@ def fetch_cdm_events():
     conn = get_db_connection()
     cursor = conn.cursor()
 
-    cursor.execute("SELECT * FROM cdm_events ORDER BY tca ASC;")
+    cursor.execute("SELECT *, tca >= NOW() AS active_now FROM cdm_events ORDER BY tca ASC;")
     cdm_events = cursor.fetchall()
+    for event in cdm_events:  # is_active is evaluated at read time, not stored
+        event["is_active"] = event.pop("active_now")
 
     cursor.close()
     conn.close()
@@ -38,10 +40,11 @@ def fetch_cdm_event(cdm_id: str):
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
-        cursor.execute("SELECT * FROM cdm_events WHERE cdm_id = %s LIMIT 1", (cdm_id,))
+        cursor.execute("SELECT *, tca >= NOW() AS active_now FROM cdm_events WHERE cdm_id = %s LIMIT 1", (cdm_id,))
         row = cursor.fetchone()
         if not row:
             raise HTTPException(status_code=404, detail="CDM event not found")
+        row["is_active"] = row.pop("active_now")
         return {"cdm_event": row}
     finally:
         cursor.close()
@@ -38,8 +38,7 @@ def _build_summary() -> dict:
                       sat_2_id, sat_2_name, sat_2_type,
                       emergency_reportable
                FROM cdm_events
-               WHERE is_active = TRUE
-                 AND tca BETWEEN NOW() AND NOW() + INTERVAL '24 hours'
+               WHERE tca BETWEEN NOW() AND NOW() + INTERVAL '24 hours'
                ORDER BY pc DESC LIMIT 5"""
         )
         cdms = [
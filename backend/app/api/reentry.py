@@ -1,8 +1,10 @@
 """Reentry Watch — predicted decay leaderboard.
 
-Pulls satellites where Space-Track has populated decay_date with a future
-prediction. Adds simple risk metrics (RCS-driven fragment risk, days-until,
-inclination band) and orders by imminence.
+Reads drag-lifetime predictions from `reentry_predictions` (written by
+predict_reentries.py after each TLE run) and orders by predicted decay.
+Adds simple risk metrics (RCS-driven fragment risk, days-until,
+inclination band). Falls back to the bstar / perigee ranking until the
+first prediction run has landed.
 
 LLM briefings live in api/llm.py — this route is a pure DB read.
 """
@@ -13,6 +15,7 @@ import os
 import sys
 from datetime import datetime, timezone
 
+import psycopg2
 from fastapi import APIRouter, HTTPException, Query
 from psycopg2.extras import DictCursor
 
@@ -75,36 +78,72 @@ def _imminence_score(perigee: float | None, bstar: float | None) -> float:
     return float(bstar) * 1e4 / max(perigee, 50.0)
 
 
+_COLUMNS = """s.name, s.norad_number, s.country, s.purpose, s.object_type,
+              s.perigee, s.apogee, s.inclination, s.bstar, s.rcs,
+              s.launch_date, s.decay_date, s.active_status"""
+
+
+def _predicted_rows(cursor, limit: int):
+    """Soonest predicted decays; one index scan on reentry_predictions."""
+    cursor.execute(
+        f"""SELECT {_COLUMNS}, r.predicted_decay, r.window_start, r.window_end
+            FROM reentry_predictions r
+            JOIN satellites s ON s.norad_number = r.norad_number
+            WHERE r.predicted_decay IS NOT NULL
+              AND s.active_status IS DISTINCT FROM 'Inactive'
+            ORDER BY r.predicted_decay
+            LIMIT %s""",
+        (limit,),
+    )
+    return cursor.fetchall()
+
+
+def _drag_ranked_rows(cursor, limit: int):
+    """Pre-prediction ranking: low perigee × high bstar."""
+    cursor.execute(
+        f"""SELECT {_COLUMNS}, NULL AS predicted_decay, NULL AS window_start, NULL AS window_end
+            FROM satellites s
+            WHERE s.perigee IS NOT NULL AND s.perigee < 350
+              AND s.bstar IS NOT NULL AND s.bstar > 0.0001
+              AND s.active_status IS DISTINCT FROM 'Inactive'
+            ORDER BY (s.bstar / NULLIF(s.perigee, 0)) DESC
+            LIMIT %s""",
+        (limit,),
+    )
+    return cursor.fetchall()
+
+
+def _iso(ts):
+    return ts.isoformat() if ts else None
+
+
 @router.get("/upcoming")
 def upcoming_reentries(limit: int = Query(20, ge=1, le=100)):
-    """Top imminent LEO reentries ordered by drag-imminence score.
+    """Top imminent LEO reentries ordered by predicted decay date.
 
     Decay_date isn't reliably populated in our catalog (Space-Track doesn't
-    publish predicted decay for most objects), so we infer imminence from
-    physics: low perigee × high bstar = short remaining lifetime.
+    publish predicted decay for most objects), so predict_reentries.py
+    integrates drag for every low-perigee object and this route just reads
+    the soonest ones back.
     """
     conn = get_db_connection()
     cursor = conn.cursor(cursor_factory=DictCursor)
     try:
-        cursor.execute(
-            """SELECT name, norad_number, country, purpose, object_type,
-                      perigee, apogee, inclination, bstar, rcs,
-                      launch_date, decay_date, active_status
-               FROM satellites
-               WHERE perigee IS NOT NULL AND perigee < 350
-                 AND bstar IS NOT NULL AND bstar > 0.0001
-                 AND active_status IS DISTINCT FROM 'Inactive'
-               ORDER BY (bstar / NULLIF(perigee, 0)) DESC
-               LIMIT %s""",
-            (limit,),
-        )
-        rows = cursor.fetchall()
+        try:
+            rows = _predicted_rows(cursor, limit)
+        except psycopg2.errors.UndefinedTable:
+            conn.rollback()  # migration 006 not applied yet
+            rows = []
+        if not rows:
+            rows = _drag_ranked_rows(cursor, limit)
     finally:
         cursor.close()
         conn.close()
 
+    now = datetime.now(timezone.utc)
     out = []
     for r in rows:
+        predicted = r["predicted_decay"]
         out.append(
             {
                 "name": r["name"],
@@ -119,6 +158,10 @@ def upcoming_reentries(limit: int = Query(20, ge=1, le=100)):
                 "rcs": r["rcs"],
                 "launch_date": str(r["launch_date"]) if r["launch_date"] else None,
                 "decay_date": str(r["decay_date"]) if r["decay_date"] else None,
+                "predicted_decay": _iso(predicted),
+                "decay_window_start": _iso(r["window_start"]),
+                "decay_window_end": _iso(r["window_end"]),
+                "days_to_decay": round((predicted - now).total_seconds() / 86400.0, 1) if predicted else None,
                 "imminence_score": round(_imminence_score(r["perigee"], r["bstar"]), 3),
                 "fragment_risk": _fragment_risk(r["rcs"]),
                 "inclination_band": _inclination_band(r["inclination"]),
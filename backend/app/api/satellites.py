@@ -1,10 +1,11 @@
 #api/satellites.py
 import logging
 import psycopg2
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Response
 import math
 from psycopg2.extras import DictCursor
 from typing import List
+from datetime import datetime, timezone
 import sys
 import os
 import logging
@@ -13,8 +14,20 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 try:
     from database import get_db_connection  # Absolute import for Docker
+    from services.chebyshev import ChebyshevError, get_chebyshev_ephemeris
+    from services.coverage import CoverageError, get_coverage
+    from services.orbit_index import OrbitQueryError, get_index, query as query_orbits
+    from services.passes import PassError, Observer, get_passes
+    from services.positions import get_positions
+    from services.tracks import TrackError, get_track
 except ImportError:
     from app.database import get_db_connection  # Relative import for local execution
+    from app.services.chebyshev import ChebyshevError, get_chebyshev_ephemeris
+    from app.services.coverage import CoverageError, get_coverage
+    from app.services.orbit_index import OrbitQueryError, get_index, query as query_orbits
+    from app.services.passes import PassError, Observer, get_passes
+    from app.services.positions import get_positions
+    from app.services.tracks import TrackError, get_track
 
 
 
@@ -30,6 +43,43 @@ def sanitize_value(value):
     return value
 
 
+def serialize_satellite(sat):
+    """One `satellites` row → the JSON shape the list and nearby routes return."""
+    return {
+        "id": sat["id"],
+        "name": sat["name"],
+        "norad_number": sat["norad_number"],
+        "orbit_type": sat["orbit_type"],
+        "inclination": sanitize_value(sat["inclination"]),
+        "velocity": sanitize_value(sat["velocity"]),
+        "latitude": sanitize_value(sat["latitude"]),
+        "longitude": sanitize_value(sat["longitude"]),
+        "bstar": sanitize_value(sat["bstar"]),
+        "rev_num": sat["rev_num"],
+        "ephemeris_type": sat["ephemeris_type"],
+        "eccentricity": sanitize_value(sat["eccentricity"]),
+        "period": sanitize_value(sat["period"]),
+        "perigee": sanitize_value(sat["perigee"]),
+        "apogee": sanitize_value(sat["apogee"]),
+        "epoch": sat["epoch"],
+        "raan": sanitize_value(sat["raan"]),
+        "arg_perigee": sanitize_value(sat["arg_perigee"]),
+        "mean_motion": sanitize_value(sat["mean_motion"]),
+        "semi_major_axis": sanitize_value(sat["semi_major_axis"]),
+        "tle_line1": sat["tle_line1"],
+        "tle_line2": sat["tle_line2"],
+        "intl_designator": sanitize_value(sat["intl_designator"]),
+        "object_type": sat["object_type"],
+        "launch_date": sat["launch_date"],
+        "launch_site": sat["launch_site"],
+        "decay_date": sat["decay_date"],
+        "rcs": sanitize_value(sat["rcs"]),
+        "purpose": sat["purpose"],
+        "country": sat["country"],
+        "active_status": sat["active_status"]
+    }
+
+
 @router.get("/")
 def get_all_satellites(
     page: int = Query(1, ge=1),
@@ -43,10 +93,8 @@ def get_all_satellites(
     try:
         print("🔍 Fetching total satellite count...")
 
-        if filter:
-            cursor.execute(f"SELECT COUNT(*) AS count FROM satellites WHERE {get_filter_condition(filter)}")
-        else:
-            cursor.execute("SELECT COUNT(*) AS count FROM satellites")
+        where_sql, params = get_filter_condition(filter)
+        cursor.execute(f"SELECT COUNT(*) AS count FROM satellites WHERE {where_sql}", params)
 
         result = cursor.fetchone()
         if not result or "count" not in result:
@@ -66,57 +114,21 @@ def get_all_satellites(
             FROM satellites
         """
 
-        # ✅ Apply filter if provided
-        if filter:
-            query += f" WHERE {get_filter_condition(filter)}"
+        # ✅ Apply filter (1=1 when none)
+        query += f" WHERE {where_sql}"
 
         # ✅ Sorting Logic: Most recent launch first, NULLs last
         query += " ORDER BY launch_date DESC NULLS LAST"
 
         query += " LIMIT %s OFFSET %s"
-        cursor.execute(query, (limit, offset))
+        cursor.execute(query, (*params, limit, offset))
         satellites = cursor.fetchall()
 
         return {
             "total": total_count,
             "page": page,
             "limit": limit,
-            "satellites": [
-                {
-                    "id": sat["id"],
-                    "name": sat["name"],
-                    "norad_number": sat["norad_number"],
-                    "orbit_type": sat["orbit_type"],
-                    "inclination": sanitize_value(sat["inclination"]),
-                    "velocity": sanitize_value(sat["velocity"]),
-                    "latitude": sanitize_value(sat["latitude"]),
-                    "longitude": sanitize_value(sat["longitude"]),
-                    "bstar": sanitize_value(sat["bstar"]),
-                    "rev_num": sat["rev_num"],
-                    "ephemeris_type": sat["ephemeris_type"],
-                    "eccentricity": sanitize_value(sat["eccentricity"]),
-                    "period": sanitize_value(sat["period"]),
-                    "perigee": sanitize_value(sat["perigee"]),
-                    "apogee": sanitize_value(sat["apogee"]),
-                    "epoch": sat["epoch"],
-                    "raan": sanitize_value(sat["raan"]),
-                    "arg_perigee": sanitize_value(sat["arg_perigee"]),
-                    "mean_motion": sanitize_value(sat["mean_motion"]),
-                    "semi_major_axis": sanitize_value(sat["semi_major_axis"]),
-                    "tle_line1": sat["tle_line1"],
-                    "tle_line2": sat["tle_line2"],
-                    "intl_designator": sanitize_value(sat["intl_designator"]),
-                    "object_type": sat["object_type"],
-                    "launch_date": sat["launch_date"],
-                    "launch_site": sat["launch_site"],
-                    "decay_date": sat["decay_date"],
-                    "rcs": sanitize_value(sat["rcs"]),
-                    "purpose": sat["purpose"],
-                    "country": sat["country"],
-                    "active_status": sat["active_status"]
-                }
-                for sat in satellites
-            ]
+            "satellites": [serialize_satellite(sat) for sat in satellites]
         }
 
     except Exception as e:
@@ -196,7 +208,10 @@ async def get_object_types():
 
 
 def get_filter_condition(filter):
-    """Generate SQL filter conditions based on the selected filter."""
+    """
+    Generate the SQL WHERE clause for the selected filters, as (sql, params).
+    Launch years and countries are bound as array parameters, never spliced in.
+    """
     filter_conditions = {
         # 🌍 Orbital Regions
         "LEO": "orbit_type = 'LEO'",
@@ -253,23 +268,27 @@ def get_filter_condition(filter):
 
             # 🎯 Dynamic Filters (Launch Year, Country)
             elif f.startswith("Launch Year:"):
-                year = f.split(":")[1]
+                year = f.split(":", 1)[1]
                 if year.isdigit():
-                    launch_years.append(year)
+                    launch_years.append(int(year))
 
             elif f.startswith("Country:"):
-                country = f.split(":")[1]
-                countries.append(f"'{country}'")
+                countries.append(f.split(":", 1)[1])
+
+    params = []
 
-    # ✅ Handle multiple Launch Year filters with `IN (...)`
+    # ✅ Handle multiple Launch Year filters with `= ANY(...)`
     if launch_years:
-        conditions.append(f"EXTRACT(YEAR FROM launch_date) IN ({', '.join(launch_years)})")
+        conditions.append("EXTRACT(YEAR FROM launch_date) = ANY(%s)")
+        params.append(sorted(set(launch_years)))
 
     # ✅ Handle multiple Country filters
     if countries:
-        conditions.append(f"country IN ({', '.join(countries)})")
+        conditions.append("country = ANY(%s)")
+        params.append(sorted(set(countries)))
 
-    return " AND ".join(conditions) if conditions else "1=1"  # Default: No filter applied
+    # Default: No filter applied
+    return (" AND ".join(conditions) if conditions else "1=1"), tuple(params)
 
 
 
@@ -330,6 +349,233 @@ def suggest_satellites(query: str = Query("", min_length=1)):
 
 
 
+def parse_time_param(value, name):
+    """ISO-8601 (trailing Z allowed) or unix seconds -> aware UTC datetime; None if unset."""
+    if not value:
+        return None
+    try:
+        return datetime.fromtimestamp(float(value), tz=timezone.utc)
+    except ValueError:
+        pass
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be ISO-8601 or unix seconds")
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+@router.get("/positions")
+def get_catalog_positions(
+    t: str = Query(None, description="ISO-8601 UTC time or unix seconds; default now"),
+    filter: str = Query(None, description="Same comma-separated filters as GET /"),
+    frame: str = Query("geodetic", pattern="^(geodetic|ecef)$"),
+    format: str = Query("json", pattern="^(json|bin)$"),
+    eclipse: bool = Query(False, description="Add a shadow column: 0 sunlit, 1 penumbra, 2 umbra"),
+):
+    """
+    Positions of every matching satellite at one instant, propagated server-side.
+    Columnar JSON (norad/lat/lon/alt or norad/x/y/z) or the packed binary layout
+    documented in services/positions.py. Cached per 5-second time bucket.
+    """
+    when = parse_time_param(t, "t")
+    try:
+        result = get_positions(*get_filter_condition(filter), when, frame=frame, fmt=format, eclipse=eclipse)
+    except Exception as e:
+        logging.error("Positions propagation failed: %s", str(e))
+        raise HTTPException(status_code=500, detail=f"Propagation error: {str(e)}")
+
+    if format == "bin":
+        return Response(content=result, media_type="application/octet-stream")
+    return result
+
+
+@router.get("/coverage")
+def get_catalog_coverage(
+    t: str = Query(None, description="ISO-8601 UTC time or unix seconds; default now"),
+    filter: str = Query(None, description="Same comma-separated filters as GET /"),
+    resolution: float = Query(1.0, ge=0.25, le=10, description="Grid cell size in degrees; must divide 180"),
+    min_elevation: float = Query(10.0, ge=0, lt=90),
+    format: str = Query("json", pattern="^(json|bin)$"),
+):
+    """
+    How many matching satellites are above `min_elevation` at each cell of a
+    lat/lon grid. Row-major counts from (-90, -180), as JSON or the packed
+    layout documented in services/coverage.py. Cached per 60-second time bucket.
+    """
+    when = parse_time_param(t, "t")
+    try:
+        result = get_coverage(*get_filter_condition(filter), when, resolution, min_elevation, fmt=format)
+    except CoverageError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logging.error("Coverage computation failed: %s", str(e))
+        raise HTTPException(status_code=500, detail=f"Coverage error: {str(e)}")
+
+    if format == "bin":
+        return Response(content=result, media_type="application/octet-stream")
+    return result
+
+
+@router.get("/ephemeris.bin")
+def get_catalog_ephemeris(
+    t: str = Query(None, description="ISO-8601 UTC time or unix seconds; default now"),
+    filter: str = Query(None, description="Same comma-separated filters as GET /"),
+    hours: float = Query(3.0, gt=0, le=12),
+    frame: str = Query("ecef", pattern="^(ecef|teme)$"),
+):
+    """
+    Piecewise Chebyshev coefficients for every matching satellite over the
+    next `hours`, with a measured max position error per object. Packed
+    float32 layout and evaluation rule documented in services/chebyshev.py.
+    Cached per 10-minute window start.
+    """
+    when = parse_time_param(t, "t")
+    try:
+        blob = get_chebyshev_ephemeris(*get_filter_condition(filter), when, hours, frame)
+    except ChebyshevError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logging.error("Chebyshev ephemeris fit failed: %s", str(e))
+        raise HTTPException(status_code=500, detail=f"Ephemeris error: {str(e)}")
+    return Response(content=blob, media_type="application/octet-stream")
+
+
+def _pass_response(where_sql, params, lat, lon, alt_km, start, hours, min_elevation, visible=False):
+    try:
+        return get_passes(where_sql, params, Observer(lat, lon, alt_km), parse_time_param(start, "start"),
+                          hours, min_elevation, visible_only=visible)
+    except PassError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/passes")
+def get_catalog_passes(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=360),
+    alt_km: float = Query(0.0, ge=-1, le=10),
+    start: str = Query(None, description="ISO-8601 UTC or unix seconds; default now"),
+    hours: float = Query(24.0, gt=0, le=72),
+    min_elevation: float = Query(10.0, ge=0, le=90),
+    filter: str = Query(None, description="Same comma-separated filters as GET /"),
+    norads: str = Query(None, description="Comma-separated NORAD numbers"),
+    visible: bool = Query(False, description="Only passes sunlit over a dark sky at rise, culmination or set"),
+):
+    """
+    Passes over one observer for many satellites at once: every satellite
+    matching `filter` and/or the `norads` list, up to a few thousand per call.
+    """
+    where_sql, params = get_filter_condition(filter)
+    if norads:
+        try:
+            norad_list = tuple(int(n) for n in norads.split(",") if n.strip())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="norads must be comma-separated integers")
+        if norad_list:
+            where_sql, params = f"({where_sql}) AND norad_number IN %s", (*params, norad_list)
+    return _pass_response(where_sql, params, lat, lon, alt_km, start, hours, min_elevation, visible)
+
+
+@router.get("/{norad_number}/passes")
+def get_satellite_passes(
+    norad_number: int,
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=360),
+    alt_km: float = Query(0.0, ge=-1, le=10),
+    start: str = Query(None, description="ISO-8601 UTC or unix seconds; default now"),
+    hours: float = Query(24.0, gt=0, le=72),
+    min_elevation: float = Query(10.0, ge=0, le=90),
+    visible: bool = Query(False, description="Only passes sunlit over a dark sky at rise, culmination or set"),
+):
+    """
+    Rise, culmination and set times (with azimuths) for one satellite over
+    an observer at lat/lon/alt_km.
+    """
+    result = _pass_response("norad_number = %s", (norad_number,), lat, lon, alt_km, start, hours, min_elevation,
+                            visible)
+    if result["satellites"] == 0:
+        raise HTTPException(status_code=404, detail="Satellite not found")
+    return result
+
+
+@router.get("/{norad_number}/track")
+def get_satellite_track(
+    norad_number: int,
+    start: str = Query(None, description="ISO-8601 UTC or unix seconds; default now"),
+    end: str = Query(None, description="ISO-8601 UTC or unix seconds; default start + one orbit"),
+    step: float = Query(None, gt=0, description="Seconds between samples; default period / 180"),
+    tolerance_km: float = Query(0.0, ge=0, description="Decimation tolerance; 0 returns every sample"),
+):
+    """
+    Orbit path and ground track sampled server-side: columnar geodetic
+    (lat/lon/alt) and ECI (TEME x/y/z) points, optionally thinned with
+    curvature-preserving decimation.
+    """
+    try:
+        track = get_track(norad_number, parse_time_param(start, "start"), parse_time_param(end, "end"),
+                          step, tolerance_km)
+    except TrackError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if track is None:
+        raise HTTPException(status_code=404, detail="Satellite not found")
+    return track
+
+
+def _nearby_details(matches):
+    """Full satellite rows for (norad, distance) matches, in match order."""
+    if not matches:
+        return []
+    conn = get_db_connection()
+    cursor = conn.cursor(cursor_factory=DictCursor)
+    try:
+        cursor.execute("""
+            SELECT id, name, norad_number, orbit_type, inclination, velocity,
+                   latitude, longitude, bstar, rev_num, ephemeris_type, eccentricity,
+                   period, perigee, apogee, epoch, raan, arg_perigee, mean_motion,
+                   semi_major_axis, tle_line1, tle_line2, intl_designator, object_type,
+                   launch_date, launch_site, decay_date, rcs, purpose, country, active_status
+            FROM satellites
+            WHERE norad_number = ANY(%s)
+        """, ([norad for norad, _ in matches],))
+        rows = {sat["norad_number"]: sat for sat in cursor.fetchall()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database query failed: {str(e)}")
+    finally:
+        cursor.close()
+        conn.close()
+
+    formatted = []
+    for norad, distance in matches:
+        sat = rows.get(norad)
+        if sat is None:  # row removed since the index was built
+            continue
+        formatted.append({**serialize_satellite(sat), "distance": round(distance, 4)})
+    return formatted
+
+
+@router.get("/nearby")
+def get_nearby_orbits(
+    perigee: float = Query(..., description="Perigee altitude, km"),
+    apogee: float = Query(..., description="Apogee altitude, km"),
+    inclination: float = Query(..., ge=0, le=180, description="Degrees"),
+    raan: float = Query(None, ge=0, le=360, description="Optional; adds node alignment to the match"),
+    limit: int = Query(10, ge=1, le=100),
+    radius: float = Query(None, gt=0, description="Max normalized L1 distance (1 = 100 km / 100 km / 5° / 30° RAAN)")
+):
+    """
+    Satellites closest to an arbitrary point in orbital-element space. Axes
+    are normalized by the same thresholds as /nearby/{norad_number}.
+    """
+    try:
+        matches = query_orbits(get_index(), (perigee, apogee, inclination, raan), k=limit, radius=radius)
+    except OrbitQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"nearby_satellites": _nearby_details(matches)}
+
+
+
+
+
+
 
 
 
@@ -435,93 +681,15 @@ def get_nearby_satellites(
 ):
     """
     Retrieve satellites with orbital parameters similar to the given NORAD number.
-    The similarity is determined by comparing perigee, apogee, and inclination.
+    The similarity is determined by comparing perigee, apogee, and inclination:
+    within 100 km / 100 km / 5° of the reference, closest first.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=DictCursor)
-    try:
-        # First, fetch the selected satellite's orbital parameters
-        cursor.execute("""
-            SELECT perigee, apogee, inclination
-            FROM satellites
-            WHERE norad_number = %s
-        """, (norad_number,))
-        main_sat = cursor.fetchone()
-        if not main_sat:
-            raise HTTPException(status_code=404, detail="Satellite not found")
-
-        # Define thresholds for similarity (adjust these as needed)
-        perigee_threshold = 100    # km difference
-        apogee_threshold = 100     # km difference
-        inclination_threshold = 5  # degrees difference
-
-        query = """
-            SELECT id, name, norad_number, orbit_type, inclination, velocity,
-                   latitude, longitude, bstar, rev_num, ephemeris_type, eccentricity,
-                   period, perigee, apogee, epoch, raan, arg_perigee, mean_motion,
-                   semi_major_axis, tle_line1, tle_line2, intl_designator, object_type,
-                   launch_date, launch_site, decay_date, rcs, purpose, country, active_status
-            FROM satellites
-            WHERE
-                ABS(perigee - %s) < %s AND
-                ABS(apogee - %s) < %s AND
-                ABS(inclination - %s) < %s AND
-                norad_number <> %s
-            ORDER BY ABS(perigee - %s) + ABS(apogee - %s) + ABS(inclination - %s)
-            LIMIT %s
-        """
-        params = (
-            main_sat["perigee"], perigee_threshold,
-            main_sat["apogee"], apogee_threshold,
-            main_sat["inclination"], inclination_threshold,
-            norad_number,
-            main_sat["perigee"], main_sat["apogee"], main_sat["inclination"],
-            limit
-        )
-        cursor.execute(query, params)
-        nearby = cursor.fetchall()
-
-        formatted = [
-            {
-                "id": sat["id"],
-                "name": sat["name"],
-                "norad_number": sat["norad_number"],
-                "orbit_type": sat["orbit_type"],
-                "inclination": sanitize_value(sat["inclination"]),
-                "velocity": sanitize_value(sat["velocity"]),
-                "latitude": sanitize_value(sat["latitude"]),
-                "longitude": sanitize_value(sat["longitude"]),
-                "bstar": sanitize_value(sat["bstar"]),
-                "rev_num": sat["rev_num"],
-                "ephemeris_type": sat["ephemeris_type"],
-                "eccentricity": sanitize_value(sat["eccentricity"]),
-                "period": sanitize_value(sat["period"]),
-                "perigee": sanitize_value(sat["perigee"]),
-                "apogee": sanitize_value(sat["apogee"]),
-                "epoch": sat["epoch"],
-                "raan": sanitize_value(sat["raan"]),
-                "arg_perigee": sanitize_value(sat["arg_perigee"]),
-                "mean_motion": sanitize_value(sat["mean_motion"]),
-                "semi_major_axis": sanitize_value(sat["semi_major_axis"]),
-                "tle_line1": sat["tle_line1"],
-                "tle_line2": sat["tle_line2"],
-                "intl_designator": sanitize_value(sat["intl_designator"]),
-                "object_type": sat["object_type"],
-                "launch_date": sat["launch_date"],
-                "launch_site": sat["launch_site"],
-                "decay_date": sat["decay_date"],
-                "rcs": sanitize_value(sat["rcs"]),
-                "purpose": sat["purpose"],
-                "country": sat["country"],
-                "active_status": sat["active_status"]
-            }
-            for sat in nearby
-        ]
-        return {"nearby_satellites": formatted}
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database query failed: {str(e)}")
-    finally:
-        cursor.close()
-        conn.close()
+    index = get_index()
+    row = index.row_of(norad_number)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Satellite not found")
+    perigee, apogee, inclination, _ = index.elements[row]
+    matches = query_orbits(index, (perigee, apogee, inclination), k=limit, radius=1.0,
+                           exclude=norad_number, box=True)
+    return {"nearby_satellites": _nearby_details(matches)}
 
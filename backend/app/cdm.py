@@ -3,24 +3,27 @@
 
 # /backend/app/tle_processor.py
 
-from tqdm import tqdm
 from dotenv import load_dotenv
 import os
 import requests
-import sys  # <-- NEW: for isatty()
+import sys
+import time
 from database import get_db_connection  # ✅ Use get_db_connection()
-from datetime import datetime, timezone
-import datetime as dt  # to differentiate
-from dateutil import parser  # ✅ Used for parsing datetime strings
 from dotenv import load_dotenv
 from database import get_db_connection  # ✅ Your database connection function
+from psycopg2.extras import execute_values
+from services.cdm_ingest import ingest_cdms
+from services.cdm_refine import refine_events
+from services.delta_sync import (
+    CDM_SOURCE, SPACETRACK_BASE_URL, HighWaterMark, fetch_records, load_sync_state, next_state, plan_cdm_fetch,
+    store_sync_state,
+)
 
 
 load_dotenv()
 SPACETRACK_USER = os.getenv("SPACETRACK_USER")
 SPACETRACK_PASS = os.getenv("SPACETRACK_PASS")
 COOKIES_FILE = "cookies.txt"
-CDM_API_URL = "https://www.space-track.org/basicspacedata/query/class/cdm_public/format/json"
 
 
 def get_spacetrack_session():
@@ -29,7 +32,7 @@ def get_spacetrack_session():
     if os.path.exists(COOKIES_FILE):
         os.remove(COOKIES_FILE)
 
-    login_url = "https://www.space-track.org/ajaxauth/login"
+    login_url = f"{SPACETRACK_BASE_URL}/ajaxauth/login"
     payload = {"identity": SPACETRACK_USER, "password": SPACETRACK_PASS}
 
     response = session.post(login_url, data=payload)
@@ -54,193 +57,144 @@ def get_spacetrack_session():
 
 
 
-def expired_cdms():
+def fetch_cdm_data(session, plan):
     """
-    Marks CDM events as inactive if their TCA (Time of Closest Approach) is in the past.
-    This preserves historical data while keeping active monitoring relevant.
+    Fetches the CDMs the plan asks for: everything on a full pull, only
+    those CREATED after the high-water mark on a delta. None on an API error.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        UPDATE cdm_events 
-        SET is_active = FALSE 
-        WHERE tca < NOW() AND is_active = TRUE;
-    """)
-    
-    updated_count = cursor.rowcount
-    conn.commit()
-    cursor.close()
-    conn.close()
-
-    print(f"🔄 Marked {updated_count} past CDM events as inactive.")
-
-
-
-
-def fetch_cdm_data(session):
-    """Fetches the latest CDM data from Space-Track."""
-    response = session.get(CDM_API_URL)
-    if response.status_code != 200:
-        print(f"❌ API Error {response.status_code}: Unable to fetch CDM data.")
-        return []
+    status, cdm_data = fetch_records(session, plan)
+    if cdm_data is None:
+        print(f"❌ API Error {status}: Unable to fetch CDM data.")
+        return None
 
-    cdm_data = response.json()
-    print(f"📡 Retrieved {len(cdm_data)} CDM records from Space-Track.")
+    since = f" created after {plan.since:%Y-%m-%d %H:%M:%S}" if plan.since else ""
+    print(f"📡 Retrieved {len(cdm_data)} CDM records{since} from Space-Track ({plan.mode}).")
     return cdm_data
 
 
-def safe_float(value):
-    """Convert value to float if possible, else return None for SQL compatibility."""
-    try:
-        return float(value) if value not in [None, ""] else None
-    except ValueError:
-        return None
-
+def insert_new_cdms(cdm_data):
+    """
+    Validates the CDMs in bulk, stages them with one COPY and merges them
+    into cdm_events in a single statement (services/cdm_ingest.py).
+    Records that fail validation land in cdm_rejects with the reason.
+    """
+    if not cdm_data:
+        print("⚠️ No new CDM events to insert.")
+        return
 
+    conn = get_db_connection()
+    print(f"📥 Ingesting {len(cdm_data)} CDM records...")
+    started = time.perf_counter()
+    try:
+        result = ingest_cdms(conn, cdm_data)
+    finally:
+        conn.close()
 
+    counts = result.counts
+    print(f"✅ CDM events: {counts.inserted} inserted, {counts.updated} updated, {counts.unchanged} unchanged "
+          f"({result.duplicates} repeated CDM_IDs collapsed) in {time.perf_counter() - started:.2f}s.")
+    if result.rejected:
+        print(f"⚠️ {result.rejected} CDM records rejected (see cdm_rejects).")
 
 
 
 
 
 
-def insert_new_cdms(cdm_data):
-    """Inserts new CDM events into the database, avoiding duplicates and ensuring required fields."""
-    if not cdm_data:
-        print("⚠️ No new CDM events to insert.")
-        return
 
+def refine_active_cdms():
+    """
+    Recomputes TCA, miss distance and relative speed for every active CDM
+    from our own TLEs and stores them next to Space-Track's values.
+    """
     conn = get_db_connection()
     cursor = conn.cursor()
 
-    print(f"📥 Inserting {len(cdm_data)} new CDM events...")
-
-    is_tty = sys.stdout.isatty()
-
-    for cdm in tqdm(
-        cdm_data,
-        desc="📡 Processing CDM data",
-        unit="CDM",
-        miniters=500,
-        mininterval=2.0,
-        disable=not is_tty
-    ):
-        try:
-            # Parse and ensure TIMEZONE-AWARE datetimes for CREATED and TCA
-            created_str = cdm.get("CREATED")
-            tca_str = cdm.get("TCA")
-
-            if not created_str or not tca_str:
-                # Missing essential timestamps, skip
-                continue
-
-            created_dt = parser.parse(created_str)
-            tca_dt = parser.parse(tca_str)
-
-            # If the parsed datetime is naive (no tzinfo), assume UTC
-            if created_dt.tzinfo is None:
-                created_dt = created_dt.replace(tzinfo=timezone.utc)
-            if tca_dt.tzinfo is None:
-                tca_dt = tca_dt.replace(tzinfo=timezone.utc)
-
-            required_fields = {
-                "CDM_ID": int(cdm.get("CDM_ID", -1)),
-                "CREATED": created_dt,
-                "TCA": tca_dt,
-                "MIN_RNG": safe_float(cdm.get("MIN_RNG")),
-                "PC": safe_float(cdm.get("PC")),
-                "SAT_1_ID": int(cdm.get("SAT_1_ID", -1)),
-                "SAT_1_NAME": cdm.get("SAT_1_NAME", "Unknown"),
-                "SAT1_OBJECT_TYPE": cdm.get("SAT1_OBJECT_TYPE", "Unknown"),
-                "SAT_2_ID": int(cdm.get("SAT_2_ID", -1)),
-                "SAT_2_NAME": cdm.get("SAT_2_NAME", "Unknown"),
-                "SAT2_OBJECT_TYPE": cdm.get("SAT2_OBJECT_TYPE", "Unknown"),
-                "EMERGENCY_REPORTABLE": True if cdm.get("EMERGENCY_REPORTABLE") == "Y" else False
-            }
-
-            # If any required field is missing or invalid, skip
-            if None in required_fields.values():
-                continue
-
-            optional_fields = {
-                "SAT1_RCS": cdm.get("SAT1_RCS", "Unknown"),
-                "SAT_1_EXCL_VOL": safe_float(cdm.get("SAT_1_EXCL_VOL")) or 0.0,
-                "SAT2_RCS": cdm.get("SAT2_RCS", "Unknown"),
-                "SAT_2_EXCL_VOL": safe_float(cdm.get("SAT_2_EXCL_VOL")) or 0.0
-            }
-
-            # Determine active status based on whether TCA is in the future
-            now_utc = dt.datetime.now(timezone.utc)
-            is_active = tca_dt >= now_utc
-
-            cdm_entry = {
-                **required_fields,
-                **optional_fields,
-                "IS_ACTIVE": is_active
-            }
-
-            cursor.execute("""
-                INSERT INTO cdm_events (
-                    cdm_id, created, tca, min_rng, pc, 
-                    sat_1_id, sat_1_name, sat_1_type, sat_1_rcs, sat_1_excl_vol,
-                    sat_2_id, sat_2_name, sat_2_type, sat_2_rcs, sat_2_excl_vol,
-                    emergency_reportable, is_active
-                )
-                VALUES (
-                    %(CDM_ID)s, %(CREATED)s, %(TCA)s, %(MIN_RNG)s, %(PC)s,
-                    %(SAT_1_ID)s, %(SAT_1_NAME)s, %(SAT1_OBJECT_TYPE)s, %(SAT1_RCS)s, %(SAT_1_EXCL_VOL)s,
-                    %(SAT_2_ID)s, %(SAT_2_NAME)s, %(SAT2_OBJECT_TYPE)s, %(SAT2_RCS)s, %(SAT_2_EXCL_VOL)s,
-                    %(EMERGENCY_REPORTABLE)s, %(IS_ACTIVE)s
-                )
-                ON CONFLICT (cdm_id) DO UPDATE SET
-                    created = EXCLUDED.created,
-                    tca = EXCLUDED.tca,
-                    min_rng = EXCLUDED.min_rng,
-                    pc = EXCLUDED.pc,
-                    sat_1_id = EXCLUDED.sat_1_id,
-                    sat_1_name = EXCLUDED.sat_1_name,
-                    sat_1_type = EXCLUDED.sat_1_type,
-                    sat_1_rcs = EXCLUDED.sat_1_rcs,
-                    sat_1_excl_vol = EXCLUDED.sat_1_excl_vol,
-                    sat_2_id = EXCLUDED.sat_2_id,
-                    sat_2_name = EXCLUDED.sat_2_name,
-                    sat_2_type = EXCLUDED.sat_2_type,
-                    sat_2_rcs = EXCLUDED.sat_2_rcs,
-                    sat_2_excl_vol = EXCLUDED.sat_2_excl_vol,
-                    emergency_reportable = EXCLUDED.emergency_reportable,
-                    is_active = EXCLUDED.is_active;
-            """, cdm_entry)
-
-        except Exception as e:
-            tqdm.write(f"⚠️ Error inserting CDM ID {cdm.get('CDM_ID', 'Unknown')}: {e}")
-
+    cursor.execute("""
+        SELECT c.cdm_id, c.tca,
+               s1.tle_line1 AS tle1_line1, s1.tle_line2 AS tle1_line2,
+               s2.tle_line1 AS tle2_line1, s2.tle_line2 AS tle2_line2
+        FROM cdm_events c
+        JOIN satellites s1 ON s1.norad_number = c.sat_1_id
+        JOIN satellites s2 ON s2.norad_number = c.sat_2_id
+        WHERE c.tca >= NOW();
+    """)
+    rows = cursor.fetchall()
+    print(f"🎯 Refining {len(rows)} active CDM events against current TLEs...")
+
+    refinements = refine_events([
+        ((row["tle1_line1"], row["tle1_line2"]), (row["tle2_line1"], row["tle2_line2"]), row["tca"])
+        for row in rows
+    ])
+    updates = [
+        (row["cdm_id"], r.tca, r.miss_distance_km, r.relative_speed_km_s)
+        for row, r in zip(rows, refinements) if r is not None
+    ]
+
+    if updates:
+        execute_values(cursor, """
+            UPDATE cdm_events AS c SET
+                refined_tca = v.tca,
+                refined_miss_km = v.miss,
+                refined_relative_speed_km_s = v.speed,
+                refined_at = NOW()
+            FROM (VALUES %s) AS v(cdm_id, tca, miss, speed)
+            WHERE c.cdm_id = v.cdm_id;
+        """, updates, template="(%s, %s::timestamptz, %s::double precision, %s::double precision)", page_size=1000)
     conn.commit()
     cursor.close()
     conn.close()
 
-    print(f"✅ Inserted/updated valid CDM events.")
-
-
-
-
-
+    print(f"✅ Refined {len(updates)} CDM events ({len(rows) - len(updates)} without usable TLEs).")
 
 
 def update_cdm_data():
-    """Main function to update CDM data: remove expired & insert new."""
+    """
+    Main function to update CDM data: fetch what is new since the stored
+    high-water mark, merge it, then advance the mark.
+
+    Expiry is not written here: an event is active while tca >= NOW(),
+    and readers evaluate that against the tca index (migrations/010).
+    """
     print("\n🚀 Updating CDM data...")
     session = get_spacetrack_session()
     if not session:
         print("❌ Could not authenticate with Space-Track. Exiting update process.")
         return
 
-    expired_cdms()
-    cdm_data = fetch_cdm_data(session)
-    insert_new_cdms(cdm_data)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        sync_state = load_sync_state(cursor, CDM_SOURCE)
+        plan = plan_cdm_fetch(sync_state)
+        cdm_data = fetch_cdm_data(session, plan)
+        if cdm_data is None:
+            return
+
+        insert_new_cdms(cdm_data)
+
+        # Only once the merge has committed: a failed run re-asks from the old mark.
+        # A full pull that returned nothing failed; an empty delta is normal.
+        mark = HighWaterMark("CREATED", None)
+        mark.observe(cdm_data)
+        if mark.count or plan.mode == "delta":
+            sync_state = next_state(sync_state, plan.mode, mark)
+            store_sync_state(cursor, sync_state, CDM_SOURCE)
+            conn.commit()
+            print(f"🔖 CDM high-water mark: {sync_state.high_water} ({plan.mode} run, {mark.count} records).")
+        else:
+            print("⚠️ Full CDM pull returned no records; keeping the previous sync state.")
+    finally:
+        cursor.close()
+        conn.close()
+
+    refine_active_cdms()
 
     print("✅ CDM update completed.\n")
 
 
 if __name__ == "__main__":
-    update_cdm_data()
+    if len(sys.argv) > 1 and sys.argv[1] == "refine":
+        refine_active_cdms()  # after a TLE run: refresh refinements only
+    else:
+        update_cdm_data()
@@ -0,0 +1,126 @@
+# /backend/app/predict_reentries.py
+
+"""
+Predicts drag reentry dates for every active object with a low perigee and
+stores them in `reentry_predictions` (see services/lifetime.py for the
+model). Runs right after tle_processor so it starts from fresh elements and
+uses the latest F10.7 / Ap from the space-weather tables.
+"""
+
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from psycopg2.extras import execute_values
+from database import get_db_connection  # ✅ Use get_db_connection()
+from services.lifetime import (
+    DEFAULT_AP,
+    DEFAULT_F107,
+    LIFETIME_HORIZON_DAYS,
+    LIFETIME_MAX_PERIGEE_KM,
+    predict_lifetimes,
+)
+
+
+def fetch_decay_candidates():
+    """Returns rows (norad_number, epoch, mean_motion, eccentricity, bstar) below the perigee cutoff."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT norad_number, epoch, mean_motion, eccentricity, bstar
+        FROM satellites
+        WHERE perigee IS NOT NULL AND perigee < %s
+          AND mean_motion > 0 AND eccentricity IS NOT NULL
+          AND bstar IS NOT NULL AND epoch IS NOT NULL
+        ORDER BY norad_number;
+    """, (LIFETIME_MAX_PERIGEE_KM,))
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    return rows
+
+
+def fetch_space_weather():
+    """Latest daily F10.7 and Ap, falling back to moderate-activity defaults."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT f107 FROM f107_flux WHERE f107 IS NOT NULL ORDER BY date DESC LIMIT 1;")
+        row = cursor.fetchone()
+        f107 = float(row["f107"]) if row else DEFAULT_F107
+        cursor.execute("SELECT ap_index FROM geomagnetic_kp_index ORDER BY time DESC LIMIT 1;")
+        row = cursor.fetchone()
+        ap = float(row["ap_index"]) if row else DEFAULT_AP
+    except Exception as e:
+        print(f"⚠️ Space weather unavailable ({e}); using F10.7={DEFAULT_F107}, Ap={DEFAULT_AP}")
+        conn.rollback()
+        f107, ap = DEFAULT_F107, DEFAULT_AP
+    finally:
+        cursor.close()
+        conn.close()
+    return f107, ap
+
+
+def _after(epoch, seconds):
+    return epoch + timedelta(seconds=float(seconds)) if math.isfinite(seconds) else None
+
+
+def store_predictions(rows, window, f107, ap, predicted_at):
+    """Replaces every prediction with this run's results in one transaction."""
+    values = []
+    for i, row in enumerate(rows):
+        epoch = row["epoch"] if row["epoch"].tzinfo else row["epoch"].replace(tzinfo=timezone.utc)
+        values.append((
+            row["norad_number"], epoch,
+            _after(epoch, window.nominal_s[i]),
+            _after(epoch, window.earliest_s[i]),
+            _after(epoch, window.latest_s[i]),
+            f107, ap, predicted_at,
+        ))
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM reentry_predictions;")
+        execute_values(cursor, """
+            INSERT INTO reentry_predictions (
+                norad_number, tle_epoch, predicted_decay, window_start, window_end,
+                f107, ap, predicted_at
+            ) VALUES %s;
+        """, values, page_size=1000)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def predict_reentries():
+    print("\n🚀 Predicting drag reentries...")
+    rows = fetch_decay_candidates()
+    if not rows:
+        print("❌ No objects below the perigee cutoff. Exiting.")
+        return
+
+    f107, ap = fetch_space_weather()
+    predicted_at = datetime.now(timezone.utc)
+    print(f"🛰️ {len(rows)} objects with perigee < {LIFETIME_MAX_PERIGEE_KM:g} km, "
+          f"F10.7={f107:g}, Ap={ap:g}, {LIFETIME_HORIZON_DAYS / 365.25:.0f}y horizon")
+
+    t0 = time.perf_counter()
+    window = predict_lifetimes(
+        [row["mean_motion"] for row in rows],
+        [row["eccentricity"] for row in rows],
+        [row["bstar"] for row in rows],
+        f107=f107, ap=ap,
+    )
+    decaying = sum(math.isfinite(t) for t in window.nominal_s)
+    print(f"✅ {decaying} objects reenter within the horizon ({time.perf_counter() - t0:.0f}s).")
+
+    store_predictions(rows, window, f107, ap, predicted_at)
+    print("✅ Reentry predictions stored.\n")
+
+
+if __name__ == "__main__":
+    predict_reentries()
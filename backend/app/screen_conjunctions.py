@@ -0,0 +1,84 @@
+# /backend/app/screen_conjunctions.py
+
+"""
+Screens the whole active catalog against itself and stores every close
+approach in `screened_conjunctions` (see services/screening.py for the
+pipeline). Runs right after tle_processor so it screens fresh elements.
+"""
+
+import time
+from datetime import datetime, timezone
+from psycopg2.extras import execute_values
+from database import get_db_connection  # ✅ Use get_db_connection()
+from services.screening import (
+    SCREENING_DISTANCE_KM,
+    SCREENING_HORIZON_HOURS,
+    SCREENING_WORKERS,
+    screen_catalog,
+)
+
+
+def fetch_active_tles():
+    """Returns (norads, [(line1, line2), ...]) for every active satellite."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT norad_number, tle_line1, tle_line2
+        FROM satellites
+        WHERE tle_line1 IS NOT NULL AND tle_line2 IS NOT NULL
+        ORDER BY norad_number;
+    """)
+    rows = cursor.fetchall()
+    cursor.close()
+    conn.close()
+    return [row["norad_number"] for row in rows], [(row["tle_line1"], row["tle_line2"]) for row in rows]
+
+
+def store_conjunctions(conjunctions, screened_at):
+    """Replaces every not-yet-passed screened conjunction with this run's results."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM screened_conjunctions WHERE tca >= %s;", (screened_at,))
+        execute_values(cursor, """
+            INSERT INTO screened_conjunctions (
+                norad_1, norad_2, tca, miss_distance_km, relative_speed_km_s, screened_at
+            ) VALUES %s
+            ON CONFLICT (norad_1, norad_2, tca) DO UPDATE SET
+                miss_distance_km = EXCLUDED.miss_distance_km,
+                relative_speed_km_s = EXCLUDED.relative_speed_km_s,
+                screened_at = EXCLUDED.screened_at;
+        """, [c.to_row() + (screened_at,) for c in conjunctions], page_size=1000)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def screen_conjunctions():
+    print("\n🚀 Screening active catalog for conjunctions...")
+    norads, tle_pairs = fetch_active_tles()
+    if not tle_pairs:
+        print("❌ No active TLEs to screen. Exiting.")
+        return
+
+    start = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    print(f"🛰️ {len(tle_pairs)} objects, {SCREENING_HORIZON_HOURS:.0f}h horizon, "
+          f"{SCREENING_DISTANCE_KM:g} km threshold, {SCREENING_WORKERS} workers")
+
+    t0 = time.perf_counter()
+    conjunctions = screen_catalog(
+        tle_pairs, norads, start,
+        progress=lambda n: print(f"   ⏳ {n} time slices screened", flush=True) if n % 10 == 0 else None,
+    )
+    print(f"✅ Found {len(conjunctions)} conjunctions in {time.perf_counter() - t0:.0f}s.")
+
+    store_conjunctions(conjunctions, start)
+    print("✅ Screened conjunctions stored.\n")
+
+
+if __name__ == "__main__":
+    screen_conjunctions()
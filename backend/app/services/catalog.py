@@ -0,0 +1,124 @@
+"""In-process snapshot of the `satellites` TLE catalog for vectorized routes.
+
+Used by:
+  - services/positions.py (GET /api/satellites/positions)
+
+Parsing 30k TLEs into a SatrecArray takes a noticeable fraction of a
+second, so each filtered catalog is parsed once and kept in memory until
+the catalog version changes. The version is the `catalog_revision`
+counter (migrations/011), which tle_processor bumps in the same
+transaction as every write to `satellites`, metadata-only changes
+included. It is itself re-read at most every CATALOG_VERSION_TTL_SECONDS
+so hot routes don't pay a query per request.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+try:
+    from database import get_db_connection
+    from services.propagation import Catalog, parse_catalog
+except ImportError:
+    from app.database import get_db_connection
+    from app.services.propagation import Catalog, parse_catalog
+
+CATALOG_VERSION_TTL_SECONDS = float(os.getenv("CATALOG_VERSION_TTL_SECONDS", "60"))
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "32"))
+
+
+@dataclass
+class CatalogSnapshot:
+    """Parsed TLEs for one filter, aligned with `norad` by catalog row."""
+    version: tuple
+    norad: np.ndarray  # int32 (N,) — one per successfully parsed TLE
+    catalog: Catalog
+
+    def __len__(self) -> int:
+        return len(self.norad)
+
+
+_lock = threading.Lock()
+_version: tuple | None = None
+_version_checked_at = 0.0
+_snapshots: "OrderedDict[tuple, CatalogSnapshot]" = OrderedDict()
+
+
+def bump_catalog_revision(cursor) -> None:
+    """Invalidate every cached snapshot (the caller commits, with its writes)."""
+    cursor.execute("UPDATE catalog_revision SET revision = revision + 1, updated_at = NOW()")
+
+
+def catalog_version(force: bool = False) -> tuple:
+    """The satellites table's current revision, cached for a short TTL."""
+    global _version, _version_checked_at
+    now = time.monotonic()
+    with _lock:
+        if not force and _version is not None and now - _version_checked_at < CATALOG_VERSION_TTL_SECONDS:
+            return _version
+
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT revision FROM catalog_revision")
+            row = cursor.fetchone()
+    finally:
+        conn.close()
+
+    version = (row["revision"] if row else 0,)
+    with _lock:
+        _version = version
+        _version_checked_at = now
+    return version
+
+
+def params_key(params: tuple | list) -> tuple:
+    """Hashable form of query params for cache keys; array parameters arrive as lists."""
+    return tuple(tuple(p) if isinstance(p, list) else p for p in params)
+
+
+def get_catalog(where_sql: str = "1=1", params: tuple | list = ()) -> CatalogSnapshot:
+    """Parsed catalog for a WHERE clause, reparsed only on version change.
+
+    `where_sql` is spliced into the query, so it must be a fixed clause
+    with %s placeholders (get_filter_condition or
+    filter_schema.build_sql_from_structured); every value from the request
+    belongs in `params`. The cache is keyed on both.
+    """
+    version = catalog_version()
+    key = (where_sql, params_key(params))
+    with _lock:
+        snap = _snapshots.get(key)
+        if snap is not None and snap.version == version:
+            _snapshots.move_to_end(key)
+            return snap
+
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                f"""SELECT norad_number, tle_line1, tle_line2
+                    FROM satellites
+                    WHERE {where_sql}
+                    ORDER BY norad_number""",
+                tuple(params),
+            )
+            rows = cursor.fetchall()
+    finally:
+        conn.close()
+
+    catalog = parse_catalog((r["tle_line1"], r["tle_line2"]) for r in rows)
+    all_norads = np.fromiter((r["norad_number"] for r in rows), dtype=np.int32, count=len(rows))
+    snap = CatalogSnapshot(version=version, norad=all_norads[catalog.index], catalog=catalog)
+
+    with _lock:
+        _snapshots[key] = snap
+        _snapshots.move_to_end(key)
+        while len(_snapshots) > CATALOG_CACHE_SIZE:
+            _snapshots.popitem(last=False)
+    return snap
@@ -0,0 +1,210 @@
+"""Batched CDM ingestion: bulk validation, one COPY, one merge, a reject table.
+
+Used by:
+  - cdm.insert_new_cdms (cdm.py → update_cdm_data)
+
+cdm.py used to run one `INSERT ... ON CONFLICT` per CDM, with a dateutil
+parse per timestamp and a datetime.now() per row, and reported bad records
+with tqdm.write. Tens of thousands of CDMs meant tens of thousands of round
+trips.
+
+Approach:
+  - parse_cdm_times() parses a whole column at once: Space-Track writes
+    CREATED / TCA as ISO 8601 without a zone ("2024-01-15 12:34:56.123000"
+    or with a "T"), which NumPy's datetime64 parser reads in C. Only when
+    a column holds something else does it fall back to one value at a
+    time, leaving NaT for the unparseable ones.
+  - prepare_cdms() validates column by column and returns the staged rows
+    (CDM_COLUMNS order) plus CDMReject records with a reason each, instead
+    of skipping silently. Repeated CDM_IDs keep the latest CREATED, so
+    the merge never touches a row twice. is_active is not staged: readers
+    evaluate `tca >= NOW()` (migrations/010_cdm_expiry.sql).
+  - ingest_cdms() COPYs the rows into a temp copy of cdm_events
+    (services/copy_stream.py, binary where the column types allow) and
+    merges with one change-only upsert (services/satellite_upsert.py),
+    then writes the rejects to `cdm_rejects`
+    (migrations/009_cdm_rejects.sql) with execute_values and prunes the
+    ones older than CDM_REJECT_RETENTION_DAYS.
+"""
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+from psycopg2.extras import execute_values
+
+try:
+    from services.copy_stream import binary_copy_types, copy_rows
+    from services.satellite_upsert import UpsertCounts, change_only_upsert
+except ImportError:
+    from app.services.copy_stream import binary_copy_types, copy_rows
+    from app.services.satellite_upsert import UpsertCounts, change_only_upsert
+
+CDM_REJECT_RETENTION_DAYS = int(os.getenv("CDM_REJECT_RETENTION_DAYS", "30"))
+
+# cdm_events column ← CDM field, in staging / merge order.
+CDM_COLUMNS = (
+    "cdm_id", "created", "tca", "min_rng", "pc",
+    "sat_1_id", "sat_1_name", "sat_1_type", "sat_1_rcs", "sat_1_excl_vol",
+    "sat_2_id", "sat_2_name", "sat_2_type", "sat_2_rcs", "sat_2_excl_vol",
+    "emergency_reportable",
+)
+_INT_FIELDS = {"cdm_id": "CDM_ID", "sat_1_id": "SAT_1_ID", "sat_2_id": "SAT_2_ID"}
+_FLOAT_FIELDS = {"min_rng": "MIN_RNG", "pc": "PC"}
+_NAME_FIELDS = {"sat_1_name": "SAT_1_NAME", "sat_1_type": "SAT1_OBJECT_TYPE",
+                "sat_2_name": "SAT_2_NAME", "sat_2_type": "SAT2_OBJECT_TYPE"}
+
+
+@dataclass
+class CDMReject:
+    cdm_id: int | None
+    reason: str
+    record: dict
+
+
+@dataclass
+class CDMIngestResult:
+    counts: UpsertCounts
+    rejected: int
+    duplicates: int
+
+
+# ---------------------------------------------------------------------------
+# Bulk parsing / validation
+# ---------------------------------------------------------------------------
+
+def parse_cdm_times(values: Sequence) -> np.ndarray:
+    """datetime64[us] (UTC) for a column of Space-Track timestamps; NaT where missing or bad."""
+    text = np.array([v if isinstance(v, str) and v else "NaT" for v in values], dtype=str)
+    text = np.char.replace(text, " ", "T")
+    try:
+        return text.astype("datetime64[us]")
+    except ValueError:
+        pass
+    parsed = np.full(len(text), np.datetime64("NaT"), dtype="datetime64[us]")
+    for i, value in enumerate(text):
+        try:
+            parsed[i] = np.datetime64(value, "us")
+        except ValueError:
+            pass
+    return parsed
+
+
+def _ints(values: list) -> list:
+    out = []
+    for v in values:
+        try:
+            out.append(int(v) if v not in (None, "") else None)
+        except (TypeError, ValueError):
+            out.append(None)
+    return out
+
+
+def _floats(values: list) -> list:
+    out = []
+    for v in values:
+        try:
+            out.append(float(v) if v not in (None, "") else None)
+        except (TypeError, ValueError):
+            out.append(None)
+    return out
+
+
+def prepare_cdms(records: Sequence[dict]) -> tuple[list[tuple], list[CDMReject], int]:
+    """(rows in CDM_COLUMNS order, rejects, duplicates dropped) for raw cdm_public records.
+
+    A record is rejected when a timestamp is missing or unparseable, an ID
+    is missing or not an integer, MIN_RNG / PC is missing or not a number,
+    or a name / object type is null. Optional fields default as before:
+    RCS "Unknown", exclusion volumes 0.0.
+    """
+    n = len(records)
+    if not n:
+        return [], [], 0
+
+    def field(key, default=None):
+        return [r.get(key, default) for r in records]
+
+    created = parse_cdm_times(field("CREATED"))
+    tca = parse_cdm_times(field("TCA"))
+    ints = {col: _ints(field(key)) for col, key in _INT_FIELDS.items()}
+    floats = {col: _floats(field(key)) for col, key in _FLOAT_FIELDS.items()}
+    names = {col: field(key, "Unknown") for col, key in _NAME_FIELDS.items()}
+
+    reasons: list[list[str]] = [[] for _ in range(n)]
+    for i in np.flatnonzero(np.isnat(created)):
+        reasons[i].append("missing CREATED" if not records[i].get("CREATED") else "bad CREATED")
+    for i in np.flatnonzero(np.isnat(tca)):
+        reasons[i].append("missing TCA" if not records[i].get("TCA") else "bad TCA")
+    for fields, source in ((ints, _INT_FIELDS), (floats, _FLOAT_FIELDS), (names, _NAME_FIELDS)):
+        for col, values in fields.items():
+            for i, v in enumerate(values):
+                if v is None:
+                    reasons[i].append(f"{'missing' if records[i].get(source[col]) in (None, '') else 'bad'} "
+                                      f"{source[col]}")
+
+    created_text = np.datetime_as_string(created, unit="us", timezone="UTC").tolist()
+    tca_text = np.datetime_as_string(tca, unit="us", timezone="UTC").tolist()
+    excl_1 = _floats(field("SAT_1_EXCL_VOL"))
+    excl_2 = _floats(field("SAT_2_EXCL_VOL"))
+
+    rejects = []
+    latest: dict[int, int] = {}  # cdm_id → index of the row kept
+    for i, record in enumerate(records):
+        if reasons[i]:
+            rejects.append(CDMReject(ints["cdm_id"][i], "; ".join(reasons[i]), record))
+            continue
+        kept = latest.get(ints["cdm_id"][i])
+        if kept is None or created[i] >= created[kept]:
+            latest[ints["cdm_id"][i]] = i
+    duplicates = n - len(rejects) - len(latest)
+
+    rows = [
+        (
+            ints["cdm_id"][i], created_text[i], tca_text[i], floats["min_rng"][i], floats["pc"][i],
+            ints["sat_1_id"][i], names["sat_1_name"][i], names["sat_1_type"][i],
+            records[i].get("SAT1_RCS", "Unknown"), excl_1[i] or 0.0,
+            ints["sat_2_id"][i], names["sat_2_name"][i], names["sat_2_type"][i],
+            records[i].get("SAT2_RCS", "Unknown"), excl_2[i] or 0.0,
+            records[i].get("EMERGENCY_REPORTABLE") == "Y",
+        )
+        for i in sorted(latest.values())
+    ]
+    return rows, rejects, duplicates
+
+
+# ---------------------------------------------------------------------------
+# Load + merge
+# ---------------------------------------------------------------------------
+
+def store_rejects(cursor, rejects: Sequence[CDMReject]) -> None:
+    """Append `rejects` to cdm_rejects and prune the expired ones (the caller commits)."""
+    if rejects:
+        execute_values(cursor, """
+            INSERT INTO cdm_rejects (cdm_id, reason, record) VALUES %s
+        """, [(r.cdm_id, r.reason, json.dumps(r.record, default=str)) for r in rejects],
+            template="(%s, %s, %s::jsonb)", page_size=1000)
+    cursor.execute("DELETE FROM cdm_rejects WHERE rejected_at < NOW() - make_interval(days => %s);",
+                   (CDM_REJECT_RETENTION_DAYS,))
+
+
+def ingest_cdms(conn, records: Sequence[dict]) -> CDMIngestResult:
+    """Validate, stage and merge `records` into cdm_events in one transaction."""
+    rows, rejects, duplicates = prepare_cdms(records)
+    counts = UpsertCounts()
+    with conn.cursor() as cursor:
+        if rows:
+            cursor.execute(f"""
+                CREATE TEMP TABLE temp_cdm_events ON COMMIT DROP AS
+                SELECT {', '.join(CDM_COLUMNS)} FROM cdm_events WITH NO DATA;
+            """)
+            types = binary_copy_types(cursor, "temp_cdm_events", CDM_COLUMNS)
+            copy_rows(cursor, "temp_cdm_events", CDM_COLUMNS, rows, types)
+            counts = change_only_upsert(cursor, "cdm_events", "temp_cdm_events", CDM_COLUMNS,
+                                        staged=len(rows), key="cdm_id")
+        store_rejects(cursor, rejects)
+    conn.commit()
+    return CDMIngestResult(counts=counts, rejected=len(rejects), duplicates=duplicates)
@@ -0,0 +1,165 @@
+"""Our own TCA / miss distance for Space-Track CDM pairs, from our TLEs.
+
+Used by:
+  - cdm.refine_active_cdms (after each TLE run and each CDM pull)
+
+Each CDM only carries Space-Track's TCA, MIN_RNG and PC. This module
+re-derives the encounter from the element sets in `satellites`, so events
+can be checked (and drift tracked) as new TLEs arrive.
+
+Approach, vectorized over every pair in a chunk:
+  1. Coarse scan. Both objects are propagated on a grid of ±window seconds
+     around the CDM TCA (one sgp4_array call per object via
+     propagate_points). The grid minimum brackets the closest approach to
+     ±one grid step.
+  2. Golden-section search on the distance inside that bracket, stepped for
+     all pairs at once until the bracket is below CDM_REFINE_TOLERANCE_S.
+  3. Chunks of pairs go to a process pool. Each chunk carries its own TLE
+     text, so workers don't share state.
+"""
+from __future__ import annotations
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import numpy as np
+
+try:
+    from services.propagation import parse_catalog, propagate_points, unix_julian_dates
+except ImportError:
+    from app.services.propagation import parse_catalog, propagate_points, unix_julian_dates
+
+CDM_REFINE_WINDOW_SECONDS = float(os.getenv("CDM_REFINE_WINDOW_SECONDS", "600"))
+CDM_REFINE_SCAN_STEP_SECONDS = float(os.getenv("CDM_REFINE_SCAN_STEP_SECONDS", "10"))
+CDM_REFINE_TOLERANCE_S = 1e-3
+CDM_REFINE_WORKERS = int(os.getenv("CDM_REFINE_WORKERS", str(os.cpu_count() or 1)))
+CDM_REFINE_CHUNK_SIZE = int(os.getenv("CDM_REFINE_CHUNK_SIZE", "500"))
+
+_INV_PHI = (math.sqrt(5.0) - 1.0) / 2.0
+
+
+@dataclass
+class Refinement:
+    tca: datetime
+    miss_distance_km: float
+    relative_speed_km_s: float
+
+
+def _separation(catalog, rows_1, rows_2, t):
+    jd, fr = unix_julian_dates(np.concatenate([t, t]))
+    e, r, v = propagate_points(catalog, np.concatenate([rows_1, rows_2]), jd, fr)
+    k = len(rows_1)
+    ok = (e[:k] == 0) & (e[k:] == 0)
+    dist = np.linalg.norm(r[:k] - r[k:], axis=1)
+    speed = np.linalg.norm(v[:k] - v[k:], axis=1)
+    return np.where(ok, dist, np.inf), speed
+
+
+def closest_approach(catalog, rows_1, rows_2, t_center,
+                     window_s: float = CDM_REFINE_WINDOW_SECONDS,
+                     scan_step_s: float = CDM_REFINE_SCAN_STEP_SECONDS,
+                     tolerance_s: float = CDM_REFINE_TOLERANCE_S):
+    """Closest approach of catalog rows rows_1[k] / rows_2[k] near t_center[k].
+
+    Returns (tca unix seconds, miss km, relative speed km/s). Rows that
+    fail to propagate come back as NaN.
+    """
+    rows_1 = np.asarray(rows_1, dtype=np.int64)
+    rows_2 = np.asarray(rows_2, dtype=np.int64)
+    t_center = np.asarray(t_center, dtype=np.float64)
+    k = len(rows_1)
+    if k == 0:
+        return np.zeros(0), np.zeros(0), np.zeros(0)
+
+    # 1) coarse scan — one flat batch of K × S points
+    offsets = np.arange(-window_s, window_s + scan_step_s / 2, scan_step_s)
+    s = len(offsets)
+    grid = (t_center[:, None] + offsets[None, :]).ravel()
+    dist, _ = _separation(catalog, np.repeat(rows_1, s), np.repeat(rows_2, s), grid)
+    dist = dist.reshape(k, s)
+    best = np.argmin(dist, axis=1)
+    found = np.isfinite(dist[np.arange(k), best])
+    lo = t_center + offsets[np.maximum(best - 1, 0)]
+    hi = t_center + offsets[np.minimum(best + 1, s - 1)]
+
+    # 2) golden section, all pairs in lockstep
+    c = hi - _INV_PHI * (hi - lo)
+    d = lo + _INV_PHI * (hi - lo)
+    fc, _ = _separation(catalog, rows_1, rows_2, c)
+    fd, _ = _separation(catalog, rows_1, rows_2, d)
+    iterations = math.ceil(math.log(tolerance_s / (2 * scan_step_s)) / math.log(_INV_PHI))
+    for _ in range(max(iterations, 0)):
+        left = fc < fd  # minimum lies in [lo, d]: d becomes the new hi
+        hi = np.where(left, d, hi)
+        lo = np.where(left, lo, c)
+        probe = np.where(left, hi - _INV_PHI * (hi - lo), lo + _INV_PHI * (hi - lo))
+        f_probe, _ = _separation(catalog, rows_1, rows_2, probe)
+        c, d = np.where(left, probe, d), np.where(left, c, probe)
+        fc, fd = np.where(left, f_probe, fd), np.where(left, fc, f_probe)
+
+    tca = (lo + hi) / 2.0
+    miss, speed = _separation(catalog, rows_1, rows_2, tca)
+    bad = ~found | ~np.isfinite(miss)
+    return np.where(bad, np.nan, tca), np.where(bad, np.nan, miss), np.where(bad, np.nan, speed)
+
+
+# ---------------------------------------------------------------------------
+# Batch entry point
+# ---------------------------------------------------------------------------
+
+def refine_chunk(chunk):
+    """Refine [(tle_1, tle_2, tca unix seconds), ...]; returns aligned
+    (tca, miss, speed) tuples, or None where a TLE failed to parse."""
+    catalog = parse_catalog([pair for tle_1, tle_2, _ in chunk for pair in (tle_1, tle_2)])
+    row_of = {int(pos): row for row, pos in enumerate(catalog.index)}
+    usable = [n for n in range(len(chunk)) if 2 * n in row_of and 2 * n + 1 in row_of]
+
+    out = [None] * len(chunk)
+    if not usable:
+        return out
+    tca, miss, speed = closest_approach(
+        catalog,
+        [row_of[2 * n] for n in usable],
+        [row_of[2 * n + 1] for n in usable],
+        [chunk[n][2] for n in usable],
+    )
+    for n, t, m, v in zip(usable, tca, miss, speed):
+        if np.isfinite(t):
+            out[n] = (float(t), float(m), float(v))
+    return out
+
+
+def refine_events(events, workers: int = CDM_REFINE_WORKERS,
+                  chunk_size: int = CDM_REFINE_CHUNK_SIZE) -> list[Refinement | None]:
+    """Refine (tle_1, tle_2, cdm_tca) triples; tle_* are (line1, line2).
+
+    Returns a list aligned with `events`, None where either element set is
+    unusable. Chunks run on a process pool when workers > 1.
+    """
+    items = []
+    for tle_1, tle_2, tca in events:
+        if tca.tzinfo is None:
+            tca = tca.replace(tzinfo=timezone.utc)
+        items.append((tuple(tle_1), tuple(tle_2), tca.timestamp()))
+    if not items:
+        return []
+
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    workers = max(1, min(workers, len(chunks)))
+    if workers == 1:
+        packed = [refine_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            packed = list(executor.map(refine_chunk, chunks))
+
+    return [
+        None if r is None else Refinement(
+            tca=datetime.fromtimestamp(r[0], tz=timezone.utc),
+            miss_distance_km=r[1],
+            relative_speed_km_s=r[2],
+        )
+        for chunk in packed for r in chunk
+    ]
@@ -0,0 +1,317 @@
+"""Streaming COPY FROM STDIN: rows encoded on demand into a file-like object.
+
+Used by:
+  - tle_processor.copy_rows (history / active / inactive staging tables)
+
+The updater used to write every staging batch to a NamedTemporaryFile CSV,
+reopen it and hand that to copy_expert: each row went through csv.writer,
+hit the disk, and came back. CopyStream instead is a read-only binary file
+whose bytes are produced by a generator of rows, so copy_expert pulls
+encoded rows straight into the COPY stream as it reads.
+
+Approach:
+  - Postgres' text COPY format (tab-separated, `\\N` for NULL, backslash
+    escapes), which needs no quoting state and no header.
+  - encode_value() maps Python values onto it: None and "" → `\\N` (an
+    unquoted empty CSV field was NULL too, so date columns fed from GP
+    strings keep loading), datetimes and dates → ISO 8601 (timestamptz
+    keeps its offset; naive datetimes are read in the session time zone,
+    as before), bools → t/f, NaN / ±inf → NaN / Infinity / -Infinity,
+    text with tabs, newlines or backslashes escaped.
+  - CopyStream buffers at most one read() worth of encoded rows.
+  - BinaryCopyStream speaks `COPY ... (FORMAT binary)` instead: the
+    server copies float8 / int / timestamp fields as they are rather than
+    parsing ~40 decimal strings per satellite row. Binary fields must match
+    the column types exactly, so binary_copy_types() reads them from
+    pg_attribute and returns None (→ text) when one is not supported.
+    Rows are encoded a batch at a time, column by column: fixed-width
+    columns are packed with NumPy into length-prefixed big-endian fields
+    in one pass, then the fields are interleaved into tuples.
+"""
+from __future__ import annotations
+
+import io
+import math
+import os
+import struct
+from datetime import date, datetime, timedelta, timezone
+from itertools import chain, islice, repeat
+from typing import Iterable, Iterator, Sequence
+
+import numpy as np
+
+# "binary" sends staging rows in COPY's binary format where every target
+# column type is supported; "text" always uses the text format.
+COPY_FORMAT = os.getenv("COPY_FORMAT", "binary")
+# Rows encoded per column-wise pass of the binary encoder.
+BINARY_COPY_BATCH_ROWS = int(os.getenv("BINARY_COPY_BATCH_ROWS", "5000"))
+
+NULL = "\\N"
+
+# Backslash first, so the escapes added after it are not doubled.
+_ESCAPES = (("\\", "\\\\"), ("\t", "\\t"), ("\n", "\\n"), ("\r", "\\r"))
+_SPECIAL = frozenset("\\\t\n\r")
+
+
+def encode_value(value) -> str:
+    """One field in COPY text format."""
+    if value is None or value == "":
+        return NULL
+    if isinstance(value, str):
+        if _SPECIAL.isdisjoint(value):
+            return value
+        for raw, escaped in _ESCAPES:
+            value = value.replace(raw, escaped)
+        return value
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):  # numpy.float64 included; repr(float(...)) round-trips
+        if math.isfinite(value):
+            return repr(float(value))
+        if math.isnan(value):
+            return "NaN"
+        return "Infinity" if value > 0 else "-Infinity"
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return encode_value(str(value))  # numpy scalars, Decimal, ...
+
+
+def encode_row(values: Sequence) -> str:
+    """One COPY text-format line, newline included."""
+    return "\t".join([encode_value(v) for v in values]) + "\n"
+
+
+class CopyStream(io.RawIOBase):
+    """Read-only binary file over the COPY text encoding of `rows`.
+
+    `rows` may be any iterable (a generator included); it is consumed as
+    the reader asks for bytes. `rows_written` counts rows encoded so far.
+    """
+
+    def __init__(self, rows: Iterable[Sequence], encoding: str = "utf-8"):
+        self._rows: Iterator[Sequence] = iter(rows)
+        self._encoding = encoding
+        self._buffer = bytearray()
+        self.rows_written = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        want = len(buffer)
+        if len(self._buffer) < want:
+            lines = []
+            size = len(self._buffer)
+            for row in self._rows:
+                line = encode_row(row).encode(self._encoding)
+                lines.append(line)
+                size += len(line)
+                self.rows_written += 1
+                if size >= want:
+                    break
+            self._buffer += b"".join(lines)
+        n = min(want, len(self._buffer))
+        buffer[:n] = self._buffer[:n]
+        del self._buffer[:n]
+        return n
+
+
+# ---------------------------------------------------------------------------
+# Binary format
+# ---------------------------------------------------------------------------
+
+class BinaryCopyUnsupported(ValueError):
+    """A target column type the binary encoder does not handle."""
+
+
+PG_EPOCH = datetime(2000, 1, 1, tzinfo=timezone.utc)
+PG_EPOCH_NAIVE = datetime(2000, 1, 1)
+PG_EPOCH_DATE = date(2000, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+BINARY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+BINARY_HEADER = BINARY_SIGNATURE + struct.pack(">ii", 0, 0)  # flags, header extension length
+BINARY_TRAILER = struct.pack(">h", -1)
+_LENGTH = struct.Struct(">i")
+_NULL_FIELD = _LENGTH.pack(-1)
+
+# pg_type.typname → big-endian NumPy dtype of the wire value.
+_FIXED_TYPES = {
+    "float8": ">f8", "float4": ">f4",
+    "int8": ">i8", "int4": ">i4", "int2": ">i2",
+    "bool": "?",
+}
+_TEXT_TYPES = frozenset({"text", "varchar", "bpchar", "name"})
+BINARY_TYPES = frozenset(_FIXED_TYPES) | _TEXT_TYPES | {"timestamptz", "timestamp", "date"}
+
+
+def _null_mask(values: list) -> np.ndarray | None:
+    """True where a value loads as NULL (None or ""), or None when nothing does."""
+    if None not in values and "" not in values:
+        return None
+    return np.fromiter((v is None or v == "" for v in values), dtype=bool, count=len(values))
+
+
+def _fixed_fields(values: list, dtype: str) -> list[bytes]:
+    """Length-prefixed fields for a fixed-width column, packed by NumPy in one pass."""
+    nulls = _null_mask(values)
+    if nulls is not None:
+        values = [0 if null else v for v, null in zip(values, nulls)]
+    dtype = np.dtype(dtype)
+    packed = np.empty(len(values), dtype=[("length", ">i4"), ("value", dtype)])
+    packed["length"] = dtype.itemsize
+    packed["value"] = values
+    fields = packed.view(f"V{4 + dtype.itemsize}").tolist()
+    if nulls is not None:
+        for i in np.flatnonzero(nulls):
+            fields[i] = _NULL_FIELD
+    return fields
+
+
+def _as_datetime(value) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    elif not isinstance(value, datetime):  # a bare date
+        value = datetime(value.year, value.month, value.day)
+    return value
+
+
+def _timestamptz_micros(value) -> int:
+    value = _as_datetime(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - PG_EPOCH) // _MICROSECOND
+
+
+def _timestamp_micros(value) -> int:
+    # Wall-clock time, like the text format: an offset is dropped, not applied.
+    return (_as_datetime(value).replace(tzinfo=None) - PG_EPOCH_NAIVE) // _MICROSECOND
+
+
+def _date_days(value) -> int:
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    elif isinstance(value, datetime):
+        value = value.date()
+    return (value - PG_EPOCH_DATE).days
+
+
+def _converted_fields(values: list, convert, dtype: str) -> list[bytes]:
+    return _fixed_fields([None if v is None or v == "" else convert(v) for v in values], dtype)
+
+
+def _text_fields(values: list) -> list[bytes]:
+    fields = []
+    for v in values:
+        if v is None or v == "":
+            fields.append(_NULL_FIELD)
+            continue
+        data = (v if isinstance(v, str) else str(v)).encode("utf-8")
+        fields.append(_LENGTH.pack(len(data)) + data)
+    return fields
+
+
+def encode_column(values: list, typname: str) -> list[bytes]:
+    """Length-prefixed binary fields for one column of `typname` values."""
+    if typname in _FIXED_TYPES:
+        return _fixed_fields(values, _FIXED_TYPES[typname])
+    if typname in _TEXT_TYPES:
+        return _text_fields(values)
+    if typname == "timestamptz":
+        return _converted_fields(values, _timestamptz_micros, ">i8")
+    if typname == "timestamp":
+        return _converted_fields(values, _timestamp_micros, ">i8")
+    if typname == "date":
+        return _converted_fields(values, _date_days, ">i4")
+    raise BinaryCopyUnsupported(f"no binary COPY encoder for column type {typname!r}")
+
+
+def encode_binary_rows(rows: Sequence[Sequence], types: Sequence[str]) -> bytes:
+    """Binary COPY tuples for `rows` (no header / trailer), encoded column by column."""
+    if not rows:
+        return b""
+    columns = list(zip(*rows))
+    if len(columns) != len(types):
+        raise BinaryCopyUnsupported(f"rows have {len(columns)} fields, expected {len(types)}")
+    fields = [encode_column(list(values), typname) for values, typname in zip(columns, types)]
+    count = struct.pack(">h", len(types))
+    return b"".join(chain.from_iterable(zip(repeat(count, len(rows)), *fields)))
+
+
+class BinaryCopyStream(io.RawIOBase):
+    """Read-only binary file over `COPY ... (FORMAT binary)` data for `rows`.
+
+    `types` are the pg_type names of the target columns, in row order.
+    Rows are encoded BINARY_COPY_BATCH_ROWS at a time as the reader asks
+    for bytes; `rows_written` counts rows encoded so far.
+    """
+
+    def __init__(self, rows: Iterable[Sequence], types: Sequence[str],
+                 batch_rows: int = BINARY_COPY_BATCH_ROWS):
+        self._blocks = self._generate(iter(rows), list(types), batch_rows)
+        self._buffer = bytearray()
+        self.rows_written = 0
+
+    def _generate(self, rows, types, batch_rows):
+        yield BINARY_HEADER
+        while True:
+            batch = list(islice(rows, batch_rows))
+            if not batch:
+                break
+            yield encode_binary_rows(batch, types)
+            self.rows_written += len(batch)
+        yield BINARY_TRAILER
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        want = len(buffer)
+        while len(self._buffer) < want:
+            block = next(self._blocks, None)
+            if block is None:
+                break
+            self._buffer += block
+        n = min(want, len(self._buffer))
+        buffer[:n] = self._buffer[:n]
+        del self._buffer[:n]
+        return n
+
+
+def binary_copy_types(cursor, table: str, columns: Sequence[str]) -> list[str] | None:
+    """pg_type names of `columns` in `table` for a binary COPY, or None to use text.
+
+    None when COPY_FORMAT is "text" or any column has a type the binary
+    encoder does not handle (e.g. numeric), so callers can pass the result
+    straight to copy_rows.
+    """
+    if COPY_FORMAT != "binary":
+        return None
+    cursor.execute("""
+        SELECT a.attname, t.typname
+        FROM pg_attribute a JOIN pg_type t ON t.oid = a.atttypid
+        WHERE a.attrelid = %s::regclass AND a.attnum > 0 AND NOT a.attisdropped
+    """, (table,))
+    types = {row["attname"]: row["typname"] for row in cursor.fetchall()}  # RealDictCursor rows
+    if any(types.get(column) not in BINARY_TYPES for column in columns):
+        return None
+    return [types[column] for column in columns]
+
+
+def copy_rows(cursor, table: str, columns: Sequence[str], rows: Iterable[Sequence],
+              types: Sequence[str] | None = None) -> int:
+    """COPY `rows` (in `columns` order) into `table`; returns the row count.
+
+    With `types` (from binary_copy_types) the rows go over the binary
+    format, otherwise as text.
+    """
+    column_list = ", ".join(columns)
+    if types is None:
+        stream = CopyStream(rows)
+        cursor.copy_expert(f"COPY {table} ({column_list}) FROM STDIN;", stream)
+    else:
+        stream = BinaryCopyStream(rows, types)
+        cursor.copy_expert(f"COPY {table} ({column_list}) FROM STDIN (FORMAT binary);", stream)
+    return stream.rows_written
@@ -0,0 +1,209 @@
+"""Ground coverage heatmap: how many satellites are above each lat/lon cell.
+
+Used by:
+  - GET /api/satellites/coverage (api/satellites.py)
+
+For every cell centre of a regular grid, count the satellites matching a
+filter that are at least `min_elevation` degrees above the horizon at one
+instant.
+
+Approach:
+  - Positions come from positions.compute_positions (ephemeris table or one
+    SatrecArray call, then ECEF), the same path the globe uses.
+  - On a spherical Earth, a satellite at geocentric radius r is above
+    elevation ε exactly where the central angle to its sub-point is at most
+        ψ = arccos(R / r · cos ε) - ε.
+    So each satellite covers a spherical cap. No (cell × satellite)
+    elevation matrix is needed.
+  - Caps are rasterized row by row: for each grid row inside a cap, the
+    spherical law of cosines gives the longitude half-width covered. Every
+    (satellite, row) span becomes a +1 / -1 in one difference array; one
+    bincount + cumsum yields the whole grid. Spans that cross the
+    antimeridian fold back onto the row.
+
+Cost is O(satellites × rows per cap), not O(satellites × cells): about
+2M spans for 30k objects at 1°.
+
+The uint16 count grid is cached per (filter, COVERAGE_BUCKET_SECONDS
+bucket, resolution, min elevation) — 2 bytes a cell, 2 MB at 0.25° — and
+encoded per request, so JSON and binary clients share one computation.
+
+Binary layout (little-endian, version 1):
+  header : 4s magic b"SCOV", u16 version, u16 nlat, u16 nlon, u16 reserved,
+           f64 unix seconds, f32 resolution deg, f32 min elevation deg,
+           u32 satellites counted
+  body   : u16 counts[nlat * nlon], row-major from (-90, -180) upward / eastward
+"""
+from __future__ import annotations
+
+import math
+import os
+import struct
+from datetime import datetime, timezone
+
+import numpy as np
+
+try:
+    from services.catalog import params_key
+    from services.lru import LRUCache
+    from services.positions import bucket_time, compute_positions
+except ImportError:
+    from app.services.catalog import params_key
+    from app.services.lru import LRUCache
+    from app.services.positions import bucket_time, compute_positions
+
+COVERAGE_BUCKET_SECONDS = int(os.getenv("COVERAGE_BUCKET_SECONDS", "60"))
+COVERAGE_CACHE_SIZE = int(os.getenv("COVERAGE_CACHE_SIZE", "64"))
+MIN_RESOLUTION_DEG = 0.25
+MAX_RESOLUTION_DEG = 10.0
+
+EARTH_MEAN_RADIUS_KM = 6371.0088
+
+FORMATS = ("json", "bin")
+
+BINARY_MAGIC = b"SCOV"
+BINARY_VERSION = 1
+_HEADER = struct.Struct("<4sHHHHdffI")
+
+_cache = LRUCache(COVERAGE_CACHE_SIZE)  # → (satellites counted, uint16 counts)
+
+
+class CoverageError(ValueError):
+    """Resolution that doesn't tile 180°, elevation mask outside [0, 90), or unknown format."""
+
+
+def grid_shape(resolution_deg: float) -> tuple[int, int]:
+    """(nlat, nlon) for a resolution that tiles 180° evenly."""
+    if not MIN_RESOLUTION_DEG <= resolution_deg <= MAX_RESOLUTION_DEG:
+        raise CoverageError(f"resolution must be between {MIN_RESOLUTION_DEG} and {MAX_RESOLUTION_DEG} degrees")
+    nlat = round(180.0 / resolution_deg)
+    if abs(nlat * resolution_deg - 180.0) > 1e-9:
+        raise CoverageError("resolution must divide 180 degrees evenly")
+    return nlat, 2 * nlat
+
+
+def cell_centers(resolution_deg: float) -> tuple[np.ndarray, np.ndarray]:
+    """Latitudes (south → north) and longitudes (west → east) of cell centres, degrees."""
+    nlat, nlon = grid_shape(resolution_deg)
+    return (-90.0 + resolution_deg * (np.arange(nlat) + 0.5),
+            -180.0 + resolution_deg * (np.arange(nlon) + 0.5))
+
+
+def footprint_radius(radius_km, min_elevation_deg: float) -> np.ndarray:
+    """Central angle (rad) of the cap seen above min_elevation from radius_km."""
+    eps = math.radians(min_elevation_deg)
+    ratio = np.clip(EARTH_MEAN_RADIUS_KM / np.asarray(radius_km, dtype=np.float64) * math.cos(eps), -1.0, 1.0)
+    return np.maximum(np.arccos(ratio) - eps, 0.0)
+
+
+def coverage_counts(ecef_km: np.ndarray, resolution_deg: float = 1.0,
+                    min_elevation_deg: float = 10.0) -> np.ndarray:
+    """uint32 (nlat, nlon) satellite counts for ECEF positions (N, 3) km."""
+    nlat, nlon = grid_shape(resolution_deg)
+    res = math.radians(resolution_deg)
+    ecef_km = np.asarray(ecef_km, dtype=np.float64).reshape(-1, 3)
+    r = np.linalg.norm(ecef_km, axis=1)
+    keep = r > EARTH_MEAN_RADIUS_KM
+    ecef_km, r = ecef_km[keep], r[keep]
+    psi = footprint_radius(r, min_elevation_deg)
+    keep = psi > 0
+    ecef_km, r, psi = ecef_km[keep], r[keep], psi[keep]
+    if len(r) == 0:
+        return np.zeros((nlat, nlon), dtype=np.uint32)
+
+    lat_s = np.arcsin(ecef_km[:, 2] / r)
+    lon_s = np.arctan2(ecef_km[:, 1], ecef_km[:, 0])
+
+    # Rows whose centre latitude lies within ψ of the sub-point.
+    first = np.clip(np.ceil((lat_s - psi + math.pi / 2) / res - 0.5), 0, nlat).astype(np.int64)
+    last = np.clip(np.floor((lat_s + psi + math.pi / 2) / res - 0.5), -1, nlat - 1).astype(np.int64)
+    n_rows = np.maximum(last - first + 1, 0)
+    sat = np.repeat(np.arange(len(r)), n_rows)
+    row = first[sat] + (np.arange(len(sat)) - np.repeat(np.cumsum(n_rows) - n_rows, n_rows))
+    lat_r = -math.pi / 2 + res * (row + 0.5)
+
+    # Longitude half-width of the cap on that row (spherical law of cosines).
+    with np.errstate(divide="ignore", invalid="ignore"):
+        q = (np.cos(psi[sat]) - np.sin(lat_r) * np.sin(lat_s[sat])) / (np.cos(lat_r) * np.cos(lat_s[sat]))
+    half = np.where(q <= -1.0, math.pi, np.arccos(np.clip(q, -1.0, 1.0)))
+    covered = q <= 1.0
+    sat, row, half = sat[covered], row[covered], half[covered]
+
+    # Columns whose centre longitude is within `half` of the sub-point, as
+    # [start, start + length) on an unwrapped row of 2 * nlon.
+    west = lon_s[sat] - half + math.pi
+    start = np.ceil(west / res - 0.5).astype(np.int64)
+    stop = np.floor((lon_s[sat] + half + math.pi) / res - 0.5).astype(np.int64) + 1
+    length = np.clip(stop - start, 0, nlon)
+    start = np.mod(start, nlon)
+
+    width = 2 * nlon + 1
+    base = row * width
+    diff = np.bincount(base + start, minlength=nlat * width)
+    diff -= np.bincount(base + start + length, minlength=nlat * width)
+    cum = np.cumsum(diff.reshape(nlat, width), axis=1)
+    return (cum[:, :nlon] + cum[:, nlon:2 * nlon]).astype(np.uint32)
+
+
+# ---------------------------------------------------------------------------
+# Encodings + cached entry point
+# ---------------------------------------------------------------------------
+
+def encode_json(when: datetime, resolution_deg: float, min_elevation_deg: float,
+                satellites: int, counts: np.ndarray) -> dict:
+    nlat, nlon = counts.shape
+    return {
+        "t": when.isoformat(),
+        "resolution": resolution_deg,
+        "min_elevation": min_elevation_deg,
+        "satellites": satellites,
+        "nlat": nlat,
+        "nlon": nlon,
+        "lat0": -90.0 + resolution_deg / 2,
+        "lon0": -180.0 + resolution_deg / 2,
+        "max": int(counts.max()) if counts.size else 0,
+        "counts": counts.ravel().tolist(),  # row-major, south → north, west → east
+    }
+
+
+def encode_binary(when: datetime, resolution_deg: float, min_elevation_deg: float,
+                  satellites: int, counts: np.ndarray) -> bytes:
+    nlat, nlon = counts.shape
+    header = _HEADER.pack(BINARY_MAGIC, BINARY_VERSION, nlat, nlon, 0, when.timestamp(),
+                          resolution_deg, min_elevation_deg, satellites)
+    return header + np.minimum(counts, 0xFFFF).astype("<u2").tobytes()
+
+
+def decode_binary(blob: bytes) -> dict:
+    """Coverage blob → header fields plus counts as a uint16 (nlat, nlon) grid."""
+    magic, version, nlat, nlon, _, unix_s, resolution, min_elevation, satellites = _HEADER.unpack_from(blob, 0)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError("not a version-1 coverage blob")
+    counts = np.frombuffer(blob, dtype="<u2", count=nlat * nlon, offset=_HEADER.size).reshape(nlat, nlon)
+    return {
+        "t": datetime.fromtimestamp(unix_s, tz=timezone.utc),
+        "resolution": resolution,
+        "min_elevation": min_elevation,
+        "satellites": satellites,
+        "counts": counts,
+    }
+
+
+def get_coverage(where_sql: str, params: tuple | list, t: datetime | None,
+                 resolution_deg: float = 1.0, min_elevation_deg: float = 10.0, fmt: str = "json"):
+    """Cached entry point for the route. Returns a dict (json) or bytes (bin)."""
+    if fmt not in FORMATS:
+        raise CoverageError(f"format must be one of {FORMATS}")
+    if not 0.0 <= min_elevation_deg < 90.0:
+        raise CoverageError("min_elevation must be in [0, 90) degrees")
+    grid_shape(resolution_deg)
+
+    when = bucket_time(t, COVERAGE_BUCKET_SECONDS)
+    key = (where_sql, params_key(params), when, resolution_deg, min_elevation_deg)
+    cached = _cache.get(key)
+    if cached is None:
+        norad, ecef = compute_positions(where_sql, params, when, frame="ecef")
+        counts = coverage_counts(ecef.T, resolution_deg, min_elevation_deg)
+        cached = _cache.put(key, (len(norad), np.minimum(counts, 0xFFFF).astype(np.uint16)))
+    encode = encode_binary if fmt == "bin" else encode_json
+    return encode(when, resolution_deg, min_elevation_deg, *cached)
@@ -0,0 +1,237 @@
+"""Incremental (delta) Space-Track queries driven by a persisted high-water mark.
+
+Used by:
+  - tle_fetch.iter_tle_chunks (tle_processor.py ingestion)
+  - cdm.update_cdm_data (cdm_public, keyed on CREATED)
+
+Every run used to pull the whole GP catalog, although only the few hundred
+objects with a fresh element set since the last run had changed. Space-Track
+stamps each GP record with CREATION_DATE (when that element set was
+published), so "everything created after the newest record we already have"
+is exactly the set of changes.
+
+Approach:
+  - `spacetrack_sync_state` (migrations/008_spacetrack_sync_state.sql)
+    keeps one row per source: the high-water mark (max CREATION_DATE
+    ingested), the max EPOCH seen, and when the last full pull happened.
+  - plan_gp_fetch() picks the query: a delta
+    (`CREATION_DATE/>mark - overlap`) normally, a full catalog pull when
+    there is no mark yet or the last full pull is older than
+    GP_FULL_SYNC_HOURS. The full pull is the periodic reconciliation: it
+    catches anything a delta can miss (records republished with an old
+    CREATION_DATE, objects Space-Track dropped, a lost run).
+  - HighWaterMark watches records as they stream past; next_state()
+    folds it into the stored state, which the caller writes only after the
+    ingestion has committed — a failed run re-asks from the old mark.
+  - The overlap (GP_DELTA_OVERLAP_SECONDS) re-requests a short window
+    before the mark: CREATION_DATE has one-second resolution and records
+    can land in the same second after our query. Re-ingesting them is a
+    no-op (unchanged TLE hashes are skipped).
+
+CDMs work the same way against `class/cdm_public`, with CREATED as the
+mark and a weekly (CDM_FULL_SYNC_HOURS) full pull.
+
+SPACETRACK_BASE_URL points every query at another host, which is how the
+tests replay recorded responses from a local server.
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+from urllib.parse import quote
+
+SPACETRACK_BASE_URL = os.getenv("SPACETRACK_BASE_URL", "https://www.space-track.org").rstrip("/")
+# "auto": deltas plus a periodic full pull; "full": always the whole catalog.
+TLE_FETCH_MODE = os.getenv("TLE_FETCH_MODE", "auto")
+GP_FULL_SYNC_HOURS = float(os.getenv("GP_FULL_SYNC_HOURS", "24"))
+GP_DELTA_OVERLAP_SECONDS = float(os.getenv("GP_DELTA_OVERLAP_SECONDS", "600"))
+CDM_FETCH_MODE = os.getenv("CDM_FETCH_MODE", "auto")
+CDM_FULL_SYNC_HOURS = float(os.getenv("CDM_FULL_SYNC_HOURS", "168"))
+
+FETCH_MODES = ("auto", "full")
+GP_SOURCE = "gp"
+CDM_SOURCE = "cdm"
+
+
+class DeltaSyncError(ValueError):
+    """Unknown fetch mode."""
+
+
+def parse_spacetrack_time(value) -> datetime | None:
+    """UTC datetime from a Space-Track timestamp ("2024-01-15T13:00:00[.ffffff]"), or None."""
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace(" ", "T").rstrip("Z"))
+    except ValueError:
+        return None
+    return parsed.replace(tzinfo=timezone.utc) if parsed.tzinfo is None else parsed.astimezone(timezone.utc)
+
+
+# ---------------------------------------------------------------------------
+# Query planning
+# ---------------------------------------------------------------------------
+
+@dataclass
+class SyncState:
+    high_water: datetime | None = None      # max CREATION_DATE ingested
+    max_epoch: datetime | None = None       # max EPOCH ingested (reporting only)
+    last_full_sync: datetime | None = None
+
+
+@dataclass
+class FetchPlan:
+    mode: str                    # "full" | "delta"
+    url: str
+    since: datetime | None = None
+    fetched_at: datetime | None = None  # set when a cached response is replayed
+
+
+def _created_after(since: datetime, field: str) -> str:
+    since = since.astimezone(timezone.utc)
+    bound = quote(f">{since:%Y-%m-%d %H:%M:%S}", safe=":")
+    return f"{field}/{bound}/orderby/{field}%20asc/format/json"
+
+
+def gp_url(since: datetime | None = None, base_url: str = SPACETRACK_BASE_URL) -> str:
+    """The GP query: the whole catalog, or records created after `since`."""
+    query = f"{base_url}/basicspacedata/query/class/gp"
+    if since is None:
+        return f"{query}/orderby/EPOCH%20desc/format/json"
+    return f"{query}/{_created_after(since, 'CREATION_DATE')}"
+
+
+def cdm_url(since: datetime | None = None, base_url: str = SPACETRACK_BASE_URL) -> str:
+    """The cdm_public query: everything published, or CDMs created after `since`."""
+    query = f"{base_url}/basicspacedata/query/class/cdm_public"
+    if since is None:
+        return f"{query}/format/json"
+    return f"{query}/{_created_after(since, 'CREATED')}"
+
+
+def _plan(state, now, mode, full_sync_hours, overlap_seconds, url) -> FetchPlan:
+    if mode not in FETCH_MODES:
+        raise DeltaSyncError(f"fetch mode must be one of {FETCH_MODES}, got {mode!r}")
+    now = now or datetime.now(timezone.utc)
+    if (
+        mode == "full"
+        or state.high_water is None
+        or state.last_full_sync is None
+        or now - state.last_full_sync >= timedelta(hours=full_sync_hours)
+    ):
+        return FetchPlan("full", url(None))
+    since = state.high_water - timedelta(seconds=overlap_seconds)
+    return FetchPlan("delta", url(since), since)
+
+
+def plan_gp_fetch(
+    state: SyncState,
+    now: datetime | None = None,
+    mode: str = TLE_FETCH_MODE,
+    full_sync_hours: float = GP_FULL_SYNC_HOURS,
+    overlap_seconds: float = GP_DELTA_OVERLAP_SECONDS,
+    base_url: str = SPACETRACK_BASE_URL,
+) -> FetchPlan:
+    """Delta when a recent full pull left a high-water mark, full otherwise."""
+    return _plan(state, now, mode, full_sync_hours, overlap_seconds, lambda since: gp_url(since, base_url))
+
+
+def plan_cdm_fetch(
+    state: SyncState,
+    now: datetime | None = None,
+    mode: str = CDM_FETCH_MODE,
+    full_sync_hours: float = CDM_FULL_SYNC_HOURS,
+    overlap_seconds: float = GP_DELTA_OVERLAP_SECONDS,
+    base_url: str = SPACETRACK_BASE_URL,
+) -> FetchPlan:
+    """plan_gp_fetch for cdm_public."""
+    return _plan(state, now, mode, full_sync_hours, overlap_seconds, lambda since: cdm_url(since, base_url))
+
+
+def fetch_records(session, plan: FetchPlan) -> tuple[int, list | None]:
+    """(HTTP status, decoded JSON list) for a non-streamed query; no list unless 200."""
+    response = session.get(plan.url)
+    if response.status_code != 200:
+        return response.status_code, None
+    return response.status_code, response.json()
+
+
+class HighWaterMark:
+    """Running max creation time (and epoch, if given a field) over the records it is shown.
+
+    The defaults read GP records; CDMs use HighWaterMark("CREATED", None).
+    """
+
+    def __init__(self, created_field: str = "CREATION_DATE", epoch_field: str | None = "EPOCH"):
+        self.created_field = created_field
+        self.epoch_field = epoch_field
+        self.creation: datetime | None = None
+        self.epoch: datetime | None = None
+        self.count = 0
+
+    def observe(self, records: Iterable[dict]) -> None:
+        for record in records:
+            self.count += 1
+            created = parse_spacetrack_time(record.get(self.created_field))
+            if created is not None and (self.creation is None or created > self.creation):
+                self.creation = created
+            if self.epoch_field is None:
+                continue
+            epoch = parse_spacetrack_time(record.get(self.epoch_field))
+            if epoch is not None and (self.epoch is None or epoch > self.epoch):
+                self.epoch = epoch
+
+
+def _later(a: datetime | None, b: datetime | None) -> datetime | None:
+    if a is None or b is None:
+        return a or b
+    return max(a, b)
+
+
+def next_state(state: SyncState, mode: str, mark: HighWaterMark, now: datetime | None = None) -> SyncState:
+    """State after a successful `mode` run that streamed the records in `mark`.
+
+    The mark never moves backwards: an empty delta, or a replayed cache,
+    leaves it where it was. Pass a replayed cache's fetch time as `now`, so
+    the full sync it holds is dated when it was fetched.
+    """
+    now = now or datetime.now(timezone.utc)
+    return SyncState(
+        high_water=_later(state.high_water, mark.creation),
+        max_epoch=_later(state.max_epoch, mark.epoch),
+        last_full_sync=now if mode == "full" else state.last_full_sync,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Persistence
+# ---------------------------------------------------------------------------
+
+def load_sync_state(cursor, source: str = GP_SOURCE) -> SyncState:
+    """Stored state for `source`; an empty SyncState when there is none yet."""
+    cursor.execute(
+        "SELECT high_water, max_epoch, last_full_sync FROM spacetrack_sync_state WHERE source = %s",
+        (source,),
+    )
+    row = cursor.fetchone()  # connections use RealDictCursor
+    if row is None:
+        return SyncState()
+    return SyncState(row["high_water"], row["max_epoch"], row["last_full_sync"])
+
+
+def store_sync_state(cursor, state: SyncState, source: str = GP_SOURCE) -> None:
+    """Upsert the state for `source` (the caller commits)."""
+    cursor.execute(
+        """
+        INSERT INTO spacetrack_sync_state (source, high_water, max_epoch, last_full_sync, updated_at)
+        VALUES (%s, %s, %s, %s, NOW())
+        ON CONFLICT (source) DO UPDATE SET
+            high_water = EXCLUDED.high_water,
+            max_epoch = EXCLUDED.max_epoch,
+            last_full_sync = EXCLUDED.last_full_sync,
+            updated_at = NOW()
+        """,
+        (source, state.high_water, state.max_epoch, state.last_full_sync),
+    )
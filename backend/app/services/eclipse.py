@@ -0,0 +1,91 @@
+"""Sunlight / eclipse state for whole catalogs.
+
+Used by:
+  - services/positions.py  (optional `eclipse` column on GET /api/satellites/positions)
+  - services/passes.py     (sunlit / visible flags on every predicted pass)
+
+variables.py loads de421.bsp for the sun and never uses it for satellites;
+asking skyfield per object would be one ephemeris call per satellite. Here
+the sun is computed once per time step and the shadow test is plain array
+math over every propagated state at that step.
+
+Approach:
+  - sun_position() is the Astronomical Almanac low-precision solar
+    ephemeris (mean longitude + equation of centre), about 0.01° over
+    1950–2050. It gives the geocentric sun in the mean equator and equinox
+    of date; TEME differs from that by nutation only (< 20 arcsec), far
+    below the penumbra width, so it is used directly against TEME states.
+  - shadow() is the conical Earth-shadow model: from the satellite, the
+    sun and the Earth are two discs of apparent radius a and b whose
+    centres are c apart. c ≥ a + b is full sun, c ≤ b - a is umbra, and in
+    between the visible fraction of the solar disc is one minus the
+    circle-overlap area over π a².
+"""
+from __future__ import annotations
+
+import numpy as np
+
+AU_KM = 149597870.7
+SUN_RADIUS_KM = 695700.0
+EARTH_EQUATORIAL_RADIUS_KM = 6378.137
+
+SUNLIT, PENUMBRA, UMBRA = 0, 1, 2
+STATES = ("sunlit", "penumbra", "umbra")
+
+
+def sun_position(jd, fr) -> np.ndarray:
+    """Geocentric sun (T, 3) km, mean equator of date (≈ TEME), for Julian dates jd + fr."""
+    t = (np.atleast_1d(np.asarray(jd, dtype=np.float64)) - 2451545.0
+         + np.atleast_1d(np.asarray(fr, dtype=np.float64))) / 36525.0
+    mean_lon = np.radians(280.460 + 36000.771 * t)
+    anomaly = np.radians(357.5291092 + 35999.05034 * t)
+    ecl_lon = mean_lon + np.radians(1.914666471 * np.sin(anomaly) + 0.019994643 * np.sin(2 * anomaly))
+    dist = AU_KM * (1.000140612 - 0.016708617 * np.cos(anomaly) - 0.000139589 * np.cos(2 * anomaly))
+    obliquity = np.radians(23.439291 - 0.0130042 * t)
+    return dist[:, None] * np.stack([
+        np.cos(ecl_lon),
+        np.cos(obliquity) * np.sin(ecl_lon),
+        np.sin(obliquity) * np.sin(ecl_lon),
+    ], axis=-1)
+
+
+def shadow(r_sat: np.ndarray, r_sun: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(state int8, sunlit fraction float64) for satellite positions r_sat (..., 3) km.
+
+    r_sun broadcasts against r_sat: one (3,) vector for a single instant,
+    or one row per time step. States are SUNLIT / PENUMBRA / UMBRA; the
+    fraction is the share of the solar disc visible (1 sunlit, 0 umbra).
+    Non-finite positions come back sunlit with a NaN fraction.
+    """
+    r_sat = np.asarray(r_sat, dtype=np.float64)
+    to_sun = np.asarray(r_sun, dtype=np.float64) - r_sat
+    d_sun = np.linalg.norm(to_sun, axis=-1)
+    d_earth = np.linalg.norm(r_sat, axis=-1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        a = np.arcsin(np.clip(SUN_RADIUS_KM / d_sun, -1.0, 1.0))
+        b = np.arcsin(np.clip(EARTH_EQUATORIAL_RADIUS_KM / d_earth, -1.0, 1.0))
+        cos_c = -(r_sat * to_sun).sum(axis=-1) / (d_earth * d_sun)
+        c = np.arccos(np.clip(cos_c, -1.0, 1.0))
+
+        # Lens area where the Earth disc covers the solar disc (partial overlap).
+        x = (c * c + a * a - b * b) / (2.0 * c)
+        y = np.sqrt(np.maximum(a * a - x * x, 0.0))
+        overlap = (a * a * np.arccos(np.clip(x / a, -1.0, 1.0))
+                   + b * b * np.arccos(np.clip((c - x) / b, -1.0, 1.0)) - c * y)
+        fraction = np.select(
+            [c >= a + b, c <= b - a, c <= a - b],
+            [1.0, 0.0, 1.0 - (b * b) / (a * a)],  # last: annular, Earth inside the solar disc
+            default=1.0 - overlap / (np.pi * a * a),
+        )
+
+    finite = np.isfinite(fraction)
+    state = np.select([~finite | (c >= a + b), c <= b - a], [SUNLIT, UMBRA], default=PENUMBRA).astype(np.int8)
+    return state, np.where(finite, np.clip(fraction, 0.0, 1.0), np.nan)
+
+
+def sun_elevation(observer_teme: np.ndarray, up_teme: np.ndarray, r_sun: np.ndarray) -> np.ndarray:
+    """Elevation (deg) of the sun for an observer at observer_teme with local up up_teme, (..., 3)."""
+    d = np.asarray(r_sun, dtype=np.float64) - observer_teme
+    sin_el = (d * up_teme).sum(axis=-1) / np.linalg.norm(d, axis=-1)
+    return np.degrees(np.arcsin(np.clip(sin_el, -1.0, 1.0)))
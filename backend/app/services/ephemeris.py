@@ -0,0 +1,287 @@
+"""Precomputed rolling-horizon ephemeris and its interpolating reader.
+
+Used by:
+  - tle_processor.update_satellite_data — writes the horizon after each run
+  - services/positions.py — serves "where is it now" from the table
+
+Every consumer of a current position used to run SGP4 and a frame
+transform again. After each ingestion run this module propagates every
+active object once over a fixed grid (EPHEMERIS_STEP_SECONDS apart, for
+EPHEMERIS_HORIZON_HOURS) and stores the TEME states compactly in
+`satellite_ephemeris` (migrations/003_ephemeris.sql): one BYTEA per
+satellite holding n_steps × [x, y, z, vx, vy, vz] as little-endian float32.
+
+A lookup is then a cubic Hermite interpolation between the two bracketing
+grid points, using the stored velocities as the end-point derivatives. With
+a 120 s step the interpolation error is a few metres for LEO, well below
+what SGP4 itself is good for.
+
+Storage is ~4.3 KB per object for the default 6 h horizon; the reader keeps
+the latest horizon in memory and reloads only when a new run lands.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Sequence
+
+import numpy as np
+from psycopg2.extras import execute_values
+from sgp4.api import SatrecArray
+
+try:
+    from database import get_db_connection
+    from services.propagation import Catalog, julian_dates
+except ImportError:
+    from app.database import get_db_connection
+    from app.services.propagation import Catalog, julian_dates
+
+logger = logging.getLogger(__name__)
+
+EPHEMERIS_STEP_SECONDS = int(os.getenv("EPHEMERIS_STEP_SECONDS", "120"))
+EPHEMERIS_HORIZON_HOURS = float(os.getenv("EPHEMERIS_HORIZON_HOURS", "6"))
+# Objects propagated per SatrecArray call while writing; bounds peak memory.
+EPHEMERIS_CHUNK_SIZE = int(os.getenv("EPHEMERIS_CHUNK_SIZE", "2000"))
+EPHEMERIS_RELOAD_TTL_SECONDS = float(os.getenv("EPHEMERIS_RELOAD_TTL_SECONDS", "60"))
+
+STATE_DTYPE = np.dtype("<f4")
+STATE_WIDTH = 6  # x, y, z, vx, vy, vz
+
+
+# ---------------------------------------------------------------------------
+# Grid + packing
+# ---------------------------------------------------------------------------
+
+def grid_start(t: datetime, step_seconds: int = EPHEMERIS_STEP_SECONDS) -> datetime:
+    """Floor `t` to the ephemeris grid so consecutive runs share grid points."""
+    if t.tzinfo is None:
+        t = t.replace(tzinfo=timezone.utc)
+    ts = int(t.timestamp()) // step_seconds * step_seconds
+    return datetime.fromtimestamp(ts, tz=timezone.utc)
+
+
+def horizon_steps(horizon_hours: float = EPHEMERIS_HORIZON_HOURS,
+                  step_seconds: int = EPHEMERIS_STEP_SECONDS) -> int:
+    # +1 so the last grid point sits on the horizon itself.
+    return int(horizon_hours * 3600 // step_seconds) + 1
+
+
+def build_states(catalog: Catalog, start: datetime, step_seconds: int, n_steps: int) -> np.ndarray:
+    """Propagate `catalog` over the grid. Returns float32 (N, n_steps, 6), NaN where invalid."""
+    times = np.datetime64(start.astimezone(timezone.utc).replace(tzinfo=None), "us") \
+        + np.arange(n_steps) * np.timedelta64(step_seconds, "s")
+    jd, fr = julian_dates(times)
+
+    out = np.full((len(catalog), n_steps, STATE_WIDTH), np.nan, dtype=np.float32)
+    for lo in range(0, len(catalog), EPHEMERIS_CHUNK_SIZE):
+        hi = min(lo + EPHEMERIS_CHUNK_SIZE, len(catalog))
+        e, r, v = SatrecArray(catalog.satrecs[lo:hi]).sgp4(jd, fr)
+        ok = (e == 0) & np.isfinite(r).all(axis=-1) & np.isfinite(v).all(axis=-1)
+        chunk = out[lo:hi]
+        chunk[..., :3] = np.where(ok[..., None], r, np.nan)
+        chunk[..., 3:] = np.where(ok[..., None], v, np.nan)
+    return out
+
+
+def pack_states(states: np.ndarray) -> bytes:
+    """(n_steps, 6) → little-endian float32 bytes."""
+    return np.ascontiguousarray(states, dtype=STATE_DTYPE).tobytes()
+
+
+def unpack_states(blob: bytes, n_steps: int) -> np.ndarray:
+    return np.frombuffer(blob, dtype=STATE_DTYPE, count=n_steps * STATE_WIDTH).reshape(n_steps, STATE_WIDTH)
+
+
+# ---------------------------------------------------------------------------
+# Interpolation
+# ---------------------------------------------------------------------------
+
+def hermite_interpolate(states: np.ndarray, step_seconds: float, offset_seconds) -> tuple[np.ndarray, np.ndarray]:
+    """Cubic Hermite position/velocity at `offset_seconds` past the grid start.
+
+    `states` is (..., n_steps, 6); offsets may be a scalar or an array of
+    shape (T,). Returns float64 position and velocity of shape (..., 3) or
+    (..., T, 3). Offsets outside the grid come back as NaN.
+    """
+    states = np.asarray(states)
+    scalar = np.ndim(offset_seconds) == 0
+    tau = np.atleast_1d(np.asarray(offset_seconds, dtype=np.float64)) / step_seconds
+    n_steps = states.shape[-2]
+
+    inside = (tau >= 0.0) & (tau <= n_steps - 1)
+    k = np.clip(np.floor(tau).astype(np.int64), 0, max(n_steps - 2, 0))
+    s = (tau - k)[:, None]
+    h = float(step_seconds)
+
+    lo = states[..., k, :].astype(np.float64)
+    hi = states[..., np.minimum(k + 1, n_steps - 1), :].astype(np.float64)
+    p0, v0, p1, v1 = lo[..., :3], lo[..., 3:], hi[..., :3], hi[..., 3:]
+
+    s2, s3 = s * s, s * s * s
+    pos = ((2 * s3 - 3 * s2 + 1) * p0 + (s3 - 2 * s2 + s) * h * v0
+           + (-2 * s3 + 3 * s2) * p1 + (s3 - s2) * h * v1)
+    vel = ((6 * s2 - 6 * s) * p0 / h + (3 * s2 - 4 * s + 1) * v0
+           + (-6 * s2 + 6 * s) * p1 / h + (3 * s2 - 2 * s) * v1)
+
+    pos[..., ~inside, :] = np.nan
+    vel[..., ~inside, :] = np.nan
+    if scalar:
+        return pos[..., 0, :], vel[..., 0, :]
+    return pos, vel
+
+
+# ---------------------------------------------------------------------------
+# Writer (ingestion side)
+# ---------------------------------------------------------------------------
+
+def store_ephemeris(conn, catalog: Catalog, norads: Sequence, tle_epochs: Sequence, run_epoch: datetime,
+                    step_seconds: int = EPHEMERIS_STEP_SECONDS,
+                    horizon_hours: float = EPHEMERIS_HORIZON_HOURS) -> int:
+    """Replace the stored horizon with a fresh one starting at `run_epoch`.
+
+    `norads` / `tle_epochs` are aligned with the catalog rows; rows with no
+    NORAD number, and repeats of one already seen, are skipped. The delete
+    and inserts share one transaction, so readers never see a partial
+    horizon. Returns the number of satellites written.
+    """
+    start = grid_start(run_epoch, step_seconds)
+    n_steps = horizon_steps(horizon_hours, step_seconds)
+
+    seen = set()
+    written = 0
+    with conn.cursor() as cursor:
+        cursor.execute("DELETE FROM satellite_ephemeris;")
+        # Propagate and insert one chunk at a time: the whole horizon is
+        # ~4 KB per object and never needs to be in memory at once.
+        for lo in range(0, len(catalog), EPHEMERIS_CHUNK_SIZE):
+            hi = min(lo + EPHEMERIS_CHUNK_SIZE, len(catalog))
+            rows = []
+            for i in range(lo, hi):
+                norad = norads[i]
+                if not norad or norad in seen:
+                    continue
+                seen.add(norad)
+                rows.append(i)
+            if not rows:
+                continue
+            states = build_states(catalog.subset(rows), start, step_seconds, n_steps)
+            execute_values(cursor, """
+                INSERT INTO satellite_ephemeris
+                    (norad_number, tle_epoch, start_time, step_seconds, n_steps, states)
+                VALUES %s
+            """, [(int(norads[i]), tle_epochs[i], start, step_seconds, n_steps, pack_states(states[k]))
+                  for k, i in enumerate(rows)], page_size=500)
+            written += len(rows)
+    conn.commit()
+    return written
+
+
+# ---------------------------------------------------------------------------
+# Reader (API side)
+# ---------------------------------------------------------------------------
+
+@dataclass
+class EphemerisTable:
+    """The latest stored horizon, one row per satellite sorted by NORAD."""
+    generated_at: datetime
+    start: datetime
+    step_seconds: int
+    norad: np.ndarray   # int32 (N,), sorted
+    states: np.ndarray  # float32 (N, n_steps, 6)
+
+    @property
+    def end(self) -> datetime:
+        return self.start + timedelta(seconds=self.step_seconds * (self.states.shape[1] - 1))
+
+    def lookup(self, norads: np.ndarray, when: datetime) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """TEME (position, velocity, ok) at `when` for each requested NORAD."""
+        norads = np.asarray(norads, dtype=np.int32)
+        pos = np.full((len(norads), 3), np.nan)
+        vel = np.full((len(norads), 3), np.nan)
+        if len(self.norad) == 0:
+            return pos, vel, np.zeros(len(norads), dtype=bool)
+
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        idx = np.clip(np.searchsorted(self.norad, norads), 0, len(self.norad) - 1)
+        found = self.norad[idx] == norads
+        offset = (when - self.start).total_seconds()
+        n_steps = self.states.shape[1]
+        if not 0.0 <= offset <= self.step_seconds * (n_steps - 1):
+            return pos, vel, np.zeros(len(norads), dtype=bool)
+
+        # Slice out only the bracketing pair of grid points before the fancy
+        # index, so a whole-catalog lookup doesn't copy the whole horizon.
+        k = min(int(offset // self.step_seconds), max(n_steps - 2, 0))
+        bracket = self.states[idx[found], k:k + 2]
+        pos[found], vel[found] = hermite_interpolate(bracket, self.step_seconds, offset - k * self.step_seconds)
+        ok = found & np.isfinite(pos).all(axis=-1) & np.isfinite(vel).all(axis=-1)
+        return pos, vel, ok
+
+
+_lock = threading.Lock()
+_table: EphemerisTable | None = None
+_checked_at = 0.0
+
+
+def load_ephemeris(force: bool = False) -> EphemerisTable | None:
+    """Latest horizon from the DB, reloaded only when a newer run has landed.
+
+    Returns None if the table is missing or empty, so callers can fall back
+    to propagating directly.
+    """
+    global _table, _checked_at
+    now = time.monotonic()
+    with _lock:
+        if not force and now - _checked_at < EPHEMERIS_RELOAD_TTL_SECONDS:
+            return _table
+
+    try:
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT MAX(generated_at) AS generated_at FROM satellite_ephemeris")
+                generated_at = cursor.fetchone()["generated_at"]
+                if generated_at is None:
+                    table = None
+                elif _table is not None and _table.generated_at == generated_at:
+                    table = _table
+                else:
+                    cursor.execute("""
+                        SELECT norad_number, start_time, step_seconds, n_steps, states
+                        FROM satellite_ephemeris
+                        WHERE generated_at = %s
+                        ORDER BY norad_number
+                    """, (generated_at,))
+                    table = _table_from_rows(generated_at, cursor.fetchall())
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning("Ephemeris table unavailable: %s", e)
+        table = None
+
+    with _lock:
+        _table = table
+        _checked_at = now
+    return table
+
+
+def _table_from_rows(generated_at: datetime, rows: list) -> EphemerisTable | None:
+    if not rows:
+        return None
+    first = rows[0]
+    n_steps = first["n_steps"]
+    states = np.empty((len(rows), n_steps, STATE_WIDTH), dtype=np.float32)
+    for i, row in enumerate(rows):
+        states[i] = unpack_states(bytes(row["states"]), n_steps)
+    return EphemerisTable(
+        generated_at=generated_at,
+        start=first["start_time"],
+        step_seconds=first["step_seconds"],
+        norad=np.fromiter((r["norad_number"] for r in rows), dtype=np.int32, count=len(rows)),
+        states=states,
+    )
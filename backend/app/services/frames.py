@@ -0,0 +1,245 @@
+"""Vectorized TEME → ITRS → geodetic conversion.
+
+Used by:
+  - variables.compute_orbital_params_chunk (TLE-epoch lat/lon/alt at ingestion)
+  - tle_processor.compute_sgp4_position1
+  - services/positions.py, services/tracks.py, services/passes.py
+
+The old path built one astropy TEME coordinate per satellite and called
+transform_to(ITRS) on it, which costs milliseconds per object. This module
+does the same rotation for N positions in a handful of NumPy operations.
+
+Approach (mirrors astropy's teme_to_itrs_mat, i.e. Vallado et al. 2006):
+  1. UT1 = UTC + DUT1, from astropy's IERS table (cached per day).
+  2. Rotate TEME → PEF about z by GMST (IAU 1982 model, on UT1).
+  3. Apply polar motion (xp, yp) — PEF → ITRS. The TIO locator s' is
+     ignored, exactly as astropy does for TEME.
+  4. ITRS Cartesian → WGS84 geodetic by fixed-point iteration on latitude.
+
+With IERS values available the result agrees with astropy to well under a
+metre. Without them (astropy missing, or the epoch outside the table) DUT1
+and polar motion fall back to zero, which costs < 1 km for LEO objects.
+
+Shapes broadcast: positions are (..., 3) and jd/fr are anything that
+broadcasts against positions.shape[:-1] — one epoch per object, a shared
+scalar epoch, or an (N, T) grid.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+SECONDS_PER_DAY = 86400.0
+ARCSEC_TO_RAD = np.pi / (180.0 * 3600.0)
+
+# WGS84 ellipsoid — the one astropy's EarthLocation uses.
+WGS84_A_KM = 6378.137
+WGS84_F = 1.0 / 298.257223563
+WGS84_E2 = WGS84_F * (2.0 - WGS84_F)
+
+# Fixed-point iterations for geodetic latitude; converges to < 1e-12 rad
+# from the surface out past GEO.
+_GEODETIC_ITERATIONS = 6
+
+
+# Daily EOP nodes keyed by integer day (floor of JD - 0.5, i.e. 0h UTC).
+# Values drift by ~1 ms / a few mas per day, so linear interpolation
+# between midnights is indistinguishable from astropy's own interpolation
+# and turns every lookup after the first into pure NumPy.
+_EOP_NODES: dict[int, tuple[float, float, float]] = {}
+_EOP_NODES_MAX = 20000
+
+
+def _lookup_eop_nodes(days: np.ndarray) -> None:
+    missing = [int(d) for d in days if int(d) not in _EOP_NODES]
+    if not missing:
+        return
+    if len(_EOP_NODES) + len(missing) > _EOP_NODES_MAX:
+        _EOP_NODES.clear()
+    jd = np.asarray(missing, dtype=np.float64) + 0.5
+    fr = np.zeros_like(jd)
+    try:
+        from astropy.utils import iers
+
+        table = iers.earth_orientation_table.get()
+        dut1, dut1_status = table.ut1_utc(jd, fr, return_status=True)
+        xp, yp, pm_status = table.pm_xy(jd, fr, return_status=True)
+        dut1 = np.where(dut1_status >= 0, np.asarray(dut1.to_value("s")), 0.0)
+        xp = np.where(pm_status >= 0, np.asarray(xp.to_value("arcsec")), 0.0) * ARCSEC_TO_RAD
+        yp = np.where(pm_status >= 0, np.asarray(yp.to_value("arcsec")), 0.0) * ARCSEC_TO_RAD
+    except Exception:
+        dut1 = xp = yp = np.zeros_like(jd)
+    for i, day in enumerate(missing):
+        _EOP_NODES[day] = (float(dut1[i]), float(xp[i]), float(yp[i]))
+
+
+def earth_orientation(jd: np.ndarray, fr: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return (dut1 seconds, xp radians, yp radians) for UTC Julian dates.
+
+    Daily values come from astropy's IERS table (one vectorized lookup per
+    batch of unseen days) and are interpolated linearly in between. Any
+    epoch the table can't serve — or a missing astropy install — falls
+    back to zeros.
+    """
+    jd = np.asarray(jd, dtype=np.float64)
+    fr = np.asarray(fr, dtype=np.float64)
+    t = (jd - 0.5) + fr
+    day = np.floor(t)
+    weight = t - day
+    day = day.astype(np.int64)
+
+    unique_days = np.unique(day)
+    _lookup_eop_nodes(np.concatenate([unique_days, unique_days + 1]))
+    nodes = np.array([_EOP_NODES[int(d)] for d in unique_days])
+    next_nodes = np.array([_EOP_NODES[int(d) + 1] for d in unique_days])
+    # A leap second makes DUT1 jump by 1 s across midnight; hold the value
+    # instead of smearing the step over the whole day.
+    leap = np.abs(next_nodes[:, 0] - nodes[:, 0]) > 0.5
+    next_nodes[leap, 0] = nodes[leap, 0]
+
+    idx = np.searchsorted(unique_days, day)
+    w = weight[..., None]
+    values = nodes[idx] * (1.0 - w) + next_nodes[idx] * w
+    return values[..., 0], values[..., 1], values[..., 2]
+
+
+def gmst82(jd_ut1: np.ndarray, fr_ut1: np.ndarray) -> np.ndarray:
+    """Greenwich mean sidereal time (IAU 1982), radians in [0, 2π).
+
+    Same expression as ERFA's eraGmst82, kept in two parts so the day
+    fraction doesn't lose precision against the large Julian date.
+    """
+    jd_ut1 = np.asarray(jd_ut1, dtype=np.float64)
+    fr_ut1 = np.asarray(fr_ut1, dtype=np.float64)
+    t = ((jd_ut1 - 2451545.0) + fr_ut1) / 36525.0
+    day_fraction = np.mod(jd_ut1, 1.0) + np.mod(fr_ut1, 1.0)
+    seconds = (24110.54841 - SECONDS_PER_DAY / 2.0
+               + (8640184.812866 + (0.093104 - 6.2e-6 * t) * t) * t
+               + SECONDS_PER_DAY * day_fraction)
+    return np.mod(seconds * (2.0 * np.pi / SECONDS_PER_DAY), 2.0 * np.pi)
+
+
+def teme_to_itrs(positions: np.ndarray, jd: np.ndarray, fr: np.ndarray, eop: bool = True) -> np.ndarray:
+    """Rotate TEME vectors (km) into ITRS (Earth-fixed) at UTC (jd, fr).
+
+    Set `eop=False` to skip the IERS lookup (DUT1 and polar motion = 0).
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    jd = np.asarray(jd, dtype=np.float64)
+    fr = np.asarray(fr, dtype=np.float64)
+    if eop:
+        dut1, xp, yp = earth_orientation(jd, fr)
+    else:
+        dut1 = xp = yp = np.zeros(np.broadcast(jd, fr).shape)
+
+    theta = gmst82(jd, fr + dut1 / SECONDS_PER_DAY)
+    cos_t, sin_t = np.cos(theta), np.sin(theta)
+
+    x, y, z = positions[..., 0], positions[..., 1], positions[..., 2]
+    # TEME → PEF: rotation about z by GMST.
+    px = cos_t * x + sin_t * y
+    py = -sin_t * x + cos_t * y
+    pz = z
+
+    # PEF → ITRS: W = Rx(-yp) · Ry(-xp), written out element-wise.
+    cx, sx = np.cos(xp), np.sin(xp)
+    cy, sy = np.cos(yp), np.sin(yp)
+    out = np.empty(np.broadcast(px, cx).shape + (3,))
+    out[..., 0] = cx * px + sx * pz
+    out[..., 1] = sx * sy * px + cy * py - sy * cx * pz
+    out[..., 2] = -sx * cy * px + sy * py + cx * cy * pz
+    return out
+
+
+def teme_to_itrs_matrix(jd: np.ndarray, fr: np.ndarray, eop: bool = True) -> np.ndarray:
+    """(..., 3, 3) rotation matrices M with r_itrs = M @ r_teme, one per epoch.
+
+    Same rotation as teme_to_itrs, materialized so callers that work with
+    many vectors per epoch (or need the inverse, M.T) can build it once per
+    time step and reuse it.
+    """
+    jd = np.asarray(jd, dtype=np.float64)
+    fr = np.asarray(fr, dtype=np.float64)
+    if eop:
+        dut1, xp, yp = earth_orientation(jd, fr)
+    else:
+        dut1 = xp = yp = np.zeros(np.broadcast(jd, fr).shape)
+
+    theta = gmst82(jd, fr + dut1 / SECONDS_PER_DAY)
+    cos_t, sin_t = np.cos(theta), np.sin(theta)
+    cx, sx = np.cos(xp), np.sin(xp)
+    cy, sy = np.cos(yp), np.sin(yp)
+
+    # W · R3(theta), with W = Rx(-yp) · Ry(-xp) as in teme_to_itrs.
+    m = np.empty(np.broadcast(cos_t, cx).shape + (3, 3))
+    m[..., 0, 0] = cx * cos_t
+    m[..., 0, 1] = cx * sin_t
+    m[..., 0, 2] = sx
+    m[..., 1, 0] = sx * sy * cos_t - cy * sin_t
+    m[..., 1, 1] = sx * sy * sin_t + cy * cos_t
+    m[..., 1, 2] = -sy * cx
+    m[..., 2, 0] = -sx * cy * cos_t - sy * sin_t
+    m[..., 2, 1] = -sx * cy * sin_t + sy * cos_t
+    m[..., 2, 2] = cx * cy
+    return m
+
+
+def itrs_to_geodetic(xyz: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ITRS Cartesian (km) → WGS84 (lat deg, lon deg, height km)."""
+    xyz = np.asarray(xyz, dtype=np.float64)
+    x, y, z = xyz[..., 0], xyz[..., 1], xyz[..., 2]
+    p = np.hypot(x, y)
+    lon = np.arctan2(y, x)
+
+    lat = np.arctan2(z, p * (1.0 - WGS84_E2))
+    for _ in range(_GEODETIC_ITERATIONS):
+        sin_lat = np.sin(lat)
+        n = WGS84_A_KM / np.sqrt(1.0 - WGS84_E2 * sin_lat * sin_lat)
+        lat = np.arctan2(z + WGS84_E2 * n * sin_lat, p)
+
+    sin_lat, cos_lat = np.sin(lat), np.cos(lat)
+    n = WGS84_A_KM / np.sqrt(1.0 - WGS84_E2 * sin_lat * sin_lat)
+    # Stable at the poles, unlike p / cos(lat) - N.
+    height = p * cos_lat + z * sin_lat - n * (1.0 - WGS84_E2 * sin_lat * sin_lat)
+    return np.degrees(lat), np.degrees(lon), height
+
+
+def geodetic_to_itrs(lat_deg, lon_deg, height_km) -> np.ndarray:
+    """WGS84 (lat deg, lon deg, height km) → ITRS Cartesian (..., 3) km."""
+    lat = np.radians(np.asarray(lat_deg, dtype=np.float64))
+    lon = np.radians(np.asarray(lon_deg, dtype=np.float64))
+    height = np.asarray(height_km, dtype=np.float64)
+    sin_lat, cos_lat = np.sin(lat), np.cos(lat)
+    n = WGS84_A_KM / np.sqrt(1.0 - WGS84_E2 * sin_lat * sin_lat)
+    return np.stack([
+        (n + height) * cos_lat * np.cos(lon),
+        (n + height) * cos_lat * np.sin(lon),
+        (n * (1.0 - WGS84_E2) + height) * sin_lat,
+    ], axis=-1)
+
+
+def teme_to_geodetic(positions: np.ndarray, jd: np.ndarray, fr: np.ndarray, eop: bool = True):
+    """TEME (km) → WGS84 (lat deg, lon deg, height km) in one call."""
+    return itrs_to_geodetic(teme_to_itrs(positions, jd, fr, eop=eop))
+
+
+def teme_to_geodetic_astropy(positions: np.ndarray, jd: np.ndarray, fr: np.ndarray):
+    """Reference implementation: one batched astropy transform.
+
+    Kept for accuracy tests and as a fallback; noticeably slower than
+    teme_to_geodetic but still a single call rather than one per object.
+    """
+    from astropy import units as u
+    from astropy.coordinates import ITRS, TEME, CartesianRepresentation
+    from astropy.time import Time
+
+    positions = np.asarray(positions, dtype=np.float64)
+    jd, fr = np.broadcast_arrays(np.asarray(jd, dtype=np.float64), np.asarray(fr, dtype=np.float64))
+    shape = np.broadcast(positions[..., 0], jd).shape
+    obstime = Time(np.broadcast_to(jd, shape), np.broadcast_to(fr, shape), format="jd", scale="utc")
+    rep = CartesianRepresentation(
+        np.broadcast_to(positions[..., 0], shape) * u.km,
+        np.broadcast_to(positions[..., 1], shape) * u.km,
+        np.broadcast_to(positions[..., 2], shape) * u.km,
+    )
+    location = TEME(rep, obstime=obstime).transform_to(ITRS(obstime=obstime)).earth_location
+    return location.lat.to_value(u.deg), location.lon.to_value(u.deg), location.height.to_value(u.km)
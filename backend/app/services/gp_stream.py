@@ -0,0 +1,151 @@
+"""Streaming reader for Space-Track `class/gp` responses and the local GP cache.
+
+Used by:
+  - tle_fetch.iter_tle_chunks (tle_processor.py ingestion)
+
+The GP payload is tens of MB of JSON. `response.json()` materializes all of
+it as dicts of ~40 string fields each; the pipeline then added computed
+parameters in place and re-serialized the whole list to the cache file, so
+the updater held several copies of the catalog at once.
+
+Approach:
+  - iter_gp_records() parses the JSON array incrementally with ijson
+    straight from the HTTP stream (or any binary file object) and keeps
+    only the GP_FIELDS the pipeline reads, so one compact dict per object
+    is alive at a time.
+  - iter_chunks() groups records into lists of a fixed size, so orbital
+    parameters, propagation and COPY staging all work chunk by chunk.
+  - open_gp_records() issues the GET with stream=True and hands the raw
+    (gzip-decoded) body to iter_gp_records.
+  - The cache is JSON Lines: a header line {"timestamp": ..., "mode": ...}
+    then one record per line. GPCacheWriter appends records as chunks finish and
+    swaps the file in atomically on close; read_gp_cache() streams it back.
+    The previous single-document cache is treated as missing.
+
+Without ijson installed, iter_gp_records falls back to json.load on the
+whole stream — same records, none of the memory savings.
+"""
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime
+from itertools import islice
+from contextlib import ExitStack
+from typing import IO, Iterable, Iterator
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - exercised only where ijson is missing
+    ijson = None
+
+# GP keys the ingestion pipeline reads (filter_satellites, infer_purpose,
+# the decay / epoch checks, delta-fetch bookkeeping). Everything else in
+# the ~40-field GP record is dropped on the way in.
+GP_FIELDS = (
+    "NORAD_CAT_ID", "OBJECT_NAME", "OBJECT_TYPE", "TLE_LINE1", "TLE_LINE2",
+    "EPOCH", "CREATION_DATE", "DECAY_DATE", "LAUNCH_DATE", "SITE",
+    "RCS_SIZE", "COUNTRY_CODE",
+)
+
+
+def compact_record(raw: dict) -> dict:
+    """The GP_FIELDS subset of one GP record (missing keys stay missing)."""
+    return {k: raw[k] for k in GP_FIELDS if k in raw}
+
+
+def iter_gp_records(stream: IO[bytes]) -> Iterator[dict]:
+    """Compact records from a GP JSON array, parsed incrementally from `stream`."""
+    if ijson is None:
+        items = json.load(stream)
+    else:
+        items = ijson.items(stream, "item", use_float=True)
+    for raw in items:
+        yield compact_record(raw)
+
+
+def open_gp_records(session, url: str, stack: ExitStack) -> tuple[int, Iterator[dict] | None]:
+    """(HTTP status, record iterator) for a streamed GP query; no iterator unless 200.
+
+    The response is entered on `stack`, which keeps the connection open
+    while the records are consumed.
+    """
+    response = stack.enter_context(session.get(url, stream=True))
+    if response.status_code != 200:
+        return response.status_code, None
+    response.raw.decode_content = True  # let urllib3 undo gzip before ijson sees the bytes
+    return response.status_code, iter_gp_records(response.raw)
+
+
+def iter_chunks(records: Iterable, size: int) -> Iterator[list]:
+    """Consecutive lists of `size` records (the last one may be shorter)."""
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# ---------------------------------------------------------------------------
+# JSON Lines cache
+# ---------------------------------------------------------------------------
+
+def _default(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Type {type(obj)} not serializable")
+
+
+class GPCacheWriter:
+    """Append-only JSONL cache, written to `path`.tmp and renamed on close().
+
+    Extra keyword arguments (e.g. mode="delta") go into the header line.
+    """
+
+    def __init__(self, path: str, timestamp: float, **header):
+        self.path = path
+        self._tmp = f"{path}.tmp"
+        self._file = open(self._tmp, "w")
+        self._file.write(json.dumps({"timestamp": timestamp, **header}) + "\n")
+        self.count = 0
+
+    def write(self, records: Iterable[dict]) -> None:
+        for record in records:
+            self._file.write(json.dumps(record, default=_default) + "\n")
+            self.count += 1
+
+    def close(self) -> None:
+        self._file.close()
+        os.replace(self._tmp, self.path)
+
+    def abort(self) -> None:
+        """Drop the partial file and keep whatever cache was there before."""
+        self._file.close()
+        os.remove(self._tmp)
+
+
+def read_gp_cache(path: str) -> tuple[dict, Iterator[dict]]:
+    """(header, record iterator) for a cache written by GPCacheWriter.
+
+    header["timestamp"] is always a float; other keys are whatever the
+    writer was given.
+
+    Raises ValueError (json.JSONDecodeError included) or KeyError when the
+    file is not in that format. The iterator owns the open file.
+    """
+    file = open(path, "r")
+    try:
+        header = json.loads(file.readline())
+        header["timestamp"] = float(header["timestamp"])
+    except Exception:
+        file.close()
+        raise
+
+    def records():
+        with file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+    return header, records()
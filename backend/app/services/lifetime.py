@@ -0,0 +1,170 @@
+"""Drag-driven orbital lifetime for the decaying part of the catalog.
+
+Used by:
+  - predict_reentries.py (after each TLE run) → reentry_predictions
+  - GET /api/reentry/upcoming reads that table
+
+The reentry leaderboard used to rank by bstar / perigee and never said
+*when*. This integrates the decay of every LEO object below
+LIFETIME_MAX_PERIGEE_KM at once.
+
+Approach:
+  - Density: the exponential model of the IPS "Satellite Orbital Decay"
+    note, with a Jacchia-like exospheric temperature
+    T = 900 + 2.5 (F10.7 - 70) + 1.5 Ap K, molecular mass
+    m = 27 - 0.012 (h - 200), scale height H = T / m km and
+    ρ = 6e-10 exp(-(h - 175) / H) kg/m³.
+  - Ballistic coefficient from the TLE: Cd·A/m = 2 B* / ρ0 with
+    ρ0 = 0.15696615 kg/m²/ER (the SGP4 reference density).
+  - Rates: Gauss' equations for tangential drag, averaged over one orbit
+    on LIFETIME_ORBIT_SAMPLES points in eccentric anomaly, so eccentric
+    orbits lose apogee first the way they should.
+  - Integration: Heun (second-order) steps for all objects in lockstep.
+    Each object's step is sized so perigee and apogee move at most
+    LIFETIME_STEP_FRACTION of their height above LIFETIME_REENTRY_ALTITUDE_KM.
+    Objects drop out of the working arrays as they reenter or pass the
+    horizon.
+  - Window: the same run with density scaled by 1 ± LIFETIME_DENSITY_UNCERTAINTY,
+    stacked into the one integration.
+"""
+from __future__ import annotations
+
+import math
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+try:
+    from services.orbital_elements import EARTH_RADIUS_KM, MU_KM3_S2
+except ImportError:
+    from app.services.orbital_elements import EARTH_RADIUS_KM, MU_KM3_S2
+
+LIFETIME_MAX_PERIGEE_KM = float(os.getenv("LIFETIME_MAX_PERIGEE_KM", "600"))
+LIFETIME_HORIZON_DAYS = float(os.getenv("LIFETIME_HORIZON_DAYS", "9131"))  # 25 years
+LIFETIME_REENTRY_ALTITUDE_KM = 120.0
+LIFETIME_DENSITY_UNCERTAINTY = float(os.getenv("LIFETIME_DENSITY_UNCERTAINTY", "0.3"))
+LIFETIME_ORBIT_SAMPLES = 32
+LIFETIME_STEP_FRACTION = 0.05
+LIFETIME_MIN_STEP_S = 60.0
+LIFETIME_MAX_STEP_S = 60 * 86400.0
+
+# Quiet-to-moderate sun, used when the space-weather tables are empty.
+DEFAULT_F107 = 150.0
+DEFAULT_AP = 15.0
+
+BSTAR_REFERENCE_DENSITY = 0.15696615  # kg/m²/ER, SGP4's ρ0
+_STEP_PAD_KM = 10.0  # keeps steps finite as the margin to reentry goes to 0
+
+
+@dataclass
+class LifetimeWindow:
+    """Seconds from each element set's epoch to reentry (inf past the horizon)."""
+    nominal_s: np.ndarray
+    earliest_s: np.ndarray
+    latest_s: np.ndarray
+
+
+def ballistic_coefficient(bstar) -> np.ndarray:
+    """Cd·A/m in m²/kg from B* in 1/ER."""
+    return 2.0 * np.asarray(bstar, dtype=np.float64) / BSTAR_REFERENCE_DENSITY
+
+
+def density(altitude_km, f107: float, ap: float) -> np.ndarray:
+    """Atmospheric density (kg/m³) at altitude_km for the given F10.7 / Ap."""
+    h = np.asarray(altitude_km, dtype=np.float64)
+    temperature = 900.0 + 2.5 * (f107 - 70.0) + 1.5 * ap
+    molecular_mass = 27.0 - 0.012 * (np.clip(h, 180.0, 1000.0) - 200.0)
+    return 6e-10 * np.exp(-(h - 175.0) * molecular_mass / temperature)
+
+
+def decay_rates(a_km, ecc, bc, f107: float, ap: float, density_scale=1.0,
+                samples: int = LIFETIME_ORBIT_SAMPLES):
+    """Orbit-averaged (da/dt km/s, de/dt 1/s) from drag, elementwise."""
+    a = np.asarray(a_km, dtype=np.float64)[:, None]
+    e = np.asarray(ecc, dtype=np.float64)[:, None]
+    bc = np.asarray(bc, dtype=np.float64)[:, None]
+    scale = np.broadcast_to(np.asarray(density_scale, dtype=np.float64), a.shape[:1])[:, None]
+
+    cos_E = np.cos((np.arange(samples) + 0.5) * (2.0 * np.pi / samples))[None, :]
+    one_minus = 1.0 - e * cos_E
+    r = a * one_minus
+    v = np.sqrt(MU_KM3_S2 * (2.0 / r - 1.0 / a))
+    cos_nu = (cos_E - e) / one_minus
+    rho = density(r - EARTH_RADIUS_KM, f107, ap) * scale
+    weight = one_minus / one_minus.sum(axis=1, keepdims=True)  # dM = (1 - e cos E) dE
+
+    # 1000: ρ·B is per metre, distances here are km.
+    da = -1000.0 * bc[:, 0] * a[:, 0] ** 2 / MU_KM3_S2 * (weight * rho * v ** 3).sum(axis=1)
+    de = -1000.0 * bc[:, 0] * (weight * rho * v * (e + cos_nu)).sum(axis=1)
+    return da, de
+
+
+def decay_times(a_km, ecc, bc, f107: float, ap: float, density_scale=1.0,
+                horizon_s: float = LIFETIME_HORIZON_DAYS * 86400.0,
+                reentry_altitude_km: float = LIFETIME_REENTRY_ALTITUDE_KM) -> np.ndarray:
+    """Seconds until perigee reaches reentry_altitude_km, inf past horizon_s."""
+    a = np.array(a_km, dtype=np.float64, ndmin=1)
+    e = np.clip(np.array(ecc, dtype=np.float64, ndmin=1), 0.0, 0.99)
+    bc = np.broadcast_to(np.asarray(bc, dtype=np.float64), a.shape).copy()
+    scale = np.broadcast_to(np.asarray(density_scale, dtype=np.float64), a.shape).copy()
+    t = np.zeros_like(a)
+    out = np.full(a.shape, np.inf)
+
+    hp = a * (1.0 - e) - EARTH_RADIUS_KM
+    out[hp <= reentry_altitude_km] = 0.0
+    idx = np.flatnonzero((hp > reentry_altitude_km) & (bc > 0))
+    a, e, bc, scale, t = a[idx], e[idx], bc[idx], scale[idx], t[idx]
+
+    while idx.size:
+        da, de = decay_rates(a, e, bc, f107, ap, scale)
+        hp = a * (1.0 - e) - EARTH_RADIUS_KM
+        ha = a * (1.0 + e) - EARTH_RADIUS_KM
+        with np.errstate(divide="ignore"):
+            dt = LIFETIME_STEP_FRACTION * np.minimum(
+                (hp - reentry_altitude_km + _STEP_PAD_KM) / np.abs(da * (1.0 - e) - a * de),
+                (ha - reentry_altitude_km + _STEP_PAD_KM) / np.abs(da * (1.0 + e) + a * de),
+            )
+        dt = np.minimum(np.clip(dt, LIFETIME_MIN_STEP_S, LIFETIME_MAX_STEP_S), horizon_s - t)
+
+        # Heun: Euler predictor, then the average of both slopes.
+        a_pred = a + da * dt
+        e_pred = np.clip(e + de * dt, 0.0, 0.99)
+        da_pred, de_pred = decay_rates(a_pred, e_pred, bc, f107, ap, scale)
+        a_next = a + 0.5 * (da + da_pred) * dt
+        e_next = np.clip(e + 0.5 * (de + de_pred) * dt, 0.0, 0.99)
+        hp_next = a_next * (1.0 - e_next) - EARTH_RADIUS_KM
+
+        # Crossed: interpolate the crossing time linearly in perigee height.
+        done = hp_next <= reentry_altitude_km
+        frac = (hp[done] - reentry_altitude_km) / np.maximum(hp[done] - hp_next[done], 1e-12)
+        out[idx[done]] = t[done] + dt[done] * frac
+
+        t = t + dt
+        keep = ~done & (t < horizon_s)
+        idx, a, e, bc, scale, t = idx[keep], a_next[keep], e_next[keep], bc[keep], scale[keep], t[keep]
+    return out
+
+
+def semi_major_axis(mean_motion_rev_day) -> np.ndarray:
+    n = np.asarray(mean_motion_rev_day, dtype=np.float64) * 2.0 * math.pi / 86400.0
+    return np.cbrt(MU_KM3_S2 / n ** 2)
+
+
+def predict_lifetimes(mean_motion_rev_day, ecc, bstar, f107: float = DEFAULT_F107,
+                      ap: float = DEFAULT_AP,
+                      uncertainty: float = LIFETIME_DENSITY_UNCERTAINTY,
+                      horizon_days: float = LIFETIME_HORIZON_DAYS) -> LifetimeWindow:
+    """Nominal time to reentry plus the window for density × (1 ± uncertainty).
+
+    Inputs are the TLE mean elements (rev/day, eccentricity, B* in 1/ER).
+    Objects with B* ≤ 0 carry no usable drag estimate and come back inf.
+    """
+    a = semi_major_axis(mean_motion_rev_day)
+    e = np.asarray(ecc, dtype=np.float64)
+    bc = ballistic_coefficient(bstar)
+    n = len(a)
+    scales = np.repeat([1.0, 1.0 + uncertainty, max(1.0 - uncertainty, 1e-3)], n)
+    times = decay_times(np.tile(a, 3), np.tile(e, 3), np.tile(bc, 3), f107, ap, scales,
+                        horizon_s=horizon_days * 86400.0)
+    return LifetimeWindow(nominal_s=times[:n], earliest_s=times[n:2 * n], latest_s=times[2 * n:])
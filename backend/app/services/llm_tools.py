@@ -300,7 +300,7 @@ def query_cdms(
     limit: int = 25,
 ) -> dict:
     limit = max(1, min(int(limit), 100))
-    where_parts = ["is_active = TRUE"]
+    where_parts = ["tca >= NOW()"]  # active = TCA still ahead (migrations/010)
     params: list = []
 
     if min_pc is not None:
@@ -0,0 +1,45 @@
+"""Thread-safe, size-bounded LRU for the per-process route caches.
+
+Used by:
+  - services/positions.py, coverage.py, chebyshev.py, tracks.py
+
+Values are computed outside the lock: two requests that miss on the same
+key at once both compute it and the second put wins, which is cheaper than
+holding every other key's readers behind one slow propagation.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Hashable
+
+
+class LRUCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[Hashable, object]" = OrderedDict()
+
+    def get(self, key: Hashable, default=None):
+        """The cached value (now most recently used), or `default`."""
+        with self._lock:
+            if key not in self._items:
+                return default
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key: Hashable, value):
+        """Store `value`, evicting the least recently used entries past maxsize; returns `value`."""
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
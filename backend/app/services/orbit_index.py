@@ -0,0 +1,180 @@
+"""In-memory KD-tree over orbital elements for "similar orbit" lookups.
+
+Used by:
+  - GET /api/satellites/nearby/{norad_number}
+  - GET /api/satellites/nearby?perigee=&apogee=&inclination=[&raan=]
+
+The old route filtered with ABS(perigee - x) < ... ORDER BY a sum of ABS()
+terms, which no index can serve, so every call was a full scan of
+`satellites`.
+
+Approach:
+  - Each active satellite becomes a point in normalized element space:
+    perigee / NEARBY_PERIGEE_SCALE_KM, apogee / NEARBY_APOGEE_SCALE_KM,
+    inclination / NEARBY_INCLINATION_SCALE_DEG. One unit per axis is the
+    old route's similarity threshold.
+  - RAAN is optional. It adds two axes: the node direction on a circle of
+    radius 1 / NEARBY_RAAN_SCALE (in radians). Chord length then tracks
+    angular separation and wraps correctly at 0/360°.
+  - Both trees (with and without RAAN) are built lazily and rebuilt when
+    catalog.catalog_version() moves.
+
+Distances are L1 in normalized units, the same ranking as the old
+ORDER BY once each axis is divided by its threshold.
+"""
+from __future__ import annotations
+
+import math
+import os
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+try:
+    from database import get_db_connection
+    from services.catalog import catalog_version
+except ImportError:
+    from app.database import get_db_connection
+    from app.services.catalog import catalog_version
+
+NEARBY_PERIGEE_SCALE_KM = float(os.getenv("NEARBY_PERIGEE_SCALE_KM", "100"))
+NEARBY_APOGEE_SCALE_KM = float(os.getenv("NEARBY_APOGEE_SCALE_KM", "100"))
+NEARBY_INCLINATION_SCALE_DEG = float(os.getenv("NEARBY_INCLINATION_SCALE_DEG", "5"))
+NEARBY_RAAN_SCALE_DEG = float(os.getenv("NEARBY_RAAN_SCALE_DEG", "30"))
+
+
+class OrbitQueryError(ValueError):
+    """Bad query point; routes map this to HTTP 400."""
+
+
+@dataclass
+class OrbitIndex:
+    version: tuple
+    norad: np.ndarray     # int32 (N,)
+    elements: np.ndarray  # float64 (N, 4) — perigee km, apogee km, inclination deg, raan deg (NaN if unknown)
+    tree: cKDTree
+    raan_rows: np.ndarray  # rows of `elements` in raan_tree
+    raan_tree: cKDTree | None = None
+
+    def __len__(self) -> int:
+        return len(self.norad)
+
+    def row_of(self, norad: int) -> int | None:
+        i = int(np.searchsorted(self.norad, norad))
+        return i if i < len(self.norad) and self.norad[i] == norad else None
+
+
+def normalize(elements: np.ndarray, with_raan: bool = False) -> np.ndarray:
+    """(N, 4) [perigee, apogee, inclination, raan] → normalized KD-tree coordinates."""
+    elements = np.atleast_2d(np.asarray(elements, dtype=np.float64))
+    cols = [
+        elements[:, 0] / NEARBY_PERIGEE_SCALE_KM,
+        elements[:, 1] / NEARBY_APOGEE_SCALE_KM,
+        elements[:, 2] / NEARBY_INCLINATION_SCALE_DEG,
+    ]
+    if with_raan:
+        radius = 1.0 / math.radians(NEARBY_RAAN_SCALE_DEG)
+        raan = np.radians(elements[:, 3])
+        cols += [radius * np.cos(raan), radius * np.sin(raan)]
+    return np.column_stack(cols)
+
+
+def build_index(norad, elements, version: tuple = ()) -> OrbitIndex:
+    """Index rows sorted by NORAD; rows missing perigee/apogee/inclination are dropped."""
+    norad = np.asarray(norad, dtype=np.int32)
+    elements = np.asarray(elements, dtype=np.float64).reshape(-1, 4)
+    keep = np.isfinite(elements[:, :3]).all(axis=1)
+    order = np.argsort(norad[keep], kind="stable")
+    norad, elements = norad[keep][order], elements[keep][order]
+    return OrbitIndex(
+        version=version,
+        norad=norad,
+        elements=elements,
+        tree=cKDTree(normalize(elements)),
+        raan_rows=np.flatnonzero(np.isfinite(elements[:, 3])),
+    )
+
+
+def _raan_tree(index: OrbitIndex) -> cKDTree:
+    if index.raan_tree is None:
+        index.raan_tree = cKDTree(normalize(index.elements[index.raan_rows], with_raan=True))
+    return index.raan_tree
+
+
+def query(index: OrbitIndex, point, k: int = 10, radius: float | None = None,
+          exclude: int | None = None, box: bool = False) -> list[tuple[int, float]]:
+    """Nearest satellites to `point` = (perigee, apogee, inclination[, raan]).
+
+    Returns up to k (norad, L1 distance) pairs, closest first. With `radius`,
+    only points within that normalized distance count. `box=True` measures
+    that radius per axis instead (max-norm), which is the old route's
+    filter. `exclude` drops one NORAD, e.g. the reference satellite itself.
+    """
+    point = [float(p) for p in point if p is not None]
+    if len(point) not in (3, 4) or not all(math.isfinite(p) for p in point):
+        raise OrbitQueryError("point must be finite (perigee, apogee, inclination[, raan])")
+    with_raan = len(point) == 4
+    tree = _raan_tree(index) if with_raan else index.tree
+    rows = index.raan_rows if with_raan else None
+    x = normalize([point + [0.0] * (4 - len(point))], with_raan=with_raan)[0]
+    if len(index) == 0 or k < 1:
+        return []
+
+    extra = 1 if exclude is not None else 0
+    if radius is None:
+        dist, hit = tree.query(x, k=min(k + extra, tree.n), p=1)
+        dist, hit = np.atleast_1d(dist), np.atleast_1d(hit)
+    else:
+        hit = np.asarray(tree.query_ball_point(x, r=radius, p=np.inf if box else 1), dtype=np.int64)
+        dist = np.abs(tree.data[hit] - x).sum(axis=1)
+        top = np.argsort(dist, kind="stable")[:k + extra]
+        dist, hit = dist[top], hit[top]
+
+    norads = index.norad[rows[hit] if rows is not None else hit]
+    out = [(int(n), float(d)) for n, d in zip(norads, dist) if n != exclude]
+    return out[:k]
+
+
+# ---------------------------------------------------------------------------
+# Cached catalog index
+# ---------------------------------------------------------------------------
+
+_lock = threading.Lock()
+_index: OrbitIndex | None = None
+
+
+def _load_elements():
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT norad_number, perigee, apogee, inclination, raan
+                FROM satellites
+                WHERE perigee IS NOT NULL AND apogee IS NOT NULL AND inclination IS NOT NULL
+            """)
+            rows = cursor.fetchall()
+    finally:
+        conn.close()
+    norad = [r["norad_number"] for r in rows]
+    elements = [
+        [r["perigee"], r["apogee"], r["inclination"], r["raan"] if r["raan"] is not None else math.nan]
+        for r in rows
+    ]
+    return norad, elements
+
+
+def get_index() -> OrbitIndex:
+    """Index for the current catalog version, rebuilt when it changes."""
+    global _index
+    version = catalog_version()
+    with _lock:
+        if _index is not None and _index.version == version:
+            return _index
+
+    norad, elements = _load_elements()
+    index = build_index(norad, elements, version)
+    with _lock:
+        _index = index
+    return index
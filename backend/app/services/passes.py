@@ -0,0 +1,385 @@
+"""Pass prediction: when is a satellite above an observer's horizon.
+
+Used by:
+  - GET /api/satellites/{norad}/passes   (one satellite)
+  - GET /api/satellites/passes           (filter / NORAD list, thousands at once)
+
+Approach:
+  1. Coarse scan. Build the time grid once and, per time step, the TEME →
+     ITRS rotation. Instead of rotating N satellites into the Earth-fixed
+     frame at every step, rotate the *observer* (position and local "up")
+     into TEME with the transposed matrix — T rotations in total, shared by
+     every satellite. Satellites are propagated in SatrecArray chunks and
+     the sine of elevation is one dot product per (satellite, step).
+  2. Brackets. A rise is a step where the satellite goes from below to
+     above the elevation mask, a set the reverse; each pass is a rise/set
+     pair per satellite, with the coarse maximum in between.
+  3. Refinement. Rise and set times are root-found inside their bracket
+     (Illinois regula falsi), the culmination by successive parabola fits
+     around the coarse maximum. Each step evaluates every open bracket at
+     once with one sgp4_array call per satellite.
+  4. Illumination. At rise, culmination and set the satellite's shadow
+     state and the sun's elevation at the observer come from
+     services/eclipse.py — one analytic sun vector per time, no per-object
+     ephemeris. A pass is "visible" when at any of the three the satellite
+     is not in umbra while the observer is in darkness (sun below
+     VISIBLE_SUN_ELEVATION): evening passes often rise sunlit and enter
+     the Earth's shadow before culminating, morning passes the reverse.
+     `eclipse` / `sun_elevation` in the response are the culmination values.
+
+Passes shorter than the scan step can fall between grid points; the default
+60 s step only misses grazing passes a few degrees above the mask. Passes
+already in progress at the window start (or still up at its end) are
+reported with a null rise (or set).
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sgp4.api import SatrecArray
+
+try:
+    from services.catalog import get_catalog
+    from services.eclipse import STATES, UMBRA, shadow, sun_elevation, sun_position
+    from services.frames import geodetic_to_itrs, teme_to_itrs_matrix
+    from services.propagation import Catalog, propagate_points, unix_julian_dates
+except ImportError:
+    from app.services.catalog import get_catalog
+    from app.services.eclipse import STATES, UMBRA, shadow, sun_elevation, sun_position
+    from app.services.frames import geodetic_to_itrs, teme_to_itrs_matrix
+    from app.services.propagation import Catalog, propagate_points, unix_julian_dates
+
+PASS_SCAN_STEP_SECONDS = float(os.getenv("PASS_SCAN_STEP_SECONDS", "60"))
+PASS_MAX_HOURS = float(os.getenv("PASS_MAX_HOURS", "72"))
+PASS_MAX_SATELLITES = int(os.getenv("PASS_MAX_SATELLITES", "5000"))
+# Satellites per SatrecArray call during the coarse scan; bounds peak memory.
+PASS_CHUNK_SIZE = int(os.getenv("PASS_CHUNK_SIZE", "500"))
+
+# Refinement effort: crossings settle to ~ms in a handful of Illinois steps;
+# the culmination is re-fitted on two shrinking parabola stencils.
+CROSSING_ITERATIONS = 6
+MAXIMUM_STENCILS_SECONDS = (5.0, 0.5)
+
+# Sun elevation (deg) below which the observer's sky is dark enough to see a
+# sunlit satellite; -6 is the end of civil twilight.
+VISIBLE_SUN_ELEVATION = float(os.getenv("VISIBLE_SUN_ELEVATION", "-6"))
+
+
+class PassError(ValueError):
+    """Bad observer, window or request size."""
+
+
+@dataclass
+class Observer:
+    lat_deg: float
+    lon_deg: float
+    alt_km: float = 0.0
+
+    def __post_init__(self):
+        if not -90.0 <= self.lat_deg <= 90.0 or not -180.0 <= self.lon_deg <= 360.0:
+            raise PassError("observer latitude / longitude out of range")
+        lat, lon = np.radians(self.lat_deg), np.radians(self.lon_deg)
+        self.itrs = geodetic_to_itrs(self.lat_deg, self.lon_deg, self.alt_km)
+        # Rows: local east, north, up (geodetic normal) in ITRS.
+        self.enu = np.array([
+            [-np.sin(lon), np.cos(lon), 0.0],
+            [-np.sin(lat) * np.cos(lon), -np.sin(lat) * np.sin(lon), np.cos(lat)],
+            [np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)],
+        ])
+
+
+@dataclass
+class Pass:
+    norad: int
+    rise: datetime | None
+    rise_azimuth: float | None
+    culmination: datetime
+    max_elevation: float
+    culmination_azimuth: float
+    set: datetime | None
+    set_azimuth: float | None
+    eclipse: str = STATES[0]            # satellite shadow state at culmination
+    sun_elevation: float | None = None  # at the observer, at culmination
+    visible: bool = False               # sunlit over a dark sky at rise, culmination or set
+
+    def to_dict(self) -> dict:
+        def iso(t):
+            return t.isoformat() if t is not None else None
+
+        def rnd(x, d=2):
+            return round(x, d) if x is not None else None
+
+        duration = (self.set - self.rise).total_seconds() if self.rise and self.set else None
+        return {
+            "norad_number": self.norad,
+            "rise": iso(self.rise),
+            "rise_azimuth": rnd(self.rise_azimuth),
+            "culmination": iso(self.culmination),
+            "max_elevation": rnd(self.max_elevation),
+            "culmination_azimuth": rnd(self.culmination_azimuth),
+            "set": iso(self.set),
+            "set_azimuth": rnd(self.set_azimuth),
+            "duration_s": rnd(duration, 1),
+            "eclipse": self.eclipse,
+            "sun_elevation": rnd(self.sun_elevation),
+            "visible": self.visible,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Geometry
+# ---------------------------------------------------------------------------
+
+def _to_datetime(unix_seconds: float) -> datetime:
+    return datetime.fromtimestamp(float(unix_seconds), tz=timezone.utc)
+
+
+def look_angles(catalog: Catalog, rows: np.ndarray, unix_seconds: np.ndarray, observer: Observer):
+    """(azimuth deg, elevation deg) of catalog row rows[k] at unix_seconds[k].
+
+    Points are grouped by satellite so each satellite costs one sgp4_array
+    call; invalid states come back with elevation -90.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    unix_seconds = np.asarray(unix_seconds, dtype=np.float64)
+    if len(rows) == 0:
+        return np.zeros(0), np.zeros(0)
+    jd, fr = unix_julian_dates(unix_seconds)
+
+    e, r, _ = propagate_points(catalog, rows, jd, fr)
+    r[e != 0] = np.nan
+
+    m = teme_to_itrs_matrix(jd, fr)
+    d = np.einsum("kij,kj->ki", m, r) - observer.itrs
+    east, north, up = (d @ observer.enu.T).T
+    rng = np.sqrt(east * east + north * north + up * up)
+    el = np.degrees(np.arcsin(np.clip(up / rng, -1.0, 1.0)))
+    az = np.degrees(np.arctan2(east, north)) % 360.0
+    el = np.where(np.isfinite(el), el, -90.0)
+    return az, el
+
+
+def illumination(catalog: Catalog, rows: np.ndarray, unix_seconds: np.ndarray, observer: Observer):
+    """(shadow state int8, sun elevation deg at the observer) for catalog row rows[k] at unix_seconds[k]."""
+    rows = np.asarray(rows, dtype=np.int64)
+    jd, fr = unix_julian_dates(np.asarray(unix_seconds, dtype=np.float64))
+    e, r, _ = propagate_points(catalog, rows, jd, fr)
+    r[e != 0] = np.nan
+
+    sun = sun_position(jd, fr)
+    state, _ = shadow(r, sun)
+    m = teme_to_itrs_matrix(jd, fr)
+    obs_teme = np.einsum("kji,j->ki", m, observer.itrs)
+    up_teme = np.einsum("kji,j->ki", m, observer.enu[2])
+    return state, sun_elevation(obs_teme, up_teme, sun)
+
+
+def _seen(state: np.ndarray, sun_el: np.ndarray) -> np.ndarray:
+    """Satellite out of the umbra while the observer's sky is dark."""
+    return (state != UMBRA) & (sun_el < VISIBLE_SUN_ELEVATION)
+
+
+def _scan_elevation(catalog: Catalog, lo: int, hi: int, jd, fr, obs_teme, up_teme) -> np.ndarray:
+    """Sine of elevation for catalog rows [lo, hi) on the coarse grid: (n, T)."""
+    e, r, _ = SatrecArray(catalog.satrecs[lo:hi]).sgp4(jd, fr)
+    d = r - obs_teme
+    sin_el = np.einsum("ntk,tk->nt", d, up_teme) / np.linalg.norm(d, axis=-1)
+    return np.where((e == 0) & np.isfinite(sin_el), sin_el, -1.0)
+
+
+# ---------------------------------------------------------------------------
+# Refinement
+# ---------------------------------------------------------------------------
+
+def _refine_crossings(catalog, rows, lo_t, hi_t, rising, observer, min_el):
+    """Time where elevation crosses `min_el` inside each [lo_t, hi_t] bracket.
+
+    Illinois (modified regula falsi): keeps the bracket like bisection but
+    converges superlinearly on the smooth elevation curve.
+    """
+    lo_t, hi_t = lo_t.astype(np.float64), hi_t.astype(np.float64)
+    sign = np.where(rising, 1.0, -1.0)  # g = sign * (el - min_el): g(lo) < 0 <= g(hi)
+    _, g_lo = look_angles(catalog, rows, lo_t, observer)
+    _, g_hi = look_angles(catalog, rows, hi_t, observer)
+    g_lo, g_hi = sign * (g_lo - min_el), sign * (g_hi - min_el)
+    side = np.zeros(len(rows), dtype=np.int8)  # which end was kept last time
+    for _ in range(CROSSING_ITERATIONS):
+        span = g_hi - g_lo
+        w = np.clip(-g_lo / np.where(span > 0, span, 1.0), 0.0, 1.0)
+        x = lo_t + w * (hi_t - lo_t)
+        _, g_x = look_angles(catalog, rows, x, observer)
+        g_x = sign * (g_x - min_el)
+        above = g_x >= 0
+        # Halve the value at an end that survives twice in a row.
+        g_lo = np.where(above & (side == -1), 0.5 * g_lo, g_lo)
+        g_hi = np.where(~above & (side == 1), 0.5 * g_hi, g_hi)
+        hi_t, g_hi = np.where(above, x, hi_t), np.where(above, g_x, g_hi)
+        lo_t, g_lo = np.where(above, lo_t, x), np.where(above, g_lo, g_x)
+        side = np.where(above, -1, 1).astype(np.int8)
+    span = g_hi - g_lo
+    w = np.clip(-g_lo / np.where(span > 0, span, 1.0), 0.0, 1.0)
+    return lo_t + w * (hi_t - lo_t)
+
+
+def _parabola_vertex(f_minus, f_0, f_plus, h):
+    """Offset of the vertex of the parabola through (-h, f_minus), (0, f_0), (h, f_plus)."""
+    curvature = f_minus - 2.0 * f_0 + f_plus
+    offset = 0.5 * h * (f_minus - f_plus) / np.where(curvature < 0, curvature, -1.0)
+    return np.where(curvature < 0, np.clip(offset, -h, h), 0.0)
+
+
+def _refine_maximum(catalog, rows, center, f_minus, f_0, f_plus, h, observer, t_min, t_max):
+    """Time of maximum elevation near each coarse maximum.
+
+    f_minus, f_0, f_plus are sin(elevation) at center - h, center,
+    center + h. A parabola through them gives a first estimate,
+    then each round re-fits on a tighter stencil around it. The fit is on
+    sin(elevation): elevation itself has a cusp for overhead passes, its
+    sine is smooth (≈ 1 - zenith_angle² / 2).
+    """
+    t = np.clip(center + _parabola_vertex(f_minus, f_0, f_plus, h), t_min, t_max)
+    for stencil in MAXIMUM_STENCILS_SECONDS:
+        times = np.concatenate([t - stencil, t, t + stencil])
+        _, el = look_angles(catalog, np.tile(rows, 3), times, observer)
+        f_minus, f_0, f_plus = np.split(np.sin(np.radians(el)), 3)
+        t = np.clip(t + _parabola_vertex(f_minus, f_0, f_plus, stencil), t_min, t_max)
+    return t
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def predict_passes(catalog: Catalog, norads: np.ndarray, observer: Observer, start: datetime, end: datetime,
+                   min_elevation: float = 10.0, step_seconds: float = PASS_SCAN_STEP_SECONDS) -> list[Pass]:
+    """All passes above `min_elevation` (deg) for every catalog object in [start, end].
+
+    `norads` is aligned with the catalog rows. Passes are sorted by culmination time.
+    """
+    if end <= start:
+        raise PassError("end must be after start")
+    if (end - start).total_seconds() > PASS_MAX_HOURS * 3600:
+        raise PassError(f"window is limited to {PASS_MAX_HOURS:g} hours")
+    if len(catalog) > PASS_MAX_SATELLITES:
+        raise PassError(f"at most {PASS_MAX_SATELLITES} satellites per request")
+    if len(catalog) == 0:
+        return []
+
+    # Uniform grid (the parabola fits rely on it); the last step may run up
+    # to one step past `end`. At least three points are always scanned.
+    t0 = start.timestamp()
+    step_seconds = min(step_seconds, (end.timestamp() - t0) / 2.0)
+    n_steps = int(np.ceil((end.timestamp() - t0) / step_seconds - 1e-9)) + 1
+    grid = t0 + np.arange(n_steps) * step_seconds
+    jd, fr = unix_julian_dates(grid)
+
+    # Per-step rotation, applied once to the observer rather than per satellite.
+    m = teme_to_itrs_matrix(jd, fr)
+    obs_teme = np.einsum("tji,j->ti", m, observer.itrs)
+    up_teme = np.einsum("tji,j->ti", m, observer.enu[2])
+    sin_min = np.sin(np.radians(min_elevation))
+
+    rise_rows, rise_k, set_rows, set_k = [], [], [], []
+    culm_rows, culm_k, culm_f = [], [], []
+    pass_index = []  # (row, rise event index or -1, set event index or -1, culmination index)
+    for lo in range(0, len(catalog), PASS_CHUNK_SIZE):
+        hi = min(lo + PASS_CHUNK_SIZE, len(catalog))
+        sin_el = _scan_elevation(catalog, lo, hi, jd, fr, obs_teme, up_teme)
+        above = sin_el > sin_min
+        for i in np.flatnonzero(above.any(axis=1)):
+            row = lo + i
+            up_mask = above[i]
+            edges = np.flatnonzero(np.diff(up_mask.astype(np.int8)))
+            starts = [0] if up_mask[0] else []
+            starts += [k + 1 for k in edges if not up_mask[k]]
+            ends = [k for k in edges if up_mask[k]]
+            if up_mask[-1]:
+                ends.append(n_steps - 1)
+            for s_k, e_k in zip(starts, ends):
+                rise_i = set_i = -1
+                if s_k > 0:
+                    rise_i = len(rise_rows)
+                    rise_rows.append(row)
+                    rise_k.append(s_k)
+                if not (e_k == n_steps - 1 and up_mask[-1]):
+                    set_i = len(set_rows)
+                    set_rows.append(row)
+                    set_k.append(e_k)
+                k_max = s_k + int(np.argmax(sin_el[i, s_k:e_k + 1]))
+                k_mid = min(max(k_max, 1), n_steps - 2)
+                culm_rows.append(row)
+                culm_k.append(k_mid)
+                culm_f.append(sin_el[i, k_mid - 1:k_mid + 2])
+                pass_index.append((row, rise_i, set_i, len(culm_rows) - 1))
+
+    if not pass_index:
+        return []
+
+    rise_rows, rise_k = np.asarray(rise_rows, dtype=np.int64), np.asarray(rise_k, dtype=np.int64)
+    set_rows, set_k = np.asarray(set_rows, dtype=np.int64), np.asarray(set_k, dtype=np.int64)
+    culm_rows = np.asarray(culm_rows, dtype=np.int64)
+
+    rise_t = set_t = np.zeros(0)
+    if len(rise_rows):
+        rise_t = _refine_crossings(catalog, rise_rows, grid[rise_k - 1], grid[rise_k],
+                                   np.ones(len(rise_rows), dtype=bool), observer, min_elevation)
+    if len(set_rows):
+        set_t = _refine_crossings(catalog, set_rows, grid[set_k], grid[set_k + 1],
+                                  np.zeros(len(set_rows), dtype=bool), observer, min_elevation)
+    culm_k, culm_f = np.asarray(culm_k, dtype=np.int64), np.asarray(culm_f)
+    culm_t = _refine_maximum(catalog, culm_rows, grid[culm_k], culm_f[:, 0], culm_f[:, 1], culm_f[:, 2],
+                             step_seconds, observer, grid[0], grid[-1])
+
+    rise_az, _ = look_angles(catalog, rise_rows, rise_t, observer)
+    set_az, _ = look_angles(catalog, set_rows, set_t, observer)
+    culm_az, culm_el = look_angles(catalog, culm_rows, culm_t, observer)
+    culm_state, culm_sun = illumination(catalog, culm_rows, culm_t, observer)
+    culm_seen = _seen(culm_state, culm_sun)
+    rise_seen = _seen(*illumination(catalog, rise_rows, rise_t, observer)) if len(rise_rows) else rise_t
+    set_seen = _seen(*illumination(catalog, set_rows, set_t, observer)) if len(set_rows) else set_t
+
+    passes = []
+    for row, rise_i, set_i, culm_i in pass_index:
+        passes.append(Pass(
+            norad=int(norads[row]),
+            rise=_to_datetime(rise_t[rise_i]) if rise_i >= 0 else None,
+            rise_azimuth=float(rise_az[rise_i]) if rise_i >= 0 else None,
+            culmination=_to_datetime(culm_t[culm_i]),
+            max_elevation=float(culm_el[culm_i]),
+            culmination_azimuth=float(culm_az[culm_i]),
+            set=_to_datetime(set_t[set_i]) if set_i >= 0 else None,
+            set_azimuth=float(set_az[set_i]) if set_i >= 0 else None,
+            eclipse=STATES[culm_state[culm_i]],
+            sun_elevation=float(culm_sun[culm_i]),
+            visible=bool(culm_seen[culm_i] or (rise_i >= 0 and rise_seen[rise_i])
+                         or (set_i >= 0 and set_seen[set_i])),
+        ))
+    passes.sort(key=lambda p: p.culmination)
+    return passes
+
+
+def get_passes(where_sql: str, params: tuple | list, observer: Observer, start: datetime | None,
+               hours: float, min_elevation: float = 10.0, visible_only: bool = False) -> dict:
+    """Route entry point: passes for every satellite matching a catalog filter."""
+    start = start or datetime.now(timezone.utc)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    end = start + timedelta(hours=hours)
+
+    snap = get_catalog(where_sql, params)
+    found = predict_passes(snap.catalog, snap.norad, observer, start, end, min_elevation)
+    if visible_only:
+        found = [p for p in found if p.visible]
+    return {
+        "observer": {"lat": observer.lat_deg, "lon": observer.lon_deg, "alt_km": observer.alt_km},
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "min_elevation": min_elevation,
+        "visible_only": visible_only,
+        "satellites": len(snap),
+        "count": len(found),
+        "passes": [p.to_dict() for p in found],
+    }
@@ -0,0 +1,176 @@
+"""Whole-catalog "where is everything at time t" in one NumPy pass.
+
+Used by:
+  - GET /api/satellites/positions (api/satellites.py)
+
+The frontend used to download every TLE of the page it showed and run
+satellite.js itself. This service propagates every object matching a
+filter with one SatrecArray call, rotates the states to Earth-fixed with
+services/frames.py, and returns packed columns instead of 30k TLE strings.
+Inside the precomputed horizon (services/ephemeris.py) the TEME states are
+interpolated from the stored grid instead; only objects the horizon doesn't
+cover are propagated.
+
+With `eclipse`, each object also gets its shadow state (services/eclipse.py)
+from the TEME position and one sun vector for the instant.
+
+Requested times are snapped down to a POSITIONS_BUCKET_SECONDS bucket and
+the encoded response is cached per (filter, bucket, frame, eclipse,
+format), so a burst of clients loading the globe at once costs one
+propagation.
+
+Binary layout (little-endian, version 1):
+  header  : 4s magic b"SPOS", u16 version, u16 frame (0 geodetic, 1 ECEF),
+            u32 count, f64 unix seconds of the propagated instant
+  body    : i32 norad[count], then three f32[count] columns —
+            lat deg / lon deg / alt km  (geodetic)
+            x km / y km / z km          (ECEF)
+  version 2 (eclipse requested): version 1 followed by u8 eclipse[count],
+            0 sunlit / 1 penumbra / 2 umbra
+"""
+from __future__ import annotations
+
+import os
+import struct
+from datetime import datetime, timezone
+
+import numpy as np
+
+try:
+    from services.catalog import get_catalog, params_key
+    from services.eclipse import shadow, sun_position
+    from services.ephemeris import load_ephemeris
+    from services.frames import itrs_to_geodetic, teme_to_itrs
+    from services.lru import LRUCache
+    from services.propagation import julian_dates, propagate
+except ImportError:
+    from app.services.catalog import get_catalog, params_key
+    from app.services.eclipse import shadow, sun_position
+    from app.services.ephemeris import load_ephemeris
+    from app.services.frames import itrs_to_geodetic, teme_to_itrs
+    from app.services.lru import LRUCache
+    from app.services.propagation import julian_dates, propagate
+
+POSITIONS_BUCKET_SECONDS = int(os.getenv("POSITIONS_BUCKET_SECONDS", "5"))
+POSITIONS_CACHE_SIZE = int(os.getenv("POSITIONS_CACHE_SIZE", "128"))
+
+FRAMES = ("geodetic", "ecef")
+FORMATS = ("json", "bin")
+
+BINARY_MAGIC = b"SPOS"
+BINARY_VERSION = 1
+BINARY_VERSION_ECLIPSE = 2
+_HEADER = struct.Struct("<4sHHId")
+
+_cache = LRUCache(POSITIONS_CACHE_SIZE)
+
+
+def bucket_time(t: datetime | None, seconds: int = POSITIONS_BUCKET_SECONDS) -> datetime:
+    """Snap `t` (default: now) down to the start of its `seconds`-long cache bucket."""
+    if t is None:
+        t = datetime.now(timezone.utc)
+    elif t.tzinfo is None:
+        t = t.replace(tzinfo=timezone.utc)
+    ts = int(t.timestamp()) // seconds * seconds
+    return datetime.fromtimestamp(ts, tz=timezone.utc)
+
+
+def compute_positions(where_sql: str, params: tuple | list, when: datetime, frame: str = "geodetic",
+                      eclipse: bool = False):
+    """Propagate the filtered catalog to `when`.
+
+    Returns (norad int32[N], columns float64[3, N]) for objects with a valid
+    SGP4 state; columns are lat/lon/alt or ECEF x/y/z depending on `frame`.
+    With `eclipse`, a fourth row holds the shadow state (eclipse.SUNLIT /
+    PENUMBRA / UMBRA).
+    """
+    snap = get_catalog(where_sql, params)
+    jd, fr = julian_dates(when)
+
+    table = load_ephemeris()
+    if table is not None:
+        r, _, ok = table.lookup(snap.norad, when)
+    else:
+        r = np.full((len(snap), 3), np.nan)
+        ok = np.zeros(len(snap), dtype=bool)
+
+    missing = np.flatnonzero(~ok)
+    if len(missing):
+        catalog = snap.catalog if len(missing) == len(snap) else snap.catalog.subset(missing)
+        result = propagate(catalog, jd, fr)
+        r[missing] = result.position[:, 0]
+        ok[missing] = result.valid[:, 0]
+
+    ecef = teme_to_itrs(r[ok], jd[0], fr[0])
+    if frame == "ecef":
+        columns = ecef.T
+    else:
+        columns = np.vstack(itrs_to_geodetic(ecef))
+    if eclipse:
+        state, _ = shadow(r[ok], sun_position(jd, fr)[0])
+        columns = np.vstack([columns, state])
+    return snap.norad[ok], columns
+
+
+def encode_json(when: datetime, frame: str, norad: np.ndarray, columns: np.ndarray) -> dict:
+    names = ("x", "y", "z") if frame == "ecef" else ("lat", "lon", "alt")
+    # 1e-4 deg ≈ 11 m on the ground, 1e-3 km = 1 m — plenty for rendering.
+    decimals = (3, 3, 3) if frame == "ecef" else (4, 4, 3)
+    body = {
+        "t": when.isoformat(),
+        "frame": frame,
+        "count": int(len(norad)),
+        "norad": norad.tolist(),
+    }
+    for name, col, d in zip(names, columns, decimals):
+        body[name] = np.round(col, d).tolist()
+    if len(columns) > 3:
+        body["eclipse"] = columns[3].astype(np.int8).tolist()  # 0 sunlit, 1 penumbra, 2 umbra
+    return body
+
+
+def encode_binary(when: datetime, frame: str, norad: np.ndarray, columns: np.ndarray) -> bytes:
+    version = BINARY_VERSION_ECLIPSE if len(columns) > 3 else BINARY_VERSION
+    header = _HEADER.pack(BINARY_MAGIC, version, FRAMES.index(frame), len(norad), when.timestamp())
+    return b"".join([
+        header,
+        norad.astype("<i4").tobytes(),
+        columns[:3].astype("<f4").tobytes(),  # row-major (3, N): three contiguous columns
+        columns[3].astype("u1").tobytes() if len(columns) > 3 else b"",
+    ])
+
+
+def decode_binary(blob: bytes) -> dict:
+    """Positions blob → {t, frame, norad, columns (3, N) float32[, eclipse]}."""
+    magic, version, frame_code, count, unix_s = _HEADER.unpack_from(blob, 0)
+    if magic != BINARY_MAGIC or version not in (BINARY_VERSION, BINARY_VERSION_ECLIPSE):
+        raise ValueError("not a version-1/2 positions blob")
+    offset = _HEADER.size
+    norad = np.frombuffer(blob, dtype="<i4", count=count, offset=offset)
+    columns = np.frombuffer(blob, dtype="<f4", count=3 * count, offset=offset + 4 * count).reshape(3, count)
+    decoded = {
+        "t": datetime.fromtimestamp(unix_s, tz=timezone.utc),
+        "frame": FRAMES[frame_code],
+        "norad": norad,
+        "columns": columns,
+    }
+    if version == BINARY_VERSION_ECLIPSE:
+        decoded["eclipse"] = np.frombuffer(blob, dtype="u1", count=count, offset=offset + 16 * count)
+    return decoded
+
+
+def get_positions(where_sql: str, params: tuple | list, t: datetime | None,
+                  frame: str = "geodetic", fmt: str = "json", eclipse: bool = False):
+    """Cached entry point for the route. Returns a dict (json) or bytes (bin)."""
+    if frame not in FRAMES:
+        raise ValueError(f"frame must be one of {FRAMES}")
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}")
+
+    when = bucket_time(t)
+    key = (where_sql, params_key(params), when, frame, eclipse, fmt)
+    encoded = _cache.get(key)
+    if encoded is None:
+        norad, columns = compute_positions(where_sql, params, when, frame, eclipse=eclipse)
+        encoded = _cache.put(key, (encode_binary if fmt == "bin" else encode_json)(when, frame, norad, columns))
+    return encoded
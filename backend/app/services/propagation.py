@@ -0,0 +1,194 @@
+"""Whole-catalog SGP4 propagation on top of sgp4's SatrecArray.
+
+Used by:
+  - tle_processor.update_satellite_data — one vectorized pass over the
+    active catalog per ingestion run.
+
+Approach:
+  1. Parse every TLE pair exactly once into a Satrec. Malformed pairs are
+     dropped; `Catalog.index` maps each parsed record back to its position
+     in the caller's input so results can be re-aligned with the rows.
+  2. Stack the records into a single SatrecArray.
+  3. Propagate the whole array against an epoch grid in one C call. sgp4
+     returns (N, T) error codes and (N, T, 3) TEME position / velocity, so
+     nothing loops in Python per satellite or per time step.
+
+The previous path built a Satrec and called sgp4() once per object on an
+8-thread pool; the GIL meant the threads bought almost nothing.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterable, Sequence
+
+import numpy as np
+from sgp4.api import WGS72, Satrec, SatrecArray
+
+# Julian date of the Unix epoch (1970-01-01T00:00:00Z).
+UNIX_EPOCH_JD = 2440587.5
+MICROSECONDS_PER_DAY = 86_400_000_000
+
+# sgp4 happily returns garbage for decayed or mangled element sets; anything
+# this far out is treated the same as a non-zero error code.
+MAX_VALID_RADIUS_KM = 1e8
+
+# Error code reported for rows whose TLE lines could not be parsed at all.
+# Mirrors the -5 used by tle_processor.compute_accuracy.
+PARSE_ERROR = -5
+
+
+@dataclass
+class Catalog:
+    """Parsed element sets ready for batch propagation."""
+    satrecs: list[Satrec]
+    index: np.ndarray  # int64 (N,) — input position of each parsed satrec
+    array: SatrecArray
+    size: int  # number of input rows, including the ones that failed to parse
+
+    def __len__(self) -> int:
+        return len(self.satrecs)
+
+    def subset(self, rows: np.ndarray) -> "Catalog":
+        """Catalog of the given parsed rows; `index` still points at the original input."""
+        rows = np.asarray(rows, dtype=np.int64)
+        satrecs = [self.satrecs[i] for i in rows]
+        return Catalog(satrecs=satrecs, index=self.index[rows], array=SatrecArray(satrecs), size=self.size)
+
+
+@dataclass
+class PropagationResult:
+    """TEME states for every catalog object at every grid time."""
+    error: np.ndarray     # uint8 (N, T) — sgp4 error code, 0 = success
+    position: np.ndarray  # float64 (N, T, 3) — km
+    velocity: np.ndarray  # float64 (N, T, 3) — km/s
+
+    @property
+    def valid(self) -> np.ndarray:
+        """(N, T) mask of states that are safe to use downstream."""
+        finite = np.isfinite(self.position).all(axis=-1) & np.isfinite(self.velocity).all(axis=-1)
+        bounded = (np.abs(self.position) < MAX_VALID_RADIUS_KM).all(axis=-1)
+        return (self.error == 0) & finite & bounded
+
+
+def parse_catalog(tle_pairs: Iterable[tuple[str, str]]) -> Catalog:
+    """Parse (tle_line1, tle_line2) pairs once; skip the ones sgp4 rejects."""
+    satrecs: list[Satrec] = []
+    index: list[int] = []
+    size = 0
+    for i, (line1, line2) in enumerate(tle_pairs):
+        size += 1
+        if not line1 or not line2:
+            continue
+        try:
+            satrec = Satrec.twoline2rv(line1, line2, WGS72)
+        except Exception:
+            continue
+        if satrec.error != 0:  # twoline2rv flags bad lines here instead of raising
+            continue
+        satrecs.append(satrec)
+        index.append(i)
+
+    return Catalog(
+        satrecs=satrecs,
+        index=np.asarray(index, dtype=np.int64),
+        array=SatrecArray(satrecs),
+        size=size,
+    )
+
+
+def _to_unix_microseconds(times) -> np.ndarray:
+    if isinstance(times, np.ndarray) and np.issubdtype(times.dtype, np.datetime64):
+        return times.astype("datetime64[us]").astype(np.int64)
+    if isinstance(times, datetime):
+        times = [times]
+    out = []
+    for t in times:
+        if t.tzinfo is None:
+            t = t.replace(tzinfo=timezone.utc)  # naive datetimes are UTC throughout the backend
+        out.append(round(t.timestamp() * 1_000_000))
+    return np.asarray(out, dtype=np.int64)
+
+
+def julian_dates(times: datetime | Sequence[datetime] | np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Split UTC times into the (jd, fr) pair sgp4 expects.
+
+    Accepts a datetime, a sequence of datetimes, or a datetime64 array.
+    Keeping the whole and fractional days apart preserves microsecond
+    resolution that a single float64 Julian date would lose.
+    """
+    us = _to_unix_microseconds(times)
+    days = us // MICROSECONDS_PER_DAY
+    jd = UNIX_EPOCH_JD + days.astype(np.float64)
+    fr = (us - days * MICROSECONDS_PER_DAY).astype(np.float64) / MICROSECONDS_PER_DAY
+    return jd, fr
+
+
+def unix_julian_dates(unix_seconds: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """julian_dates for float Unix seconds (rounded to the microsecond)."""
+    us = np.round(np.asarray(unix_seconds, dtype=np.float64) * 1e6).astype(np.int64)
+    return julian_dates(us.astype("datetime64[us]"))
+
+
+def propagate(catalog: Catalog, jd: np.ndarray, fr: np.ndarray) -> PropagationResult:
+    """Propagate every object in `catalog` to every (jd, fr) grid time."""
+    jd = np.ascontiguousarray(jd, dtype=np.float64)
+    fr = np.ascontiguousarray(fr, dtype=np.float64)
+    if len(catalog) == 0:
+        t = len(jd)
+        return PropagationResult(
+            error=np.zeros((0, t), dtype=np.uint8),
+            position=np.zeros((0, t, 3)),
+            velocity=np.zeros((0, t, 3)),
+        )
+    e, r, v = catalog.array.sgp4(jd, fr)
+    return PropagationResult(error=e, position=r, velocity=v)
+
+
+def propagate_points(catalog: Catalog, rows: np.ndarray, jd: np.ndarray, fr: np.ndarray):
+    """Propagate catalog row rows[k] to its own time (jd[k], fr[k]).
+
+    For scattered (object, time) pairs — refinement steps, event times —
+    where the full (N, T) grid of `propagate` would be mostly wasted. Points
+    are grouped by object so each object costs one sgp4_array call. Returns
+    (error (K,), position (K, 3), velocity (K, 3)).
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    jd = np.asarray(jd, dtype=np.float64)
+    fr = np.asarray(fr, dtype=np.float64)
+    error = np.zeros(len(rows), dtype=np.uint8)
+    position = np.full((len(rows), 3), np.nan)
+    velocity = np.full((len(rows), 3), np.nan)
+    if len(rows) == 0:
+        return error, position, velocity
+
+    order = np.argsort(rows, kind="stable")
+    bounds = np.flatnonzero(np.diff(rows[order])) + 1
+    for seg in np.split(order, bounds):
+        e, r, v = catalog.satrecs[rows[seg[0]]].sgp4_array(jd[seg], fr[seg])
+        error[seg], position[seg], velocity[seg] = e, r, v
+    return error, position, velocity
+
+
+def propagate_catalog(
+    tle_pairs: Iterable[tuple[str, str]],
+    times: datetime | Sequence[datetime] | np.ndarray,
+) -> tuple[Catalog, PropagationResult]:
+    """Convenience wrapper: parse + propagate in one call."""
+    catalog = parse_catalog(tle_pairs)
+    jd, fr = julian_dates(times)
+    return catalog, propagate(catalog, jd, fr)
+
+
+def row_error_codes(catalog: Catalog, result: PropagationResult, step: int = 0) -> np.ndarray:
+    """Per-input-row status for one grid step, aligned with the caller's rows.
+
+    0 = usable state, PARSE_ERROR = TLE rejected by sgp4, any other value is
+    the sgp4 error code (or 1 when the state was non-finite / out of range).
+    """
+    codes = np.full(catalog.size, PARSE_ERROR, dtype=np.int16)
+    if len(catalog):
+        err = result.error[:, step].astype(np.int16)
+        err[(err == 0) & ~result.valid[:, step]] = 1
+        codes[catalog.index] = err
+    return codes
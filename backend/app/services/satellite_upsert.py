@@ -0,0 +1,96 @@
+"""Change-only upserts from the ingestion staging tables.
+
+Used by:
+  - tle_processor.update_satellite_data (satellites, satellites_inactive)
+
+`INSERT ... ON CONFLICT (norad_number) DO UPDATE SET <every column>`
+rewrote every conflicting row on every run, changed or not. Each rewrite is
+a new tuple version plus index entries, so a run left a table's worth of
+dead tuples for autovacuum and churned the indexes the API reads through.
+
+Approach:
+  - The DO UPDATE carries a `WHERE (stored columns) IS DISTINCT FROM
+    (incoming columns)` guard, so a conflicting row whose TLE and derived
+    state are identical is left alone: no new tuple, no index writes.
+    IS DISTINCT FROM treats NULL = NULL (and Postgres NaN = NaN) as
+    unchanged.
+  - Columns with their own update rule (the active table keeps a stored
+    name unless it is a placeholder) are compared through that rule, so
+    a name that would not be taken does not count as a change.
+  - The statement runs in a CTE with `RETURNING (xmax = 0)`: rows
+    inserted have no xmax, updated rows do, and rows the guard skipped are
+    not returned at all. inserted / updated / unchanged come out of one
+    round trip.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Mapping, Sequence
+
+# `satellites` keeps the stored name unless it is still a placeholder.
+KEEP_NAME_UNLESS_PLACEHOLDER = {
+    "name": "CASE WHEN main.name LIKE 'TBA%' OR main.name IS NULL THEN EXCLUDED.name ELSE main.name END",
+}
+
+
+@dataclass
+class UpsertCounts:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+    @property
+    def staged(self) -> int:
+        return self.inserted + self.updated + self.unchanged
+
+
+def change_only_upsert_sql(
+    table: str,
+    source: str,
+    columns: Sequence[str],
+    key: str = "norad_number",
+    rules: Mapping[str, str] | None = None,
+) -> str:
+    """INSERT ... SELECT FROM `source` that updates a conflicting row only if it changed.
+
+    `rules` maps a column to the SQL expression it is set to (default
+    EXCLUDED.<column>); the target row is aliased `main`. The statement
+    returns one row with `inserted` and `updated` counts.
+    """
+    rules = rules or {}
+    updated = [c for c in columns if c != key]
+    new_values = [rules.get(c, f"EXCLUDED.{c}") for c in updated]
+    column_list = ", ".join(columns)
+    assignments = ",\n                ".join(f"{c} = {v}" for c, v in zip(updated, new_values))
+    stored = ", ".join(f"main.{c}" for c in updated)
+    incoming = ", ".join(new_values)
+    return f"""
+        WITH upserted AS (
+            INSERT INTO {table} AS main ({column_list})
+            SELECT {column_list} FROM {source}
+            ON CONFLICT ({key}) DO UPDATE
+            SET
+                {assignments}
+            WHERE ({stored}) IS DISTINCT FROM ({incoming})
+            RETURNING (xmax = 0) AS inserted
+        )
+        SELECT COUNT(*) FILTER (WHERE inserted) AS inserted,
+               COUNT(*) FILTER (WHERE NOT inserted) AS updated
+        FROM upserted;
+    """
+
+
+def change_only_upsert(
+    cursor,
+    table: str,
+    source: str,
+    columns: Sequence[str],
+    staged: int,
+    key: str = "norad_number",
+    rules: Mapping[str, str] | None = None,
+) -> UpsertCounts:
+    """Run change_only_upsert_sql; `staged` is the row count in `source` (the caller commits)."""
+    cursor.execute(change_only_upsert_sql(table, source, columns, key, rules))
+    row = cursor.fetchone()  # RealDictCursor
+    inserted, updated = row["inserted"], row["updated"]
+    return UpsertCounts(inserted=inserted, updated=updated, unchanged=staged - inserted - updated)
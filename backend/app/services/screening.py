@@ -0,0 +1,344 @@
+"""All-vs-all conjunction screening of the active catalog.
+
+Used by:
+  - screen_conjunctions.py (ingestion job → `screened_conjunctions`)
+
+cdm.py only mirrors Space-Track's cdm_public feed. This module screens the
+whole catalog against itself over a multi-day horizon.
+
+Pipeline:
+  1. Shell sieve (per object). Each object's radial shell is
+     [perigee - pad, apogee + pad]. Objects whose shell overlaps no other
+     object's shell can't meet anything and are dropped before propagation.
+  2. Coarse spatial screen. The window is sampled every `step` seconds.
+     Each step's positions go into a cKDTree, and query_pairs returns every
+     pair closer than D + v_max · step / 2 — the farthest apart two objects
+     can be at the nearest sample and still pass within D at TCA. Per pair,
+     samples that are local minima of the sampled distance become candidate
+     encounters.
+  3. Pair filters, on candidates only (30k objects give 4.5e8 pairs, far
+     too many to test up front):
+       - apogee/perigee: the two shells must overlap to within D.
+       - orbit plane: each object must be able to get within D of the other's
+         orbital plane inside ±step of the candidate, given its out-of-plane
+         velocity.
+  4. TCA refinement. Newton's method on the range rate r_rel · v_rel = 0,
+     with two-body accelerations in the derivative. It is bracketed to ±step
+     around the candidate and run for every surviving candidate at once.
+     Encounters closer than D are kept.
+
+The window is cut into independent time slices (SCREENING_SLICE_STEPS
+samples each). Slices bound memory and are the unit of parallelism for
+screen_catalog's process pool. Encounters found at a slice edge by both
+neighbouring slices are merged.
+"""
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+try:
+    from services.propagation import Catalog, parse_catalog, propagate_points, unix_julian_dates
+except ImportError:
+    from app.services.propagation import Catalog, parse_catalog, propagate_points, unix_julian_dates
+
+SCREENING_DISTANCE_KM = float(os.getenv("SCREENING_DISTANCE_KM", "5"))
+SCREENING_HORIZON_HOURS = float(os.getenv("SCREENING_HORIZON_HOURS", "72"))
+SCREENING_STEP_SECONDS = float(os.getenv("SCREENING_STEP_SECONDS", "20"))
+SCREENING_SLICE_STEPS = int(os.getenv("SCREENING_SLICE_STEPS", "360"))
+SCREENING_WORKERS = int(os.getenv("SCREENING_WORKERS", str(os.cpu_count() or 1)))
+# Time steps propagated per SatrecArray call inside a slice; bounds memory.
+SCREENING_PROPAGATION_STEPS = int(os.getenv("SCREENING_PROPAGATION_STEPS", "30"))
+
+# Head-on LEO encounters close at ~15.5 km/s; nothing in Earth orbit is faster.
+MAX_RELATIVE_SPEED_KM_S = 16.0
+# Shell padding for perigee/apogee drift (drag, J2) over a multi-day horizon.
+SHELL_PAD_KM = 25.0
+MU_KM3_S2 = 398600.8  # WGS72, matching the propagator
+TCA_ITERATIONS = 3
+TCA_TOLERANCE_S = 0.01
+
+
+@dataclass
+class Conjunction:
+    norad_1: int
+    norad_2: int
+    tca: datetime
+    miss_distance_km: float
+    relative_speed_km_s: float
+
+    def to_row(self) -> tuple:
+        return (self.norad_1, self.norad_2, self.tca, self.miss_distance_km, self.relative_speed_km_s)
+
+
+# ---------------------------------------------------------------------------
+# Stage 1 — shell sieve
+# ---------------------------------------------------------------------------
+
+def shell_bounds(catalog: Catalog) -> tuple[np.ndarray, np.ndarray]:
+    """(perigee radius, apogee radius) in km for every catalog object."""
+    a = np.array([s.a * s.radiusearthkm for s in catalog.satrecs])
+    e = np.array([s.ecco for s in catalog.satrecs])
+    return a * (1.0 - e), a * (1.0 + e)
+
+
+def overlapping_shells(lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """Mask of intervals [lo, hi] that overlap at least one other interval."""
+    n = len(lo)
+    mask = np.zeros(n, dtype=bool)
+    if n < 2:
+        return mask
+    order = np.argsort(lo, kind="stable")
+    lo_s, hi_s = lo[order], hi[order]
+    # Some earlier interval reaches this one...
+    reach_before = np.concatenate([[-np.inf], np.maximum.accumulate(hi_s)[:-1]])
+    # ...or the next one (sorted by start) begins before this one ends.
+    next_lo = np.concatenate([lo_s[1:], [np.inf]])
+    mask[order] = (reach_before >= lo_s) | (next_lo <= hi_s)
+    return mask
+
+
+# ---------------------------------------------------------------------------
+# Stage 2 — coarse KD-tree screen
+# ---------------------------------------------------------------------------
+
+def coarse_candidates(catalog: Catalog, rows: np.ndarray, grid: np.ndarray, threshold_km: float):
+    """KD-tree pairs within `threshold_km` at each grid time.
+
+    `rows` selects the catalog objects to screen. Returns (i, j, step, dist)
+    arrays with i < j as catalog rows and step as an index into `grid`.
+    """
+    sub = catalog.subset(rows) if len(rows) != len(catalog) else catalog
+    out_i, out_j, out_k, out_d = [], [], [], []
+    for lo in range(0, len(grid), SCREENING_PROPAGATION_STEPS):
+        hi = min(lo + SCREENING_PROPAGATION_STEPS, len(grid))
+        jd, fr = unix_julian_dates(grid[lo:hi])
+        e, r, _ = sub.array.sgp4(jd, fr)
+        valid = (e == 0) & np.isfinite(r).all(axis=-1)
+        for s in range(hi - lo):
+            live = np.flatnonzero(valid[:, s])
+            if len(live) < 2:
+                continue
+            pos = r[live, s]
+            pairs = cKDTree(pos).query_pairs(threshold_km, output_type="ndarray")
+            if not len(pairs):
+                continue
+            a, b = live[pairs[:, 0]], live[pairs[:, 1]]
+            out_i.append(np.minimum(a, b))
+            out_j.append(np.maximum(a, b))
+            out_k.append(np.full(len(a), lo + s, dtype=np.int64))
+            out_d.append(np.linalg.norm(r[a, s] - r[b, s], axis=1))
+    if not out_i:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, np.zeros(0)
+    i = rows[np.concatenate(out_i)]
+    j = rows[np.concatenate(out_j)]
+    return i, j, np.concatenate(out_k), np.concatenate(out_d)
+
+
+def local_minima(i: np.ndarray, j: np.ndarray, step: np.ndarray, dist: np.ndarray) -> np.ndarray:
+    """Indices of records that are local minima of distance along each pair's steps.
+
+    A missing neighbouring step (pair out of range, or slice edge) counts as
+    infinitely far, so the first / last in-range sample can be a minimum.
+    """
+    if len(i) == 0:
+        return np.zeros(0, dtype=np.int64)
+    key = i.astype(np.int64) * (int(j.max()) + 1) + j
+    order = np.lexsort((step, key))
+    key_s, step_s, dist_s = key[order], step[order], dist[order]
+
+    same_prev = np.concatenate([[False], (key_s[1:] == key_s[:-1]) & (step_s[1:] == step_s[:-1] + 1)])
+    same_next = np.concatenate([same_prev[1:], [False]])
+    prev_d = np.where(same_prev, np.concatenate([[np.inf], dist_s[:-1]]), np.inf)
+    next_d = np.where(same_next, np.concatenate([dist_s[1:], [np.inf]]), np.inf)
+    return order[(dist_s <= prev_d) & (dist_s < next_d)]
+
+
+# ---------------------------------------------------------------------------
+# Stage 3 — pair filters
+# ---------------------------------------------------------------------------
+
+def shell_filter(i, j, perigee, apogee, distance_km, pad_km=SHELL_PAD_KM) -> np.ndarray:
+    """Pairs whose radial shells come within `distance_km` of each other."""
+    gap = np.maximum(perigee[i], perigee[j]) - np.minimum(apogee[i], apogee[j])
+    return gap <= distance_km + 2.0 * pad_km
+
+
+def plane_filter(r_i, v_i, r_j, v_j, window_s, distance_km) -> np.ndarray:
+    """Pairs where each object can reach the other's orbit plane (± distance)
+    within ±window_s, moving at its current out-of-plane speed."""
+    def reachable(r_a, v_a, r_b, v_b):
+        n_b = np.cross(r_b, v_b)
+        n_b /= np.linalg.norm(n_b, axis=1, keepdims=True)
+        offset = np.abs(np.einsum("ij,ij->i", r_a, n_b))
+        drift = np.abs(np.einsum("ij,ij->i", v_a, n_b)) * window_s
+        return offset - drift <= distance_km
+
+    return reachable(r_i, v_i, r_j, v_j) & reachable(r_j, v_j, r_i, v_i)
+
+
+# ---------------------------------------------------------------------------
+# Stage 4 — TCA refinement
+# ---------------------------------------------------------------------------
+
+def _relative_states(catalog, i, j, t):
+    # One propagate_points call for both sides halves the per-object overhead.
+    jd, fr = unix_julian_dates(np.concatenate([t, t]))
+    e, r, v = propagate_points(catalog, np.concatenate([i, j]), jd, fr)
+    k = len(i)
+    ok = (e[:k] == 0) & (e[k:] == 0)
+    return r[:k], v[:k], r[k:], v[k:], ok
+
+
+def refine_tca(catalog: Catalog, i, j, t_guess, window_s):
+    """Newton on the range rate, clamped to t_guess ± window_s.
+
+    Returns (tca unix seconds, miss km, relative speed km/s, ok); ok is
+    False where propagation failed or the iteration didn't converge.
+    """
+    t = np.asarray(t_guess, dtype=np.float64).copy()
+    lo, hi = t - window_s, t + window_s
+    for _ in range(TCA_ITERATIONS):
+        r_i, v_i, r_j, v_j, ok = _relative_states(catalog, i, j, t)
+        dr, dv = r_i - r_j, v_i - v_j
+        a_i = -MU_KM3_S2 * r_i / np.linalg.norm(r_i, axis=1, keepdims=True) ** 3
+        a_j = -MU_KM3_S2 * r_j / np.linalg.norm(r_j, axis=1, keepdims=True) ** 3
+        f = np.einsum("ij,ij->i", dr, dv)
+        df = np.einsum("ij,ij->i", dv, dv) + np.einsum("ij,ij->i", dr, a_i - a_j)
+        step = np.where(ok & (df > 0), -f / np.where(df > 0, df, 1.0), 0.0)
+        t = np.clip(t + step, lo, hi)
+
+    r_i, v_i, r_j, v_j, ok = _relative_states(catalog, i, j, t)
+    dr, dv = r_i - r_j, v_i - v_j
+    miss = np.linalg.norm(dr, axis=1)
+    speed = np.linalg.norm(dv, axis=1)
+    # Linearized distance (in time) to the true minimum; a pair pinned at the
+    # clamp without converging is a range-rate sign change, not an encounter.
+    residual = np.abs(np.einsum("ij,ij->i", dr, dv)) / np.maximum(speed, 1e-9) ** 2
+    return t, miss, speed, ok & np.isfinite(miss) & (residual < TCA_TOLERANCE_S)
+
+
+# ---------------------------------------------------------------------------
+# Slices and the full run
+# ---------------------------------------------------------------------------
+
+def screen_slice(catalog: Catalog, rows: np.ndarray, perigee: np.ndarray, apogee: np.ndarray,
+                 grid: np.ndarray, step_seconds: float, distance_km: float):
+    """Screen `rows` over one slice of the time grid.
+
+    Returns (i, j, tca, miss, speed) arrays for encounters within distance_km.
+    """
+    threshold = distance_km + MAX_RELATIVE_SPEED_KM_S * step_seconds / 2.0
+    i, j, k, d = coarse_candidates(catalog, rows, grid, threshold)
+    keep = local_minima(i, j, k, d)
+    i, j, k = i[keep], j[keep], k[keep]
+
+    keep = shell_filter(i, j, perigee, apogee, distance_km)
+    i, j, k = i[keep], j[keep], k[keep]
+
+    r_i, v_i, r_j, v_j, ok = _relative_states(catalog, i, j, grid[k])
+    keep = ok & plane_filter(r_i, v_i, r_j, v_j, step_seconds, distance_km)
+    i, j, k = i[keep], j[keep], k[keep]
+
+    tca, miss, speed, ok = refine_tca(catalog, i, j, grid[k], step_seconds)
+    keep = ok & (miss <= distance_km)
+    return i[keep], j[keep], tca[keep], miss[keep], speed[keep]
+
+
+def merge_encounters(i, j, tca, miss, speed, separation_s):
+    """Collapse duplicates of one encounter (same pair, TCAs within separation_s)."""
+    if len(i) == 0:
+        return i, j, tca, miss, speed
+    order = np.lexsort((tca, j, i))
+    i, j, tca, miss, speed = i[order], j[order], tca[order], miss[order], speed[order]
+    new = np.concatenate([[True], (i[1:] != i[:-1]) | (j[1:] != j[:-1]) | (np.diff(tca) > separation_s)])
+    group = np.cumsum(new) - 1
+    # Keep the closest approach of each group.
+    best = np.full(group[-1] + 1, -1, dtype=np.int64)
+    by_miss = np.lexsort((miss, group))
+    first = np.concatenate([[True], group[by_miss][1:] != group[by_miss][:-1]])
+    best[group[by_miss][first]] = by_miss[first]
+    return i[best], j[best], tca[best], miss[best], speed[best]
+
+
+_worker_state: dict = {}
+
+
+def _prepare(catalog: Catalog, step_seconds: float, distance_km: float) -> None:
+    perigee, apogee = shell_bounds(catalog)
+    rows = np.flatnonzero(overlapping_shells(perigee - SHELL_PAD_KM, apogee + SHELL_PAD_KM))
+    _worker_state.update(catalog=catalog, rows=rows, perigee=perigee, apogee=apogee,
+                         step_seconds=step_seconds, distance_km=distance_km)
+
+
+def _init_worker(tle_pairs, step_seconds, distance_km):
+    # Satrec objects don't pickle cheaply; each worker parses the TLE text itself.
+    _prepare(parse_catalog(tle_pairs), step_seconds, distance_km)
+
+
+def _screen_slice_worker(grid):
+    s = _worker_state
+    return screen_slice(s["catalog"], s["rows"], s["perigee"], s["apogee"], grid,
+                        s["step_seconds"], s["distance_km"])
+
+
+def screen_catalog(tle_pairs, norads, start: datetime, hours: float = SCREENING_HORIZON_HOURS,
+                   step_seconds: float = SCREENING_STEP_SECONDS, distance_km: float = SCREENING_DISTANCE_KM,
+                   workers: int = SCREENING_WORKERS, slice_steps: int = SCREENING_SLICE_STEPS,
+                   progress=None) -> list[Conjunction]:
+    """Screen every (line1, line2) pair against every other over [start, start + hours].
+
+    `norads` is aligned with `tle_pairs`. `progress`, if given, is called
+    with the number of finished slices. Results are sorted by TCA.
+    """
+    tle_pairs = list(tle_pairs)
+    norads = np.asarray(norads)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+
+    t0 = start.timestamp()
+    n_steps = int(np.ceil(hours * 3600.0 / step_seconds)) + 1
+    grid = t0 + np.arange(n_steps) * step_seconds
+    slices = [grid[lo:lo + slice_steps] for lo in range(0, n_steps, slice_steps)]
+
+    catalog = parse_catalog(tle_pairs)
+    workers = max(1, min(workers, len(slices)))
+    if workers == 1:
+        _prepare(catalog, step_seconds, distance_km)
+        results = []
+        for n, grid_slice in enumerate(slices, start=1):
+            results.append(_screen_slice_worker(grid_slice))
+            if progress:
+                progress(n)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(tle_pairs, step_seconds, distance_km)) as executor:
+            results = []
+            for n, result in enumerate(executor.map(_screen_slice_worker, slices), start=1):
+                results.append(result)
+                if progress:
+                    progress(n)
+
+    i, j, tca, miss, speed = merge_encounters(*(np.concatenate([r[c] for r in results]) for c in range(5)),
+                                              separation_s=2.0 * step_seconds)
+    inside = (tca >= t0) & (tca <= grid[-1])
+    i, j, tca, miss, speed = i[inside], j[inside], tca[inside], miss[inside], speed[inside]
+    found = [
+        Conjunction(
+            norad_1=int(min(norads[catalog.index[a]], norads[catalog.index[b]])),
+            norad_2=int(max(norads[catalog.index[a]], norads[catalog.index[b]])),
+            tca=datetime.fromtimestamp(float(t), tz=timezone.utc),
+            miss_distance_km=float(m),
+            relative_speed_km_s=float(v),
+        )
+        for a, b, t, m, v in zip(i, j, tca, miss, speed)
+    ]
+    found.sort(key=lambda c: c.tca)
+    return found
+
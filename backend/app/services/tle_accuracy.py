@@ -0,0 +1,256 @@
+"""TLE prediction error from consecutive element sets in satellite_tle_history.
+
+Used by:
+  - analyze_tle_accuracy.py (daily) → tle_accuracy_objects / tle_accuracy_classes
+
+compute_accuracy in tle_processor compares a fresh propagation against the
+row's stored lat/lon and throws the number away. This measures what a TLE
+is actually worth as a predictor: for every consecutive (older, newer)
+pair of one object, propagate the older set to the newer epoch and compare
+with the newer set at its own epoch.
+
+Approach:
+  - History arrives as an iterator of rows ordered by (norad, epoch);
+    iter_norad_chunks() cuts it into chunks of about ACCURACY_CHUNK_ROWS
+    rows without splitting an object, so memory stays bounded.
+  - pair_errors() parses a chunk once and propagates each element set to
+    both of its times (its own epoch, the next set's epoch) in one
+    propagate_points call. The miss is reported in total and in the
+    radial / in-track / cross-track frame of the newer state.
+  - Object statistics are exact: an object never spans two chunks.
+    Orbit-class statistics go through ClassAccumulator. It keeps running
+    sums and a log-spaced error histogram per class, so percentiles come
+    out of a fixed-size table however long the history gets.
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+import numpy as np
+
+try:
+    from services.orbital_elements import EARTH_RADIUS_KM
+    from services.propagation import parse_catalog, propagate_points
+except ImportError:
+    from app.services.orbital_elements import EARTH_RADIUS_KM
+    from app.services.propagation import parse_catalog, propagate_points
+
+ACCURACY_CHUNK_ROWS = int(os.getenv("ACCURACY_CHUNK_ROWS", "200000"))
+ACCURACY_MAX_SPAN_DAYS = float(os.getenv("ACCURACY_MAX_SPAN_DAYS", "30"))
+
+# Histogram for class percentiles: 1 m … 100,000 km, ~1.2% per bin.
+_HIST_EDGES = np.logspace(-3, 5, 1601)
+
+ORBIT_CLASSES = ("LEO", "MEO", "GEO", "HEO")
+
+
+def orbit_classes(perigee_km, apogee_km) -> np.ndarray:
+    """Vectorized variables.classify_orbit_type (same thresholds)."""
+    mean_alt = (np.asarray(perigee_km, dtype=np.float64) + np.asarray(apogee_km, dtype=np.float64)) / 2.0
+    return np.select(
+        [mean_alt < 2000, mean_alt < 35786, mean_alt <= 35792],
+        ["LEO", "MEO", "GEO"],
+        default="HEO",
+    )
+
+
+def iter_norad_chunks(rows: Iterable, chunk_rows: int = ACCURACY_CHUNK_ROWS,
+                      key: str = "norad_number") -> Iterator[list]:
+    """Group rows (sorted by `key`) into lists of ~chunk_rows, never splitting a key.
+
+    One object with more than chunk_rows rows comes out as a chunk of its own.
+    """
+    chunk, tail, current = [], [], None
+    for row in rows:
+        if row[key] != current:
+            chunk.extend(tail)
+            tail, current = [], row[key]
+            if len(chunk) >= chunk_rows:
+                yield chunk
+                chunk = []
+        tail.append(row)
+    chunk.extend(tail)
+    if chunk:
+        yield chunk
+
+
+@dataclass
+class PairErrors:
+    """One entry per consecutive (older, newer) element-set pair."""
+    norad: np.ndarray          # int64 (K,)
+    epoch_jd: np.ndarray       # float64 (K,) — newer epoch, Julian date
+    span_days: np.ndarray      # float64 (K,)
+    error_km: np.ndarray       # float64 (K,)
+    radial_km: np.ndarray
+    in_track_km: np.ndarray
+    cross_track_km: np.ndarray
+    orbit_class: np.ndarray    # str (K,) — from the newer element set
+
+    def __len__(self) -> int:
+        return len(self.norad)
+
+
+def pair_errors(norads, tle_pairs, max_span_days: float = ACCURACY_MAX_SPAN_DAYS) -> PairErrors:
+    """Prediction error of each element set at the next one's epoch.
+
+    `norads` / `tle_pairs` are aligned and sorted by (norad, epoch). Pairs
+    further apart than max_span_days, with a non-increasing epoch, or where
+    either set fails to parse or propagate, are dropped.
+    """
+    catalog = parse_catalog(tle_pairs)
+    n = len(catalog)
+    norad = np.asarray(norads, dtype=np.int64)[catalog.index] if n else np.zeros(0, np.int64)
+    jd = np.array([s.jdsatepoch for s in catalog.satrecs])
+    fr = np.array([s.jdsatepochF for s in catalog.satrecs])
+    span = (jd[1:] - jd[:-1]) + (fr[1:] - fr[:-1])
+    older = np.flatnonzero((norad[1:] == norad[:-1]) & (span > 0) & (span <= max_span_days))
+    newer = older + 1
+
+    # Every set at its own epoch (tsince 0) + each "older" set at the next epoch.
+    rows = np.concatenate([newer, older])
+    err, r, v = propagate_points(catalog, rows, np.concatenate([jd[newer], jd[newer]]),
+                                 np.concatenate([fr[newer], fr[newer]]))
+    k = len(older)
+    ok = (err[:k] == 0) & (err[k:] == 0) & np.isfinite(r).all(axis=1).reshape(2, k).all(axis=0)
+    r_new, v_new, r_old = r[:k][ok], v[:k][ok], r[k:][ok]
+    older, newer = older[ok], newer[ok]
+
+    radial = r_new / np.linalg.norm(r_new, axis=1, keepdims=True)
+    h = np.cross(r_new, v_new)
+    cross = h / np.linalg.norm(h, axis=1, keepdims=True)
+    along = np.cross(cross, radial)
+    d = r_old - r_new
+
+    a = np.array([catalog.satrecs[i].a * catalog.satrecs[i].radiusearthkm for i in newer], dtype=np.float64)
+    e = np.array([catalog.satrecs[i].ecco for i in newer], dtype=np.float64)
+    return PairErrors(
+        norad=norad[newer],
+        epoch_jd=jd[newer] + fr[newer],
+        span_days=span[older],
+        error_km=np.linalg.norm(d, axis=1),
+        radial_km=(d * radial).sum(axis=1),
+        in_track_km=(d * along).sum(axis=1),
+        cross_track_km=(d * cross).sum(axis=1),
+        orbit_class=orbit_classes(a * (1 - e) - EARTH_RADIUS_KM, a * (1 + e) - EARTH_RADIUS_KM),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Statistics
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ObjectStats:
+    norad_number: int
+    orbit_class: str
+    pairs: int
+    median_error_km: float
+    p95_error_km: float
+    max_error_km: float
+    median_span_days: float
+    median_error_rate_km_day: float
+    median_radial_km: float
+    median_in_track_km: float
+    median_cross_track_km: float
+
+    def to_row(self) -> tuple:
+        return (
+            self.norad_number, self.orbit_class, self.pairs, self.median_error_km,
+            self.p95_error_km, self.max_error_km, self.median_span_days,
+            self.median_error_rate_km_day, self.median_radial_km,
+            self.median_in_track_km, self.median_cross_track_km,
+        )
+
+
+def object_stats(errors: PairErrors) -> list[ObjectStats]:
+    """Per-object error statistics; absolute values for the RIC components."""
+    if len(errors) == 0:
+        return []
+    starts = np.flatnonzero(np.r_[True, errors.norad[1:] != errors.norad[:-1]])
+    ends = np.r_[starts[1:], len(errors)]
+    out = []
+    for s, e in zip(starts, ends):
+        err = errors.error_km[s:e]
+        out.append(ObjectStats(
+            norad_number=int(errors.norad[s]),
+            orbit_class=str(errors.orbit_class[e - 1]),
+            pairs=int(e - s),
+            median_error_km=float(np.median(err)),
+            p95_error_km=float(np.percentile(err, 95)),
+            max_error_km=float(err.max()),
+            median_span_days=float(np.median(errors.span_days[s:e])),
+            median_error_rate_km_day=float(np.median(err / errors.span_days[s:e])),
+            median_radial_km=float(np.median(np.abs(errors.radial_km[s:e]))),
+            median_in_track_km=float(np.median(np.abs(errors.in_track_km[s:e]))),
+            median_cross_track_km=float(np.median(np.abs(errors.cross_track_km[s:e]))),
+        ))
+    return out
+
+
+@dataclass
+class ClassStats:
+    orbit_class: str
+    pairs: int
+    objects: int
+    mean_error_km: float
+    rms_error_km: float
+    p50_error_km: float
+    p90_error_km: float
+    p95_error_km: float
+    p99_error_km: float
+    mean_span_days: float
+
+    def to_row(self) -> tuple:
+        return (
+            self.orbit_class, self.pairs, self.objects, self.mean_error_km, self.rms_error_km,
+            self.p50_error_km, self.p90_error_km, self.p95_error_km, self.p99_error_km,
+            self.mean_span_days,
+        )
+
+
+class ClassAccumulator:
+    """Streaming per-orbit-class error statistics in fixed memory."""
+
+    def __init__(self):
+        self.counts = {c: np.zeros(len(_HIST_EDGES) + 1, dtype=np.int64) for c in ORBIT_CLASSES}
+        self.sums = {c: np.zeros(3) for c in ORBIT_CLASSES}  # error, error², span
+        self.objects = {c: 0 for c in ORBIT_CLASSES}
+
+    def add(self, errors: PairErrors, stats: list[ObjectStats] | None = None) -> None:
+        for c in ORBIT_CLASSES:
+            mask = errors.orbit_class == c
+            err = errors.error_km[mask]
+            self.counts[c] += np.bincount(np.searchsorted(_HIST_EDGES, err), minlength=len(_HIST_EDGES) + 1)
+            self.sums[c] += (err.sum(), (err ** 2).sum(), errors.span_days[mask].sum())
+        for s in stats if stats is not None else object_stats(errors):
+            self.objects[s.orbit_class] += 1
+
+    def _percentile(self, c: str, q: float) -> float:
+        cum = np.cumsum(self.counts[c])
+        i = int(np.searchsorted(cum, q / 100.0 * cum[-1]))
+        lo = _HIST_EDGES[max(i - 1, 0)]
+        hi = _HIST_EDGES[min(i, len(_HIST_EDGES) - 1)]
+        return float(np.sqrt(lo * hi))  # geometric bin centre
+
+    def stats(self) -> list[ClassStats]:
+        out = []
+        for c in ORBIT_CLASSES:
+            n = int(self.counts[c].sum())
+            if n == 0:
+                continue
+            total, squares, span = self.sums[c]
+            out.append(ClassStats(
+                orbit_class=c,
+                pairs=n,
+                objects=self.objects[c],
+                mean_error_km=float(total / n),
+                rms_error_km=float(np.sqrt(squares / n)),
+                p50_error_km=self._percentile(c, 50),
+                p90_error_km=self._percentile(c, 90),
+                p95_error_km=self._percentile(c, 95),
+                p99_error_km=self._percentile(c, 99),
+                mean_span_days=float(span / n),
+            ))
+        return out
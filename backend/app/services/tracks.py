@@ -0,0 +1,223 @@
+"""Ground track / orbit path for one satellite, sampled server-side.
+
+Used by:
+  - GET /api/satellites/{norad}/track (api/satellites.py)
+
+SatelliteDetail.jsx and Tracking.jsx used to rebuild orbit paths in the
+browser from raw TLEs. This service samples the whole window with one
+Satrec.sgp4_array call, converts every sample with services/frames.py in
+one batch, and returns columnar ECI (TEME) and geodetic points.
+
+Optional decimation (Ramer–Douglas–Peucker) drops samples that lie within
+`tolerance_km` of the straight segment between their kept neighbours. The
+test runs on ECI and Earth-fixed coordinates together, so the thinned
+result follows both the orbit ellipse and the ground track's curvature,
+keeping dense samples where the path bends and few where it doesn't.
+
+Results are cached per (norad, TLE epoch, window, step, tolerance): a new
+element set changes the key, so nothing stale is served after ingestion.
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sgp4.api import WGS72, Satrec
+
+try:
+    from database import get_db_connection
+    from services.frames import itrs_to_geodetic, teme_to_itrs
+    from services.lru import LRUCache
+    from services.propagation import MAX_VALID_RADIUS_KM, julian_dates
+except ImportError:
+    from app.database import get_db_connection
+    from app.services.frames import itrs_to_geodetic, teme_to_itrs
+    from app.services.lru import LRUCache
+    from app.services.propagation import MAX_VALID_RADIUS_KM, julian_dates
+
+TRACK_MAX_SAMPLES = int(os.getenv("TRACK_MAX_SAMPLES", "20000"))
+TRACK_CACHE_SIZE = int(os.getenv("TRACK_CACHE_SIZE", "256"))
+# Default window is one orbit sampled at this many points.
+DEFAULT_SAMPLES_PER_ORBIT = 180
+
+
+class TrackError(ValueError):
+    """Bad window / step, or a satellite without a usable TLE."""
+
+
+@dataclass
+class Track:
+    """Valid samples only; all arrays share the first axis."""
+    norad: int
+    tle_epoch: str
+    unix_seconds: np.ndarray  # float64 (N,)
+    eci: np.ndarray           # float64 (N, 3) — TEME km
+    ecef: np.ndarray          # float64 (N, 3) — ITRS km
+    lat: np.ndarray
+    lon: np.ndarray
+    alt: np.ndarray
+
+    def take(self, keep: np.ndarray) -> "Track":
+        return Track(self.norad, self.tle_epoch, self.unix_seconds[keep], self.eci[keep],
+                     self.ecef[keep], self.lat[keep], self.lon[keep], self.alt[keep])
+
+    def to_dict(self) -> dict:
+        return {
+            "norad_number": self.norad,
+            "tle_epoch": self.tle_epoch,
+            "count": int(len(self.unix_seconds)),
+            "t": np.round(self.unix_seconds, 3).tolist(),
+            "lat": np.round(self.lat, 4).tolist(),
+            "lon": np.round(self.lon, 4).tolist(),
+            "alt": np.round(self.alt, 3).tolist(),
+            "eci": {
+                "x": np.round(self.eci[:, 0], 3).tolist(),
+                "y": np.round(self.eci[:, 1], 3).tolist(),
+                "z": np.round(self.eci[:, 2], 3).tolist(),
+            },
+        }
+
+
+# ---------------------------------------------------------------------------
+# Sampling
+# ---------------------------------------------------------------------------
+
+def orbital_period_seconds(satrec: Satrec) -> float:
+    # no_kozai is the mean motion in rad/min.
+    return 2.0 * np.pi / satrec.no_kozai * 60.0
+
+
+def sample_track(satrec: Satrec, norad: int, tle_epoch: str,
+                 start: datetime, end: datetime, step_seconds: float) -> Track:
+    """Propagate `satrec` over [start, end] every `step_seconds` in one call."""
+    if step_seconds <= 0:
+        raise TrackError("step must be positive")
+    if end <= start:
+        raise TrackError("end must be after start")
+    n = int((end - start).total_seconds() // step_seconds) + 1
+    if n > TRACK_MAX_SAMPLES:
+        raise TrackError(f"window / step gives {n} samples; the limit is {TRACK_MAX_SAMPLES}")
+
+    t0 = np.datetime64(start.astimezone(timezone.utc).replace(tzinfo=None), "us")
+    times = t0 + np.round(np.arange(n) * step_seconds * 1e6).astype("timedelta64[us]")
+    jd, fr = julian_dates(times)
+
+    e, r, v = satrec.sgp4_array(jd, fr)
+    ok = (e == 0) & np.isfinite(r).all(axis=-1) & (np.abs(r) < MAX_VALID_RADIUS_KM).all(axis=-1)
+
+    eci = r[ok]
+    ecef = teme_to_itrs(eci, jd[ok], fr[ok])
+    lat, lon, alt = itrs_to_geodetic(ecef)
+    unix_seconds = times[ok].astype(np.int64) / 1e6
+    return Track(norad, tle_epoch, unix_seconds, eci, ecef, lat, lon, alt)
+
+
+# ---------------------------------------------------------------------------
+# Decimation
+# ---------------------------------------------------------------------------
+
+def _segment_distances(points: np.ndarray, a: int, b: int) -> np.ndarray:
+    """Distance of points[a+1:b] from the segment points[a] → points[b]."""
+    p, q = points[a], points[b]
+    d = q - p
+    inner = points[a + 1:b] - p
+    length2 = float(d @ d)
+    if length2 == 0.0:
+        return np.linalg.norm(inner, axis=1)
+    u = np.clip(inner @ d / length2, 0.0, 1.0)
+    return np.linalg.norm(inner - u[:, None] * d, axis=1)
+
+
+def rdp_keep(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """Ramer–Douglas–Peucker on (N, D) points; returns a boolean keep-mask.
+
+    Iterative (no recursion limit) and vectorized per segment. Endpoints are
+    always kept.
+    """
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        dist = _segment_distances(points, a, b)
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            split = a + 1 + i
+            keep[split] = True
+            stack.append((a, split))
+            stack.append((split, b))
+    return keep
+
+
+def decimate(track: Track, tolerance_km: float) -> Track:
+    """Keep the samples needed to stay within `tolerance_km` of the full path."""
+    if tolerance_km <= 0 or len(track.unix_seconds) < 3:
+        return track
+    return track.take(rdp_keep(np.hstack([track.eci, track.ecef]), tolerance_km))
+
+
+# ---------------------------------------------------------------------------
+# Cached entry point
+# ---------------------------------------------------------------------------
+
+_cache = LRUCache(TRACK_CACHE_SIZE)
+
+
+def _load_tle(norad: int) -> dict | None:
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT tle_line1, tle_line2, epoch FROM satellites WHERE norad_number = %s",
+                (norad,),
+            )
+            return cursor.fetchone()
+    finally:
+        conn.close()
+
+
+def get_track(norad: int, start: datetime | None = None, end: datetime | None = None,
+              step_seconds: float | None = None, tolerance_km: float = 0.0) -> dict | None:
+    """Track as a JSON-ready dict, or None if the satellite isn't in the catalog.
+
+    Defaults: start = now (to the minute), end = start + one orbital period,
+    step = period / 180.
+    """
+    row = _load_tle(norad)
+    if row is None:
+        return None
+    satrec = Satrec.twoline2rv(row["tle_line1"], row["tle_line2"], WGS72)
+    if satrec.error != 0:
+        raise TrackError("stored TLE could not be parsed")
+
+    period = orbital_period_seconds(satrec)
+    if start is None:
+        # Snap "now" to the minute so default-window requests share a cache entry.
+        now = int(datetime.now(timezone.utc).timestamp())
+        start = datetime.fromtimestamp(now - now % 60, tz=timezone.utc)
+    elif start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    end = end or start + timedelta(seconds=period)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    step_seconds = step_seconds or period / DEFAULT_SAMPLES_PER_ORBIT
+
+    tle_epoch = str(row["epoch"])
+    key = (norad, tle_epoch, start, end, step_seconds, tolerance_km)
+    body = _cache.get(key)
+    if body is not None:
+        return body
+
+    track = decimate(sample_track(satrec, norad, tle_epoch, start, end, step_seconds), tolerance_km)
+    body = track.to_dict()
+    body.update({"start": start.isoformat(), "end": end.isoformat(), "step": step_seconds,
+                 "tolerance_km": tolerance_km})
+
+    return _cache.put(key, body)
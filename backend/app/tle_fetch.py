@@ -1,18 +1,33 @@
 # /backend/app/tle_processor.py
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from variables import compute_orbital_params, infer_purpose
+from variables import ORBITAL_PARAMS_VERSION, compute_orbital_params_chunk, orbital_params_from_record, infer_purpose
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
 import os
 import requests
 import time
-import json
+from contextlib import ExitStack
 from datetime import datetime, timezone
+from services.delta_sync import SPACETRACK_BASE_URL, FetchPlan, gp_url
+from services.gp_stream import GPCacheWriter, iter_chunks, open_gp_records, read_gp_cache
 # ✅ Load latest IERS data
 load_dotenv()
 SPACETRACK_USER = os.getenv("SPACETRACK_USER")
 SPACETRACK_PASS = os.getenv("SPACETRACK_PASS")
 COOKIES_FILE = "cookies.txt"  # Ensure this is the correct cookie file path
-TLE_FILE_PATH = "tle_latest.json"  # ✅ Store TLE data locally
+TLE_FILE_PATH = "tle_latest.jsonl"  # ✅ Store TLE data locally (JSON Lines, see services/gp_stream.py)
+TLE_CACHE_MAX_AGE_SECONDS = 3600
+GP_URL = gp_url()  # full catalog; services/delta_sync.py builds the delta queries
+
+# Orbital-parameter computation is pure CPU — fan it out across processes.
+# TLE_WORKERS=1 keeps everything in-process (handy for debugging).
+TLE_WORKERS = int(os.getenv("TLE_WORKERS", str(os.cpu_count() or 1)))
+TLE_CHUNK_SIZE = int(os.getenv("TLE_CHUNK_SIZE", "1000"))
+# GP records parsed, computed, propagated and staged together; bounds the
+# updater's working set when streaming the catalog.
+TLE_STREAM_CHUNK_SIZE = int(os.getenv("TLE_STREAM_CHUNK_SIZE", "5000"))
 
 
 def parse_datetime(date_str):
@@ -29,11 +44,53 @@ def parse_datetime(date_str):
 
 
 
-def serialize_datetime(obj):
-    """Convert datetime objects to ISO format strings."""
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    raise TypeError(f"Type {type(obj)} not serializable")
+def tle_hash(tle_line1, tle_line2):
+    """
+    Change-detection key for an element set: md5 of the two stripped TLE
+    lines, identical to Postgres' md5(tle_line1 || tle_line2) on the stored row.
+    """
+    return hashlib.md5(f"{(tle_line1 or '').strip()}{(tle_line2 or '').strip()}".encode()).hexdigest()
+
+
+
+class PreviousParams:
+    """
+    Last run's orbital parameters, looked up by NORAD_CAT_ID and TLE hash.
+    Orbital parameters depend only on the TLE lines, so an unchanged element
+    set can reuse them as-is. Only the md5 digest and the byte offset of each
+    record are kept in memory; a hit reads its parameters back from the old
+    cache file, which stays in place until the new cache is swapped in.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._index = {}
+        self._file.readline()  # header
+        offset = self._file.tell()
+        for line in self._file:
+            if line.strip():
+                sat = json.loads(line)
+                if sat.get("computed_params"):
+                    digest = bytes.fromhex(tle_hash(sat.get("TLE_LINE1"), sat.get("TLE_LINE2")))
+                    self._index[sat.get("NORAD_CAT_ID")] = (digest, offset)
+            offset += len(line)
+
+    def lookup(self, norad, tle_hash_hex):
+        """computed_params stored for `norad` if its TLE hash still matches, else None."""
+        entry = self._index.get(norad)
+        if entry is None or entry[0] != bytes.fromhex(tle_hash_hex):
+            return None
+        self._file.seek(entry[1])
+        params = json.loads(self._file.readline())["computed_params"]
+        if isinstance(params.get("epoch"), str):
+            params["epoch"] = datetime.fromisoformat(params["epoch"])
+        return params
+
+    def __len__(self):
+        return len(self._index)
+
+    def close(self):
+        self._file.close()
 
 
 
@@ -46,7 +103,7 @@ def get_spacetrack_session():
     if os.path.exists(COOKIES_FILE):
         os.remove(COOKIES_FILE)
 
-    login_url = "https://www.space-track.org/ajaxauth/login"
+    login_url = f"{SPACETRACK_BASE_URL}/ajaxauth/login"
     payload = {"identity": SPACETRACK_USER, "password": SPACETRACK_PASS}
 
     response = session.post(login_url, data=payload)
@@ -70,51 +127,97 @@ def get_spacetrack_session():
 
 
 
-def fetch_tle_data(session, existing_norads):
+def _init_orbital_params_worker():
     """
-    Fetches the latest TLE data and ensures the file is always written cleanly.
-    Uses cached TLEs if available but always rewrites the file.
+    Runs once per worker process: load the IERS table so every chunk the
+    worker handles reuses it instead of re-reading it per satellite.
     """
-    if not existing_norads:
-        print("⚠️ No existing NORAD numbers found. Skipping TLE fetch.")
+    from astropy.utils import iers
+    try:
+        iers.earth_orientation_table.get()
+    except Exception as e:
+        print(f"⚠️ IERS table unavailable in worker ({e}); using zero EOP.")
+
+
+def compute_orbital_params_parallel(records, workers=TLE_WORKERS, chunk_size=TLE_CHUNK_SIZE, executor=None):
+    """
+    Computes orbital parameters for a list of (name, tle_line1, tle_line2)
+    tuples across a process pool. Returns a list aligned with `records`
+    holding the compute_orbital_params dict (or None) for each entry.
+    Pass `executor` to reuse one pool across calls (streaming ingestion).
+    """
+    if not records:
         return []
 
-    # ✅ Initialize variable
-    satellites = []
+    chunks = [records[i:i + chunk_size] for i in range(0, len(records), chunk_size)]
+    if executor is not None:
+        packed = list(executor.map(compute_orbital_params_chunk, chunks))
+        return [orbital_params_from_record(record) for chunk in packed for record in chunk]
+
+    workers = max(1, min(workers, len(chunks)))
+    print(f"⚙️ Computing orbital parameters for {len(records)} TLEs "
+          f"({len(chunks)} chunks, {workers} worker{'s' if workers > 1 else ''})...")
+
+    if workers == 1:
+        packed = [compute_orbital_params_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_orbital_params_worker) as executor:
+            packed = list(executor.map(compute_orbital_params_chunk, chunks))
 
+    return [orbital_params_from_record(record) for chunk in packed for record in chunk]
 
-    # ✅ Check if the TLE file exists
+
+def _open_gp_source(session, stack, plan):
+    """
+    (records iterator, previous_params, cache header or None) for this run.
+    A fresh cache is streamed instead of querying, unless it holds a delta
+    and `plan` asks for the full catalog; otherwise the GP response for
+    `plan.url` is parsed straight off the HTTP stream. Returns
+    (None, ...) on an API error.
+    """
+    previous_params = None
     if os.path.exists(TLE_FILE_PATH):
         try:
-            with open(TLE_FILE_PATH, "r") as file:
-                tle_data = json.load(file)
-
-            # ✅ Use cached data if <1 hour old
-            if time.time() - tle_data["timestamp"] < 3600:
-                print("📡 Using cached TLE data (Last Updated: < 1 hour ago)")
-                satellites = tle_data["satellites"]
-        except (json.JSONDecodeError, KeyError):
+            header, cached = read_gp_cache(TLE_FILE_PATH)
+            cached_mode = header.get("mode", "full")
+            if header.get("params_version") != ORBITAL_PARAMS_VERSION:
+                # Parameters from an older formula: recompute every one of them.
+                print("⚠️ Cached orbital parameters are from an older version. Fetching fresh data...")
+            elif (time.time() - header["timestamp"] < TLE_CACHE_MAX_AGE_SECONDS
+                    and (cached_mode == "full" or plan.mode == "delta")):
+                print(f"📡 Using cached TLE data ({cached_mode}, Last Updated: < 1 hour ago)")
+                return cached, previous_params, header
+            else:
+                # ✅ Remember last run's results so unchanged TLEs skip recomputation
+                previous_params = PreviousParams(TLE_FILE_PATH)
+                stack.callback(previous_params.close)
+        except (ValueError, KeyError):
             print("⚠️ TLE file is corrupt or incomplete. Fetching fresh data...")
 
+    if plan.mode == "delta":
+        print(f"📡 Fetching GP records created since {plan.since:%Y-%m-%d %H:%M:%S} UTC (delta, streaming)...")
+    else:
+        print("📡 Fetching latest TLE data from Space-Track (full catalog, streaming)...")
+    status, records = open_gp_records(session, plan.url, stack)
+    if records is None:
+        print(f"❌ API error {status}. Could not fetch TLE data.")
+    return records, previous_params, None
 
 
-    # ✅ If no cached data is available, fetch fresh TLEs
-    if not satellites:
-        print("📡 Fetching latest TLE data from Space-Track...")
-        tle_url = "https://www.space-track.org/basicspacedata/query/class/gp/orderby/EPOCH%20desc/format/json"
-        response = session.get(tle_url)
-
-        if response.status_code == 200:
-            satellites = response.json()
-        else:
-            print(f"❌ API error {response.status_code}. Could not fetch TLE data.")
-            return []
-        
-    
-    # ✅ Compute orbital parameters for each satellite
-    # ✅ Compute orbital parameters for each satellite
-    for sat in satellites:
-        now = datetime.now().astimezone(timezone.utc)
+def _prepare_chunk(chunk, previous_params, executor):
+    """
+    Decay / future-epoch checks, parameter reuse and computation for one
+    chunk of GP records, in place. Returns the number of reused parameter sets.
+    """
+    now = datetime.now().astimezone(timezone.utc)
+    pending = []
+    reused = 0
+    for sat in chunk:
+        if "computed_params" in sat:  # streamed back from the cache, already done
+            params = sat["computed_params"]
+            if params and isinstance(params.get("epoch"), str):
+                params["epoch"] = datetime.fromisoformat(params["epoch"])
+            continue
 
         decay_date = parse_datetime(sat.get("DECAY_DATE"))
         if decay_date is not None and decay_date.tzinfo is None:
@@ -122,6 +225,7 @@ def fetch_tle_data(session, existing_norads):
 
         # 🚀 **Skip decayed satellites (older than 7 days)**
         if decay_date is not None and decay_date < now - timedelta(days=7):
+            sat["computed_params"] = None
             continue
 
         epoch = parse_datetime(sat.get("EPOCH"))
@@ -134,20 +238,95 @@ def fetch_tle_data(session, existing_norads):
             sat["computed_params"] = None  # ✅ Mark it explicitly as None
             continue  # 🚀 Skip computing parameters
 
+        # ✅ Reuse last run's parameters if the element set hasn't changed
+        previous = previous_params and previous_params.lookup(
+            sat.get("NORAD_CAT_ID"), tle_hash(sat.get("TLE_LINE1"), sat.get("TLE_LINE2")))
+        if previous:
+            sat["computed_params"] = previous
+            reused += 1
+            continue
+
         # ✅ Compute only if epoch is valid
-        sat["computed_params"] = compute_orbital_params(
-            sat.get("OBJECT_NAME", "Unknown"),
-            sat.get("TLE_LINE1", ""),
-            sat.get("TLE_LINE2", "")
-        )
+        pending.append(sat)
+
+    computed = compute_orbital_params_parallel([
+        (sat.get("OBJECT_NAME", "Unknown"), sat.get("TLE_LINE1", ""), sat.get("TLE_LINE2", ""))
+        for sat in pending
+    ], executor=executor)
+    for sat, params in zip(pending, computed):
+        sat["computed_params"] = params
+    return reused
 
 
-    # ✅ Always rewrite the file, even if using cached data
-    with open(TLE_FILE_PATH, "w") as file:
-        json.dump({"timestamp": time.time(), "satellites": satellites}, file, default=serialize_datetime)
+def iter_tle_chunks(session, existing_norads, chunk_size=TLE_STREAM_CHUNK_SIZE, plan=None, mark=None):
+    """
+    Streams the GP catalog and yields (active, inactive) satellite lists one
+    chunk of `chunk_size` GP records at a time, so the caller can propagate
+    and stage each chunk without holding the catalog's records. What stays
+    per object is the NORAD sets and a hash/offset into the previous cache.
+    The cache file is rewritten as chunks go by and swapped in at the end.
+
+    `plan` (services/delta_sync.FetchPlan) selects a full or delta query;
+    the default is the full catalog. When a fresh cache is replayed instead,
+    plan.mode and plan.fetched_at are set to the mode and time that cache
+    was fetched with. Every streamed
+    record is shown to `mark` (a delta_sync.HighWaterMark), if given.
+    """
+    if not existing_norads:
+        print("⚠️ No existing NORAD numbers found. Skipping TLE fetch.")
+        return
+
+    plan = plan or FetchPlan("full", GP_URL)
+    with ExitStack() as stack:
+        records, previous_params, cache_header = _open_gp_source(session, stack, plan)
+        if records is None:
+            return
+        from_cache = cache_header is not None
+        if from_cache:
+            plan.mode = cache_header.get("mode", "full")
+            plan.fetched_at = datetime.fromtimestamp(cache_header["timestamp"], timezone.utc)
+
+        workers = max(1, TLE_WORKERS)
+        executor = None
+        if workers > 1:
+            executor = stack.enter_context(
+                ProcessPoolExecutor(max_workers=workers, initializer=_init_orbital_params_worker))
+        print(f"⚙️ Computing orbital parameters chunk by chunk "
+              f"({chunk_size} GP records per chunk, {workers} worker{'s' if workers > 1 else ''})...")
+
+        # ✅ A replayed cache keeps its original fetch time, so it still expires
+        cache = GPCacheWriter(TLE_FILE_PATH, cache_header["timestamp"] if from_cache else time.time(),
+                              mode=plan.mode, params_version=ORBITAL_PARAMS_VERSION)
+        seen_norads = set()
+        reused = 0
+        try:
+            for chunk in iter_chunks(records, chunk_size):
+                if mark is not None:
+                    mark.observe(chunk)
+                reused += _prepare_chunk(chunk, previous_params, executor)
+                cache.write(chunk)
+                yield filter_satellites(chunk, existing_norads, seen_norads)
+        except BaseException:
+            cache.abort()
+            raise
+        # ✅ Always rewrite the file, even if using cached data
+        cache.close()
+
+    if not from_cache:
+        print(f"♻️ Reused orbital parameters for {reused} unchanged TLEs.")
+    print(f"✅ Processed {plan.mode} TLE data for {cache.count} satellites.")
+
 
-    print(f"✅ Processed TLE data for {len(satellites)} satellites.")
-    return filter_satellites(satellites, existing_norads)
+def fetch_tle_data(session, existing_norads):
+    """
+    Whole-catalog form of iter_tle_chunks: (active, inactive) lists for
+    callers that want everything at once.
+    """
+    active, inactive = [], []
+    for active_chunk, inactive_chunk in iter_tle_chunks(session, existing_norads):
+        active.extend(active_chunk)
+        inactive.extend(inactive_chunk)
+    return active, inactive
 
 
 
@@ -209,19 +388,19 @@ def classify_satellite_activity(orbit_type, epoch, perigee):
 
 
 
-def filter_satellites(satellites, existing_norads):
+def filter_satellites(satellites, existing_norads, seen_norads=None):
     """
     Filters the downloaded TLE dataset to:
     - Keep satellites in our database
     - Store additional metadata fields
-    - Prevent duplicates (NORADs)
+    - Prevent duplicates (NORADs), across chunks when `seen_norads` is shared
     - Ignore satellites with NaN lat/lon
     - Return two lists: active satellites and inactive satellites
     """
     filtered_satellites = []
     inactive_satellites = []
     existing_norads_set = set(existing_norads)
-    seen_norads = set()  # ✅ Track added NORADs
+    seen_norads = set() if seen_norads is None else seen_norads  # ✅ Track added NORADs
 
     for sat in satellites:
         try:
@@ -1,24 +1,24 @@
 # /backend/app/tle_processor.py
 
-import csv
 import psycopg2
 from skyfield.api import load
 from tqdm import tqdm
 from database import get_db_connection  # ✅ Use get_db_connection()
-from tle_fetch import get_spacetrack_session, fetch_tle_data
-from tempfile import NamedTemporaryFile
+from tle_fetch import get_spacetrack_session, iter_tle_chunks, tle_hash
 import numpy as np  # For NaN detection
-from concurrent.futures import ThreadPoolExecutor
-from sgp4.api import Satrec, WGS72
+from sgp4.api import Satrec, SatrecArray, WGS72
 from datetime import datetime, timezone
 import traceback
-from astropy.coordinates import TEME, ITRS
-from astropy import units as u
-from astropy.time import Time
 import math
-import os
 import sys
-from concurrent.futures import ThreadPoolExecutor
+from services.catalog import bump_catalog_revision
+from services.copy_stream import binary_copy_types, copy_rows
+from services.delta_sync import HighWaterMark, load_sync_state, next_state, plan_gp_fetch, store_sync_state
+from services.ephemeris import store_ephemeris
+from services.frames import teme_to_geodetic
+from services.orbital_elements import derived_elements
+from services.propagation import Catalog, julian_dates, parse_catalog, propagate_catalog, row_error_codes
+from services.satellite_upsert import KEEP_NAME_UNLESS_PLACEHOLDER, UpsertCounts, change_only_upsert
 EARTH_RADIUS_KM = 6371 
 
 
@@ -111,9 +111,11 @@ def clean_old_norads():
             OR (altitude_km IS NULL OR altitude_km < 80)
     """
     cursor.execute(delete_query)
+    deleted_rows = cursor.rowcount
+    if deleted_rows:
+        bump_catalog_revision(cursor)
     conn.commit()
 
-    deleted_rows = cursor.rowcount
     print(f"✅ Moved and deleted {deleted_rows} outdated NORADs from 'satellites'.")
 
     cursor.close()
@@ -156,6 +158,28 @@ def get_existing_norad_numbers():
 
 
 
+def get_existing_tle_hashes():
+    """
+    Fetches md5(tle_line1 || tle_line2) for every row in 'satellites'.
+    Returns a dict NORAD -> hash, used to keep element sets that haven't
+    changed since the last run out of the TLE history.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)  # ✅ Use dictionary cursor
+
+    cursor.execute("SELECT norad_number, md5(tle_line1 || tle_line2) AS tle_hash FROM satellites;")
+    hashes = {int(row["norad_number"]): row["tle_hash"] for row in cursor.fetchall()}
+
+    cursor.close()
+    conn.close()
+
+    print(f"✅ Found {len(hashes)} stored TLE hashes in the database.")
+    return hashes
+
+
+
+
+
 def get_existing_satellite_names():
     """
     Fetches all existing satellite names from the database.
@@ -199,12 +223,8 @@ def compute_sgp4_position1(tle_line1, tle_line2):
             #print(f"❌ [ERROR] Invalid TLE parse failure: {e}")
             return None  # Error: TLE parse failure
 
-        now = datetime.utcnow()
-        obstime = Time(now, scale='utc')
-
-        jd_total = obstime.jd
-        jd = math.floor(jd_total)
-        fr = jd_total - jd
+        now = datetime.now(timezone.utc)
+        jd, fr = (float(x[0]) for x in julian_dates(now))
 
         # 🚀 **Run SGP4 propagation**
         error_code, r, v = satrec.sgp4(jd, fr)
@@ -219,16 +239,10 @@ def compute_sgp4_position1(tle_line1, tle_line2):
 
         # 🚀 **Convert TEME to ITRS (geodetic coordinates)**
         try:
-            teme_coord = TEME(x=r[0] * u.km, y=r[1] * u.km, z=r[2] * u.km, obstime=obstime)
-            itrs_coord = teme_coord.transform_to(ITRS(obstime=obstime))
-
-            lat_deg = itrs_coord.earth_location.lat.to(u.deg).value
-            lon_deg = itrs_coord.earth_location.lon.to(u.deg).value
-            alt_km = itrs_coord.earth_location.height.to(u.km).value
-
+            lat_deg, lon_deg, alt_km = (float(c) for c in teme_to_geodetic(r, jd, fr))
         except Exception as e:
-            print(f"❌ [ERROR] Astropy transformation failed: {e}")
-            return None  # Error: Astropy conversion failure
+            print(f"❌ [ERROR] Frame transformation failed: {e}")
+            return None  # Error: frame conversion failure
 
         # 🚀 **Sanity checks**
         if lat_deg is None or lon_deg is None or not (-90 <= lat_deg <= 90) or not (-180 <= lon_deg <= 180):
@@ -239,33 +253,17 @@ def compute_sgp4_position1(tle_line1, tle_line2):
             print(f"❌ [ERROR] Computed altitude out of range: {alt_km} km")
             return None  # Error: Invalid altitude
 
-        # 🚀 **Compute Additional Orbital Parameters**
-        mu = 398600.4418  # Earth's gravitational parameter (km³/s²)
-        semi_major_axis = (mu / (satrec.no_kozai**2))**(1/3) if satrec.no_kozai else None
-
         vx, vy, vz = v  # Velocity components in TEME frame (km/s)
         velocity = math.sqrt(vx**2 + vy**2 + vz**2) if all(map(math.isfinite, v)) else None
 
-        # Compute Anomalies (Mean, Eccentric, True)
-        mean_anomaly = satrec.mo * (180 / math.pi)
-        eccentric_anomaly = mean_anomaly + (satrec.ecco * math.sin(math.radians(mean_anomaly)))  # Approximation
-        true_anomaly = 2 * math.atan2(math.sqrt(1 + satrec.ecco) * math.sin(math.radians(eccentric_anomaly) / 2),
-                                      math.sqrt(1 - satrec.ecco) * math.cos(math.radians(eccentric_anomaly) / 2))
-        true_anomaly = math.degrees(true_anomaly)
-
-        # Argument of Latitude
-        argument_of_latitude = satrec.argpo * (180 / math.pi) + true_anomaly
-
-        # Specific Angular Momentum (h)
-        specific_angular_momentum = math.sqrt(mu * semi_major_axis * (1 - satrec.ecco**2)) if semi_major_axis else None
-
-        # Radial Distance
-        radial_distance = semi_major_axis * (1 - satrec.ecco * math.cos(math.radians(eccentric_anomaly))) if semi_major_axis else None
-
-        # Flight Path Angle (γ)
-        flight_path_angle = math.atan2(satrec.ecco * math.sin(math.radians(true_anomaly)),
-                                       1 + satrec.ecco * math.cos(math.radians(true_anomaly)))
-        flight_path_angle = math.degrees(flight_path_angle)
+        # 🚀 **Compute Additional Orbital Parameters** from the mean elements
+        # SGP4 just propagated to `now` (nm is rad/min; derived_elements wants rev/day)
+        derived = {
+            key: float(value) for key, value in derived_elements(
+                satrec.nm * 1440.0 / (2 * math.pi), satrec.em,
+                math.degrees(satrec.mm), math.degrees(satrec.om),
+            ).items()
+        }
 
         # 🚀 **Return all computed values**
         return {
@@ -280,13 +278,13 @@ def compute_sgp4_position1(tle_line1, tle_line2):
             "predicted_vx": vx,  # TEME Velocity X (km/s)  
             "predicted_vy": vy,  # TEME Velocity Y (km/s)  
             "predicted_vz": vz,  # TEME Velocity Z (km/s)  
-            "predicted_mean_anomaly": mean_anomaly,  # Mean anomaly (deg)  
-            "predicted_eccentric_anomaly": eccentric_anomaly,  # Eccentric anomaly (deg)  
-            "predicted_true_anomaly": true_anomaly,  # True anomaly (deg)  
-            "predicted_argument_of_latitude": argument_of_latitude,  # Argument of latitude (deg)  
-            "predicted_specific_angular_momentum": specific_angular_momentum,  # Specific angular momentum (km²/s)  
-            "predicted_radial_distance": radial_distance,  # Distance from Earth's center (km)  
-            "predicted_flight_path_angle": flight_path_angle,  # Flight path angle (deg)  
+            "predicted_mean_anomaly": derived["mean_anomaly"],  # Mean anomaly (deg)  
+            "predicted_eccentric_anomaly": derived["eccentric_anomaly"],  # Eccentric anomaly (deg)  
+            "predicted_true_anomaly": derived["true_anomaly"],  # True anomaly (deg)  
+            "predicted_argument_of_latitude": derived["argument_of_latitude"],  # Argument of latitude (deg)  
+            "predicted_specific_angular_momentum": derived["specific_angular_momentum"],  # Specific angular momentum (km²/s)  
+            "predicted_radial_distance": derived["radial_distance"],  # Distance from Earth's center (km)  
+            "predicted_flight_path_angle": derived["flight_path_angle"],  # Flight path angle (deg)  
         }
 
     except Exception as e:
@@ -396,12 +394,77 @@ def compute_accuracy(sat):
 
 
 
+SATELLITE_COPY_COLUMNS = [
+    "name", "tle_line1", "tle_line2", "norad_number", "epoch",
+    "inclination", "eccentricity", "mean_motion", "raan", "arg_perigee",
+    "velocity", "latitude", "longitude", "orbit_type", "period",
+    "perigee", "apogee", "semi_major_axis", "bstar", "rev_num",
+    "ephemeris_type", "object_type", "launch_date", "launch_site",
+    "decay_date", "rcs", "purpose", "country", "altitude_km",
+    "x", "y", "z", "vx", "vy", "vz",
+    "mean_anomaly", "eccentric_anomaly", "true_anomaly", "argument_of_latitude",
+    "specific_angular_momentum", "radial_distance", "flight_path_angle",
+    "active_status",
+]
+
+HISTORY_COPY_COLUMNS = ["norad_number", "epoch", "tle_line1", "tle_line2", "inserted_at"]
+
+
+def satellite_copy_row(sat):
+    """One satellites / satellites_inactive row, in SATELLITE_COPY_COLUMNS order."""
+    return [
+        sat["name"], sat["tle_line1"], sat["tle_line2"], sat["norad_number"], sat["epoch"],
+        sat["inclination"], sat["eccentricity"], sat["mean_motion"], sat["raan"], sat["arg_perigee"],
+        sat["velocity"], sat["latitude"], sat["longitude"], sat.get("orbit_type", "Unknown"), sat.get("period"),
+        sat["perigee"], sat["apogee"], sat["semi_major_axis"], sat["bstar"], sat["rev_num"],
+        sat["ephemeris_type"], sat["object_type"], sat["launch_date"], sat["launch_site"],
+        sat["decay_date"], sat["rcs"], sat["purpose"], sat["country"], sat["altitude_km"],
+        sat["x"], sat["y"], sat["z"], sat["vx"], sat["vy"], sat["vz"],
+        sat["mean_anomaly"], sat["eccentric_anomaly"], sat["true_anomaly"], sat["argument_of_latitude"],
+        sat["specific_angular_momentum"], sat["radial_distance"], sat["flight_path_angle"],
+        sat["active_status"],
+    ]
+
+
+def unique_name(name, batch_existing_names):
+    """`name`, or `name (n)` for the first n that is not taken yet in this batch."""
+    original_name = name
+    suffix = 1
+    while name in batch_existing_names:
+        name = f"{original_name} ({suffix})"
+        suffix += 1
+    batch_existing_names.add(name)
+    return name
+
+
+def load_active_catalog(cursor):
+    """
+    (catalog, norads, epochs) for every element set in 'satellites', with
+    norads / epochs aligned to the parsed catalog rows.
+    """
+    cursor.execute("SELECT norad_number, epoch, tle_line1, tle_line2 FROM satellites;")
+    rows = cursor.fetchall()
+    catalog = parse_catalog((row["tle_line1"], row["tle_line2"]) for row in rows)
+    return (catalog, [rows[i]["norad_number"] for i in catalog.index],
+            [rows[i]["epoch"] for i in catalog.index])
+
+
 def update_satellite_data():
     """
     Efficiently update and insert satellite data using two separate tables:
     - 'satellites' for active satellites, with SGP4-based computations
     - 'satellites_inactive' for inactive satellites (skip SGP4)
     Also stores historical TLEs for time-series analysis, if desired.
+
+    The GP catalog is streamed (tle_fetch.iter_tle_chunks): each chunk is
+    propagated and COPY'd into the temp tables as it arrives, and the
+    upserts run once over the temp tables at the end, so GP records and
+    propagated states are never held for the whole catalog at once.
+
+    Most runs only ask for GP records created since the stored high-water
+    mark (services/delta_sync.py); every GP_FULL_SYNC_HOURS the whole
+    catalog is pulled again to reconcile. The mark advances only once the
+    upserts have committed.
     """
 
     conn = get_db_connection()
@@ -409,47 +472,74 @@ def update_satellite_data():
 
     existing_norads = set(get_existing_norad_numbers())
     existing_names = set(get_existing_satellite_names())
+    existing_tle_hashes = get_existing_tle_hashes()
 
     session = get_spacetrack_session()
     if not session:
         print("❌ Failed to authenticate with Space-Track API. Exiting.")
         return
 
-    # 1) Fetch all TLE data
-    active_sats, inactive_sats = fetch_tle_data(session, existing_norads)
-    
-
-    print(f"📡 Total Active satellites fetched from Space-Track: {len(active_sats)}")
-    print(f"📡 Total Inactive satellites fetched from Space-Track: {len(inactive_sats)}")
-
-    
+    sync_state = load_sync_state(cursor)
+    plan = plan_gp_fetch(sync_state)
+    mark = HighWaterMark()
 
-    # 3) Prepare sets for batch processing
+    # Staging tables, filled chunk by chunk below.
+    cursor.execute("CREATE TEMP TABLE temp_tle_history AS TABLE satellite_tle_history WITH NO DATA;")
+    cursor.execute("DROP TABLE IF EXISTS temp_satellites;")
+    cursor.execute("CREATE UNLOGGED TABLE temp_satellites AS TABLE satellites WITH NO DATA;")
+    cursor.execute("DROP TABLE IF EXISTS temp_satellites_inactive;")
+    cursor.execute("CREATE UNLOGGED TABLE temp_satellites_inactive AS TABLE satellites_inactive WITH NO DATA;")
+    # Binary COPY where every staged column type allows it, text otherwise.
+    history_types = binary_copy_types(cursor, "temp_tle_history", HISTORY_COPY_COLUMNS)
+    active_types = binary_copy_types(cursor, "temp_satellites", SATELLITE_COPY_COLUMNS)
+    inactive_types = binary_copy_types(cursor, "temp_satellites_inactive", SATELLITE_COPY_COLUMNS)
+    print(f"📦 Staging COPY format: history {'binary' if history_types else 'text'}, "
+          f"active {'binary' if active_types else 'text'}, inactive {'binary' if inactive_types else 'text'}.")
+
+    # Prepare sets for batch processing (NORADs / names only — compact)
     batch_existing_norads = set()
     batch_existing_names = set(existing_names)
-    batch_active = []     # Will hold active satellites
-    batch_inactive = []   # Will hold inactive satellites
     skipped_norads = []
-    historical_tles = []
+    fetched_active = fetched_inactive = 0
+    active_count = inactive_count = history_count = 0
+    unchanged_count = 0
+    sgp4_error_count = 0
+
+    # Parsed element sets of every ACTIVE satellite, kept for the ephemeris horizon.
+    ephemeris_satrecs, ephemeris_norads, ephemeris_epochs = [], [], []
 
     # Determine if we are in a TTY (interactive) environment
     is_tty = sys.stdout.isatty()
-
-    # ----------------------------------------------------------------
-    # PROCESS **ACTIVE** SATELLITES
-    # ----------------------------------------------------------------
-    print(f"🛰️ Processing {len(active_sats)} ACTIVE satellites with SGP4...")
-
-    # We only run ThreadPoolExecutor for the active satellites
-    with ThreadPoolExecutor(max_workers=8) as executor:
-        for sat, (accuracy, lat, lon, error_km, altitude_km, velocity,
-                  mean_anomaly, eccentric_anomaly, true_anomaly,
-                  argument_of_latitude, specific_angular_momentum, radial_distance,
-                  flight_path_angle, predicted_x, predicted_y, predicted_z,
-                  predicted_vx, predicted_vy, predicted_vz, error_code) in tqdm(
-            zip(active_sats, executor.map(compute_accuracy, active_sats)),
+    run_epoch = datetime.now(timezone.utc)
+
+    # 1) Stream the TLE data, one chunk at a time
+    for active_sats, inactive_sats in iter_tle_chunks(session, existing_norads, plan=plan, mark=mark):
+        fetched_active += len(active_sats)
+        fetched_inactive += len(inactive_sats)
+        historical_tles = []
+        batch_active = []     # Will hold active satellites
+        batch_inactive = []   # Will hold inactive satellites
+
+        # ----------------------------------------------------------------
+        # PROCESS **ACTIVE** SATELLITES
+        # ----------------------------------------------------------------
+        # One SatrecArray pass over the chunk: each TLE is parsed once and
+        # propagated to the run's reference epoch in a single C call.
+        catalog, states = propagate_catalog(
+            ((sat.get("tle_line1"), sat.get("tle_line2")) for sat in active_sats),
+            [run_epoch],
+        )
+        sgp4_error_codes = row_error_codes(catalog, states)
+        sgp4_error_count += int(np.count_nonzero(sgp4_error_codes))
+        for k, i in enumerate(catalog.index):
+            ephemeris_satrecs.append(catalog.satrecs[k])
+            ephemeris_norads.append(active_sats[i].get("norad_number"))
+            ephemeris_epochs.append(active_sats[i].get("epoch"))
+
+        for sat, error_code in tqdm(
+            zip(active_sats, sgp4_error_codes),
             total=len(active_sats),
-            desc="Computing accuracy (ACTIVE)",
+            desc="Building batch (ACTIVE)",
             unit="sat",
             miniters=50,
             mininterval=1.0,
@@ -470,90 +560,67 @@ def update_satellite_data():
                 continue
 
             # Ensure unique satellite name in this batch
-            original_name = sat["name"]
-            name = original_name
-            suffix = 1
-            while name in batch_existing_names:
-                name = f"{original_name} ({suffix})"
-                suffix += 1
-            batch_existing_names.add(name)
-            sat["name"] = name
-
-            # Collect TLE for historical storage
-            historical_tles.append((
-                norad_number,
-                sat["epoch"],
-                sat["tle_line1"],
-                sat["tle_line2"],
-                datetime.now(timezone.utc)
-            ))
+            sat["name"] = unique_name(sat["name"], batch_existing_names)
+
+            # Same element set as the stored row: nothing new for the history.
+            # The row is still staged — DECAY_DATE, RCS, OBJECT_TYPE... can
+            # change without a new TLE — and change_only_upsert skips it if
+            # nothing differs.
+            if existing_tle_hashes.get(norad_number) == tle_hash(sat["tle_line1"], sat["tle_line2"]):
+                unchanged_count += 1
+            else:
+                # Collect TLE for historical storage
+                historical_tles.append((
+                    norad_number,
+                    sat["epoch"],
+                    sat["tle_line1"],
+                    sat["tle_line2"],
+                    datetime.now(timezone.utc)
+                ))
 
             # Mark them "seen" so we don't insert duplicates in the same run
             batch_existing_norads.add(norad_number)
 
-            # Fill in the predicted/accuracy columns
-            #sat["accuracy_percentage"] = accuracy
-            #sat["predicted_latitude"] = lat
-            #sat["predicted_longitude"] = lon
-            #sat["error_km"] = error_km
-            #sat["predicted_altitude_km"] = altitude_km
-            #sat["predicted_velocity"] = velocity
-            #sat["predicted_x"] = predicted_x
-            #sat["predicted_y"] = predicted_y
-            #sat["predicted_z"] = predicted_z
-            #sat["predicted_vx"] = predicted_vx
-            #sat["predicted_vy"] = predicted_vy
-            #sat["predicted_vz"] = predicted_vz
-            #sat["predicted_mean_anomaly"] = mean_anomaly
-            #sat["predicted_eccentric_anomaly"] = eccentric_anomaly
-            #sat["predicted_true_anomaly"] = true_anomaly
-            #sat["predicted_argument_of_latitude"] = argument_of_latitude
-            #sat["predicted_specific_angular_momentum"] = specific_angular_momentum
-            #sat["predicted_radial_distance"] = radial_distance
-            #sat["predicted_flight_path_angle"] = flight_path_angle
-
             batch_active.append(sat)
 
-    # ----------------------------------------------------------------
-    # PROCESS **INACTIVE** SATELLITES (NO SGP4!)
-    # ----------------------------------------------------------------
-    print(f"🛰️ Processing {len(inactive_sats)} INACTIVE satellites (skipping SGP4)...")
-    for sat in tqdm(
-        inactive_sats,
-        desc="Building batch (INACTIVE)",
-        unit="sat",
-        miniters=50,
-        mininterval=1.0,
-        disable=not is_tty
-    ):
-        norad_number = sat.get("norad_number")
-        if not norad_number:
-            skipped_norads.append(f"{sat['name']} (❌ Missing NORAD)")
-            continue
-
-        if norad_number in batch_existing_norads:
-            skipped_norads.append(f"{sat['name']} (NORAD {norad_number}) - ❌ Duplicate in batch.")
-            continue
-
-        # Make the satellite name unique in this batch
-        original_name = sat["name"]
-        name = original_name
-        suffix = 1
-        while name in batch_existing_names:
-            name = f"{original_name} ({suffix})"
-            suffix += 1
-        batch_existing_names.add(name)
-        sat["name"] = name
-
-        
-
-        batch_existing_norads.add(norad_number)
-
-        # For inactive satellites, we do NOT set predicted_x, etc.
-        # but you can fill them with None or skip them altogether
-        # e.g. sat["predicted_altitude_km"] = None
-
-        batch_inactive.append(sat)
+        # ----------------------------------------------------------------
+        # PROCESS **INACTIVE** SATELLITES (NO SGP4!)
+        # ----------------------------------------------------------------
+        for sat in inactive_sats:
+            norad_number = sat.get("norad_number")
+            if not norad_number:
+                skipped_norads.append(f"{sat['name']} (❌ Missing NORAD)")
+                continue
+
+            if norad_number in batch_existing_norads:
+                skipped_norads.append(f"{sat['name']} (NORAD {norad_number}) - ❌ Duplicate in batch.")
+                continue
+
+            # Make the satellite name unique in this batch
+            sat["name"] = unique_name(sat["name"], batch_existing_names)
+            batch_existing_norads.add(norad_number)
+            batch_inactive.append(sat)
+
+        # ----------------------------------------------------------------
+        # STAGE THE CHUNK (history, active, inactive → temp tables)
+        # ----------------------------------------------------------------
+        if historical_tles:
+            copy_rows(cursor, "temp_tle_history", HISTORY_COPY_COLUMNS, historical_tles, history_types)
+        if batch_active:
+            copy_rows(cursor, "temp_satellites", SATELLITE_COPY_COLUMNS,
+                      (satellite_copy_row(sat) for sat in batch_active), active_types)
+        if batch_inactive:
+            copy_rows(cursor, "temp_satellites_inactive", SATELLITE_COPY_COLUMNS,
+                      (satellite_copy_row(sat) for sat in batch_inactive), inactive_types)
+        history_count += len(historical_tles)
+        active_count += len(batch_active)
+        inactive_count += len(batch_inactive)
+
+    print(f"📡 Total Active satellites fetched from Space-Track: {fetched_active}")
+    print(f"📡 Total Inactive satellites fetched from Space-Track: {fetched_inactive}")
+    print(f"✅ Propagated {len(ephemeris_satrecs)} ACTIVE satellites chunk by chunk "
+          f"({sgp4_error_count} with SGP4 errors).")
+    print(f"♻️ {unchanged_count} of {active_count} staged ACTIVE satellites have the same TLE as last run.")
 
     # ----------------------------------------------------------------
     # 4) WRITE SKIPPED NORADS LOG
@@ -565,310 +632,80 @@ def update_satellite_data():
     # ----------------------------------------------------------------
     # 5) INSERT HISTORICAL TLES (for both active & inactive)
     # ----------------------------------------------------------------
-    print(f"📜 Inserting {len(historical_tles)} historical TLEs...")
-    cursor.execute("CREATE TEMP TABLE temp_tle_history AS TABLE satellite_tle_history WITH NO DATA;")
-    with NamedTemporaryFile(mode="w", delete=False, suffix=".csv") as temp_file:
-        csv_writer = csv.writer(temp_file, delimiter=",")
-        csv_writer.writerow(["norad_number", "epoch", "tle_line1", "tle_line2", "inserted_at"])
-        csv_writer.writerows(historical_tles)
-        temp_file_path = temp_file.name
-
-    with open(temp_file_path, "r") as temp_file:
-        cursor.copy_expert("""
-            COPY temp_tle_history (norad_number, epoch, tle_line1, tle_line2, inserted_at)
-            FROM STDIN WITH CSV HEADER;
-        """, temp_file)
+    print(f"📜 Inserting {history_count} historical TLEs...")
     cursor.execute("""
         INSERT INTO satellite_tle_history (norad_number, epoch, tle_line1, tle_line2, inserted_at)
         SELECT norad_number, epoch, tle_line1, tle_line2, inserted_at FROM temp_tle_history
         ON CONFLICT (norad_number, epoch) DO NOTHING;
     """)
     cursor.execute("DROP TABLE temp_tle_history;")
-    os.remove(temp_file_path)
     conn.commit()
 
     # ----------------------------------------------------------------
     # 6) UPSERT ACTIVE SATELLITES
     # ----------------------------------------------------------------
-    if batch_active:
-        print(f"📤 Preparing {len(batch_active)} active satellites for DB upsert...")
-        with NamedTemporaryFile(mode="w", delete=False, suffix=".csv") as temp_file:
-            csv_writer = csv.writer(temp_file, delimiter=",")
-            # Adjust columns as needed:
-            csv_writer.writerow([
-                "name", "tle_line1", "tle_line2", "norad_number", "epoch",
-                "inclination", "eccentricity", "mean_motion", "raan", "arg_perigee",
-                "velocity", "latitude", "longitude", "orbit_type", "period",
-                "perigee", "apogee", "semi_major_axis", "bstar", "rev_num",
-                "ephemeris_type", "object_type", "launch_date", "launch_site",
-                "decay_date", "rcs", "purpose", "country", "altitude_km",
-                "x", "y", "z", "vx", "vy", "vz",
-                "mean_anomaly", "eccentric_anomaly", "true_anomaly", "argument_of_latitude",
-                "specific_angular_momentum", "radial_distance", "flight_path_angle", 
-                "active_status"
-                
-            ])
-
-            for sat in tqdm(batch_active, desc="Writing ACTIVE to CSV", disable=not is_tty):
-                csv_writer.writerow([
-                    sat["name"], sat["tle_line1"], sat["tle_line2"], sat["norad_number"], sat["epoch"],
-                    sat["inclination"], sat["eccentricity"], sat["mean_motion"], sat["raan"], sat["arg_perigee"],
-                    sat["velocity"], sat["latitude"], sat["longitude"], sat.get("orbit_type", "Unknown"), sat.get("period"),
-                    sat["perigee"], sat["apogee"], sat["semi_major_axis"], sat["bstar"], sat["rev_num"],
-                    sat["ephemeris_type"], sat["object_type"], sat["launch_date"], sat["launch_site"],
-                    sat["decay_date"], sat["rcs"], sat["purpose"], sat["country"], sat["altitude_km"],
-                    sat["x"], sat["y"], sat["z"], sat["vx"], sat["vy"], sat["vz"],
-                    sat["mean_anomaly"], sat["eccentric_anomaly"], sat["true_anomaly"], sat["argument_of_latitude"],
-                    sat["specific_angular_momentum"], sat["radial_distance"], sat["flight_path_angle"],
-                    sat["active_status"]
-                ])
-            temp_file_path = temp_file.name
-
-        # Load into temp table for active satellites
-        cursor.execute("DROP TABLE IF EXISTS temp_satellites;")
-        cursor.execute("CREATE UNLOGGED TABLE temp_satellites AS TABLE satellites WITH NO DATA;")
-        cursor.execute("TRUNCATE temp_satellites;")
-
-        print("📤 Loading CSV into temp_satellites (ACTIVE)...")
-        with open(temp_file_path, "r") as temp_file:
-            cursor.copy_expert("""
-                COPY temp_satellites (
-                    name, tle_line1, tle_line2, norad_number, epoch,
-                    inclination, eccentricity, mean_motion, raan, arg_perigee,
-                    velocity, latitude, longitude, orbit_type, period,
-                    perigee, apogee, semi_major_axis, bstar, rev_num,
-                    ephemeris_type, object_type, launch_date, launch_site,
-                    decay_date, rcs, purpose, country, altitude_km,
-                    x, y, z, vx, vy, vz,
-                    mean_anomaly, eccentric_anomaly, true_anomaly, argument_of_latitude,
-                    specific_angular_momentum, radial_distance, flight_path_angle, active_status
-                    
-                )
-                FROM STDIN WITH CSV HEADER;
-            """, temp_file)
-        os.remove(temp_file_path)
-
-        print("🔄 Performing UPSERT on 'satellites' table (ACTIVE)...")
-        cursor.execute("""
-            INSERT INTO satellites AS main (
-                name, tle_line1, tle_line2, norad_number, epoch,
-                inclination, eccentricity, mean_motion, raan, arg_perigee,
-                velocity, latitude, longitude, orbit_type, period,
-                perigee, apogee, semi_major_axis, bstar, rev_num,
-                ephemeris_type, object_type, launch_date, launch_site,
-                decay_date, rcs, purpose, country, altitude_km,
-                x, y, z, vx, vy, vz,
-                mean_anomaly, eccentric_anomaly, true_anomaly, argument_of_latitude,
-                specific_angular_momentum, radial_distance, flight_path_angle, active_status
-                
-            )
-            SELECT
-                name, tle_line1, tle_line2, norad_number, epoch,
-                inclination, eccentricity, mean_motion, raan, arg_perigee,
-                velocity, latitude, longitude, orbit_type, period,
-                perigee, apogee, semi_major_axis, bstar, rev_num,
-                ephemeris_type, object_type, launch_date, launch_site,
-                decay_date, rcs, purpose, country, altitude_km,
-                x, y, z, vx, vy, vz,
-                mean_anomaly, eccentric_anomaly, true_anomaly, argument_of_latitude,
-                specific_angular_momentum, radial_distance, flight_path_angle, active_status
-                
-            FROM temp_satellites
-            ON CONFLICT (norad_number) DO UPDATE 
-            SET 
-                -- Example: only update name if main.name is TBA or null
-                name = CASE 
-                    WHEN main.name LIKE 'TBA%' OR main.name IS NULL THEN EXCLUDED.name 
-                    ELSE main.name 
-                END,
-                epoch = EXCLUDED.epoch,
-                tle_line1 = EXCLUDED.tle_line1,
-                tle_line2 = EXCLUDED.tle_line2,
-                inclination = EXCLUDED.inclination,
-                eccentricity = EXCLUDED.eccentricity,
-                mean_motion = EXCLUDED.mean_motion,
-                raan = EXCLUDED.raan,
-                arg_perigee = EXCLUDED.arg_perigee,
-                velocity = EXCLUDED.velocity,
-                latitude = EXCLUDED.latitude,
-                longitude = EXCLUDED.longitude,
-                orbit_type = EXCLUDED.orbit_type,
-                period = EXCLUDED.period,
-                perigee = EXCLUDED.perigee,
-                apogee = EXCLUDED.apogee,
-                semi_major_axis = EXCLUDED.semi_major_axis,
-                bstar = EXCLUDED.bstar,
-                rev_num = EXCLUDED.rev_num,
-                ephemeris_type = EXCLUDED.ephemeris_type,
-                object_type = EXCLUDED.object_type,
-                launch_date = EXCLUDED.launch_date,
-                launch_site = EXCLUDED.launch_site,
-                decay_date = EXCLUDED.decay_date,
-                rcs = EXCLUDED.rcs,
-                purpose = EXCLUDED.purpose,
-                country = EXCLUDED.country,
-                altitude_km = EXCLUDED.altitude_km,
-                x = EXCLUDED.x,
-                y = EXCLUDED.y,
-                z = EXCLUDED.z,
-                vx = EXCLUDED.vx,
-                vy = EXCLUDED.vy,
-                vz = EXCLUDED.vz,
-                mean_anomaly = EXCLUDED.mean_anomaly,
-                eccentric_anomaly = EXCLUDED.eccentric_anomaly,
-                true_anomaly = EXCLUDED.true_anomaly,
-                argument_of_latitude = EXCLUDED.argument_of_latitude,
-                specific_angular_momentum = EXCLUDED.specific_angular_momentum,
-                radial_distance = EXCLUDED.radial_distance,
-                flight_path_angle = EXCLUDED.flight_path_angle,
-                active_status = EXCLUDED.active_status;
-                
-        """)
+    # Conflicting rows are rewritten only when something actually changed
+    # (services/satellite_upsert.py), so unchanged rows leave no dead tuples.
+    active_upsert = UpsertCounts()
+    if active_count:
+        print("🔄 Performing change-only UPSERT on 'satellites' table (ACTIVE)...")
+        active_upsert = change_only_upsert(cursor, "satellites", "temp_satellites", SATELLITE_COPY_COLUMNS,
+                                           staged=active_count, rules=KEEP_NAME_UNLESS_PLACEHOLDER)
+        if active_upsert.inserted or active_upsert.updated:
+            bump_catalog_revision(cursor)  # the API's cached catalog snapshots (services/catalog.py)
         conn.commit()
 
     # ----------------------------------------------------------------
     # 7) UPSERT INACTIVE SATELLITES
     # ----------------------------------------------------------------
-    if batch_inactive:
-        print(f"📤 Preparing {len(batch_inactive)} INACTIVE satellites for DB upsert...")
-        with NamedTemporaryFile(mode="w", delete=False, suffix=".csv") as temp_file:
-            csv_writer = csv.writer(temp_file, delimiter=",")
-            # Adjust columns as needed, typically the same as for active, but
-            # you might skip predicted_* columns if not used:
-            csv_writer.writerow([
-                "name", "tle_line1", "tle_line2", "norad_number", "epoch",
-                "inclination", "eccentricity", "mean_motion", "raan", "arg_perigee",
-                "velocity", "latitude", "longitude", "orbit_type", "period",
-                "perigee", "apogee", "semi_major_axis", "bstar", "rev_num",
-                "ephemeris_type", "object_type", "launch_date", "launch_site",
-                "decay_date", "rcs", "purpose", "country", "altitude_km",
-                "x", "y", "z", "vx", "vy", "vz",
-                "mean_anomaly", "eccentric_anomaly", "true_anomaly", "argument_of_latitude",
-                "specific_angular_momentum", "radial_distance", "flight_path_angle", 
-                "active_status"
-            ])
-
-            for sat in tqdm(batch_inactive, desc="Writing INACTIVE to CSV", disable=not is_tty):
-                csv_writer.writerow([
-                    sat["name"], sat["tle_line1"], sat["tle_line2"], sat["norad_number"], sat["epoch"],
-                    sat["inclination"], sat["eccentricity"], sat["mean_motion"], sat["raan"], sat["arg_perigee"],
-                    sat["velocity"], sat["latitude"], sat["longitude"], sat.get("orbit_type", "Unknown"), sat.get("period"),
-                    sat["perigee"], sat["apogee"], sat["semi_major_axis"], sat["bstar"], sat["rev_num"],
-                    sat["ephemeris_type"], sat["object_type"], sat["launch_date"], sat["launch_site"],
-                    sat["decay_date"], sat["rcs"], sat["purpose"], sat["country"], sat["altitude_km"],
-                    sat["x"], sat["y"], sat["z"], sat["vx"], sat["vy"], sat["vz"],
-                    sat["mean_anomaly"], sat["eccentric_anomaly"], sat["true_anomaly"], sat["argument_of_latitude"],
-                    sat["specific_angular_momentum"], sat["radial_distance"], sat["flight_path_angle"],
-                    sat["active_status"]
-                ])
-            temp_file_path = temp_file.name
-
-        cursor.execute("DROP TABLE IF EXISTS temp_satellites_inactive;")
-        cursor.execute("CREATE UNLOGGED TABLE temp_satellites_inactive AS TABLE satellites_inactive WITH NO DATA;")
-        cursor.execute("TRUNCATE temp_satellites_inactive;")
-
-        print("📤 Loading CSV into temp_satellites_inactive...")
-        with open(temp_file_path, "r") as temp_file:
-            cursor.copy_expert("""
-                COPY temp_satellites_inactive (
-                    name, tle_line1, tle_line2, norad_number, epoch,
-                    inclination, eccentricity, mean_motion, raan, arg_perigee,
-                    velocity, latitude, longitude, orbit_type, period,
-                    perigee, apogee, semi_major_axis, bstar, rev_num,
-                    ephemeris_type, object_type, launch_date, launch_site,
-                    decay_date, rcs, purpose, country, altitude_km,
-                    x, y, z, vx, vy, vz,
-                    mean_anomaly, eccentric_anomaly, true_anomaly, argument_of_latitude,
-                    specific_angular_momentum, radial_distance, flight_path_angle,
-                    active_status
-                )
-                FROM STDIN WITH CSV HEADER;
-            """, temp_file)
-        os.remove(temp_file_path)
-
-        print("🔄 Performing UPSERT on 'satellites_inactive' table...")
-        cursor.execute("""
-            INSERT INTO satellites_inactive AS main_inactive (
-                name, tle_line1, tle_line2, norad_number, epoch,
-                inclination, eccentricity, mean_motion, raan, arg_perigee,
-                velocity, latitude, longitude, orbit_type, period,
-                perigee, apogee, semi_major_axis, bstar, rev_num,
-                ephemeris_type, object_type, launch_date, launch_site,
-                decay_date, rcs, purpose, country, altitude_km,
-                x, y, z, vx, vy, vz,
-                mean_anomaly, eccentric_anomaly, true_anomaly, argument_of_latitude,
-                specific_angular_momentum, radial_distance, flight_path_angle,
-                active_status
-            )
-            SELECT
-                name, tle_line1, tle_line2, norad_number, epoch,
-                inclination, eccentricity, mean_motion, raan, arg_perigee,
-                velocity, latitude, longitude, orbit_type, period,
-                perigee, apogee, semi_major_axis, bstar, rev_num,
-                ephemeris_type, object_type, launch_date, launch_site,
-                decay_date, rcs, purpose, country, altitude_km,
-                x, y, z, vx, vy, vz,
-                mean_anomaly, eccentric_anomaly, true_anomaly, argument_of_latitude,
-                specific_angular_momentum, radial_distance, flight_path_angle,
-                active_status
-            FROM temp_satellites_inactive
-            ON CONFLICT (norad_number) DO UPDATE 
-            SET
-                name = EXCLUDED.name,
-                epoch = EXCLUDED.epoch,
-                tle_line1 = EXCLUDED.tle_line1,
-                tle_line2 = EXCLUDED.tle_line2,
-                inclination = EXCLUDED.inclination,
-                eccentricity = EXCLUDED.eccentricity,
-                mean_motion = EXCLUDED.mean_motion,
-                raan = EXCLUDED.raan,
-                arg_perigee = EXCLUDED.arg_perigee,
-                velocity = EXCLUDED.velocity,
-                latitude = EXCLUDED.latitude,
-                longitude = EXCLUDED.longitude,
-                orbit_type = EXCLUDED.orbit_type,
-                period = EXCLUDED.period,
-                perigee = EXCLUDED.perigee,
-                apogee = EXCLUDED.apogee,
-                semi_major_axis = EXCLUDED.semi_major_axis,
-                bstar = EXCLUDED.bstar,
-                rev_num = EXCLUDED.rev_num,
-                ephemeris_type = EXCLUDED.ephemeris_type,
-                object_type = EXCLUDED.object_type,
-                launch_date = EXCLUDED.launch_date,
-                launch_site = EXCLUDED.launch_site,
-                decay_date = EXCLUDED.decay_date,
-                rcs = EXCLUDED.rcs,
-                purpose = EXCLUDED.purpose,
-                country = EXCLUDED.country,
-                altitude_km = EXCLUDED.altitude_km,
-                x = EXCLUDED.x,
-                y = EXCLUDED.y,
-                z = EXCLUDED.z,
-                vx = EXCLUDED.vx,
-                vy = EXCLUDED.vy,
-                vz = EXCLUDED.vz,
-                mean_anomaly = EXCLUDED.mean_anomaly,
-                eccentric_anomaly = EXCLUDED.eccentric_anomaly,
-                true_anomaly = EXCLUDED.true_anomaly,
-                argument_of_latitude = EXCLUDED.argument_of_latitude,
-                specific_angular_momentum = EXCLUDED.specific_angular_momentum,
-                radial_distance = EXCLUDED.radial_distance,
-                flight_path_angle = EXCLUDED.flight_path_angle,
-                active_status = EXCLUDED.active_status;
-        """)
+    inactive_upsert = UpsertCounts()
+    if inactive_count:
+        print("🔄 Performing change-only UPSERT on 'satellites_inactive' table...")
+        inactive_upsert = change_only_upsert(cursor, "satellites_inactive", "temp_satellites_inactive",
+                                             SATELLITE_COPY_COLUMNS, staged=inactive_count)
         conn.commit()
 
     # ----------------------------------------------------------------
-    # 8) CLEAN UP
+    # 7b) ADVANCE THE DELTA HIGH-WATER MARK
+    # ----------------------------------------------------------------
+    # A full pull that streamed nothing failed; an empty delta is normal.
+    if mark.count or plan.mode == "delta":
+        sync_state = next_state(sync_state, plan.mode, mark, now=plan.fetched_at)
+        store_sync_state(cursor, sync_state)
+        conn.commit()
+        print(f"🔖 GP high-water mark: {sync_state.high_water} ({plan.mode} run, {mark.count} records).")
+
+    # ----------------------------------------------------------------
+    # 8) PRECOMPUTE EPHEMERIS HORIZON (ACTIVE)
+    # ----------------------------------------------------------------
+    # Reuses the catalog parsed above; readers interpolate from this grid
+    # instead of running SGP4 + a frame transform per request.
+    # Runs even when no TLE changed — the horizon has to roll forward.
+    # A delta only streamed the changed objects, so the horizon is built
+    # from the whole (just upserted) 'satellites' table instead.
+    catalog = None
+    if plan.mode == "delta":
+        catalog, ephemeris_norads, ephemeris_epochs = load_active_catalog(cursor)
+    elif ephemeris_satrecs:
+        catalog = Catalog(satrecs=ephemeris_satrecs, index=np.arange(len(ephemeris_satrecs)),
+                          array=SatrecArray(ephemeris_satrecs), size=len(ephemeris_satrecs))
+    if catalog is not None and len(catalog):
+        print("🗺️ Precomputing ephemeris horizon for ACTIVE satellites...")
+        written = store_ephemeris(conn, catalog, ephemeris_norads, ephemeris_epochs, run_epoch)
+        print(f"✅ Stored ephemeris for {written} satellites.")
+
+    # ----------------------------------------------------------------
+    # 9) CLEAN UP
     # ----------------------------------------------------------------
     cursor.close()
     conn.close()
 
     print(f"✅ Successfully processed:")
-    print(f"   - {len(batch_active)} ACTIVE satellites (stored in 'satellites').")
-    print(f"   - {len(batch_inactive)} INACTIVE satellites (stored in 'satellites_inactive').")
-    print(f"✅ Historical TLEs added (total: {len(historical_tles)}).")
+    print(f"   - ACTIVE ('satellites'): {active_upsert.inserted} inserted, {active_upsert.updated} updated, "
+          f"{active_upsert.unchanged} unchanged ({unchanged_count} with the same TLE).")
+    print(f"   - INACTIVE ('satellites_inactive'): {inactive_upsert.inserted} inserted, "
+          f"{inactive_upsert.updated} updated, {inactive_upsert.unchanged} unchanged.")
+    print(f"✅ Historical TLEs added (total: {history_count}).")
     print(f"⚠️ {len(skipped_norads)} satellites were skipped.")
 
 if __name__ == "__main__":
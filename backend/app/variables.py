@@ -6,10 +6,10 @@ from math import isfinite
 from sgp4.api import Satrec, WGS72
 from datetime import datetime
 import traceback
-from astropy.coordinates import TEME, ITRS
-from astropy import units as u
-from astropy.time import Time
-import math
+import numpy as np
+from services.frames import teme_to_geodetic
+from services.orbital_elements import derived_elements
+from services.propagation import julian_dates
 from astropy.utils.iers import conf
 conf.iers_auto_url = "https://datacenter.iers.org/data/latest/finals2000A.all"
 conf.auto_download = True  # Ensure automatic updates
@@ -314,124 +314,130 @@ def parse_tle_line2(tle_line2):
 def compute_orbital_params(name, tle_line1, tle_line2):
     """
     Compute all possible orbital parameters strictly at the TLE epoch 
-    using python-sgp4 + Astropy.
+    using python-sgp4 + services/orbital_elements. Single-TLE form of
+    compute_orbital_params_chunk.
     """
-    try:
-        if not tle_line1 or not tle_line2:
-            #print(f"⚠️ Skipping {name}: Missing TLE data")
-            return None
+    return orbital_params_from_record(compute_orbital_params_chunk([(name, tle_line1, tle_line2)])[0])
+
+
+
+# Bumped whenever a stored column changes meaning, so parameters cached by
+# an older run are recomputed instead of reused (tle_fetch). 2: anomalies,
+# flight-path angle and argument of latitude in degrees, exact Kepler solve.
+ORBITAL_PARAMS_VERSION = 2
+
+# Compact record form of compute_orbital_params() output. Worker processes
+# hand whole chunks back as one structured array instead of pickling a dict
+# per satellite; `ok` is False where compute_orbital_params returned None.
+ORBITAL_PARAMS_FLOAT_FIELDS = [
+    "inclination", "eccentricity", "mean_motion", "raan", "arg_perigee",
+    "period", "semi_major_axis", "perigee", "apogee", "velocity", "bstar",
+    "latitude", "longitude", "altitude_km",
+    "x", "y", "z", "vx", "vy", "vz",
+    "mean_anomaly", "eccentric_anomaly", "true_anomaly", "argument_of_latitude",
+    "specific_angular_momentum", "radial_distance", "flight_path_angle",
+]
+ORBITAL_PARAMS_DTYPE = np.dtype(
+    [("ok", "?"), ("norad_number", "<i4"), ("intl_designator", "<U12"),
+     ("ephemeris_type", "<i2"), ("epoch", "<M8[us]"), ("rev_num", "<i4"),
+     ("orbit_type", "<U3")]
+    + [(f, "<f8") for f in ORBITAL_PARAMS_FLOAT_FIELDS]
+)
+
+
+def compute_orbital_params_chunk(records):
+    """
+    Computes orbital parameters for a chunk of (name, tle_line1, tle_line2)
+    tuples and packs them into one ORBITAL_PARAMS_DTYPE array. TLE parsing
+    and SGP4 at each epoch are per satellite; the frame transform and every
+    derived element are one vectorized call for the whole chunk.
+    """
+    out = np.zeros(len(records), dtype=ORBITAL_PARAMS_DTYPE)
 
-        satrec = Satrec.twoline2rv(tle_line1, tle_line2, WGS72)
+    rows, satrecs, positions, velocities = [], [], [], []
+    for i, (name, tle_line1, tle_line2) in enumerate(records):
+        if not tle_line1 or not tle_line2:
+            continue
+        try:
+            satrec = Satrec.twoline2rv(tle_line1, tle_line2, WGS72)
+        except Exception:
+            traceback.print_exc()
+            continue
 
         norad_number, intl_designator, ephemeris_type = parse_tle_line1(tle_line1)
         mean_motion, rev_num = parse_tle_line2(tle_line2)
         epoch = extract_epoch(tle_line1)
-
         if None in [norad_number, mean_motion, epoch]:
-            #print(f"⚠️ Skipping {name} (NORAD {norad_number}): Invalid TLE data.")
-            return None
-
-        # Convert epoch to Julian Date
-        tle_epoch_time = Time(epoch, scale="utc")
-        jd_total = tle_epoch_time.jd
-        jd = math.floor(jd_total)
-        fr = jd_total - jd  
-
-        # 4) Extract SGP4 Model Parameters
-        inclination = satrec.inclo * (180 / math.pi)  
-        eccentricity = satrec.ecco
-        bstar = satrec.bstar
-        raan = satrec.nodeo * (180 / math.pi)  
-        arg_perigee = satrec.argpo * (180 / math.pi)  
-
-        mu = 398600.4418  
-        n_rad_s = mean_motion * 2 * math.pi / 86400.0
-        semi_major_axis = (mu / (n_rad_s**2)) ** (1 / 3)  
-
-        perigee = semi_major_axis * (1 - eccentricity) - 6378.0  
-        apogee  = semi_major_axis * (1 + eccentricity) - 6378.0
-        period = (1.0 / mean_motion) * 1440.0  
-
-        orbit_type = classify_orbit_type(perigee, apogee)
+            continue
 
+        jd, fr = (float(x[0]) for x in julian_dates(epoch))
         error_code, r_teme, v_teme = satrec.sgp4(jd, fr)
         if error_code != 0:
             print(f"⚠️ [SGP4 Error {error_code}] for {name} (NORAD {norad_number}) at epoch {epoch}")
-            return None
-
-        teme_coord = TEME(
-            x=r_teme[0] * u.km,
-            y=r_teme[1] * u.km,
-            z=r_teme[2] * u.km,
-            obstime=tle_epoch_time
-        )
-        itrs_coord = teme_coord.transform_to(ITRS(obstime=tle_epoch_time))
-        lat_deg = itrs_coord.earth_location.lat.to(u.deg).value
-        lon_deg = itrs_coord.earth_location.lon.to(u.deg).value
-        alt_km  = itrs_coord.earth_location.height.to(u.km).value
-
-        vx, vy, vz = v_teme  
-        velocity = math.sqrt(vx**2 + vy**2 + vz**2)  
-
-        # Additional Computations
-        mean_anomaly = satrec.mo * (180 / math.pi)  
-        eccentric_anomaly = mean_anomaly + (eccentricity * math.sin(mean_anomaly))  
-        true_anomaly = 2 * math.atan2(math.sqrt(1 + eccentricity) * math.sin(eccentric_anomaly / 2),
-                                      math.sqrt(1 - eccentricity) * math.cos(eccentric_anomaly / 2))  
-        argument_of_latitude = arg_perigee + true_anomaly  
-        specific_angular_momentum = math.sqrt(mu * semi_major_axis * (1 - eccentricity**2))  
-        radial_distance = semi_major_axis * (1 - eccentricity * math.cos(eccentric_anomaly))  
-        flight_path_angle = math.atan((eccentricity * math.sin(true_anomaly)) / (1 + eccentricity * math.cos(true_anomaly)))  
-        
-        if vx is None or vy is None or vz is None:
-            #print(f"❌ [ERROR] Missing velocity for {name} (NORAD {norad_number})")
-            return None
-
-
-
-
-
-
-        return {
-            "norad_number": norad_number,
-            "intl_designator": intl_designator,
-            "ephemeris_type": ephemeris_type,
-            "epoch": epoch,
-            "inclination": inclination,
-            "eccentricity": eccentricity,
-            "mean_motion": mean_motion,
-            "raan": raan,
-            "arg_perigee": arg_perigee,
-            "period": period,
-            "semi_major_axis": semi_major_axis,
-            "perigee": perigee,
-            "apogee": apogee,
-            "velocity": velocity,
-            "orbit_type": orbit_type,
-            "bstar": bstar,
-            "rev_num": rev_num,
-            "latitude": lat_deg,
-            "longitude": lon_deg,
-            "altitude_km": alt_km,  # Now at TLE epoch
-            "x": r_teme[0],  # TEME Position X (km)
-            "y": r_teme[1],  # TEME Position Y (km)
-            "z": r_teme[2],  # TEME Position Z (km)
-            "vx": vx,  # TEME Velocity X (km/s)
-            "vy": vy,  # TEME Velocity Y (km/s)
-            "vz": vz,  # TEME Velocity Z (km/s)
-            "mean_anomaly": mean_anomaly,  # Mean anomaly (deg)
-            "eccentric_anomaly": eccentric_anomaly,  # Eccentric anomaly (deg)
-            "true_anomaly": true_anomaly,  # True anomaly (deg)
-            "argument_of_latitude": argument_of_latitude,  # Argument of latitude (deg)
-            "specific_angular_momentum": specific_angular_momentum,  # Specific angular momentum (km²/s)
-            "radial_distance": radial_distance,  # Distance from Earth's center (km)
-            "flight_path_angle": flight_path_angle,  # Angle between velocity vector and orbital plane (deg)
-        }
-
-    except Exception as e:
-        #print(f"❌ Error: {e}")
-        traceback.print_exc()
+            continue
+
+        row = out[i]
+        row["norad_number"] = norad_number
+        row["intl_designator"] = intl_designator or ""
+        row["ephemeris_type"] = ephemeris_type
+        row["epoch"] = np.datetime64(epoch, "us")
+        row["rev_num"] = rev_num
+        row["mean_motion"] = mean_motion
+        rows.append(i)
+        satrecs.append(satrec)
+        positions.append(r_teme)
+        velocities.append(v_teme)
+
+    if not rows:
+        return out
+
+    rows = np.asarray(rows)
+    r_teme = np.asarray(positions, dtype=np.float64)
+    v_teme = np.asarray(velocities, dtype=np.float64)
+    jd, fr = julian_dates(out["epoch"][rows])
+    lat_deg, lon_deg, alt_km = teme_to_geodetic(r_teme, jd, fr)
+
+    eccentricity = np.array([s.ecco for s in satrecs])
+    arg_perigee = np.degrees([s.argpo for s in satrecs])
+    derived = derived_elements(out["mean_motion"][rows], eccentricity,
+                               np.degrees([s.mo for s in satrecs]), arg_perigee)
+
+    chunk = out[rows]
+    chunk["ok"] = True
+    chunk["inclination"] = np.degrees([s.inclo for s in satrecs])
+    chunk["eccentricity"] = eccentricity
+    chunk["raan"] = np.degrees([s.nodeo for s in satrecs])
+    chunk["arg_perigee"] = arg_perigee
+    chunk["bstar"] = [s.bstar for s in satrecs]
+    chunk["velocity"] = np.linalg.norm(v_teme, axis=1)
+    chunk["latitude"], chunk["longitude"], chunk["altitude_km"] = lat_deg, lon_deg, alt_km
+    chunk["x"], chunk["y"], chunk["z"] = r_teme.T
+    chunk["vx"], chunk["vy"], chunk["vz"] = v_teme.T
+    for field, values in derived.items():
+        chunk[field] = values
+    chunk["orbit_type"] = [classify_orbit_type(p, a) for p, a in zip(chunk["perigee"], chunk["apogee"])]
+    out[rows] = chunk
+    return out
+
+
+def orbital_params_from_record(record):
+    """
+    Inverse of compute_orbital_params_chunk for one row: back to the dict
+    shape compute_orbital_params returns (None when the row failed).
+    """
+    if not record["ok"]:
         return None
+    params = {
+        "norad_number": int(record["norad_number"]),
+        "intl_designator": str(record["intl_designator"]),
+        "ephemeris_type": int(record["ephemeris_type"]),
+        "epoch": record["epoch"].item(),
+        "rev_num": int(record["rev_num"]),
+        "orbit_type": str(record["orbit_type"]),
+    }
+    for field in ORBITAL_PARAMS_FLOAT_FIELDS:
+        params[field] = float(record[field])
+    return params
 
 
 
@@ -0,0 +1,20 @@
+-- 003_ephemeris.sql
+-- Additive only. Precomputed TEME ephemeris for every active satellite over a
+-- rolling horizon, written by tle_processor after each ingestion run and read
+-- by services/ephemeris.py (Hermite interpolation between grid points).
+-- Run once: psql "$DATABASE_URL" -f backend/migrations/003_ephemeris.sql
+
+-- One row per satellite; each run overwrites the previous horizon.
+-- `states` is little-endian float32 packed as n_steps × [x, y, z, vx, vy, vz]
+-- (km, km/s), sampled at start_time + k * step_seconds. Invalid SGP4 steps
+-- are stored as NaN.
+CREATE TABLE IF NOT EXISTS satellite_ephemeris (
+  norad_number  INT PRIMARY KEY,
+  tle_epoch     TIMESTAMPTZ,
+  start_time    TIMESTAMPTZ NOT NULL,
+  step_seconds  INT NOT NULL,
+  n_steps       INT NOT NULL,
+  states        BYTEA NOT NULL,
+  generated_at  TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS satellite_ephemeris_generated_idx ON satellite_ephemeris(generated_at);
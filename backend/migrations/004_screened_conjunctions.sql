@@ -0,0 +1,18 @@
+-- 004_screened_conjunctions.sql
+-- Additive only. Close approaches found by our own all-vs-all screening of
+-- the active catalog (app/screen_conjunctions.py → services/screening.py),
+-- alongside the Space-Track cdm_public mirror in cdm_events.
+-- Run once: psql "$DATABASE_URL" -f backend/migrations/004_screened_conjunctions.sql
+
+-- norad_1 < norad_2. Each run replaces every row with a future TCA; past
+-- encounters are kept as history.
+CREATE TABLE IF NOT EXISTS screened_conjunctions (
+  norad_1              INT NOT NULL,
+  norad_2              INT NOT NULL,
+  tca                  TIMESTAMPTZ NOT NULL,
+  miss_distance_km     DOUBLE PRECISION NOT NULL,
+  relative_speed_km_s  DOUBLE PRECISION NOT NULL,
+  screened_at          TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (norad_1, norad_2, tca)
+);
+CREATE INDEX IF NOT EXISTS screened_conjunctions_tca_idx ON screened_conjunctions(tca);
@@ -0,0 +1,12 @@
+-- 005_cdm_refinement.sql
+-- Additive only. Our own closest approach for each CDM pair, recomputed from
+-- the `satellites` TLEs by cdm.refine_active_cdms (services/cdm_refine.py)
+-- after every TLE run, next to Space-Track's TCA / MIN_RNG / PC.
+-- Run once: psql "$DATABASE_URL" -f backend/migrations/005_cdm_refinement.sql
+
+-- NULL until the event has been refined, or when either object has no
+-- usable element set in `satellites`.
+ALTER TABLE cdm_events ADD COLUMN IF NOT EXISTS refined_tca                  TIMESTAMPTZ;
+ALTER TABLE cdm_events ADD COLUMN IF NOT EXISTS refined_miss_km              DOUBLE PRECISION;
+ALTER TABLE cdm_events ADD COLUMN IF NOT EXISTS refined_relative_speed_km_s  DOUBLE PRECISION;
+ALTER TABLE cdm_events ADD COLUMN IF NOT EXISTS refined_at                   TIMESTAMPTZ;
@@ -0,0 +1,22 @@
+-- 006_reentry_predictions.sql
+-- Additive only. Drag-lifetime predictions for every active object with
+-- perigee below LIFETIME_MAX_PERIGEE_KM (app/predict_reentries.py →
+-- services/lifetime.py). /api/reentry/upcoming reads this table instead of
+-- ranking `satellites` on the fly.
+-- Run once: psql "$DATABASE_URL" -f backend/migrations/006_reentry_predictions.sql
+
+-- One row per object, replaced on every run. predicted_decay is NULL when
+-- the object outlives the LIFETIME_HORIZON_DAYS horizon (or has no usable
+-- B*); the window is density × (1 ± LIFETIME_DENSITY_UNCERTAINTY).
+CREATE TABLE IF NOT EXISTS reentry_predictions (
+  norad_number     INT PRIMARY KEY,
+  tle_epoch        TIMESTAMPTZ NOT NULL,
+  predicted_decay  TIMESTAMPTZ,
+  window_start     TIMESTAMPTZ,
+  window_end       TIMESTAMPTZ,
+  f107             DOUBLE PRECISION NOT NULL,
+  ap               DOUBLE PRECISION NOT NULL,
+  predicted_at     TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS reentry_predictions_decay_idx
+  ON reentry_predictions(predicted_decay) WHERE predicted_decay IS NOT NULL;
@@ -0,0 +1,38 @@
+-- 007_tle_accuracy.sql
+-- Additive only. How far each TLE's prediction lands from the next TLE of
+-- the same object, summarized from satellite_tle_history by
+-- app/analyze_tle_accuracy.py (→ services/tle_accuracy.py).
+-- Run once: psql "$DATABASE_URL" -f backend/migrations/007_tle_accuracy.sql
+
+-- Per object. RIC columns are medians of absolute radial / in-track /
+-- cross-track error. Replaced on every run.
+CREATE TABLE IF NOT EXISTS tle_accuracy_objects (
+  norad_number              INT PRIMARY KEY,
+  orbit_class               TEXT NOT NULL,
+  pairs                     INT NOT NULL,
+  median_error_km           DOUBLE PRECISION NOT NULL,
+  p95_error_km              DOUBLE PRECISION NOT NULL,
+  max_error_km              DOUBLE PRECISION NOT NULL,
+  median_span_days          DOUBLE PRECISION NOT NULL,
+  median_error_rate_km_day  DOUBLE PRECISION NOT NULL,
+  median_radial_km          DOUBLE PRECISION NOT NULL,
+  median_in_track_km        DOUBLE PRECISION NOT NULL,
+  median_cross_track_km     DOUBLE PRECISION NOT NULL,
+  computed_at               TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS tle_accuracy_objects_class_idx ON tle_accuracy_objects(orbit_class);
+
+-- Per orbit class (LEO / MEO / GEO / HEO), over every pair.
+CREATE TABLE IF NOT EXISTS tle_accuracy_classes (
+  orbit_class      TEXT PRIMARY KEY,
+  pairs            BIGINT NOT NULL,
+  objects          INT NOT NULL,
+  mean_error_km    DOUBLE PRECISION NOT NULL,
+  rms_error_km     DOUBLE PRECISION NOT NULL,
+  p50_error_km     DOUBLE PRECISION NOT NULL,
+  p90_error_km     DOUBLE PRECISION NOT NULL,
+  p95_error_km     DOUBLE PRECISION NOT NULL,
+  p99_error_km     DOUBLE PRECISION NOT NULL,
+  mean_span_days   DOUBLE PRECISION NOT NULL,
+  computed_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
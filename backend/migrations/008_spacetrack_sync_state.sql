@@ -0,0 +1,18 @@
+-- 008_spacetrack_sync_state.sql
+-- Additive only. High-water marks for incremental Space-Track queries,
+-- written by app/tle_processor.py and app/cdm.py (→ services/delta_sync.py)
+-- after each committed ingestion run.
+-- Run once: psql "$DATABASE_URL" -f backend/migrations/008_spacetrack_sync_state.sql
+
+-- One row per query source ('gp' for the element-set catalog, 'cdm' for
+-- cdm_public).
+-- high_water is the max CREATION_DATE (CDMs: CREATED) ingested; the next
+-- delta asks for records created after it. last_full_sync schedules the
+-- periodic full pull.
+CREATE TABLE IF NOT EXISTS spacetrack_sync_state (
+  source          TEXT PRIMARY KEY,
+  high_water      TIMESTAMPTZ,
+  max_epoch       TIMESTAMPTZ,
+  last_full_sync  TIMESTAMPTZ,
+  updated_at      TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,15 @@
+-- 009_cdm_rejects.sql
+-- Additive only. CDM records the ingestion refused, with the reason,
+-- written by app/cdm.py (→ services/cdm_ingest.py). Rows older than
+-- CDM_REJECT_RETENTION_DAYS are pruned on each run.
+-- Run once: psql "$DATABASE_URL" -f backend/migrations/009_cdm_rejects.sql
+
+CREATE TABLE IF NOT EXISTS cdm_rejects (
+  id           BIGSERIAL PRIMARY KEY,
+  cdm_id       BIGINT,              -- NULL when the record's CDM_ID itself was unusable
+  reason       TEXT NOT NULL,       -- "; "-joined, e.g. "missing TCA; bad PC"
+  record       JSONB NOT NULL,      -- the cdm_public record as received
+  rejected_at  TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS cdm_rejects_rejected_at_idx ON cdm_rejects(rejected_at);
+CREATE INDEX IF NOT EXISTS cdm_rejects_cdm_id_idx ON cdm_rejects(cdm_id);
@@ -0,0 +1,12 @@
+-- 010_cdm_expiry.sql
+-- Additive only. A CDM is active while its TCA is in the future; readers
+-- now evaluate `tca >= NOW()` at query time instead of app/cdm.py running
+-- a table-wide `UPDATE ... SET is_active = FALSE WHERE tca < NOW()` on
+-- every run. NOW() is not immutable, so it cannot sit in a partial index
+-- predicate: a plain index on tca makes the upcoming-events range scan
+-- cheap (only the tail of the index is read).
+-- The stored is_active column is no longer written: ingestion leaves it at
+-- its default and nothing reads it.
+-- Run once: psql "$DATABASE_URL" -f backend/migrations/010_cdm_expiry.sql
+
+CREATE INDEX IF NOT EXISTS cdm_events_tca_idx ON cdm_events(tca);
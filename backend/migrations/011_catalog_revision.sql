@@ -0,0 +1,15 @@
+-- 011_catalog_revision.sql
+-- Additive only. A counter app/tle_processor.py bumps in the same
+-- transaction as any write to `satellites` (upserts, clean_old_norads).
+-- services/catalog.py keys its parsed-catalog snapshots and the orbit
+-- index on it, so a changed country, name or older element set
+-- invalidates them even when the row count and max epoch stay put.
+-- Run once: psql "$DATABASE_URL" -f backend/migrations/011_catalog_revision.sql
+
+-- Exactly one row.
+CREATE TABLE IF NOT EXISTS catalog_revision (
+  id          BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+  revision    BIGINT NOT NULL DEFAULT 0,
+  updated_at  TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+INSERT INTO catalog_revision DEFAULT VALUES ON CONFLICT (id) DO NOTHING;
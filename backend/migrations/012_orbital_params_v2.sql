@@ -0,0 +1,16 @@
+-- 012_orbital_params_v2.sql
+-- One-off, after deploying orbital-parameter version 2 (variables.py:
+-- true_anomaly, flight_path_angle and argument_of_latitude in degrees,
+-- eccentric_anomaly from an exact Kepler solve). Rows whose TLE has not
+-- changed since still hold the old radian / approximate values.
+--
+-- The next full GP pull recomputes every active object (tle_fetch ignores
+-- cached parameters from an older version) and restages it, and the
+-- change-only upsert rewrites exactly the rows whose values differ.
+-- Clearing last_full_sync makes the very next tle_processor run that full
+-- pull instead of waiting up to GP_FULL_SYNC_HOURS.
+-- Rows in satellites_inactive are not recomputed; their derived columns
+-- keep the version-1 units.
+-- Run once: psql "$DATABASE_URL" -f backend/migrations/012_orbital_params_v2.sql
+
+UPDATE spacetrack_sync_state SET last_full_sync = NULL WHERE source = 'gp';
@@ -0,0 +1,76 @@
+"""Shared fixtures for the pytest-benchmark suite.
+
+Catalog sizes come from BENCH_SIZES (default "1000,30000"; add 100000 for
+the full-growth case). Every benchmark is parametrized over them, so a
+saved run has one entry per (function, size).
+
+The ingestion scripts (variables.py, tle_processor.py) are flat modules
+under backend/app that load de421.bsp at import; benchmarks that need
+them skip when that import fails (e.g. offline).
+"""
+from __future__ import annotations
+
+import importlib
+import math
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from tests.conftest import GEO_TLE_LINE1, GEO_TLE_LINE2, ISS_TLE_LINE1, ISS_TLE_LINE2
+from tests.synthetic_catalog import EPOCH, cloned_tles
+
+pytest.importorskip("pytest_benchmark")
+
+APP_DIR = Path(__file__).resolve().parents[2] / "app"
+BENCH_SIZES = [int(s) for s in os.getenv("BENCH_SIZES", "1000,30000").split(",") if s.strip()]
+
+# Roughly the LEO : GEO split of the active catalog.
+TEMPLATES = [(ISS_TLE_LINE1, ISS_TLE_LINE2)] * 9 + [(GEO_TLE_LINE1, GEO_TLE_LINE2)]
+
+
+def flat_module(name: str):
+    """Import an ingestion script the way the workers do (app/ on sys.path)."""
+    if str(APP_DIR) not in sys.path:
+        sys.path.append(str(APP_DIR))
+    try:
+        return importlib.import_module(name)
+    except Exception as exc:  # de421 download, missing DB driver, ...
+        pytest.skip(f"cannot import {name}: {exc}")
+
+
+@pytest.fixture(scope="session", params=BENCH_SIZES, ids=lambda n: f"n{n}")
+def catalog(request) -> list[tuple[str, str]]:
+    return cloned_tles(TEMPLATES, request.param)
+
+
+@pytest.fixture(scope="session")
+def satellite_rows(catalog) -> list[dict]:
+    """`satellites`-shaped rows (every column the serializers and COPY
+    writers read), with the NaN / None gaps real rows have."""
+    rng = np.random.default_rng(0)
+    rows = []
+    for i, (l1, l2) in enumerate(catalog):
+        values = rng.uniform(0.0, 1000.0, size=24)
+        values[rng.random(24) < 0.02] = math.nan
+        v = [float(x) for x in values]
+        rows.append({
+            "id": i + 1, "name": f"SAT {i + 1}", "norad_number": int(l1[2:7]),
+            "tle_line1": l1, "tle_line2": l2, "epoch": EPOCH,
+            "inclination": v[0], "eccentricity": v[1] / 1000.0, "mean_motion": v[2] / 60.0,
+            "raan": v[3] % 360.0, "arg_perigee": v[4] % 360.0, "velocity": v[5] / 100.0,
+            "latitude": v[6] % 180.0 - 90.0, "longitude": v[7] % 360.0 - 180.0,
+            "orbit_type": "LEO", "period": v[8] / 10.0, "perigee": v[9], "apogee": v[10],
+            "semi_major_axis": v[11] + 6378.0, "bstar": v[12] * 1e-7, "rev_num": i,
+            "ephemeris_type": 0, "object_type": "PAYLOAD", "intl_designator": "98067A",
+            "launch_date": None, "launch_site": "AFETR", "decay_date": None, "rcs": None,
+            "purpose": "Unknown", "country": "US", "altitude_km": v[13],
+            "x": v[14], "y": v[15], "z": v[16], "vx": v[17], "vy": v[18], "vz": v[19],
+            "mean_anomaly": v[20] % 360.0, "eccentric_anomaly": v[21] % 360.0,
+            "true_anomaly": v[22] % 360.0, "argument_of_latitude": v[23] % 360.0,
+            "specific_angular_momentum": 52000.0, "radial_distance": 6800.0,
+            "flight_path_angle": 0.01, "active_status": "Active",
+        })
+    return rows
@@ -0,0 +1,104 @@
+"""Benchmarks for query building, row serialization and the COPY streams."""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app.services.copy_stream import BinaryCopyStream, CopyStream
+from app.services.filter_schema import ORBIT_TYPES, PURPOSES, build_sql_from_structured
+from tests.bench.conftest import flat_module
+
+pytestmark = pytest.mark.bench
+
+
+def test_build_sql_from_structured(benchmark, catalog):
+    """One structured filter per catalog row, a random subset of keys each."""
+    rng = np.random.default_rng(0)
+    filters = []
+    for _ in range(len(catalog)):
+        filt = {
+            "orbit_type": rng.choice(ORBIT_TYPES),
+            "purpose": rng.choice(PURPOSES),
+            "country": "US",
+            "launch_year_min": 2000,
+            "launch_year_max": 2024,
+            "perigee_min_km": 300.0,
+            "apogee_max_km": 2000.0,
+            "eccentricity_min": 0.01,
+            "active_only": True,
+        }
+        filters.append({k: v for k, v in filt.items() if rng.random() < 0.5})
+    out = benchmark(lambda: [build_sql_from_structured(f) for f in filters])
+    assert len(out) == len(filters)
+
+
+def test_serialize_satellite(benchmark, satellite_rows):
+    from app.api.satellites import serialize_satellite
+
+    out = benchmark(lambda: [serialize_satellite(row) for row in satellite_rows])
+    assert len(out) == len(satellite_rows)
+
+
+def _drain(stream, size=8192):
+    total = 0
+    while chunk := stream.read(size):
+        total += len(chunk)
+    return total
+
+
+# Plausible staging column types for the binary encoder (the live ones come from pg_attribute).
+_TEXT_COLUMNS = {"name", "tle_line1", "tle_line2", "orbit_type", "object_type", "launch_site",
+                 "rcs", "purpose", "country", "active_status"}
+_COLUMN_TYPES = {"norad_number": "int4", "rev_num": "int4", "ephemeris_type": "int4",
+                 "epoch": "timestamptz", "decay_date": "timestamptz", "inserted_at": "timestamptz",
+                 "launch_date": "date"}
+
+
+def _types(columns):
+    return [("text" if c in _TEXT_COLUMNS else _COLUMN_TYPES.get(c, "float8")) for c in columns]
+
+
+def _history_rows(satellite_rows):
+    """A history batch: four element sets per object (~120k rows at n30000)."""
+    return [
+        (sat["norad_number"], sat["epoch"], sat["tle_line1"], sat["tle_line2"], sat["epoch"])
+        for _ in range(4) for sat in satellite_rows
+    ]
+
+
+@pytest.mark.parametrize("fmt", ["text", "binary"])
+def test_stream_satellite_copy(benchmark, satellite_rows, fmt):
+    tle_processor = flat_module("tle_processor")
+    types = _types(tle_processor.SATELLITE_COPY_COLUMNS)
+
+    def stream():
+        rows = (tle_processor.satellite_copy_row(sat) for sat in satellite_rows)
+        return _drain(CopyStream(rows) if fmt == "text" else BinaryCopyStream(rows, types))
+
+    assert benchmark(stream) > 0
+
+
+@pytest.mark.parametrize("fmt", ["text", "binary"])
+def test_stream_history_copy(benchmark, satellite_rows, fmt):
+    tle_processor = flat_module("tle_processor")
+    types = _types(tle_processor.HISTORY_COPY_COLUMNS)
+    history = _history_rows(satellite_rows)
+
+    def stream():
+        return _drain(CopyStream(history) if fmt == "text" else BinaryCopyStream(history, types))
+
+    assert benchmark(stream) > 0
+
+
+def test_prepare_cdms(benchmark, catalog):
+    """cdm_public records, one per catalog row, through bulk validation."""
+    from app.services.cdm_ingest import prepare_cdms
+
+    records = [{
+        "CDM_ID": str(i), "CREATED": f"2024-01-15 10:{i % 60:02d}:00.000000", "TCA": "2024-01-16T03:04:05.250000",
+        "MIN_RNG": "812", "PC": "1.2e-5", "SAT_1_ID": "25544", "SAT_1_NAME": "ISS (ZARYA)",
+        "SAT1_OBJECT_TYPE": "PAYLOAD", "SAT_2_ID": str(40000 + i), "SAT_2_NAME": "DEB",
+        "SAT2_OBJECT_TYPE": "DEBRIS", "EMERGENCY_REPORTABLE": "N",
+    } for i in range(len(catalog))]
+    rows, rejects, _ = benchmark(lambda: prepare_cdms(records))
+    assert len(rows) == len(records) and not rejects
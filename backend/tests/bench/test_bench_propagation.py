@@ -0,0 +1,55 @@
+"""Benchmarks for the per-TLE math on the ingestion path."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from app.services.maneuver_detector import OrbitalSnapshot, detect_events
+from tests.bench.conftest import flat_module
+from tests.synthetic_catalog import EPOCH
+
+pytestmark = pytest.mark.bench
+
+HISTORY_LENGTH = 50  # element sets per satellite in the maneuver benchmark
+
+
+def test_compute_orbital_params(benchmark, catalog):
+    variables = flat_module("variables")
+    named = [(f"SAT {i}", l1, l2) for i, (l1, l2) in enumerate(catalog)]
+    out = benchmark(lambda: [variables.compute_orbital_params(*r) for r in named])
+    assert all(p is not None for p in out)
+
+
+def test_compute_orbital_params_chunk(benchmark, catalog):
+    variables = flat_module("variables")
+    named = [(f"SAT {i}", l1, l2) for i, (l1, l2) in enumerate(catalog)]
+    out = benchmark(variables.compute_orbital_params_chunk, named)
+    assert out["ok"].all()
+
+
+def test_compute_sgp4_position1(benchmark, catalog):
+    tle_processor = flat_module("tle_processor")
+    out = benchmark(lambda: [tle_processor.compute_sgp4_position1(l1, l2) for l1, l2 in catalog])
+    assert all(p is not None for p in out)
+
+
+def test_detect_events(benchmark, catalog):
+    """len(catalog) snapshots, split into HISTORY_LENGTH-long histories with
+    a perigee raise every tenth element set."""
+    rng = np.random.default_rng(0)
+    histories = []
+    for _ in range(max(1, len(catalog) // HISTORY_LENGTH)):
+        perigee = 400.0 + np.cumsum(np.where(np.arange(HISTORY_LENGTH) % 10 == 9, 12.0, 0.0))
+        perigee += rng.normal(0.0, 0.5, HISTORY_LENGTH)
+        histories.append([
+            OrbitalSnapshot(
+                epoch=EPOCH + timedelta(hours=12 * k),
+                perigee_km=float(p), apogee_km=410.0, inclination_deg=51.6,
+                semi_major_axis_km=6783.0 + float(p) / 2.0, mean_motion_rev_per_day=15.5,
+            )
+            for k, p in enumerate(perigee)
+        ])
+    events = benchmark(lambda: [detect_events(h) for h in histories])
+    assert all(events)
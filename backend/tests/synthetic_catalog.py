@@ -0,0 +1,122 @@
+"""Synthetic TLE catalogs with a realistic orbital mix, for perf tests.
+
+The real catalog isn't available offline (and changes daily), so timing
+tests build one: dense LEO shells (Starlink / OneWeb / sun-synchronous
+like), a diffuse LEO debris field, GNSS-like MEO, a GEO belt and GTO/HEO
+objects, in roughly the proportions of the public catalog. Element sets
+are produced with sgp4init + export_tle, so they parse exactly like real
+TLEs. Deterministic for a given seed.
+
+cloned_tles() instead fans a few real element sets (the pinned ISS / GEO
+TLEs in conftest.py) out into a catalog of look-alikes, for benchmarks
+whose cost depends on the TLE text more than on the orbit mix.
+"""
+from __future__ import annotations
+
+import math
+from datetime import datetime, timezone
+
+import numpy as np
+from sgp4.api import WGS72, Satrec
+from sgp4.exporter import export_tle
+
+EARTH_RADIUS_KM = 6378.135
+MU_KM3_S2 = 398600.8  # WGS72, the constants sgp4 propagates with
+EPOCH = datetime(2024, 1, 15, 12, 0, tzinfo=timezone.utc)
+_SGP4_EPOCH_ZERO = datetime(1949, 12, 31, tzinfo=timezone.utc)
+
+# (share, perigee km range, apogee km range or None for circular,
+#  inclinations deg, "pick" one of them ± jitter / "span" uniform between them)
+_POPULATIONS = (
+    (0.30, (540.0, 560.0), None, (53.0, 53.2, 70.0, 97.6), "pick"),    # mega-constellation shell
+    (0.05, (1190.0, 1210.0), None, (87.9,), "pick"),                  # polar constellation
+    (0.15, (450.0, 850.0), None, (97.0, 98.8), "span"),               # sun-synchronous
+    (0.25, (300.0, 2000.0), (300.0, 2500.0), (0.0, 110.0), "span"),   # LEO debris field
+    (0.08, (19000.0, 23500.0), None, (55.0, 56.0, 64.8), "pick"),     # GNSS
+    (0.07, (35770.0, 35800.0), None, (0.0, 15.0), "span"),            # GEO belt
+    (0.10, (200.0, 650.0), (20000.0, 40000.0), (7.0, 63.4), "span"),  # GTO / HEO
+)
+
+
+def _mean_motion_rad_per_min(a_km: float) -> float:
+    return math.sqrt(MU_KM3_S2 / a_km ** 3) * 60.0
+
+
+def synthetic_tles(n: int, seed: int = 0, epoch: datetime = EPOCH) -> list[tuple[str, str]]:
+    """`n` (line1, line2) pairs with NORAD numbers 1..n."""
+    rng = np.random.default_rng(seed)
+    shares = np.array([p[0] for p in _POPULATIONS])
+    kinds = rng.choice(len(_POPULATIONS), size=n, p=shares / shares.sum())
+    epoch_days = (epoch - _SGP4_EPOCH_ZERO).total_seconds() / 86400.0
+
+    pairs = []
+    for norad, kind in enumerate(kinds, start=1):
+        _, perigee_range, apogee_range, inclinations, mode = _POPULATIONS[kind]
+        perigee = rng.uniform(*perigee_range)
+        apogee = perigee if apogee_range is None else max(perigee, rng.uniform(*apogee_range))
+        rp, ra = EARTH_RADIUS_KM + perigee, EARTH_RADIUS_KM + apogee
+        a = (rp + ra) / 2.0
+        ecc = max((ra - rp) / (ra + rp), 1e-4 * rng.random())
+        if mode == "span":
+            inc = rng.uniform(*inclinations)
+        else:
+            inc = rng.choice(inclinations) + rng.normal(0.0, 0.05)
+
+        satrec = Satrec()
+        satrec.sgp4init(
+            WGS72, "i", norad, epoch_days,
+            float(rng.uniform(1e-5, 5e-4)) if perigee < 2000 else 0.0,  # bstar
+            0.0, 0.0,
+            ecc,
+            rng.uniform(0.0, 2 * math.pi),   # argument of perigee
+            math.radians(abs(inc)),
+            rng.uniform(0.0, 2 * math.pi),   # mean anomaly
+            _mean_motion_rad_per_min(a),
+            rng.uniform(0.0, 2 * math.pi),   # RAAN
+        )
+        pairs.append(export_tle(satrec))
+    return pairs
+
+
+def circular_tle(norad: int, inclination_deg: float, altitude_km: float = 550.0,
+                 epoch: datetime = EPOCH) -> tuple[str, str]:
+    """Near-circular element set at the ascending node of RAAN 0 at `epoch`.
+
+    Two of these at the same altitude and different inclinations cross
+    each other's plane at the node at `epoch`: a known close approach.
+    """
+    satrec = Satrec()
+    satrec.sgp4init(
+        WGS72, "i", norad, (epoch - _SGP4_EPOCH_ZERO).total_seconds() / 86400.0,
+        0.0, 0.0, 0.0, 0.0005, 0.0, math.radians(inclination_deg), 0.0,
+        _mean_motion_rad_per_min(EARTH_RADIUS_KM + altitude_km), 0.0,
+    )
+    return export_tle(satrec)
+
+
+def cloned_tles(templates, n: int, seed: int = 0, first_norad: int = 1) -> list[tuple[str, str]]:
+    """`n` copies of the template (line1, line2) pairs, cycled in order.
+
+    Each copy keeps its template's epoch, mean motion, eccentricity and
+    drag term, gets a fresh RAAN / mean anomaly / argument of perigee and a
+    small inclination jitter, and NORAD numbers first_norad, first_norad+1, ...
+    """
+    rng = np.random.default_rng(seed)
+    parsed = [Satrec.twoline2rv(l1, l2) for l1, l2 in templates]
+    pairs = []
+    for i in range(n):
+        src = parsed[i % len(parsed)]
+        satrec = Satrec()
+        satrec.sgp4init(
+            WGS72, "i", first_norad + i,
+            src.jdsatepoch + src.jdsatepochF - 2433281.5,  # days since 1949-12-31
+            src.bstar, 0.0, 0.0,
+            src.ecco,
+            rng.uniform(0.0, 2 * math.pi),
+            min(abs(src.inclo + math.radians(rng.normal(0.0, 0.1))), math.pi),
+            rng.uniform(0.0, 2 * math.pi),
+            src.no_kozai,
+            rng.uniform(0.0, 2 * math.pi),
+        )
+        pairs.append(export_tle(satrec))
+    return pairs
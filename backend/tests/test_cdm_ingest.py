@@ -0,0 +1,113 @@
+"""Batched CDM ingestion: bulk validation, rejects with reasons, one COPY + merge."""
+from __future__ import annotations
+
+from datetime import datetime
+
+import numpy as np
+
+from app.services import cdm_ingest
+
+
+def _cdm(cdm_id, created="2024-01-15 10:00:00.000000", tca="2024-01-16T03:04:05.250000", **overrides):
+    record = {
+        "CDM_ID": str(cdm_id), "CREATED": created, "TCA": tca, "MIN_RNG": "812", "PC": "1.2e-5",
+        "SAT_1_ID": "25544", "SAT_1_NAME": "ISS (ZARYA)", "SAT1_OBJECT_TYPE": "PAYLOAD", "SAT1_RCS": "LARGE",
+        "SAT_1_EXCL_VOL": "5.00", "SAT_2_ID": "48274", "SAT_2_NAME": "DEB", "SAT2_OBJECT_TYPE": "DEBRIS",
+        "SAT2_RCS": "SMALL", "SAT_2_EXCL_VOL": "", "EMERGENCY_REPORTABLE": "Y",
+    }
+    record.update(overrides)
+    return record
+
+
+def test_parse_cdm_times_fast_path_and_fallback():
+    good = cdm_ingest.parse_cdm_times(["2024-01-15 10:00:00.000000", "2024-01-16T03:04:05.25"])
+    assert good.tolist() == [datetime(2024, 1, 15, 10), datetime(2024, 1, 16, 3, 4, 5, 250000)]
+    mixed = cdm_ingest.parse_cdm_times(["2024-01-15 10:00:00", None, "", "15 Jan 2024", 7])
+    assert mixed[0] == np.datetime64("2024-01-15T10:00:00") and np.isnat(mixed[1:]).all()
+
+
+def test_prepare_validates_in_bulk_and_keeps_latest_duplicate():
+    records = [
+        _cdm(1),
+        _cdm(2, tca="2024-01-14T00:00:00"),                          # past TCA, still kept
+        _cdm(3, TCA=None, PC="n/a"),                                 # two reasons
+        _cdm(4, CREATED="yesterday"),
+        {**_cdm(5), "SAT_2_NAME": None},
+        _cdm("x"),
+        _cdm(1, created="2024-01-15 11:00:00", MIN_RNG="700"),       # newer copy of CDM 1 wins
+        _cdm(1, created="2024-01-15 09:00:00", MIN_RNG="900"),
+    ]
+    rows, rejects, duplicates = cdm_ingest.prepare_cdms(records)
+
+    assert duplicates == 2
+    assert [r[0] for r in rows] == [2, 1]  # kept in arrival order of the surviving record
+    by_id = {r[0]: dict(zip(cdm_ingest.CDM_COLUMNS, r)) for r in rows}
+    assert by_id[1]["min_rng"] == 700.0 and by_id[1]["created"] == "2024-01-15T11:00:00.000000Z"
+    assert by_id[1]["tca"] == "2024-01-16T03:04:05.250000Z" and by_id[2]["tca"] == "2024-01-14T00:00:00.000000Z"
+    assert "is_active" not in cdm_ingest.CDM_COLUMNS  # evaluated at read time, never staged
+    assert by_id[1]["sat_1_excl_vol"] == 5.0 and by_id[1]["sat_2_excl_vol"] == 0.0
+    assert by_id[1]["emergency_reportable"] is True and by_id[1]["pc"] == 1.2e-5
+
+    reasons = {r.cdm_id: r.reason for r in rejects}
+    assert reasons == {3: "missing TCA; bad PC", 4: "bad CREATED", 5: "missing SAT_2_NAME", None: "bad CDM_ID"}
+    assert rejects[0].record["CDM_ID"] == "3"
+
+
+def test_ingest_stages_merges_and_records_rejects():
+    class Cursor:
+        def __init__(self, log):
+            self.log = log
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, sql, params=None):
+            sql = sql.decode() if isinstance(sql, bytes) else sql
+            self.log.append(("execute", " ".join(sql.split()), params))
+
+        def fetchall(self):  # no pg_attribute rows → text COPY
+            return []
+
+        def fetchone(self):
+            return {"inserted": 1, "updated": 0}
+
+        def copy_expert(self, sql, file):
+            self.log.append(("copy", sql, file.read()))
+
+        def mogrify(self, template, args):
+            return (template % tuple(repr(a) for a in args)).encode()
+
+        @property
+        def connection(self):
+            return Conn
+
+    log = []
+
+    class Conn:
+        encoding = "UTF8"
+        committed = 0
+
+        @staticmethod
+        def cursor():
+            return Cursor(log)
+
+        @classmethod
+        def commit(cls):
+            cls.committed += 1
+
+    result = cdm_ingest.ingest_cdms(Conn, [_cdm(1), _cdm(2, TCA="")])
+    assert (result.counts.inserted, result.counts.unchanged, result.rejected, result.duplicates) == (1, 0, 1, 0)
+    assert Conn.committed == 1
+
+    kinds = [entry[0] for entry in log]
+    assert kinds == ["execute", "execute", "copy", "execute", "execute", "execute"]
+    assert "CREATE TEMP TABLE temp_cdm_events ON COMMIT DROP" in log[0][1]
+    assert log[2][1].startswith("COPY temp_cdm_events (cdm_id, created, tca,")
+    assert log[2][2].startswith(b"1\t2024-01-15T10:00:00.000000Z\t2024-01-16T03:04:05.250000Z\t812.0\t")
+    assert "INSERT INTO cdm_events AS main" in log[3][1] and "ON CONFLICT (cdm_id)" in log[3][1]
+    assert log[4][1].startswith("INSERT INTO cdm_rejects (cdm_id, reason, record) VALUES")
+    assert "VALUES (2, 'missing TCA', '{\"CDM_ID\": \"2\"" in log[4][1]
+    assert log[5][1].startswith("DELETE FROM cdm_rejects")
@@ -0,0 +1,55 @@
+"""CDM TCA refinement vs a brute-force fine scan."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from app.services import cdm_refine
+from app.services.propagation import parse_catalog, unix_julian_dates
+from tests.synthetic_catalog import EPOCH, circular_tle
+
+
+@pytest.fixture(scope="module")
+def crossing_pair():
+    return circular_tle(90001, 53.0), circular_tle(90002, 97.6)
+
+
+@pytest.fixture(scope="module")
+def fine_scan(crossing_pair):
+    catalog = parse_catalog(list(crossing_pair))
+    t = EPOCH.timestamp() + np.arange(-600.0, 600.0, 0.001)
+    jd, fr = unix_julian_dates(t)
+    _, r, v = catalog.array.sgp4(jd, fr)
+    d = np.linalg.norm(r[0] - r[1], axis=1)
+    k = int(d.argmin())
+    return t[k], d[k], np.linalg.norm(v[0, k] - v[1, k])
+
+
+@pytest.mark.parametrize("cdm_offset_s", [0.0, 137.0, -412.0])
+def test_matches_fine_scan(crossing_pair, fine_scan, cdm_offset_s):
+    # Space-Track's TCA is off from ours by up to minutes; the scan window covers it.
+    cdm_tca = EPOCH + timedelta(seconds=cdm_offset_s)
+    [r] = cdm_refine.refine_events([(*crossing_pair, cdm_tca)], workers=1)
+    tca, miss, speed = fine_scan
+    assert abs(r.tca.timestamp() - tca) < 2e-3
+    assert r.miss_distance_km == pytest.approx(miss, abs=1e-4)
+    assert r.relative_speed_km_s == pytest.approx(speed, rel=1e-4)
+
+
+def test_unusable_tles_align_as_none(crossing_pair, iss_tle):
+    events = [
+        (*crossing_pair, EPOCH),
+        (crossing_pair[0], ("1 garbage", "2 garbage"), EPOCH),
+        (crossing_pair[0], iss_tle, EPOCH),
+    ]
+    out = cdm_refine.refine_events(events, workers=1, chunk_size=2)
+    assert out[0] is not None and out[1] is None and out[2] is not None
+
+
+def test_pool_matches_in_process(crossing_pair):
+    events = [(*crossing_pair, EPOCH + timedelta(seconds=s)) for s in range(-300, 300, 50)]
+    serial = cdm_refine.refine_events(events, workers=1, chunk_size=4)
+    pooled = cdm_refine.refine_events(events, workers=2, chunk_size=4)
+    assert serial == pooled
@@ -0,0 +1,77 @@
+"""Chebyshev ephemeris fit vs direct SGP4, blob round trip and cache."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.services import chebyshev
+from app.services.catalog import CatalogSnapshot
+from app.services.frames import teme_to_itrs
+from app.services.propagation import parse_catalog, propagate, unix_julian_dates
+
+T0 = datetime(2024, 1, 15, 12, 3, 20, tzinfo=timezone.utc)
+
+
+def test_fit_matrix_recovers_polynomials():
+    n = 8
+    x = chebyshev.chebyshev_nodes(n)
+    samples = 3.0 - 2.0 * x + 0.5 * (4 * x ** 3 - 3 * x)  # 3 T0 - 2 T1 + 0.5 T3
+    coeffs = chebyshev.fit_matrix(n) @ samples
+    np.testing.assert_allclose(coeffs, [3.0, -2.0, 0.0, 0.5, 0, 0, 0, 0], atol=1e-12)
+    grid = np.linspace(-1, 1, 7)
+    np.testing.assert_allclose(chebyshev.clenshaw(coeffs, grid), 3.0 - 2.0 * grid + 0.5 * (4 * grid ** 3 - 3 * grid))
+
+
+@pytest.mark.parametrize("frame", ["ecef", "teme"])
+def test_fit_matches_sgp4_within_reported_bound(iss_tle, geo_tle, frame):
+    catalog = parse_catalog([iss_tle, geo_tle])
+    rows, coeffs, max_error = chebyshev.fit_catalog(catalog, T0, 3.0, frame)
+    assert rows.tolist() == [0, 1]
+    assert coeffs.dtype == np.float32 and coeffs.shape == (2, 6, 3, chebyshev.CHEBYSHEV_COEFFICIENTS)
+
+    offsets = np.sort(np.random.default_rng(0).uniform(0, 3 * 3600, 500))
+    jd, fr = unix_julian_dates(T0.timestamp() + offsets)
+    truth = propagate(catalog, jd, fr).position
+    if frame == "ecef":
+        truth = teme_to_itrs(truth, jd, fr)
+    miss = np.linalg.norm(chebyshev.evaluate(coeffs, chebyshev.CHEBYSHEV_SEGMENT_SECONDS, offsets) - truth, axis=-1)
+
+    assert max_error[0] < 0.05 and max_error[1] < 0.01  # km: ISS, GEO
+    # The bound comes from a sample of check points; between them it holds to within a factor.
+    assert np.all(miss.max(axis=1) <= 2.0 * max_error + 1e-3)
+    assert np.isnan(chebyshev.evaluate(coeffs, chebyshev.CHEBYSHEV_SEGMENT_SECONDS, [-1.0, 4 * 3600.0])).all()
+
+
+def test_blob_round_trip_and_cache(iss_tle, geo_tle, monkeypatch):
+    catalog = parse_catalog([iss_tle, ("garbage", "garbage"), geo_tle])
+    snap = CatalogSnapshot(version=(3, "x"), norad=np.array([25544, 99999, 28884], dtype=np.int32)[catalog.index],
+                           catalog=catalog)
+    calls = []
+
+    def fake_get_catalog(where_sql="1=1", params=()):
+        calls.append(where_sql)
+        return snap
+
+    monkeypatch.setattr(chebyshev, "get_catalog", fake_get_catalog)
+    chebyshev._cache.clear()
+
+    blob = chebyshev.get_chebyshev_ephemeris("1=1", (), T0, hours=2.0)
+    decoded = chebyshev.decode_binary(blob)
+    assert decoded["start"] == datetime(2024, 1, 15, 12, 0, 0, tzinfo=timezone.utc)
+    assert decoded["frame"] == "ecef"
+    assert decoded["norad"].tolist() == [25544, 28884]
+    # Window starts at the bucket and still covers 2 h past the request.
+    span = decoded["coeffs"].shape[1] * decoded["segment_seconds"]
+    assert decoded["start"] + timedelta(seconds=span) >= T0 + timedelta(hours=2)
+
+    hours = 2.0 + chebyshev.CHEBYSHEV_BUCKET_SECONDS / 3600.0
+    _, coeffs, max_error = chebyshev.fit_catalog(catalog, decoded["start"], hours)
+    np.testing.assert_array_equal(decoded["coeffs"], coeffs)
+    np.testing.assert_array_equal(decoded["max_error_km"], max_error)
+
+    assert chebyshev.get_chebyshev_ephemeris("1=1", (), T0 + timedelta(minutes=5), hours=2.0) is blob
+    assert len(calls) == 1
+    with pytest.raises(chebyshev.ChebyshevError):
+        chebyshev.get_chebyshev_ephemeris("1=1", (), T0, hours=48.0)
@@ -0,0 +1,157 @@
+"""COPY text / binary encodings and the generator-backed streams fed to copy_expert."""
+from __future__ import annotations
+
+import math
+import re
+import struct
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.services import copy_stream
+
+_UNESCAPE = {"\\": "\\", "t": "\t", "n": "\n", "r": "\r"}
+
+
+def _parse_copy_text(data: bytes) -> list[list[str | None]]:
+    """Postgres' side of the text format: split lines and fields, undo escapes, \\N → None."""
+    rows = []
+    for line in data.decode().split("\n")[:-1]:
+        fields = line.split("\t")
+        rows.append([None if f == "\\N" else re.sub(r"\\(.)", lambda m: _UNESCAPE[m.group(1)], f) for f in fields])
+    return rows
+
+
+def test_encode_values():
+    stamp = datetime(2024, 1, 15, 12, 0, 0, 250000, tzinfo=timezone.utc)
+    row = [None, "", "ISS (ZARYA)", 25544, np.int64(7), 0.1 + 0.2, np.float64(51.64), math.nan, -math.inf,
+           stamp, date(1998, 11, 20), True]
+    assert copy_stream.encode_row(row) == (
+        "\\N\t\\N\tISS (ZARYA)\t25544\t7\t0.30000000000000004\t51.64\tNaN\t-Infinity\t"
+        "2024-01-15T12:00:00.250000+00:00\t1998-11-20\tt\n"
+    )
+    # Floats survive exactly; timestamps keep their offset.
+    assert float(copy_stream.encode_value(0.1 + 0.2)) == 0.1 + 0.2
+    east = stamp.astimezone(timezone(timedelta(hours=5)))
+    assert datetime.fromisoformat(copy_stream.encode_value(east)) == stamp
+
+
+def test_stream_round_trips_awkward_text():
+    rows = [["tab\there", "line\nbreak\r", "back\\slash", "\\N", None], ["plain", "", "x", "y", "z"]]
+    stream = copy_stream.CopyStream(iter(rows))
+    parsed = _parse_copy_text(stream.read())
+    assert parsed == [["tab\there", "line\nbreak\r", "back\\slash", "\\N", None], ["plain", None, "x", "y", "z"]]
+    assert stream.rows_written == 2 and stream.read() == b""
+
+
+def test_stream_is_lazy_and_chunk_size_independent():
+    def rows(n):
+        for i in range(n):
+            yield (i, f"SAT {i}", datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=i), i / 7)
+
+    whole = b"".join(copy_stream.encode_row(r).encode() for r in rows(20000))
+    stream = copy_stream.CopyStream(rows(20000))
+    first = stream.read(8192)
+    assert stream.rows_written < 500  # only what one read needed
+    parts = [first]
+    while chunk := stream.read(777):
+        parts.append(chunk)
+    assert b"".join(parts) == whole and stream.rows_written == 20000
+
+
+def test_copy_rows_hands_stream_to_copy_expert():
+    class Cursor:
+        def copy_expert(self, sql, file):
+            self.sql, self.data = sql, file.read()
+
+    cursor = Cursor()
+    n = copy_stream.copy_rows(cursor, "temp_tle_history", ["norad_number", "tle_line1"], [(1, "a"), (2, None)])
+    assert n == 2
+    assert cursor.sql == "COPY temp_tle_history (norad_number, tle_line1) FROM STDIN;"
+    assert cursor.data == b"1\ta\n2\t\\N\n"
+
+
+def _parse_copy_binary(data: bytes, types: list[str]) -> list[list]:
+    """Decode COPY binary tuples the way the server reads them."""
+    decoders = {
+        "float8": lambda b: struct.unpack(">d", b)[0], "float4": lambda b: struct.unpack(">f", b)[0],
+        "int8": lambda b: struct.unpack(">q", b)[0], "int4": lambda b: struct.unpack(">i", b)[0],
+        "int2": lambda b: struct.unpack(">h", b)[0], "bool": lambda b: b == b"\x01",
+        "text": lambda b: b.decode(),
+        "timestamptz": lambda b: copy_stream.PG_EPOCH + timedelta(microseconds=struct.unpack(">q", b)[0]),
+        "timestamp": lambda b: copy_stream.PG_EPOCH_NAIVE + timedelta(microseconds=struct.unpack(">q", b)[0]),
+        "date": lambda b: copy_stream.PG_EPOCH_DATE + timedelta(days=struct.unpack(">i", b)[0]),
+    }
+    assert data[:11] == copy_stream.BINARY_SIGNATURE and data[11:19] == b"\0" * 8
+    pos, rows = 19, []
+    while True:
+        (count,) = struct.unpack_from(">h", data, pos)
+        pos += 2
+        if count == -1:
+            assert pos == len(data)
+            return rows
+        assert count == len(types)
+        row = []
+        for typname in types:
+            (length,) = struct.unpack_from(">i", data, pos)
+            pos += 4
+            if length == -1:
+                row.append(None)
+                continue
+            row.append(decoders[typname](data[pos:pos + length]))
+            pos += length
+        rows.append(row)
+
+
+def test_binary_stream_round_trips_every_type():
+    types = ["int4", "text", "float8", "float4", "int8", "int2", "bool", "timestamptz", "timestamp", "date", "date"]
+    stamp = datetime(2024, 1, 15, 12, 0, 0, 250000, tzinfo=timezone.utc)
+    rows = [
+        [25544, "ISS (ZARYA)", 0.1 + 0.2, 1.5, 2 ** 40, -3, True, stamp, stamp, date(1998, 11, 20), "1998-11-20"],
+        [np.int64(7), "Ünïcode\ttab", np.float64(-1e-300), None, None, None, False,
+         stamp.astimezone(timezone(timedelta(hours=-5))), datetime(1999, 12, 31, 23, 59), stamp, None],
+        [None, "", math.nan, math.inf, 0, 0, None, datetime(2024, 1, 15, 12), None, None, ""],
+    ]
+    stream = copy_stream.BinaryCopyStream(iter(rows), types, batch_rows=2)
+    parsed = []
+    while chunk := stream.read(13):
+        parsed.append(chunk)
+    parsed = _parse_copy_binary(b"".join(parsed), types)
+    assert stream.rows_written == 3
+
+    naive = stamp.replace(tzinfo=None)
+    assert parsed[0] == [25544, "ISS (ZARYA)", 0.1 + 0.2, 1.5, 2 ** 40, -3, True, stamp, naive,
+                         date(1998, 11, 20), date(1998, 11, 20)]
+    assert parsed[1] == [7, "Ünïcode\ttab", -1e-300, None, None, None, False,
+                         stamp, datetime(1999, 12, 31, 23, 59), date(2024, 1, 15), None]
+    # NaN / inf are float values, not NULL; naive timestamptz values are UTC; "" is NULL as in text.
+    assert parsed[2][0] is None and parsed[2][1] is None and math.isnan(parsed[2][2]) and parsed[2][3] == math.inf
+    assert parsed[2][7] == datetime(2024, 1, 15, 12, tzinfo=timezone.utc) and parsed[2][10] is None
+
+
+def test_binary_types_fall_back_to_text():
+    class Cursor:
+        def __init__(self, types):
+            self.types, self.sql = types, []
+
+        def execute(self, sql, params=None):
+            self.params = params
+
+        def fetchall(self):  # RealDictCursor rows, as get_db_connection() returns
+            return [{"attname": name, "typname": typname} for name, typname in self.types.items()]
+
+        def copy_expert(self, sql, file):
+            self.sql.append(sql)
+            self.data = file.read()
+
+    cursor = Cursor({"norad_number": "int4", "epoch": "timestamptz", "rcs": "numeric"})
+    assert copy_stream.binary_copy_types(cursor, "temp_tle_history", ["norad_number", "epoch"]) == ["int4", "timestamptz"]
+    assert cursor.params == ("temp_tle_history",)
+    assert copy_stream.binary_copy_types(cursor, "temp_tle_history", ["norad_number", "rcs"]) is None
+
+    assert copy_stream.copy_rows(cursor, "t", ["norad_number"], [(1,), (2,)], ["int4"]) == 2
+    assert cursor.sql[-1] == "COPY t (norad_number) FROM STDIN (FORMAT binary);"
+    assert _parse_copy_binary(cursor.data, ["int4"]) == [[1], [2]]
+    with pytest.raises(copy_stream.BinaryCopyUnsupported):
+        copy_stream.encode_binary_rows([(1,)], ["numeric"])
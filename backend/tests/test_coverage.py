@@ -0,0 +1,82 @@
+"""Coverage heatmap vs a brute-force elevation matrix, plus encodings and cache."""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from app.services import coverage
+from app.services.frames import geodetic_to_itrs
+
+T0 = datetime(2024, 1, 15, 12, 0, 42, tzinfo=timezone.utc)
+
+
+def _brute_force(ecef, resolution, min_elevation):
+    lat, lon = np.meshgrid(*map(np.radians, coverage.cell_centers(resolution)), indexing="ij")
+    up = np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+    ground = up * coverage.EARTH_MEAN_RADIUS_KM
+    d = ecef[None, None, :, :] - ground[:, :, None, :]
+    sin_el = (d * up[:, :, None, :]).sum(axis=-1) / np.linalg.norm(d, axis=-1)
+    return (np.degrees(np.arcsin(sin_el)) >= min_elevation).sum(axis=-1)
+
+
+def _random_sky(n, seed=0):
+    rng = np.random.default_rng(seed)
+    alt = np.where(rng.random(n) < 0.8, rng.uniform(300, 2000, n), rng.uniform(19000, 36000, n))
+    lat = np.degrees(np.arcsin(rng.uniform(-1, 1, n)))
+    return geodetic_to_itrs(lat, rng.uniform(-180, 180, n), alt)
+
+
+@pytest.mark.parametrize("resolution,min_elevation", [(2.0, 10.0), (5.0, 0.0), (3.0, 45.0)])
+def test_matches_brute_force_elevation(resolution, min_elevation):
+    ecef = _random_sky(200)
+    counts = coverage.coverage_counts(ecef, resolution, min_elevation)
+    np.testing.assert_array_equal(counts, _brute_force(ecef, resolution, min_elevation))
+
+
+def test_antimeridian_and_pole_caps():
+    ecef = geodetic_to_itrs([0.0, 89.0], [179.5, 0.0], [800.0, 800.0])
+    counts = coverage.coverage_counts(ecef, 1.0, 10.0)
+    lat, lon = coverage.cell_centers(1.0)
+    equator = np.argmin(np.abs(lat - 0.5))
+    # The equatorial cap wraps: both edge columns are covered, the far side isn't.
+    assert counts[equator, 0] == 1 and counts[equator, -1] == 1
+    assert counts[equator, np.argmin(np.abs(lon))] == 0
+    # The polar cap covers every longitude of the top row.
+    assert (counts[-1] >= 1).all()
+    np.testing.assert_array_equal(counts, _brute_force(ecef, 1.0, 10.0))
+
+
+def test_resolution_must_tile_the_sphere():
+    assert coverage.grid_shape(1.0) == (180, 360)
+    assert coverage.grid_shape(0.25) == (720, 1440)
+    with pytest.raises(coverage.CoverageError):
+        coverage.grid_shape(0.7)
+    with pytest.raises(coverage.CoverageError):
+        coverage.grid_shape(20.0)
+
+
+def test_binary_roundtrip_and_cache(monkeypatch):
+    ecef = _random_sky(500, seed=1)
+    calls = []
+
+    def fake_compute_positions(where_sql, params, when, frame="geodetic"):
+        calls.append(when)
+        return np.arange(len(ecef), dtype=np.int32), ecef.T
+
+    monkeypatch.setattr(coverage, "compute_positions", fake_compute_positions)
+    coverage._cache.clear()
+
+    blob = coverage.get_coverage("1=1", (), T0, 2.0, 10.0, fmt="bin")
+    decoded = coverage.decode_binary(blob)
+    assert decoded["t"] == datetime(2024, 1, 15, 12, 0, 0, tzinfo=timezone.utc)
+    assert decoded["satellites"] == 500
+    np.testing.assert_array_equal(decoded["counts"], coverage.coverage_counts(ecef, 2.0, 10.0))
+
+    body = coverage.get_coverage("1=1", (), T0, 2.0, 10.0)
+    assert body["nlat"] * body["nlon"] == len(body["counts"]) == 90 * 180
+    assert body["max"] == decoded["counts"].max()
+
+    coverage.get_coverage("1=1", (), T0.replace(second=59), 2.0, 10.0)
+    assert len(calls) == 1  # same bucket, either format → one computation
@@ -0,0 +1,184 @@
+"""Delta GP queries against a local stand-in for Space-Track replaying recorded responses."""
+from __future__ import annotations
+
+import gzip
+import json
+import threading
+from contextlib import ExitStack
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from app.services import delta_sync
+from app.services.gp_stream import open_gp_records
+
+NOW = datetime(2024, 1, 16, 0, 0, tzinfo=timezone.utc)
+
+
+def _gp(norad: int, created: str, epoch: str = "2024-01-15T12:00:00.000000") -> dict:
+    return {
+        "NORAD_CAT_ID": norad, "OBJECT_NAME": f"SAT {norad}", "OBJECT_TYPE": "PAYLOAD",
+        "TLE_LINE1": f"1 {norad:05d}U 24001A   24015.50000000  .00000000  00000-0  10000-3 0  9990",
+        "TLE_LINE2": f"2 {norad:05d}  51.6000  30.0000 0005000  90.0000 270.0000 15.50000000    10",
+        "EPOCH": epoch, "CREATION_DATE": created, "MEAN_MOTION": 15.5,
+    }
+
+
+FULL = [_gp(1, "2024-01-15T13:00:00"), _gp(2, "2024-01-15T18:30:00"), _gp(3, "2024-01-14T02:00:00")]
+DELTA = [_gp(2, "2024-01-15T22:10:00", "2024-01-15T21:00:00.000000"), _gp(4, "2024-01-15T23:05:00")]
+
+
+class _Replay(BaseHTTPRequestHandler):
+    """Serves server.responses[path] (gzipped, like Space-Track); 404 otherwise."""
+
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        body = self.server.responses.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        payload = gzip.compress(json.dumps(body).encode())
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def spacetrack():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Replay)
+    server.responses, server.requests = {}, []
+    server.base_url = f"http://127.0.0.1:{server.server_port}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _run(session, state, now, base_url, **kwargs):
+    """One ingestion run's fetch: plan, stream, and the state it would store."""
+    plan = delta_sync.plan_gp_fetch(state, now=now, base_url=base_url, **kwargs)
+    mark = delta_sync.HighWaterMark()
+    with ExitStack() as stack:
+        status, records = open_gp_records(session, plan.url, stack)
+        if records is None:
+            return plan, status, [], state
+        records = list(records)
+        mark.observe(records)
+    return plan, status, records, delta_sync.next_state(state, plan.mode, mark, now)
+
+
+def test_delta_cycle_against_replayed_responses(spacetrack):
+    base = spacetrack.base_url
+    since = datetime(2024, 1, 15, 18, 30, tzinfo=timezone.utc) - timedelta(seconds=delta_sync.GP_DELTA_OVERLAP_SECONDS)
+    full_path = "/basicspacedata/query/class/gp/orderby/EPOCH%20desc/format/json"
+    delta_path = ("/basicspacedata/query/class/gp/CREATION_DATE/%3E2024-01-15%2018:20:00"
+                  "/orderby/CREATION_DATE%20asc/format/json")
+    spacetrack.responses = {full_path: FULL, delta_path: DELTA}
+    session = requests.Session()
+
+    # No mark yet: the whole catalog.
+    plan, status, records, state = _run(session, delta_sync.SyncState(), NOW, base)
+    assert plan.mode == "full" and status == 200
+    assert [r["NORAD_CAT_ID"] for r in records] == [1, 2, 3]
+    assert state.high_water == datetime(2024, 1, 15, 18, 30, tzinfo=timezone.utc)
+    assert state.last_full_sync == NOW
+
+    # Six hours later: only what was created since the mark (minus the overlap).
+    plan, status, records, state = _run(session, state, NOW + timedelta(hours=6), base)
+    assert plan.mode == "delta" and plan.since == since
+    assert spacetrack.requests[-1] == delta_path
+    assert [r["NORAD_CAT_ID"] for r in records] == [2, 4]
+    assert state.high_water == datetime(2024, 1, 15, 23, 5, tzinfo=timezone.utc)
+    assert state.max_epoch == datetime(2024, 1, 15, 21, tzinfo=timezone.utc)
+    assert state.last_full_sync == NOW
+
+    # Once GP_FULL_SYNC_HOURS have passed, reconcile with a full pull.
+    plan, _, records, state = _run(session, state, NOW + timedelta(hours=25), base, full_sync_hours=24)
+    assert plan.mode == "full" and len(records) == 3
+    # The full catalog's newest record is older than the delta's: the mark holds.
+    assert state.high_water == datetime(2024, 1, 15, 23, 5, tzinfo=timezone.utc)
+    assert state.last_full_sync == NOW + timedelta(hours=25)
+    assert spacetrack.requests == [full_path, delta_path, full_path]
+
+
+def test_api_error_leaves_state_alone(spacetrack):
+    state = delta_sync.SyncState(high_water=NOW, last_full_sync=NOW)
+    plan, status, records, after = _run(requests.Session(), state, NOW + timedelta(hours=1), spacetrack.base_url)
+    assert plan.mode == "delta" and status == 404 and records == [] and after is state
+
+
+def test_cdm_delta_against_replayed_responses(spacetrack):
+    full_path = "/basicspacedata/query/class/cdm_public/format/json"
+    delta_path = ("/basicspacedata/query/class/cdm_public/CREATED/%3E2024-01-15%2011:50:00"
+                  "/orderby/CREATED%20asc/format/json")
+    spacetrack.responses = {
+        full_path: [{"CDM_ID": "1", "CREATED": "2024-01-15 09:00:00.000000"},
+                    {"CDM_ID": "2", "CREATED": "2024-01-15 12:00:00.000000"}],
+        delta_path: [{"CDM_ID": "3", "CREATED": "2024-01-15 20:00:00.000000"}],
+    }
+    session, state = requests.Session(), delta_sync.SyncState()
+
+    for now, mode, ids, high_water in [
+        (NOW, "full", ["1", "2"], datetime(2024, 1, 15, 12, tzinfo=timezone.utc)),
+        (NOW + timedelta(hours=8), "delta", ["3"], datetime(2024, 1, 15, 20, tzinfo=timezone.utc)),
+    ]:
+        plan = delta_sync.plan_cdm_fetch(state, now=now, base_url=spacetrack.base_url)
+        status, records = delta_sync.fetch_records(session, plan)
+        mark = delta_sync.HighWaterMark("CREATED", None)
+        mark.observe(records)
+        state = delta_sync.next_state(state, plan.mode, mark, now)
+        assert (plan.mode, status, [r["CDM_ID"] for r in records]) == (mode, 200, ids)
+        assert state.high_water == high_water and state.max_epoch is None and state.last_full_sync == NOW
+
+    assert spacetrack.requests == [full_path, delta_path]
+    # A week on, the full pull comes back; an error hands back no records.
+    plan = delta_sync.plan_cdm_fetch(state, now=NOW + timedelta(hours=168), base_url=spacetrack.base_url)
+    assert plan.url == spacetrack.base_url + full_path
+    spacetrack.responses = {}
+    assert delta_sync.fetch_records(session, plan) == (404, None)
+
+
+def test_plan_modes():
+    state = delta_sync.SyncState(high_water=NOW, last_full_sync=NOW)
+    assert delta_sync.plan_gp_fetch(state, now=NOW, mode="full").mode == "full"
+    assert delta_sync.plan_gp_fetch(delta_sync.SyncState(high_water=NOW), now=NOW).mode == "full"
+    with pytest.raises(delta_sync.DeltaSyncError):
+        delta_sync.plan_gp_fetch(state, now=NOW, mode="delta-only")
+
+
+def test_high_water_mark_parsing():
+    mark = delta_sync.HighWaterMark()
+    mark.observe([{"CREATION_DATE": "2024-01-15T13:00:00"}, {"CREATION_DATE": None},
+                  {"CREATION_DATE": "garbage", "EPOCH": "2024-01-15T12:00:00.123456"}, {}])
+    assert mark.count == 4
+    assert mark.creation == datetime(2024, 1, 15, 13, tzinfo=timezone.utc)
+    assert mark.epoch == datetime(2024, 1, 15, 12, 0, 0, 123456, tzinfo=timezone.utc)
+    # An empty delta never moves the mark backwards or touches the full-sync time.
+    state = delta_sync.SyncState(high_water=NOW, last_full_sync=NOW)
+    assert delta_sync.next_state(state, "delta", delta_sync.HighWaterMark(), NOW + timedelta(hours=6)) == state
+
+
+def test_load_sync_state_reads_dict_rows():
+    class Cursor:  # get_db_connection() hands out RealDictCursor
+        def __init__(self, row):
+            self.row = row
+
+        def execute(self, sql, params=None):
+            self.params = params
+
+        def fetchone(self):
+            return self.row
+
+    row = {"high_water": NOW, "max_epoch": NOW - timedelta(hours=1), "last_full_sync": NOW}
+    assert delta_sync.load_sync_state(Cursor(row)) == delta_sync.SyncState(NOW, NOW - timedelta(hours=1), NOW)
+    assert delta_sync.load_sync_state(Cursor(None)) == delta_sync.SyncState()
@@ -0,0 +1,102 @@
+"""Sun vector vs astropy, conical shadow vs ray casting, and the API columns."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.services import eclipse, passes
+from app.services.propagation import julian_dates, parse_catalog
+
+T0 = datetime(2024, 1, 15, 12, 0, 0, tzinfo=timezone.utc)
+
+
+def _angle_deg(a, b):
+    cos = (a * b).sum(axis=-1) / (np.linalg.norm(a, axis=-1) * np.linalg.norm(b, axis=-1))
+    return np.degrees(np.arccos(np.clip(cos, -1.0, 1.0)))
+
+
+def test_sun_matches_astropy_true_of_date():
+    coordinates = pytest.importorskip("astropy.coordinates")
+    time = pytest.importorskip("astropy.time")
+    units = pytest.importorskip("astropy.units")
+
+    t = time.Time("2015-01-01", scale="utc") + np.linspace(0, 3285, 40) * units.day
+    ref = coordinates.get_sun(t).transform_to(coordinates.TETE(obstime=t)).cartesian.xyz.to_value(units.km).T
+    ours = eclipse.sun_position(t.jd1, t.jd2)
+
+    assert _angle_deg(ours, ref).max() < 0.02
+    np.testing.assert_allclose(np.linalg.norm(ours, axis=1), np.linalg.norm(ref, axis=1), rtol=2e-4)
+
+
+def _ray_cast_fraction(r_sat, r_sun, n=200):
+    """Share of a grid of points on the solar disc whose line of sight misses the Earth."""
+    to_sun = r_sun - r_sat
+    dist = np.linalg.norm(to_sun)
+    w = to_sun / dist
+    u = np.cross(w, [0.0, 0.0, 1.0])
+    u /= np.linalg.norm(u)
+    v = np.cross(w, u)
+    g = np.linspace(-1, 1, n)
+    x, y = np.meshgrid(g, g)
+    inside = x * x + y * y <= 1.0
+    points = r_sun + eclipse.SUN_RADIUS_KM * (x[inside, None] * u + y[inside, None] * v)
+
+    d = points - r_sat
+    d /= np.linalg.norm(d, axis=1, keepdims=True)
+    along = -(d @ r_sat)  # closest approach to the Earth's centre along each ray
+    miss = np.linalg.norm(r_sat + along[:, None] * d, axis=1)
+    blocked = (along > 0) & (miss < eclipse.EARTH_EQUATORIAL_RADIUS_KM)
+    return 1.0 - blocked.mean()
+
+
+def test_shadow_matches_ray_casting_through_the_terminator():
+    r_sun = eclipse.sun_position(*julian_dates(T0))[0]
+    s = r_sun / np.linalg.norm(r_sun)
+    side = np.cross(s, [0.0, 0.0, 1.0])
+    side /= np.linalg.norm(side)
+
+    # A 7000 km circle through the shadow, sampled densely around the umbra edge.
+    radius = 7000.0
+    edge = np.arcsin(eclipse.EARTH_EQUATORIAL_RADIUS_KM / radius)
+    theta = np.concatenate([np.pi - np.linspace(edge + 0.02, edge - 0.02, 41), [0.0, np.pi / 2, np.pi]])
+    r_sat = radius * (np.cos(theta)[:, None] * s + np.sin(theta)[:, None] * side)
+
+    state, fraction = eclipse.shadow(r_sat, r_sun)
+    assert state[-3] == eclipse.SUNLIT and fraction[-3] == 1.0      # sub-solar side
+    assert state[-1] == eclipse.UMBRA and fraction[-1] == 0.0       # straight behind the Earth
+    assert {eclipse.SUNLIT, eclipse.PENUMBRA, eclipse.UMBRA} <= set(state[:41].tolist())
+    assert np.all(np.diff(fraction[:41]) <= 1e-12)                  # sun sets monotonically
+    for k in np.flatnonzero(state == eclipse.PENUMBRA):
+        assert fraction[k] == pytest.approx(_ray_cast_fraction(r_sat[k], r_sun), abs=0.01)
+
+
+def test_shadow_broadcasts_per_time_step_and_skips_invalid():
+    jd, fr = julian_dates([T0 + timedelta(hours=h) for h in range(4)])
+    suns = eclipse.sun_position(jd, fr)
+    r = np.random.default_rng(0).normal(size=(5, 4, 3)) * 8000.0
+    r[0, 0] = np.nan
+    state, fraction = eclipse.shadow(r, suns)
+    assert state.shape == fraction.shape == (5, 4)
+    for j in range(4):
+        expected, _ = eclipse.shadow(r[:, j], suns[j])
+        assert state[:, j].tolist() == expected.tolist()
+    assert state[0, 0] == eclipse.SUNLIT and np.isnan(fraction[0, 0])
+
+
+def test_pass_flags_follow_sun_and_shadow(iss_tle, geo_tle):
+    catalog = parse_catalog([iss_tle, geo_tle])
+    observer = passes.Observer(40.0, -105.0, 1.6)
+    found = passes.predict_passes(catalog, np.array([25544, 28884]), observer, T0, T0 + timedelta(hours=48))
+    iss = [p for p in found if p.norad == 25544]
+    assert iss
+
+    for p in iss:
+        state, sun_el = passes.illumination(catalog, [0], [p.culmination.timestamp()], observer)
+        assert p.eclipse == eclipse.STATES[state[0]]
+        assert p.sun_elevation == pytest.approx(sun_el[0])
+        assert p.visible == (p.eclipse != "umbra" and p.sun_elevation < passes.VISIBLE_SUN_ELEVATION)
+        assert p.to_dict()["visible"] == p.visible
+    # Two days over Boulder in January: some passes in daylight, some at night.
+    assert min(p.sun_elevation for p in iss) < 0 < max(p.sun_elevation for p in iss)
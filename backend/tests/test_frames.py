@@ -0,0 +1,106 @@
+"""TEME → geodetic fast path vs the astropy transform it replaces.
+
+Positions come from propagating the pinned ISS / GEO TLEs (conftest.py)
+across a day, so the test covers all latitudes and longitudes. astropy's
+bundled IERS tables are used offline — no download.
+"""
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.services import frames
+from app.services.propagation import julian_dates, propagate_catalog
+
+astropy_iers = pytest.importorskip("astropy.utils.iers")
+
+T0 = datetime(2024, 1, 15, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _offline_iers():
+    with astropy_iers.conf.set_temp("auto_download", False):
+        yield
+
+
+def _states(iss_tle, geo_tle, n_times: int, step_minutes: float = 7.0):
+    times = [T0 + timedelta(minutes=step_minutes * i) for i in range(n_times)]
+    _, result = propagate_catalog([iss_tle, geo_tle], times)
+    jd, fr = julian_dates(times)
+    return result.position, jd, fr
+
+
+def _lon_diff(a, b):
+    return np.abs((a - b + 180.0) % 360.0 - 180.0)
+
+
+def test_matches_astropy_with_iers(iss_tle, geo_tle):
+    r, jd, fr = _states(iss_tle, geo_tle, 200)
+    lat, lon, alt = frames.teme_to_geodetic(r, jd, fr)
+    ref_lat, ref_lon, ref_alt = frames.teme_to_geodetic_astropy(r, jd, fr)
+
+    # 1e-8 deg ≈ 1 mm on the ground; height in km.
+    assert np.abs(lat - ref_lat).max() < 1e-8
+    assert _lon_diff(lon, ref_lon).max() < 1e-8
+    assert np.abs(alt - ref_alt).max() < 1e-6
+
+
+def test_without_eop_stays_within_a_kilometre(iss_tle, geo_tle):
+    r, jd, fr = _states(iss_tle, geo_tle, 200)
+    lat, lon, _ = frames.teme_to_geodetic(r, jd, fr, eop=False)
+    ref_lat, ref_lon, _ = frames.teme_to_geodetic_astropy(r, jd, fr)
+    # ~0.01 deg ≈ 1.1 km of arc at the surface.
+    assert np.abs(lat - ref_lat).max() < 0.01
+    assert _lon_diff(lon, ref_lon).max() < 0.01
+
+
+def test_per_object_epochs_and_shared_epoch_agree(iss_tle, geo_tle):
+    r, jd, fr = _states(iss_tle, geo_tle, 3)
+    # (N, T, 3) grid with per-column epochs vs one call per column.
+    lat_grid, lon_grid, alt_grid = frames.teme_to_geodetic(r, jd, fr)
+    for j in range(r.shape[1]):
+        lat, lon, alt = frames.teme_to_geodetic(r[:, j], jd[j], fr[j])
+        np.testing.assert_allclose(lat, lat_grid[:, j], atol=1e-12)
+        np.testing.assert_allclose(lon, lon_grid[:, j], atol=1e-12)
+        np.testing.assert_allclose(alt, alt_grid[:, j], atol=1e-9)
+
+
+def test_geodetic_poles_and_equator():
+    lat, lon, alt = frames.itrs_to_geodetic(np.array([
+        [frames.WGS84_A_KM + 400.0, 0.0, 0.0],
+        [0.0, 0.0, frames.WGS84_A_KM * (1 - frames.WGS84_F) + 400.0],
+        [0.0, 0.0, -(frames.WGS84_A_KM * (1 - frames.WGS84_F) + 400.0)],
+    ]))
+    np.testing.assert_allclose(lat, [0.0, 90.0, -90.0], atol=1e-9)
+    np.testing.assert_allclose(alt, [400.0, 400.0, 400.0], atol=1e-6)
+    assert lon[0] == 0.0
+
+
+@pytest.mark.perf
+def test_speedup_on_full_catalog(iss_tle, geo_tle):
+    """30k objects: one vectorized call vs the old per-object astropy path."""
+    r, jd, fr = _states(iss_tle, geo_tle, 15000, step_minutes=0.5)
+    r = r.reshape(-1, 3)
+    jd = np.tile(jd, 2)
+    fr = np.tile(fr, 2)
+    n = len(r)
+
+    frames.teme_to_geodetic(r[:10], jd[:10], fr[:10])  # warm the EOP cache
+    t0 = time.perf_counter()
+    frames.teme_to_geodetic(r, jd, fr)
+    vectorized_s = time.perf_counter() - t0
+
+    # The legacy path is ~ms per object; time a sample and extrapolate.
+    sample = 100
+    t0 = time.perf_counter()
+    for i in range(sample):
+        frames.teme_to_geodetic_astropy(r[i], jd[i], fr[i])
+    legacy_s = (time.perf_counter() - t0) / sample * n
+
+    speedup = legacy_s / vectorized_s
+    print(f"\n{n} objects: vectorized {vectorized_s * 1e3:.1f} ms, "
+          f"per-object astropy ~{legacy_s:.1f} s, speedup ×{speedup:.0f}")
+    assert speedup > 50
@@ -0,0 +1,115 @@
+"""Streaming GP parse: record fidelity, flat memory and the JSONL cache."""
+from __future__ import annotations
+
+import io
+import json
+import tracemalloc
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services import gp_stream
+
+pytest.importorskip("ijson")
+
+
+def _gp_record(norad: int) -> dict:
+    """A GP record with the full set of fields Space-Track returns."""
+    record = {f"FIELD_{k}": f"value {k} for {norad}" for k in range(28)}  # fields we drop
+    record.update({
+        "NORAD_CAT_ID": norad, "OBJECT_NAME": f"SAT {norad}", "OBJECT_TYPE": "PAYLOAD",
+        "TLE_LINE1": f"1 {norad:05d}U 24001A   24015.50000000  .00000000  00000-0  10000-3 0  9990",
+        "TLE_LINE2": f"2 {norad:05d}  51.6000  30.0000 0005000  90.0000 270.0000 15.50000000    10",
+        "EPOCH": "2024-01-15T12:00:00.000000", "CREATION_DATE": "2024-01-15T13:00:00",
+        "DECAY_DATE": None, "LAUNCH_DATE": "2024-01-01", "SITE": "AFETR",
+        "RCS_SIZE": "LARGE", "COUNTRY_CODE": "US", "MEAN_MOTION": 15.5,
+    })
+    return record
+
+
+class _GeneratedStream(io.RawIOBase):
+    """A JSON array of n GP records produced on demand, like an HTTP body."""
+
+    def __init__(self, n: int):
+        self._parts = self._generate(n)
+        self._buffer = bytearray()
+
+    def _generate(self, n):
+        record = json.dumps(_gp_record(25544)).encode()
+        yield b"["
+        for i in range(n):
+            yield (b"," if i else b"") + record
+        yield b"]"
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while len(self._buffer) < len(buffer):
+            part = next(self._parts, None)
+            if part is None:
+                break
+            self._buffer += part
+        n = min(len(buffer), len(self._buffer))
+        buffer[:n] = self._buffer[:n]
+        del self._buffer[:n]
+        return n
+
+
+def test_records_match_json_loads_on_gp_fields():
+    payload = json.dumps([_gp_record(n) for n in (5, 25544, 99999)]).encode()
+    records = list(gp_stream.iter_gp_records(io.BytesIO(payload)))
+    expected = [{k: v for k, v in r.items() if k in gp_stream.GP_FIELDS} for r in json.loads(payload)]
+    assert records == expected
+    assert isinstance(records[1]["NORAD_CAT_ID"], int) and records[1]["DECAY_DATE"] is None
+
+
+def _parse_peak(n: int) -> tuple[int, int]:
+    """(records seen, peak traced bytes) for streaming n generated records in chunks."""
+    stream = _GeneratedStream(n)
+    tracemalloc.start()
+    try:
+        count = sum(len(c) for c in gp_stream.iter_chunks(gp_stream.iter_gp_records(stream), 500))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return count, peak
+
+
+def test_parse_memory_is_flat_in_catalog_size():
+    small, large = _parse_peak(2000), _parse_peak(10000)
+    assert small[0] == 2000 and large[0] == 10000
+    # Five times the payload (~10 MB) costs no more than one chunk of records.
+    assert large[1] < 1.5 * small[1]
+    assert large[1] < 3_000_000
+
+
+def test_chunks():
+    assert [len(c) for c in gp_stream.iter_chunks(range(7), 3)] == [3, 3, 1]
+    assert list(gp_stream.iter_chunks([], 3)) == []
+
+
+def test_cache_round_trip_and_atomic_swap(tmp_path):
+    path = str(tmp_path / "tle_latest.jsonl")
+    epoch = datetime(2024, 1, 15, 12, tzinfo=timezone.utc)
+    records = [dict(gp_stream.compact_record(_gp_record(n)), computed_params={"epoch": epoch}) for n in (1, 2, 3)]
+
+    writer = gp_stream.GPCacheWriter(path, timestamp=1700000000.0, mode="delta")
+    writer.write(records[:2])
+    writer.write(records[2:])
+    writer.close()
+
+    # A failed rewrite leaves the previous cache in place.
+    broken = gp_stream.GPCacheWriter(path, timestamp=1800000000.0)
+    broken.write(records[:1])
+    broken.abort()
+
+    header, cached = gp_stream.read_gp_cache(path)
+    assert header == {"timestamp": 1700000000.0, "mode": "delta"}
+    cached = list(cached)
+    assert [r["NORAD_CAT_ID"] for r in cached] == [1, 2, 3]
+    assert cached[0]["computed_params"]["epoch"] == epoch.isoformat()
+
+    (tmp_path / "old.json").write_text("not json lines")
+    with pytest.raises(ValueError):
+        gp_stream.read_gp_cache(str(tmp_path / "old.json"))
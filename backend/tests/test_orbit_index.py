@@ -0,0 +1,81 @@
+"""KD-tree similar-orbit index vs the brute-force filter it replaces."""
+from __future__ import annotations
+
+import time
+
+import numpy as np
+import pytest
+
+from app.services import orbit_index
+
+
+@pytest.fixture(scope="module")
+def elements():
+    rng = np.random.default_rng(7)
+    n = 30000
+    perigee = rng.uniform(300, 1500, n)
+    apogee = perigee + rng.exponential(200, n)
+    inclination = rng.choice([53.0, 97.5, 87.9, 0.1, 65.0], n) + rng.normal(0, 2, n)
+    raan = rng.uniform(0, 360, n)
+    return np.arange(1, n + 1), np.column_stack([perigee, apogee, inclination, raan])
+
+
+@pytest.fixture(scope="module")
+def index(elements):
+    return orbit_index.build_index(*elements)
+
+
+def _brute_force(elements, point, k, exclude):
+    """The old SQL: per-axis thresholds, then ORDER BY the (normalized) L1 sum."""
+    norad, el = elements
+    diff = np.abs(el[:, :3] - point) / [100.0, 100.0, 5.0]
+    inside = (diff <= 1.0).all(axis=1) & (norad != exclude)
+    score = diff.sum(axis=1)
+    rows = np.flatnonzero(inside)
+    rows = rows[np.argsort(score[rows], kind="stable")][:k]
+    return [(int(norad[r]), float(score[r])) for r in rows]
+
+
+def test_box_query_matches_old_filter(elements, index):
+    for norad in (1, 500, 12345, 29999):
+        point = elements[1][norad - 1, :3]
+        got = orbit_index.query(index, point, k=10, radius=1.0, exclude=norad, box=True)
+        want = _brute_force(elements, point, 10, norad)
+        assert [n for n, _ in got] == [n for n, _ in want]
+        np.testing.assert_allclose([d for _, d in got], [d for _, d in want])
+
+
+def test_knn_and_radius_agree(index):
+    point = (550.0, 560.0, 53.0)
+    nearest = orbit_index.query(index, point, k=25)
+    assert len(nearest) == 25
+    assert [d for _, d in nearest] == sorted(d for _, d in nearest)
+    within = orbit_index.query(index, point, k=25, radius=nearest[-1][1] + 1e-9)
+    assert [n for n, _ in within] == [n for n, _ in nearest]
+
+
+def test_raan_wraps_around():
+    index = orbit_index.build_index(
+        [1, 2, 3],
+        [[550, 550, 53, 359.0], [550, 550, 53, 180.0], [550, 550, 53, 10.0]],
+    )
+    got = orbit_index.query(index, (550, 550, 53, 1.0), k=3)
+    assert [n for n, _ in got] == [1, 3, 2]
+    # Without RAAN all three are the same orbit.
+    assert all(d == 0 for _, d in orbit_index.query(index, (550, 550, 53), k=3))
+
+
+def test_rejects_bad_point(index):
+    with pytest.raises(orbit_index.OrbitQueryError):
+        orbit_index.query(index, (550.0, float("nan"), 53.0))
+
+
+@pytest.mark.perf
+def test_query_latency(index):
+    orbit_index.query(index, (550.0, 560.0, 53.0, 120.0), k=10)  # build the RAAN tree
+    t0 = time.perf_counter()
+    for i in range(1000):
+        orbit_index.query(index, (400.0 + i % 800, 600.0, 53.0), k=10)
+    per_query_us = (time.perf_counter() - t0) * 1e3
+    print(f"\nk=10 query on {len(index)} orbits: {per_query_us:.0f} µs")
+    assert per_query_us < 1000
@@ -0,0 +1,75 @@
+"""Vectorized Kepler solver and derived elements."""
+from __future__ import annotations
+
+import math
+import time
+
+import numpy as np
+import pytest
+from sgp4.api import WGS72, Satrec
+
+from app.services import orbital_elements
+from tests.synthetic_catalog import synthetic_tles
+
+
+def test_kepler_residual_across_eccentricities():
+    rng = np.random.default_rng(1)
+    M = rng.uniform(-20.0, 20.0, 200_000)
+    e = np.concatenate([rng.uniform(0.0, 0.999, 199_000), np.full(1000, 0.9999)])
+    E = orbital_elements.solve_kepler(M, e)
+    assert np.abs(E - e * np.sin(E) - M).max() < 1e-12
+    # Same revolution as the input mean anomaly.
+    assert np.abs(E - M).max() <= 1.0 + 1e-12
+
+
+def test_circular_orbit_angles_in_degrees():
+    out = orbital_elements.derived_elements([15.5], [0.0], [90.0], [30.0])
+    assert out["eccentric_anomaly"][0] == pytest.approx(90.0)
+    assert out["true_anomaly"][0] == pytest.approx(90.0)
+    assert out["argument_of_latitude"][0] == pytest.approx(120.0)
+    assert out["flight_path_angle"][0] == pytest.approx(0.0, abs=1e-12)
+    assert out["radial_distance"][0] == pytest.approx(out["semi_major_axis"][0])
+
+
+def test_high_eccentricity_radius_matches_sgp4():
+    # GTO / HEO objects: the exact solution tracks SGP4's |r| at epoch to a
+    # fraction of a percent; E ≈ M + e·sin M misses by far more.
+    heo = []
+    for line1, line2 in synthetic_tles(400, seed=5):
+        satrec = Satrec.twoline2rv(line1, line2, WGS72)
+        if satrec.ecco > 0.5:
+            heo.append(satrec)
+    assert len(heo) > 5
+
+    e = np.array([s.ecco for s in heo])
+    M = np.array([s.mo for s in heo])
+    out = orbital_elements.derived_elements(
+        [s.no_kozai * 1440.0 / (2 * math.pi) for s in heo], e, np.degrees(M), np.degrees([s.argpo for s in heo])
+    )
+    r_sgp4 = np.array([np.linalg.norm(s.sgp4_tsince(0.0)[1]) for s in heo])
+
+    exact_error = np.abs(out["radial_distance"] / r_sgp4 - 1.0)
+    E_approx = M + e * np.sin(M)
+    approx_error = np.abs(out["semi_major_axis"] * (1 - e * np.cos(E_approx)) / r_sgp4 - 1.0)
+    assert exact_error.max() < 0.01
+    assert approx_error.max() > 10 * exact_error.max()
+
+
+@pytest.mark.perf
+def test_vectorized_faster_than_scalar():
+    rng = np.random.default_rng(2)
+    n = 30000
+    args = (rng.uniform(1, 16, n), rng.uniform(0, 0.9, n), rng.uniform(0, 360, n), rng.uniform(0, 360, n))
+
+    t0 = time.perf_counter()
+    orbital_elements.derived_elements(*args)
+    vectorized_s = time.perf_counter() - t0
+
+    sample = 1000
+    t0 = time.perf_counter()
+    for i in range(sample):
+        orbital_elements.derived_elements(*(a[i:i + 1] for a in args))
+    scalar_s = (time.perf_counter() - t0) / sample * n
+
+    print(f"\n{n} element sets: vectorized {vectorized_s * 1e3:.1f} ms, per-object ~{scalar_s:.2f} s")
+    assert scalar_s > 20 * vectorized_s
@@ -0,0 +1,108 @@
+"""Pass prediction vs a brute-force 1 s scan and vs skyfield's find_events."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.services import passes
+from app.services.propagation import parse_catalog
+
+START = datetime(2024, 1, 15, tzinfo=timezone.utc)
+END = START + timedelta(hours=24)
+BOULDER = passes.Observer(40.0, -105.0, 1.6)
+
+
+@pytest.fixture
+def catalog(iss_tle, geo_tle):
+    return parse_catalog([iss_tle, geo_tle])
+
+
+def _iss_passes(catalog, **kwargs):
+    found = passes.predict_passes(catalog, np.array([25544, 28884]), BOULDER, START, END, **kwargs)
+    return [p for p in found if p.norad == 25544]
+
+
+def test_matches_brute_force_scan(catalog):
+    found = _iss_passes(catalog)
+    assert len(found) == 5
+
+    t = START.timestamp() + np.arange(0, 24 * 3600 + 1, 1.0)
+    _, el = passes.look_angles(catalog, np.zeros(len(t), dtype=np.int64), t, BOULDER)
+    up = el > 10.0
+    rises = t[1:][up[1:] & ~up[:-1]]
+    sets = t[:-1][up[:-1] & ~up[1:]]
+    assert len(rises) == len(sets) == len(found)
+
+    for p, rise, set_ in zip(found, rises, sets):
+        assert abs(p.rise.timestamp() - rise) <= 1.0
+        assert abs(p.set.timestamp() - set_) <= 1.0
+        window = (t >= rise) & (t <= set_)
+        assert p.max_elevation >= el[window].max() - 1e-6
+        assert abs(p.culmination.timestamp() - t[window][np.argmax(el[window])]) <= 1.0
+
+
+def test_matches_skyfield(iss_tle, catalog):
+    skyfield_api = pytest.importorskip("skyfield.api")
+    ts = skyfield_api.load.timescale(builtin=True)
+    sat = skyfield_api.EarthSatellite(*iss_tle, "ISS", ts)
+    topo = skyfield_api.wgs84.latlon(40.0, -105.0, elevation_m=1600)
+    times, events = sat.find_events(topo, ts.from_datetime(START), ts.from_datetime(END), altitude_degrees=10.0)
+    reference = [ti.utc_datetime() for ti in times]
+
+    ours = []
+    for p in _iss_passes(catalog):
+        ours += [p.rise, p.culmination, p.set]
+    assert list(events) == [0, 1, 2] * (len(ours) // 3)
+    # skyfield applies its own Earth-orientation model; agreement is sub-second.
+    assert max(abs((a - b).total_seconds()) for a, b in zip(ours, reference)) < 1.0
+
+
+def test_overhead_pass_culmination(catalog):
+    # The first pass of the day is almost straight overhead: elevation has a
+    # cusp there, so this is the hard case for the maximum refinement.
+    first = _iss_passes(catalog)[0]
+    assert first.max_elevation > 89.0
+    rise_to_top = (first.culmination - first.rise).total_seconds()
+    top_to_set = (first.set - first.culmination).total_seconds()
+    assert abs(rise_to_top - top_to_set) < 5.0
+
+
+def test_pass_in_progress_at_window_edges(catalog):
+    first = _iss_passes(catalog)[0]
+    mid = first.culmination
+    found = passes.predict_passes(catalog.subset([0]), np.array([25544]), BOULDER, mid, mid + timedelta(hours=1))
+    assert found[0].rise is None and found[0].set is not None
+
+    found = passes.predict_passes(catalog.subset([0]), np.array([25544]), BOULDER, mid - timedelta(hours=1), mid)
+    assert found[-1].set is None and found[-1].rise is not None
+
+
+def test_batch_equals_single(catalog):
+    batch = _iss_passes(catalog)
+    single = passes.predict_passes(catalog.subset([0]), np.array([25544]), BOULDER, START, END)
+    assert [p.to_dict() for p in batch] == [p.to_dict() for p in single]
+
+
+def test_rejects_bad_requests(catalog):
+    with pytest.raises(passes.PassError):
+        passes.Observer(91.0, 0.0)
+    with pytest.raises(passes.PassError):
+        passes.predict_passes(catalog, np.array([1, 2]), BOULDER, START, START + timedelta(days=10))
+
+
+def test_visible_if_sunlit_over_dark_sky_anywhere_in_the_pass(catalog):
+    # Evening passes here rise sunlit and culminate in the Earth's shadow.
+    observer = passes.Observer(-50.0, -180.0)
+    found = passes.predict_passes(catalog.subset([0]), np.array([25544]), observer, START, START + timedelta(hours=72))
+    shadowed_top = [p for p in found if p.eclipse == "umbra" and p.visible]
+    assert shadowed_top
+
+    for p in found:
+        if p.rise is None or p.set is None:
+            continue
+        t = np.arange(p.rise.timestamp(), p.set.timestamp(), 5.0)
+        state, sun_el = passes.illumination(catalog, np.zeros(len(t), dtype=np.int64), t, observer)
+        dense = bool(((state != passes.UMBRA) & (sun_el < passes.VISIBLE_SUN_ELEVATION)).any())
+        assert p.visible == dense, p.culmination
@@ -0,0 +1,170 @@
+"""Whole-catalog positions: propagation, encodings and the time-bucket cache.
+
+The DB-backed catalog snapshot is replaced with one built from the pinned
+ISS / GEO TLEs (conftest.py), so nothing here needs Postgres.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from app.services import eclipse, ephemeris, frames, positions
+from app.services.catalog import CatalogSnapshot
+from app.services.propagation import julian_dates, parse_catalog, propagate
+
+T0 = datetime(2024, 1, 15, 12, 0, 2, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def snapshot(iss_tle, geo_tle, monkeypatch):
+    catalog = parse_catalog([iss_tle, ("garbage", "garbage"), geo_tle])
+    snap = CatalogSnapshot(version=(3, "x"), norad=np.array([25544, 99999, 28884], dtype=np.int32)[catalog.index],
+                           catalog=catalog)
+    calls = []
+
+    def fake_get_catalog(where_sql="1=1", params=()):
+        calls.append(where_sql)
+        return snap
+
+    monkeypatch.setattr(positions, "get_catalog", fake_get_catalog)
+    monkeypatch.setattr(positions, "load_ephemeris", lambda: None)
+    positions._cache.clear()
+    snap.calls = calls
+    return snap
+
+
+def test_bucket_time_snaps_down():
+    when = positions.bucket_time(T0)
+    assert when == datetime(2024, 1, 15, 12, 0, 0, tzinfo=timezone.utc)
+    assert positions.bucket_time(T0.replace(tzinfo=None)) == when
+
+
+def test_geodetic_matches_per_object_transform(snapshot):
+    norad, cols = positions.compute_positions("1=1", (), T0)
+    assert norad.tolist() == [25544, 28884]
+
+    jd, fr = julian_dates(T0)
+    r = propagate(snapshot.catalog, jd, fr).position[:, 0]
+    for i in range(len(norad)):
+        lat, lon, alt = frames.teme_to_geodetic(r[i], jd[0], fr[0])
+        np.testing.assert_allclose(cols[:, i], [lat, lon, alt], atol=1e-9)
+
+
+def test_ephemeris_hit_matches_propagation_and_fills_gaps(snapshot, monkeypatch):
+    expected_norad, expected = positions.compute_positions("1=1", (), T0)
+
+    # Horizon only covers the ISS; the GEO object must fall back to SGP4.
+    start = ephemeris.grid_start(T0)
+    states = ephemeris.build_states(snapshot.catalog.subset([0]), start, ephemeris.EPHEMERIS_STEP_SECONDS, 3)
+    table = ephemeris.EphemerisTable(generated_at=T0, start=start, step_seconds=ephemeris.EPHEMERIS_STEP_SECONDS,
+                                     norad=np.array([25544], dtype=np.int32), states=states)
+    monkeypatch.setattr(positions, "load_ephemeris", lambda: table)
+
+    norad, cols = positions.compute_positions("1=1", (), T0)
+    assert norad.tolist() == expected_norad.tolist()
+    np.testing.assert_allclose(cols[:2], expected[:2], atol=1e-4)  # lat/lon deg
+    np.testing.assert_allclose(cols[2], expected[2], atol=0.02)    # alt km
+
+
+def test_binary_round_trip(snapshot):
+    when = positions.bucket_time(T0)
+    norad, cols = positions.compute_positions("1=1", (), when, frame="ecef")
+    decoded = positions.decode_binary(positions.encode_binary(when, "ecef", norad, cols))
+
+    assert decoded["t"] == when
+    assert decoded["frame"] == "ecef"
+    assert decoded["norad"].tolist() == norad.tolist()
+    np.testing.assert_allclose(decoded["columns"], cols, rtol=1e-6)
+
+
+def test_json_is_columnar_and_cached_per_bucket(snapshot):
+    body = positions.get_positions("1=1", (), T0)
+    assert set(body) == {"t", "frame", "count", "norad", "lat", "lon", "alt"}
+    assert body["count"] == len(body["norad"]) == len(body["lat"]) == 2
+
+    # Same 5 s bucket → served from cache, no second catalog lookup.
+    assert positions.get_positions("1=1", (), T0.replace(second=4)) is body
+    assert len(snapshot.calls) == 1
+    positions.get_positions("1=1", (), T0.replace(second=6))
+    assert len(snapshot.calls) == 2
+
+
+def test_filter_values_are_bound_parameters(snapshot):
+    from app.api.satellites import get_filter_condition
+
+    where_sql, params = get_filter_condition("LEO,Country:US') OR 1=1 --,Launch Year:2020,Country:100%")
+    assert where_sql == "orbit_type = 'LEO' AND EXTRACT(YEAR FROM launch_date) = ANY(%s) AND country = ANY(%s)"
+    assert params == ([2020], ["100%", "US') OR 1=1 --"])
+    assert get_filter_condition(None) == ("1=1", ())
+
+    # Array parameters still make a usable cache key.
+    body = positions.get_positions(where_sql, params, T0)
+    assert positions.get_positions(where_sql, params, T0) is body and len(snapshot.calls) == 1
+
+
+def test_catalog_snapshot_follows_revision_not_row_count(iss_tle, monkeypatch):
+    from app.services import catalog
+
+    revision = {"n": 7}
+    queries = []
+
+    class Cursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, sql, params=None):
+            queries.append(sql)
+
+        def fetchone(self):
+            return {"revision": revision["n"]}
+
+        def fetchall(self):
+            return [{"norad_number": 25544, "tle_line1": iss_tle[0], "tle_line2": iss_tle[1]}]
+
+    class Conn:
+        def cursor(self):
+            return Cursor()
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(catalog, "get_db_connection", Conn)
+    monkeypatch.setattr(catalog, "_snapshots", type(catalog._snapshots)())
+    monkeypatch.setattr(catalog, "_version", None)
+    catalog.catalog_version(force=True)
+
+    first = catalog.get_catalog()
+    assert first.version == (7,) and catalog.get_catalog() is first
+    revision["n"] = 8  # e.g. a country fix: same rows, same max epoch
+    catalog.catalog_version(force=True)
+    assert catalog.get_catalog() is not first
+    assert sum("FROM satellites" in q for q in queries) == 2
+
+
+def test_rejects_unknown_frame(snapshot):
+    with pytest.raises(ValueError):
+        positions.get_positions("1=1", (), T0, frame="teme")
+
+
+def test_eclipse_column_matches_shadow_model(snapshot):
+    when = positions.bucket_time(T0)
+    norad, cols = positions.compute_positions("1=1", (), when, eclipse=True)
+    assert cols.shape == (4, 2)
+
+    jd, fr = julian_dates(when)
+    r = propagate(snapshot.catalog, jd, fr).position[:, 0]
+    expected, _ = eclipse.shadow(r, eclipse.sun_position(jd, fr)[0])
+    assert cols[3].tolist() == expected.tolist()
+
+    body = positions.get_positions("1=1", (), when, eclipse=True)
+    assert body["eclipse"] == expected.tolist()
+    assert "eclipse" not in positions.get_positions("1=1", (), when)  # separate cache entry
+
+    decoded = positions.decode_binary(positions.get_positions("1=1", (), when, fmt="bin", eclipse=True))
+    assert decoded["eclipse"].tolist() == expected.tolist()
+    np.testing.assert_allclose(decoded["columns"], cols[:3], rtol=1e-6)
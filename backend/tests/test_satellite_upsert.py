@@ -0,0 +1,42 @@
+"""Change-only upsert SQL: the IS DISTINCT FROM guard and the per-run counts."""
+from __future__ import annotations
+
+import re
+
+from app.services import satellite_upsert
+
+COLUMNS = ["name", "tle_line1", "norad_number", "epoch", "x"]
+
+
+def _squash(sql: str) -> str:
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+def test_guard_compares_what_the_update_would_write():
+    sql = _squash(satellite_upsert.change_only_upsert_sql(
+        "satellites", "temp_satellites", COLUMNS, rules=satellite_upsert.KEEP_NAME_UNLESS_PLACEHOLDER))
+    name_rule = satellite_upsert.KEEP_NAME_UNLESS_PLACEHOLDER["name"]
+
+    assert "INSERT INTO satellites AS main (name, tle_line1, norad_number, epoch, x) " \
+           "SELECT name, tle_line1, norad_number, epoch, x FROM temp_satellites" in sql
+    assert f"SET name = {name_rule}, tle_line1 = EXCLUDED.tle_line1, epoch = EXCLUDED.epoch, x = EXCLUDED.x " in sql
+    assert "norad_number = " not in sql  # the conflict key is never rewritten
+    assert (f"WHERE (main.name, main.tle_line1, main.epoch, main.x) "
+            f"IS DISTINCT FROM ({name_rule}, EXCLUDED.tle_line1, EXCLUDED.epoch, EXCLUDED.x)") in sql
+    assert sql.endswith("SELECT COUNT(*) FILTER (WHERE inserted) AS inserted, "
+                        "COUNT(*) FILTER (WHERE NOT inserted) AS updated FROM upserted;")
+
+    plain = _squash(satellite_upsert.change_only_upsert_sql("satellites_inactive", "temp_satellites_inactive", COLUMNS))
+    assert "SET name = EXCLUDED.name," in plain and "CASE" not in plain
+
+
+def test_counts_from_returned_rows():
+    class Cursor:
+        def execute(self, sql, params=None):
+            self.sql = sql
+
+        def fetchone(self):  # RealDictCursor row
+            return {"inserted": 12, "updated": 30}
+
+    counts = satellite_upsert.change_only_upsert(Cursor(), "satellites", "temp_satellites", COLUMNS, staged=500)
+    assert (counts.inserted, counts.updated, counts.unchanged, counts.staged) == (12, 30, 458, 500)
@@ -0,0 +1,95 @@
+"""TLE pair prediction errors vs scalar sgp4, chunking and class statistics."""
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pytest
+from sgp4.api import WGS72, Satrec
+from sgp4.exporter import export_tle
+
+from app.services import tle_accuracy
+from tests.synthetic_catalog import EPOCH, _SGP4_EPOCH_ZERO
+
+
+def _history(norad, epoch_offsets_days, mean_motion_rev_day=15.5, ecc=0.0005, seed=0):
+    """Element sets of one object at the given epochs, with the kind of
+    scatter between updates that real orbit determination leaves."""
+    rng = np.random.default_rng(seed)
+    base = (EPOCH - _SGP4_EPOCH_ZERO).total_seconds() / 86400.0
+    n = mean_motion_rev_day * 2 * math.pi / 1440.0
+    rows = []
+    for dt in epoch_offsets_days:
+        satrec = Satrec()
+        satrec.sgp4init(
+            WGS72, "i", norad, base + dt, 1e-4, 0.0, 0.0, ecc, 1.0,
+            math.radians(51.6 + rng.normal(0, 1e-3)),
+            (2.0 + n * dt * 1440.0 + rng.normal(0, 1e-4)) % (2 * math.pi),
+            n * (1 + rng.normal(0, 1e-6)), math.radians(30.0),
+        )
+        rows.append(export_tle(satrec))
+    return rows
+
+
+def test_pair_errors_match_scalar_sgp4():
+    rows = [(25544, p) for p in _history(25544, [0.0, 0.4, 1.1, 45.0, 45.5])]
+    rows += [(40000, p) for p in _history(40000, [0.2, 0.9], seed=1)]
+    rows.insert(3, (25544, ("1 garbage", "2 garbage")))
+    errors = tle_accuracy.pair_errors([n for n, _ in rows], [p for _, p in rows])
+
+    # (0, 0.4), (0.4, 1.1), (45, 45.5), (40000: 0.2, 0.9). 1.1 → 45 is past the span limit.
+    assert errors.norad.tolist() == [25544, 25544, 25544, 40000]
+    assert errors.span_days == pytest.approx([0.4, 0.7, 0.5, 0.7])
+
+    valid = [(n, p) for n, p in rows if p[0] != "1 garbage"]
+    for k, (i, j) in enumerate([(0, 1), (1, 2), (3, 4), (5, 6)]):
+        old = Satrec.twoline2rv(*valid[i][1], WGS72)
+        new = Satrec.twoline2rv(*valid[j][1], WGS72)
+        _, r_old, _ = old.sgp4(new.jdsatepoch, new.jdsatepochF)
+        _, r_new, _ = new.sgp4(new.jdsatepoch, new.jdsatepochF)
+        expected = np.linalg.norm(np.subtract(r_old, r_new))
+        assert errors.error_km[k] == pytest.approx(expected, rel=1e-9)
+
+    ric = np.sqrt(errors.radial_km ** 2 + errors.in_track_km ** 2 + errors.cross_track_km ** 2)
+    np.testing.assert_allclose(ric, errors.error_km, rtol=1e-9)
+    assert set(errors.orbit_class) == {"LEO"}
+
+
+def test_chunks_never_split_an_object():
+    rows = [{"norad_number": n} for n in [1, 1, 1, 2, 3, 3, 3, 3, 3, 4, 5, 5]]
+    chunks = list(tle_accuracy.iter_norad_chunks(iter(rows), chunk_rows=3))
+    assert [[r["norad_number"] for r in c] for c in chunks] == [
+        [1, 1, 1], [2, 3, 3, 3, 3, 3], [4, 5, 5],
+    ]
+    assert list(tle_accuracy.iter_norad_chunks(iter([]), chunk_rows=3)) == []
+
+
+def test_class_accumulator_matches_exact_statistics():
+    rng = np.random.default_rng(4)
+    k = 20000
+    err = rng.lognormal(mean=0.5, sigma=1.2, size=k)
+    errors = tle_accuracy.PairErrors(
+        norad=np.sort(rng.integers(1, 500, size=k)),
+        epoch_jd=np.zeros(k),
+        span_days=rng.uniform(0.1, 3.0, size=k),
+        error_km=err,
+        radial_km=err, in_track_km=np.zeros(k), cross_track_km=np.zeros(k),
+        orbit_class=np.full(k, "LEO"),
+    )
+    acc = tle_accuracy.ClassAccumulator()
+    half = k // 2
+    for part in (slice(0, half), slice(half, k)):  # two chunks, same answer
+        acc.add(tle_accuracy.PairErrors(**{f: getattr(errors, f)[part] for f in errors.__dataclass_fields__}))
+
+    [leo] = acc.stats()
+    assert leo.pairs == k
+    assert leo.mean_error_km == pytest.approx(err.mean())
+    assert leo.rms_error_km == pytest.approx(np.sqrt((err ** 2).mean()))
+    for q, got in ((50, leo.p50_error_km), (95, leo.p95_error_km), (99, leo.p99_error_km)):
+        assert got == pytest.approx(np.percentile(err, q), rel=0.02)
+
+
+def test_orbit_classes_match_classify_orbit_type():
+    perigee = np.array([400.0, 19000.0, 35786.0, 300.0])
+    apogee = np.array([420.0, 21000.0, 35790.0, 72000.0])
+    assert tle_accuracy.orbit_classes(perigee, apogee).tolist() == ["LEO", "MEO", "GEO", "HEO"]
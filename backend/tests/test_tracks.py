@@ -0,0 +1,66 @@
+"""Server-side ground track sampling, decimation and caching."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from sgp4.api import WGS72, Satrec, jday
+
+from app.services import frames, tracks
+
+T0 = datetime(2024, 1, 15, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def iss_satrec(iss_tle):
+    return Satrec.twoline2rv(*iss_tle, WGS72)
+
+
+def test_samples_match_scalar_sgp4(iss_satrec):
+    track = tracks.sample_track(iss_satrec, 25544, "x", T0, T0 + timedelta(minutes=90), 30.0)
+    assert len(track.unix_seconds) == 181
+
+    for i in (0, 57, 180):
+        t = T0 + timedelta(seconds=30 * i)
+        jd, fr = jday(t.year, t.month, t.day, t.hour, t.minute, t.second)
+        _, r, _ = iss_satrec.sgp4(jd, fr)
+        np.testing.assert_allclose(track.eci[i], r, atol=1e-6)
+        lat, lon, alt = frames.teme_to_geodetic(np.array(r), jd, fr)
+        assert abs(track.lat[i] - lat) < 1e-9
+        assert abs(track.alt[i] - alt) < 1e-6
+
+
+def test_decimation_keeps_endpoints_and_stays_within_tolerance(iss_satrec):
+    full = tracks.sample_track(iss_satrec, 25544, "x", T0, T0 + timedelta(hours=3), 10.0)
+    thin = tracks.decimate(full, tolerance_km=5.0)
+
+    assert 10 < len(thin.unix_seconds) < len(full.unix_seconds) / 3
+    assert thin.unix_seconds[0] == full.unix_seconds[0]
+    assert thin.unix_seconds[-1] == full.unix_seconds[-1]
+
+    # Every dropped ECI sample lies within tolerance of the linear path through kept ones.
+    for axis in range(3):
+        interp = np.interp(full.unix_seconds, thin.unix_seconds, thin.eci[:, axis])
+        assert np.abs(interp - full.eci[:, axis]).max() <= 5.0 + 1e-9
+
+
+def test_rejects_oversized_window(iss_satrec):
+    with pytest.raises(tracks.TrackError):
+        tracks.sample_track(iss_satrec, 25544, "x", T0, T0 + timedelta(days=30), 1.0)
+    with pytest.raises(tracks.TrackError):
+        tracks.sample_track(iss_satrec, 25544, "x", T0, T0 - timedelta(minutes=1), 10.0)
+
+
+def test_get_track_cached_per_tle_epoch(iss_tle, monkeypatch):
+    row = {"tle_line1": iss_tle[0], "tle_line2": iss_tle[1], "epoch": "2024-01-15 10:00:00"}
+    loads = []
+    monkeypatch.setattr(tracks, "_load_tle", lambda norad: loads.append(norad) or dict(row))
+    tracks._cache.clear()
+
+    first = tracks.get_track(25544, T0, T0 + timedelta(minutes=30), 60.0)
+    assert first["count"] == 31 and len(first["eci"]["x"]) == 31
+    assert tracks.get_track(25544, T0, T0 + timedelta(minutes=30), 60.0) is first
+
+    row["epoch"] = "2024-01-15 16:00:00"  # new element set → new cache entry
+    assert tracks.get_track(25544, T0, T0 + timedelta(minutes=30), 60.0) is not first